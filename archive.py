@@ -0,0 +1,114 @@
+import json
+import sqlite3
+import threading
+
+from storage import dump_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    gid              TEXT PRIMARY KEY,
+    created_ts       REAL,
+    claim_expires_ts REAL,
+    snapshot         TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS winner_log (
+    seq   INTEGER PRIMARY KEY,
+    gid   TEXT NOT NULL DEFAULT '',
+    entry TEXT NOT NULL
+);
+"""
+
+
+def archive_due(snap: dict, now: float, grace: float) -> bool:
+    """True once the snapshot's claim window closed more than `grace` seconds ago."""
+    try:
+        exp = float((snap or {}).get("claim_expires_ts") or 0)
+    except (TypeError, ValueError):
+        return False
+    return bool(exp) and now > exp + grace
+
+
+# =========================================================
+# HISTORY ARCHIVE
+# =========================================================
+class HistoryArchive:
+    """
+    Finished giveaways nobody can claim anymore, moved out of
+    data["history"] (and their winner log rows) into their own sqlite
+    file. Nothing is read at startup: snapshots are looked up by gid on
+    demand, log rows by position (archived rows come before the ones
+    still in memory).
+
+    put() commits before the caller drops the moved entries from data, so
+    a crash in between leaves them in both places; the next put()
+    replaces the snapshot, and rows of a gid already archived are not
+    added twice.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self._io = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=" + ("FULL" if fsync else "NORMAL"))
+        self.conn.executescript(SCHEMA)
+
+    def put(self, snapshots: dict, log_rows=(), gid_key: str = "gid") -> int:
+        """Archive gid -> snapshot and winner log rows (dicts with a `gid_key`) in one transaction."""
+        with self._io:
+            c = self.conn
+            with c:
+                c.execute("BEGIN")
+                done = {gid for gid in snapshots if self._has(gid)}
+                for gid, snap in snapshots.items():
+                    c.execute(
+                        "INSERT OR REPLACE INTO history(gid, created_ts, claim_expires_ts, snapshot) VALUES(?, ?, ?, ?)",
+                        (str(gid), snap.get("created_ts"), snap.get("claim_expires_ts"), dump_json(snap)),
+                    )
+                rows = [r for r in log_rows if str((r or {}).get(gid_key) or "") not in done]
+                c.executemany(
+                    "INSERT INTO winner_log(gid, entry) VALUES(?, ?)",
+                    [(str((r or {}).get(gid_key) or ""), dump_json(r)) for r in rows],
+                )
+        return len(snapshots)
+
+    def _has(self, gid) -> bool:
+        return self.conn.execute("SELECT 1 FROM history WHERE gid=?", (str(gid),)).fetchone() is not None
+
+    def get(self, gid):
+        """Archived snapshot of gid (a fresh dict), or None."""
+        if not gid:
+            return None
+        with self._io:
+            row = self.conn.execute("SELECT snapshot FROM history WHERE gid=?", (str(gid),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, gid) -> bool:
+        with self._io:
+            return self._has(gid)
+
+    def __len__(self) -> int:
+        with self._io:
+            return self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    # ---------- winner log ----------
+    def log_count(self) -> int:
+        with self._io:
+            return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM winner_log").fetchone()[0]
+
+    def log_rows(self, start: int, stop: int) -> list:
+        """Archived log rows start..stop-1 (0 = oldest)."""
+        with self._io:
+            cur = self.conn.execute(
+                "SELECT entry FROM winner_log WHERE seq > ? AND seq <= ? ORDER BY seq", (int(start), int(stop)),
+            )
+            return [json.loads(e) for e, in cur]
+
+    def log_tail(self, n: int) -> list:
+        """The newest `n` archived log rows, oldest first."""
+        total = self.log_count()
+        return self.log_rows(max(0, total - max(0, int(n))), total)
+
+    def close(self):
+        with self._io:
+            self.conn.close()
@@ -0,0 +1,116 @@
+import csv
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+ID_COLUMNS = ("user_id", "uid", "id")
+NAME_COLUMNS = ("username", "user", "name")
+
+
+@contextmanager
+def downloaded(bot, file_id: str):
+    """Uploaded document saved to a temp file, opened for binary reading; removed afterwards."""
+    fd, path = tempfile.mkstemp(prefix="banimport-")
+    os.close(fd)
+    try:
+        bot.get_file(file_id).download(custom_path=path)
+        with open(path, "rb") as f:
+            yield f
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_chunks(f, size: int = 5000):
+    """Lists of up to `size` non-empty lines from a binary file, decoded as UTF-8."""
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+    chunk = []
+    for line in text:
+        line = line.strip()
+        if line:
+            chunk.append(line)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+# =========================================================
+# BAN LIST IMPORT
+# =========================================================
+class BanImport:
+    """
+    Streaming parse of an uploaded ban list (.txt / .csv), one chunk of
+    lines at a time. Accepted lines:
+
+      123456789
+      @name | 123456789
+      CSV rows: with a header, its user_id / uid / id and username columns;
+      without one, the first numeric field is the id and the first @field
+      the username (an /export file imports as is)
+
+    Ids repeated in the file, or already in one of the `known` lists
+    passed to keep(), are counted as duplicates. `entries` keeps the new
+    ones (uid -> username) in file order for a single batched commit.
+    """
+
+    def __init__(self, tag=None):
+        self.tag = tag or (lambda u: u)
+        self.entries = {}
+        self.lines = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self._columns = None  # (id column, username column or None) from a CSV header
+        self._first = True
+
+    def parse(self, lines):
+        """(uid, username) pairs of one chunk; invalid lines are counted."""
+        out = []
+        plain = []
+        for line in lines:
+            self.lines += 1
+            if "|" in line:
+                left, right = line.split("|", 1)
+                uid = right.strip().replace(" ", "")
+                if uid.isdigit():
+                    out.append((uid, self.tag(left.strip().lstrip("@"))))
+                else:
+                    self.invalid += 1
+            else:
+                plain.append(line)
+
+        for fields in csv.reader(plain):
+            fields = [f.strip() for f in fields]
+            if self._first:
+                self._first = False
+                header = [f.lower() for f in fields]
+                id_col = next((header.index(c) for c in ID_COLUMNS if c in header), None)
+                if id_col is not None:
+                    name_col = next((header.index(c) for c in NAME_COLUMNS if c in header), None)
+                    self._columns = (id_col, name_col)
+                    self.lines -= 1  # the header is not an entry
+                    continue
+            if self._columns is not None:
+                id_col, name_col = self._columns
+                uid = fields[id_col].replace(" ", "") if id_col < len(fields) else ""
+                uname = fields[name_col] if name_col is not None and name_col < len(fields) else ""
+            else:
+                uid = next((f.replace(" ", "") for f in fields if f.replace(" ", "").isdigit()), "")
+                uname = next((f for f in fields if f.startswith("@")), "")
+            if uid.isdigit():
+                out.append((uid, self.tag(uname.lstrip("@"))))
+            else:
+                self.invalid += 1
+        return out
+
+    def keep(self, pairs, *known):
+        """Keep the new ids of one parsed chunk (caller holds the bans region)."""
+        for uid, uname in pairs:
+            if uid in self.entries or any(uid in k for k in known):
+                self.duplicates += 1
+            else:
+                self.entries[uid] = uname
@@ -0,0 +1,121 @@
+"""
+Lucky Draw burst: every interested user clicks 🍀 Try Your Luck in the
+same one-second window. Fires --clicks concurrent clicks (distinct users,
+--threads at once) at each configured window of a running auto selection
+(bot.py) and checks that exactly one of them won, in the answers and in
+the saved state.
+
+  python bench_lucky.py
+  python bench_lucky.py --clicks 10000 --threads 128
+  LUCKY_WINDOWS=528,300,120 python bench_lucky.py
+
+The clock is frozen inside each window, so a slow run cannot drift out of
+it; latency is click start to answerCallbackQuery.
+"""
+import argparse
+import importlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_bot():
+    tmp = tempfile.mkdtemp(prefix="bench-lucky-")
+    os.environ.update({
+        "BOT_TOKEN": "123456:bench",
+        "ADMIN_ID": "1",
+        "CHANNEL_ID": "-100",
+        "DATA_FILE": os.path.join(tmp, "data.json"),
+        "CLICK_WINDOW": "0",  # every click reaches the handler
+    })
+    sys.path.insert(0, HERE)
+    logging.disable(logging.CRITICAL)
+    return importlib.import_module("bot")
+
+
+class Query:
+    __slots__ = ("data", "from_user", "message", "t0", "t1", "text")
+
+    def __init__(self, data: str, uid: int):
+        self.data = data
+        self.from_user = SimpleNamespace(id=uid, username=f"lucky_{uid}", full_name="")
+        self.message = None
+        self.t0 = self.t1 = 0.0
+        self.text = ""
+
+    def answer(self, text=None, show_alert=False, **kw):
+        self.t1 = time.perf_counter()
+        self.text = text or ""
+
+
+def burst(m, g, clicks: int, threads: int) -> list:
+    queries = [Query(f"try_luck:{g.gid}", 5_000_000_000 + i) for i in range(clicks)]
+    context = SimpleNamespace(bot=None, user_data={})
+    start = threading.Barrier(threads)
+
+    def worker(part):
+        start.wait()
+        for q in part:
+            q.t0 = time.perf_counter()
+            m.cb_handler(SimpleNamespace(callback_query=q), context)
+
+    ts = [threading.Thread(target=worker, args=(queries[i::threads],)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return queries
+
+
+def pct(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clicks", type=int, default=10000, help="clicks per window (one per user)")
+    ap.add_argument("--threads", type=int, default=64, help="clicks in flight at once")
+    args = ap.parse_args()
+
+    m = load_bot()
+    g = m.giveaways.create("P1-P2-B3", m.fresh_giveaway(-100))
+    start_ts = 1_700_000_000.0
+    g["autodraw_message_id"] = 42
+    g["autodraw_start_ts"] = start_ts
+
+    ok = True
+    print(f"== bot.py  windows={m.LUCKY_WINDOWS}  clicks={args.clicks}  threads={args.threads}")
+    for window in m.LUCKY_WINDOWS:
+        frozen = start_ts + m.AUTO_DRAW_DURATION_SECONDS - window
+        m.now_ts = lambda: frozen
+        t0 = time.perf_counter()
+        queries = burst(m, g, args.clicks, args.threads)
+        wall = time.perf_counter() - t0
+        m.side_effects.drain()
+
+        winners = [
+            str(q.from_user.id) for q in queries
+            if q.text == m.popup_lucky_win(m.user_tag(q.from_user.username), str(q.from_user.id))
+        ]
+        saved = (g.get("lucky_winners") or {}).get(str(window))
+        lat = [(q.t1 - q.t0) * 1000 for q in queries]
+        good = len(winners) == 1 and saved == winners[0] and saved in (g.get("autodraw_bonus_winners") or {})
+        ok = ok and good
+        print(
+            f"  window {m.format_hms(window)}  winners {len(winners)} (saved {saved})  "
+            f"{args.clicks / wall:8.0f} clicks/s  answer p50 {pct(lat, 0.5):7.3f} ms  "
+            f"p99 {pct(lat, 0.99):7.3f} ms  max {max(lat):7.2f} ms  {'OK' if good else 'FAIL'}"
+        )
+    m.side_effects.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
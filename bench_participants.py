@@ -0,0 +1,99 @@
+"""
+Memory and snapshot size of one giveaway's participants: the old
+uid(str) -> {"username", "name"} dict against ParticipantTable.
+
+  python bench_participants.py                     # 100k and 1M
+  python bench_participants.py --sizes 250000
+
+Memory is measured with tracemalloc (allocations made while building the
+container, strings included). Snapshot = the JSON text the journal store
+writes for it. Build / dump / load / `in` are timed on a separate,
+untraced run.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from participants import ParticipantTable
+from storage import dump_json, load_json
+
+
+def fake_rows(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    for i in range(n):
+        uid = str(5_000_000_000 + rnd.randrange(1_000_000_000) * 8 + i % 8)
+        # ~90% of users have a username
+        uname = f"@user_{i:x}" if rnd.random() < 0.9 else ""
+        yield uid, uname, f"User {i}"
+
+
+def build_dict(rows):
+    parts = {}
+    for uid, uname, name in rows:
+        parts[uid] = {"username": uname, "name": name}
+    return parts
+
+
+def build_table(rows):
+    t = ParticipantTable()
+    for uid, uname, name in rows:
+        t[uid] = {"username": uname, "name": name}
+    return t
+
+
+def measure(build, n: int) -> dict:
+    # rows are generated inside the traced region: each container is
+    # charged for the strings it keeps alive
+    gc.collect()
+    tracemalloc.start()
+    obj = build(fake_rows(n))
+    mem, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+
+    # timings without tracemalloc
+    gc.collect()
+    t0 = time.perf_counter()
+    obj = build(fake_rows(n))
+    built = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    text = dump_json(obj)
+    dumped = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    load_json(text)
+    loaded = time.perf_counter() - t0
+
+    uid = next(iter(obj))
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        uid in obj
+    lookup = (time.perf_counter() - t0) / 100_000
+    return {
+        "mem": mem, "snapshot": len(text.encode("utf-8")),
+        "build_s": built, "dump_s": dumped, "load_s": loaded, "lookup_us": lookup * 1e6,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="100000,1000000")
+    args = ap.parse_args()
+
+    for n in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        print(f"== {n} participants")
+        for name, build in (("dict", build_dict), ("ParticipantTable", build_table)):
+            r = measure(build, n)
+            print(
+                f"  {name:<17} memory {r['mem'] / 2**20:7.1f} MiB ({r['mem'] / n:5.0f} B/row)"
+                f"  snapshot {r['snapshot'] / 2**20:6.1f} MiB ({r['snapshot'] / n:3.0f} B/row)"
+                f"  build {r['build_s']:.2f} s  dump {r['dump_s']:.2f} s  load {r['load_s']:.2f} s"
+                f"  `in` {r['lookup_us']:.2f} us"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Render time of the channel post builders, per call: the live giveaway
+post (every countdown tick / join burst), the closed post, the selection
+post (every autodraw tick) and the winners post.
+
+  python bench_templates.py                          # both bots
+  python bench_templates.py --bots bot --rules 12 --winners 50
+
+Each builder is called --calls times with the giveaway unchanged, the
+way ticks call it (best of --repeat runs); "edited" changes the title
+before every call, so the static part of the post is rebuilt each time.
+"""
+import argparse
+import importlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_bot(modname: str):
+    tmp = tempfile.mkdtemp(prefix="bench-templates-")
+    os.environ.update({
+        "BOT_TOKEN": "123456:bench",
+        "ADMIN_ID": "1",
+        "CHANNEL_ID": "-100",
+        "DATA_FILE": os.path.join(tmp, "data.json"),
+    })
+    sys.path.insert(0, HERE)
+    logging.disable(logging.CRITICAL)
+    return importlib.import_module(modname)
+
+
+def sample_giveaway(m, rules: int):
+    from giveaways import Giveaway
+
+    g = Giveaway("P123-P456-B7890", m.fresh_giveaway(-100))
+    g["title"] = "POWER POINT BREAK MEGA GIVEAWAY"
+    g["prize"] = "10x 100 USDT + 1x Premium Account"
+    g["winner_count"] = 10
+    g["duration_seconds"] = 3600
+    g["rules"] = "\n".join(f"Rule number {i}: stay subscribed to the channel" for i in range(1, rules + 1))
+    for i in range(1000):
+        g["participants"][str(5_000_000_000 + i)] = {"username": f"@user_{i}", "name": ""}
+    return g
+
+
+def renderers(m, modname: str, g, winners: int):
+    wmap = {str(7_000_000_000 + i): {"username": f"@winner_{i}"} for i in range(winners)}
+    delivered = {uid: True for uid in list(wmap)[::2]}
+    first_uid, others = next(iter(wmap)), [(u, w["username"]) for u, w in list(wmap.items())[1:]]
+    entry = m.format_entry("5000000001", "@user_1")
+
+    out = [
+        ("live post", lambda i: m.build_live_text(g, 3600 - i % 3600)),
+        ("closed post", lambda i: m.build_closed_simple_text(g)),
+    ]
+    if modname == "bot":
+        out += [
+            ("selection post", lambda i: m.build_live_autodraw_text(
+                g["title"], g["prize"], i % 10, 10, i % 100, 600 - i % 600, "🔄",
+                entry, "🟡", entry, "🟠", entry, "🟣")),
+            ("winners post", lambda i: m.build_winners_post_text(g.gid, g["title"], g["prize"], wmap, delivered)),
+        ]
+    else:
+        out += [
+            ("selection post", lambda i: m.build_autodraw_text(
+                i % 100, 300 - i % 300, "🔄", entry, "🟡", entry, "🟠", entry, "🟣")),
+            ("winners post", lambda i: m.build_winners_post_text(
+                g.gid, g["prize"], first_uid, "@winner_0", others, delivered)),
+        ]
+    return out
+
+
+def timed(fn, calls: int, repeat: int = 5) -> float:
+    # best of `repeat` runs, in microseconds per call
+    fn(0)
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        t = (time.perf_counter() - t0) / calls
+        best = t if best is None else min(best, t)
+    return best * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bots", default="main,bot")
+    ap.add_argument("--calls", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=5, help="runs per builder (best one is shown)")
+    ap.add_argument("--rules", type=int, default=6, help="lines of custom rules")
+    ap.add_argument("--winners", type=int, default=10)
+    args = ap.parse_args()
+
+    for modname in [b.strip() for b in args.bots.split(",") if b.strip()]:
+        m = load_bot(modname)
+        g = sample_giveaway(m, args.rules)
+        print(f"== {modname}.py  rules={args.rules} lines  winners={args.winners}")
+        for name, fn in renderers(m, modname, g, args.winners):
+            steady = timed(fn, args.calls, args.repeat)
+            title = g["title"]
+
+            def edited(i, fn=fn):
+                g["title"] = f"{title} #{i}"
+                return fn(i)
+
+            changed = timed(edited, max(1, args.calls // 10), args.repeat)
+            g["title"] = title
+            print(f"  {name:<15} {steady:7.2f} us/call   edited {changed:7.2f} us/call")
+        print()
+
+
+if __name__ == "__main__":
+    main()
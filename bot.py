@@ -1,11 +1,14 @@
+import itertools
 import os
-import json
 import random
-import threading
+from collections import deque
 from datetime import datetime
+from functools import partial
+from types import SimpleNamespace
 
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.utils.request import Request
 from telegram.ext import (
     Updater,
     CommandHandler,
@@ -15,6 +18,32 @@ from telegram.ext import (
     CallbackContext,
 )
 
+from archive import HistoryArchive, archive_due
+from banimport import BanImport, downloaded, read_chunks
+from clicks import ClickLimiter
+from cluster import SharedState, WorkerPool
+from eligibility import EligibleIndex
+from export import FORMATS as EXPORT_FORMATS, Exporter, chunked
+from gateway import COSMETIC, ApiGateway, GatewayRequest, api_priority
+from giveaways import GiveawayManager
+from live_post import LivePost
+from locks import SnapshotMap, StateLocks
+from membership import MembershipCache
+from metrics import (
+    SAVE_SECONDS,
+    instrument_dispatcher,
+    observe_store,
+    start_http_server,
+    timed_job,
+)
+from participants import ParticipantTable
+from pipeline import SideEffects
+from router import CallbackRouter
+from storage import open_store
+from templates import PostTemplate
+from ticker import TickClock
+from webhook import WebhookServer, run_webhook
+
 # =========================================================
 # LOAD ENV
 # =========================================================
@@ -31,10 +60,120 @@ CHANNEL_LINK = os.getenv("CHANNEL_LINK", "https://t.me/PowerPointBreak")
 ADMIN_CONTACT = os.getenv("ADMIN_CONTACT", "@MinexxProo")
 DATA_FILE = os.getenv("DATA_FILE", "giveaway_data.json")
 
+# "json" = DATA_FILE snapshot + journal, "sqlite" = indexed tables in DATA_DB
+# (an existing DATA_FILE is migrated into DATA_DB on first start)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "json").strip().lower()
+DATA_DB = os.getenv("DATA_DB", os.path.splitext(DATA_FILE)[0] + ".db")
+
+# finished giveaways nobody can claim anymore move out of memory into
+# HISTORY_ARCHIVE_DB (checked at startup and every HISTORY_ARCHIVE_INTERVAL seconds)
+HISTORY_ARCHIVE_DB = os.getenv("HISTORY_ARCHIVE_DB", os.path.splitext(DATA_FILE)[0] + ".archive.db")
+HISTORY_ARCHIVE_INTERVAL = float(os.getenv("HISTORY_ARCHIVE_INTERVAL", "3600"))
+
+# journal is folded into a fresh DATA_FILE snapshot every N records
+JOURNAL_COMPACT_EVERY = int(os.getenv("JOURNAL_COMPACT_EVERY", "5000"))
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "0") == "1"
+
+# write-behind: joins only mark state dirty, a flusher writes the batch
+# after SAVE_FLUSH_INTERVAL seconds (the durability window) or after
+# SAVE_FLUSH_MAX_PENDING changes. 0 = write through on every change.
+SAVE_FLUSH_INTERVAL = float(os.getenv("SAVE_FLUSH_INTERVAL", "1.0"))
+SAVE_FLUSH_MAX_PENDING = int(os.getenv("SAVE_FLUSH_MAX_PENDING", "500"))
+
+# live channel post: joins and ticks only mark it dirty, at most one
+# edit per LIVE_EDIT_MIN_INTERVAL seconds goes out (latest count wins)
+LIVE_EDIT_MIN_INTERVAL = float(os.getenv("LIVE_EDIT_MIN_INTERVAL", "3"))
+
+# verify targets: get_chat_member answers are cached per (target, user);
+# "not joined" expires quickly so users who join the target get in soon
+VERIFY_CACHE_TTL = float(os.getenv("VERIFY_CACHE_TTL", "300"))
+VERIFY_CACHE_NEGATIVE_TTL = float(os.getenv("VERIFY_CACHE_NEGATIVE_TTL", "15"))
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "100000"))
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", "8"))
+
+# user buttons (join / claim / lucky draw): a user's clicks on one button
+# beyond CLICK_LIMIT per CLICK_WINDOW seconds are answered with the last
+# popup again, without reaching the handler. 0 = off.
+CLICK_WINDOW = float(os.getenv("CLICK_WINDOW", "2"))
+CLICK_LIMIT = int(os.getenv("CLICK_LIMIT", "1"))
+CLICK_CACHE_SIZE = int(os.getenv("CLICK_CACHE_SIZE", "100000"))
+
+# multi-process joins: join clicks are handed to CLUSTER_WORKERS forked
+# worker processes (by user id, CLUSTER_THREADS handlers each) that decide
+# them against CLUSTER_DB (sqlite WAL: runs, bans, verify targets, joins);
+# this process pulls their joins every CLUSTER_SYNC_INTERVAL seconds.
+# Everything else stays here. 0 = off; on a single CPU workers are slower
+# than 0 (IPC + a sqlite write per join, see cluster.WorkerPool).
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", "0"))
+CLUSTER_THREADS = int(os.getenv("CLUSTER_THREADS", "4"))
+CLUSTER_QUEUE_SIZE = int(os.getenv("CLUSTER_QUEUE_SIZE", "1000"))
+CLUSTER_SYNC_INTERVAL = float(os.getenv("CLUSTER_SYNC_INTERVAL", "0.5"))
+CLUSTER_DB = os.getenv("CLUSTER_DB", os.path.splitext(DATA_FILE)[0] + ".cluster.db")
+
+# Lucky Draw windows: remaining times (seconds) of the auto selection at
+# which 🍀 Try Your Luck is open for one second, one winner each
+# (e.g. LUCKY_WINDOWS="528,300,120"). Default 08:48 only.
+LUCKY_WINDOWS = sorted({int(w) for w in os.getenv("LUCKY_WINDOWS", "528").split(",") if w.strip()}, reverse=True)
+
+# update ingestion: "polling" (default) or "webhook" (local HTTP listener,
+# WEBHOOK_URL is registered with Telegram when set). A WEBHOOK_LISTEN
+# other than loopback (behind a reverse proxy) requires WEBHOOK_SECRET.
+UPDATE_MODE = os.getenv("UPDATE_MODE", "polling").strip().lower()
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").strip()
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "").strip()
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
+# Prometheus text endpoint (handler / job / Bot API / save_data / lock
+# timings) on METRICS_LISTEN:METRICS_PORT/metrics. 0 = off.
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# outbound Bot API gateway: sends / edits / deletes / pins are queued by
+# priority (posts > edits > progress edits) under a global and a per-chat
+# token bucket; callback answers and reads are never queued
+API_GLOBAL_RATE = float(os.getenv("API_GLOBAL_RATE", "30"))            # per second
+API_CHAT_RATE = float(os.getenv("API_CHAT_RATE", "1"))                 # per second, private chats
+API_GROUP_PER_MINUTE = float(os.getenv("API_GROUP_PER_MINUTE", "20"))  # groups / channels
+API_CHAT_BURST = float(os.getenv("API_CHAT_BURST", "3"))
+API_SENDERS = int(os.getenv("API_SENDERS", "4"))
+API_COSMETIC_MAX_AGE = float(os.getenv("API_COSMETIC_MAX_AGE", "30"))
+
+# /export: collections are read EXPORT_CHUNK_ROWS rows per lock hold;
+# files expected to reach EXPORT_GZIP_ROWS rows are sent gzip-compressed
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_GZIP_ROWS = int(os.getenv("EXPORT_GZIP_ROWS", "50000"))
+
 # =========================================================
 # THREAD SAFE STORAGE
 # =========================================================
-lock = threading.RLock()
+# state is split into regions with their own locks (run, participants,
+# bans, history; see locks.py for the lock order). `lock` takes all of
+# them and is kept for bulk changes; hot paths take only their region.
+locks = StateLocks()
+lock = locks
+store = open_store(
+    DATA_BACKEND, DATA_FILE, DATA_DB, lock,
+    compact_every=JOURNAL_COMPACT_EVERY, fsync=JOURNAL_FSYNC,
+    flush_interval=SAVE_FLUSH_INTERVAL, flush_max_pending=SAVE_FLUSH_MAX_PENDING,
+    observer=observe_store,
+)
+# expired history snapshots + their winner_log rows, read on demand
+archive = HistoryArchive(HISTORY_ARCHIVE_DB, fsync=JOURNAL_FSYNC)
+membership = MembershipCache(
+    positive_ttl=VERIFY_CACHE_TTL, negative_ttl=VERIFY_CACHE_NEGATIVE_TTL,
+    max_size=VERIFY_CACHE_SIZE, workers=VERIFY_WORKERS,
+)
+# repeat clicks on user buttons, answered from the last popup
+clicks = ClickLimiter(window=CLICK_WINDOW, limit=CLICK_LIMIT, max_size=CLICK_CACHE_SIZE)
+# saves and live post edits queued by callbacks after they have answered
+side_effects = SideEffects()
+# /export files are written and uploaded on their own background thread
+exporter = Exporter(gzip_rows=EXPORT_GZIP_ROWS)
 
 # =========================================================
 # CONSTANTS (ENGLISH ONLY)
@@ -45,11 +184,14 @@ LINE2 = "━━━━━━━━━━━━━━━━━━━━━━"
 SPINNER = ["🔄", "🔃", "🔁", "🔂", "🌀"]
 
 SHOW_COLORS = ["🟡", "🟠", "⚫", "🟣", "🟢", "🔵", "🔴", "🟤"]
+SHOWCASE_DECK_SIZE = 64  # showcase names drawn per deck refill
+PARTICIPANTS_PAGE_SIZE = 50  # /participants rows per page (messages are capped at 4096 chars)
 
-AUTO_DRAW_DURATION_SECONDS = 10 * 60  # 10 minutes
+BAN_IMPORT_MAX_BYTES = 20 * 2**20  # bots can download files up to 20 MB
+BAN_IMPORT_CHUNK_LINES = 5000
+BAN_IMPORT_PROGRESS_INTERVAL = 2  # seconds between progress edits
 
-# Lucky Draw is ACTIVE ONLY at remaining == 08:48 (one-second window)
-LUCKY_TRIGGER_REMAINING = 8 * 60 + 48  # 08:48 remaining (1 second window)
+AUTO_DRAW_DURATION_SECONDS = 10 * 60  # 10 minutes
 
 # Showcase change timers (requested)
 SHOW_LINE1_SEC = 5
@@ -72,13 +214,20 @@ POST_COMPLETE_AFTER_SECONDS = 24 * 3600  # after expiry, show "Giveaway Complete
 # =========================================================
 data = {}
 admin_state = None
+admin_draft_gid = None  # giveaway being set up by /newgiveaway
+
+# gid -> Giveaway (per-giveaway state lives in data["giveaways"][gid];
+# countdown / live post / selection / draw jobs live on the object)
+giveaways = GiveawayManager(locks.run)
 
-countdown_job = None
-closed_wait_job = None
-draw_job = None
-draw_finalize_job = None
+# history snapshots as seen by claim buttons (copy-on-write, read without locks)
+claims = SnapshotMap()
 
-auto_sel_job = None  # auto selection tick job
+# cluster mode (start_cluster): state shared with the workers, the pool,
+# and the last participant row pulled from `shared`
+shared = None
+cluster = None
+cluster_seq = 0
 
 
 # =========================================================
@@ -86,45 +235,18 @@ auto_sel_job = None  # auto selection tick job
 # =========================================================
 def fresh_default_data():
     return {
-        # giveaway status
-        "active": False,
-        "closed": False,
-
-        "title": "",
-        "prize": "",
-        "winner_count": 0,
-        "duration_seconds": 0,
-        "rules": "",
-
-        "start_time": None,
-
-        "live_message_id": None,
-        "closed_message_id": None,
-
-        # participants: uid(str) -> {"username":"@x","name":""}
-        "participants": {},
-
         # verify targets: [{"ref":"-100.." or "@x","display":"..."}]
         "verify_targets": [],
 
         # bans
         "permanent_block": {},  # uid -> {"username":"@x"}
-        "old_winner_mode": "skip",  # "block" or "skip"
-        "old_winners": {},  # uid -> {"username":"@x"} (only if mode=block)
-
-        # first join champion
-        "first_winner_id": None,
-        "first_winner_username": "",
-        "first_winner_name": "",
+        "old_winners": {},  # uid -> {"username":"@x"} (giveaways with mode=block)
 
         # autodraw toggle
         "autodraw_enabled": False,
 
-        # auto selection post state
-        "autodraw_message_id": None,
-        "autodraw_start_ts": None,
-        "autodraw_bonus_winners": {},  # Lucky winner: uid -> {"username":"@x"}
-        "lucky_draw_winner_uid": None,
+        # running giveaways: gid -> fresh_giveaway() state
+        "giveaways": {},
 
         # history: gid -> snapshot
         # snapshot:
@@ -137,6 +259,7 @@ def fresh_default_data():
         #   "created_ts": float,
         #   "claim_expires_ts": float,
         #   "winners_message_id": int,
+        #   "chat_id": channel of the winners post,
         # }
         "history": {},
         "latest_gid": None,
@@ -147,11 +270,72 @@ def fresh_default_data():
     }
 
 
+def fresh_giveaway(chat_id) -> dict:
+    return {
+        # channel the giveaway is posted in
+        "chat_id": chat_id,
+
+        # giveaway status
+        "active": False,
+        "closed": False,
+
+        "title": "",
+        "prize": "",
+        "winner_count": 0,
+        "duration_seconds": 0,
+        "rules": "",
+
+        "start_time": None,
+
+        "live_message_id": None,
+        "closed_message_id": None,
+
+        # participants: uid(str) -> {"username":"@x","name":""} (ParticipantTable)
+        "participants": ParticipantTable(),
+
+        # old winners (data["old_winners"]) may not join when "block"
+        "old_winner_mode": "skip",  # "block" or "skip"
+
+        # first join champion
+        "first_winner_id": None,
+        "first_winner_username": "",
+        "first_winner_name": "",
+
+        # auto selection post state
+        "autodraw_message_id": None,
+        "autodraw_start_ts": None,
+        "autodraw_bonus_winners": {},  # Lucky winner: uid -> {"username":"@x"}
+        "lucky_winners": {},  # Lucky Draw window (remaining seconds) -> uid
+        # running draws, checkpointed so a restart resumes them
+        "autodraw_state": None,  # selection post: schedule, pool (saved once)
+        "autodraw_cursor": None,  # selection post: showcase, picked count (every tick)
+        "draw_state": None,      # manual draw: admin progress message, start time
+    }
+
+
+# keys of the old single-giveaway layout (moved into data["giveaways"])
+LEGACY_GIVEAWAY_KEYS = tuple(k for k in fresh_giveaway(None) if k != "chat_id") + ("_pending_snapshot",)
+
+
+def migrate_single_giveaway(d: dict) -> bool:
+    """
+    Older data files kept one giveaway in top-level keys. Move it into
+    data["giveaways"] (under a new giveaway id) so it keeps running.
+    """
+    legacy = {k: d.pop(k) for k in LEGACY_GIVEAWAY_KEYS if k in d}
+    if not any(legacy.values()):
+        return False  # nothing but empty leftovers: no rewrite needed
+    if legacy.get("active") or legacy.get("closed") or legacy.get("participants"):
+        g = fresh_giveaway(CHANNEL_ID)
+        g.update(legacy)
+        d.setdefault("giveaways", {})[make_gid()] = g
+    return True
+
+
 def load_data():
     base = fresh_default_data()
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f)
+        d = store.load()  # snapshot + journal replay (or sqlite tables)
     except Exception:
         d = {}
 
@@ -159,24 +343,117 @@ def load_data():
         d.setdefault(k, v)
 
     # deep defaults
-    d.setdefault("participants", {})
     d.setdefault("verify_targets", [])
     d.setdefault("permanent_block", {})
     d.setdefault("old_winners", {})
-    d.setdefault("autodraw_bonus_winners", {})
     d.setdefault("history", {})
     d.setdefault("winner_log", [])
+    d.setdefault("giveaways", {})
+
+    if migrate_single_giveaway(d):
+        store.snapshot(d)
+
+    for gid, g in d["giveaways"].items():
+        for k, v in fresh_giveaway(CHANNEL_ID).items():
+            g.setdefault(k, v)
+        if not isinstance(g.get("participants"), ParticipantTable):
+            parts = g.get("participants")
+            g["participants"] = ParticipantTable(parts if isinstance(parts, dict) else None)
 
     return d
 
 
-def save_data():
-    with lock:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+def save_data(*paths):
+    """
+    save_data("active", ("participants", uid))  -> append only those values to the journal
+    save_data()                                 -> rewrite the full snapshot (bulk changes)
+    """
+    with SAVE_SECONDS.time():
+        if paths:
+            # caller holds the region lock of these paths
+            store.record(data, *paths)
+            if shared is not None:
+                shared.record(data, *paths)
+        else:
+            with lock:
+                store.snapshot(data)
+                if shared is not None:
+                    shared.snapshot(data)
 
 
-data = load_data()
+def save_region(region, *paths):
+    # deferred save_data(*paths): the callback answered and released
+    # `region` before this runs
+    with region:
+        save_data(*paths)
+
+
+def flush_data():
+    # critical transitions (close, winners, reset) must hit disk now
+    try:
+        store.flush()
+    except Exception:
+        pass
+
+
+def publish_claims(*gids):
+    # claim lookups read `claims` without any lock: republish after every
+    # change to data["history"] (caller holds the history region)
+    hist = data.get("history", {}) or {}
+    if not gids:
+        claims.replace(hist)
+    for gid in gids:
+        claims.set(gid, hist.get(gid))
+
+
+def find_history(gid: str):
+    # snapshot of gid, moved back from the archive when it was archived
+    # (caller holds the history region)
+    hist = data.setdefault("history", {})
+    snap = hist.get(gid)
+    if snap is None and gid:
+        snap = archive.get(gid)
+        if snap is not None:
+            hist[gid] = snap
+            save_data(("history", gid))
+            publish_claims(gid)
+    return snap
+
+
+def archive_history(now=None) -> int:
+    """
+    Move snapshots whose claim window closed more than
+    POST_COMPLETE_AFTER_SECONDS ago (claim buttons answer "completed"
+    without them) and their winner_log rows to the archive.
+    """
+    now = now_ts() if now is None else now
+    with locks.history:
+        hist = data.get("history", {}) or {}
+        old = {gid: snap for gid, snap in hist.items() if archive_due(snap, now, POST_COMPLETE_AFTER_SECONDS)}
+        if not old:
+            return 0
+        logs = data.get("winner_log", []) or []
+        keep = [row for row in logs if row.get("gid") not in old]
+
+        # on disk before it leaves the data file
+        archive.put(old, [row for row in logs if row.get("gid") in old])
+        for gid in old:
+            hist.pop(gid, None)
+        save_data(*[("history", gid) for gid in old])
+        if len(keep) != len(logs):
+            data["winner_log"] = keep
+            save_data("winner_log")
+        publish_claims()  # one swap instead of one copy per archived gid
+    return len(old)
+
+
+@timed_job("history_archive")
+def history_archive_job(context: CallbackContext):
+    try:
+        archive_history()
+    except Exception:
+        pass
+
 
 # =========================================================
 # HELPERS
@@ -211,8 +488,57 @@ def is_valid_username(uname: str) -> bool:
     return bool(u) and u.startswith("@") and len(u) >= 3
 
 
-def participants_count() -> int:
-    return len(data.get("participants", {}) or {})
+def eligible_index(g) -> EligibleIndex:
+    # draw pool of g: built from its participants dict once, then kept up
+    # to date by joins and bans (caller holds the participants region)
+    parts = g.get("participants")
+    idx = g.eligible
+    if idx is None or idx.source is not parts:
+        with locks.bans:
+            perma = data.get("permanent_block", {}) or {}
+            idx = g.eligible = EligibleIndex(parts, (
+                uid for uid, uname, _ in parts.rows()
+                if uid not in perma and is_valid_username(uname)
+            ))
+    return idx
+
+
+def index_join(g, uid: str, uname: str):
+    # caller holds the participants region; a ban that raced the join is seen here
+    if not is_valid_username(uname):
+        return
+    idx = eligible_index(g)
+    with locks.bans:
+        if uid not in (data.get("permanent_block", {}) or {}):
+            idx.add(uid)
+
+
+def index_ban(*uids):
+    # caller holds all regions (`with lock`)
+    for g in giveaways.all():
+        if g.eligible is not None:
+            for uid in uids:
+                g.eligible.discard(uid)
+
+
+def index_unban(uid: str):
+    # lifted ban of one user (caller holds all regions); stale indexes are
+    # rebuilt by eligible_index() anyway
+    for g in giveaways.all():
+        parts = g.get("participants")
+        if g.eligible is not None and g.eligible.source is parts and is_valid_username(parts.username(uid)):
+            g.eligible.add(uid)
+
+
+def index_rebuild():
+    # after a load or a reset of the ban list (caller holds all regions)
+    for g in giveaways.all():
+        g.eligible = None
+        eligible_index(g)
+
+
+def participants_count(g) -> int:
+    return len(g.get("participants", {}) or {})
 
 
 def format_hms(seconds: int) -> str:
@@ -271,24 +597,17 @@ def normalize_verify_ref(text: str) -> str:
     return ""
 
 
-def verify_user_join(bot, user_id: int) -> bool:
-    targets = data.get("verify_targets", []) or []
+def verify_user_join(bot, user_id: int, targets=None) -> bool:
+    # cluster workers pass the targets from `shared`
+    if targets is None:
+        targets = data.get("verify_targets", []) or []
     if not targets:
         return True
 
-    for t in targets:
-        ref = (t or {}).get("ref", "")
-        if not ref:
-            return False
-        try:
-            member = bot.get_chat_member(chat_id=ref, user_id=user_id)
-            status = getattr(member, "status", None)
-            if status not in ("member", "administrator", "creator"):
-                return False
-        except Exception:
-            return False
-
-    return True
+    refs = [(t or {}).get("ref", "") for t in targets]
+    if not all(refs):
+        return False
+    return membership.check(bot, refs, user_id)
 
 
 def parse_user_lines(text: str):
@@ -321,6 +640,14 @@ def make_gid() -> str:
     return f"P{a}-P{b}-B{c}"
 
 
+def channel_ref(text: str):
+    # "/newgiveaway -100123" or "@channel" -> chat id for send_message
+    ref = normalize_verify_ref(text)
+    if ref.startswith("-"):
+        return int(ref)
+    return ref
+
+
 def format_entry(uid: str, uname: str) -> str:
     if uname and is_valid_username(uname):
         return f"{uname} | 🆔 {uid}"
@@ -381,12 +708,19 @@ def should_pick_now(elapsed_sec: int, schedule: list, already_picked: int) -> bo
     return elapsed_sec >= schedule[already_picked]
 
 
+data = load_data()
+giveaways.bind(data)
+publish_claims()
+with lock:
+    index_rebuild()
+
+
 # =========================================================
 # UI MARKUPS
 # =========================================================
-def join_button_markup():
+def join_button_markup(gid: str):
     return InlineKeyboardMarkup(
-        [[InlineKeyboardButton("🎁✨ JOIN GIVEAWAY NOW ✨🎁", callback_data="join_giveaway")]]
+        [[InlineKeyboardButton("🎁✨ JOIN GIVEAWAY NOW ✨🎁", callback_data=f"join:{gid}")]]
     )
 
 
@@ -396,23 +730,23 @@ def claim_button_markup(gid: str):
     )
 
 
-def preview_markup():
+def preview_markup(gid: str):
     return InlineKeyboardMarkup(
         [
             [
-                InlineKeyboardButton("✔️ Approve & Post", callback_data="preview_approve"),
-                InlineKeyboardButton("❌ Reject Giveaway", callback_data="preview_reject"),
+                InlineKeyboardButton("✔️ Approve & Post", callback_data=f"preview_approve:{gid}"),
+                InlineKeyboardButton("❌ Reject Giveaway", callback_data=f"preview_reject:{gid}"),
             ],
-            [InlineKeyboardButton("✏️ Edit Again", callback_data="preview_edit")],
+            [InlineKeyboardButton("✏️ Edit Again", callback_data=f"preview_edit:{gid}")],
         ]
     )
 
 
-def winners_approve_markup():
+def winners_approve_markup(gid: str):
     return InlineKeyboardMarkup(
         [[
-            InlineKeyboardButton("✅ Approve & Post", callback_data="winners_approve"),
-            InlineKeyboardButton("❌ Reject", callback_data="winners_reject"),
+            InlineKeyboardButton("✅ Approve & Post", callback_data=f"winners_approve:{gid}"),
+            InlineKeyboardButton("❌ Reject", callback_data=f"winners_reject:{gid}"),
         ]]
     )
 
@@ -426,10 +760,39 @@ def autodraw_toggle_markup():
     )
 
 
-def selection_buttons_markup():
+def participants_page_markup(gid: str, page: int, pages: int):
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("⏮", callback_data=f"parts_page:{gid}:0"))
+        nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"parts_page:{gid}:{page - 1}"))
+    nav.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=f"parts_jump:{gid}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"parts_page:{gid}:{page + 1}"))
+        nav.append(InlineKeyboardButton("⏭", callback_data=f"parts_page:{gid}:{pages - 1}"))
+    return InlineKeyboardMarkup(
+        [
+            nav,
+            [
+                InlineKeyboardButton("🔢 Jump to Page", callback_data=f"parts_jump:{gid}"),
+                InlineKeyboardButton("🔎 Search", callback_data=f"parts_search:{gid}"),
+            ],
+        ]
+    )
+
+
+def participants_search_markup(gid: str):
+    return InlineKeyboardMarkup(
+        [[
+            InlineKeyboardButton("⬅️ Back to List", callback_data=f"parts_page:{gid}:0"),
+            InlineKeyboardButton("🔎 New Search", callback_data=f"parts_search:{gid}"),
+        ]]
+    )
+
+
+def selection_buttons_markup(gid: str):
     return InlineKeyboardMarkup(
         [[
-            InlineKeyboardButton("🍀 Try Your Luck", callback_data="try_luck"),
+            InlineKeyboardButton("🍀 Try Your Luck", callback_data=f"try_luck:{gid}"),
             InlineKeyboardButton("📌 Entry Rule", callback_data="entry_rule"),
         ]]
     )
@@ -468,6 +831,14 @@ def popup_first_join(username: str, uid: str) -> str:
     )
 
 
+def popup_busy() -> str:
+    return (
+        "⏳ TOO MANY REQUESTS\n"
+        "We're handling a lot of joins right now.\n"
+        "Please tap JOIN GIVEAWAY again in a few seconds."
+    )
+
+
 def popup_already_joined() -> str:
     return (
         "🚫 ENTRY UNSUCCESSFUL\n"
@@ -548,7 +919,7 @@ def popup_entry_rule() -> str:
     return (
         "📌 ENTRY RULE\n\n"
         "⏰ Lucky Draw Time:\n"
-        f"Available only at {format_hms(LUCKY_TRIGGER_REMAINING)} remaining\n\n"
+        f"Available only at {', '.join(format_hms(w) for w in LUCKY_WINDOWS)} remaining\n\n"
         "• Tap 🍀 Try Your Luck at the exact moment\n"
         "• First click wins instantly (Lucky Draw)\n"
         "• Must have a valid @username\n"
@@ -580,6 +951,19 @@ def popup_lucky_closed(winner_uname: str, winner_uid: str) -> str:
     )
 
 
+def popup_lucky_not_available() -> str:
+    return "⏳ Not available right now."
+
+
+def popup_lucky_window_closed() -> str:
+    return (
+        "⏰ LUCKY DRAW CLOSED\n\n"
+        "The Lucky Draw window has just ended.\n"
+        "This slot is no longer available.\n\n"
+        "Please wait for the final winners announcement."
+    )
+
+
 def popup_no_username_required() -> str:
     return (
         "🚫 ENTRY DENIED\n"
@@ -591,8 +975,8 @@ def popup_no_username_required() -> str:
 # =========================================================
 # TEXT BUILDERS (CHANNEL POSTS)
 # =========================================================
-def format_rules() -> str:
-    rules = (data.get("rules") or "").strip()
+def format_rules(g) -> str:
+    rules = (g.get("rules") or "").strip()
     if not rules:
         rules = (
             "Must join the official channel\n"
@@ -604,17 +988,17 @@ def format_rules() -> str:
     return "\n".join(f"• {l}" for l in lines)
 
 
-def build_preview_text() -> str:
-    remaining = int(data.get("duration_seconds", 0) or 0)
+def build_preview_text(g) -> str:
+    remaining = int(g.get("duration_seconds", 0) or 0)
     return (
         f"{LINE}\n"
         "🔍 GIVEAWAY PREVIEW (ADMIN)\n"
         f"{LINE}\n\n"
-        f"⚡ {data.get('title','')} ⚡\n\n"
+        f"⚡ {g.get('title','')} ⚡\n\n"
         "🎁 Prize Pool 🌟\n"
-        f"{data.get('prize','')}\n\n"
+        f"{g.get('prize','')}\n\n"
         f"👥 Total Participants: 0  \n"
-        f"🏆 Total Winners: {data.get('winner_count',0)}  \n\n"
+        f"🏆 Total Winners: {g.get('winner_count',0)}  \n\n"
         "🎯 Winner Selection\n"
         "• 100% Random & Fair  \n"
         "• Auto System  \n\n"
@@ -622,57 +1006,123 @@ def build_preview_text() -> str:
         "📊 Live Progress\n"
         f"{build_progress(0)}  \n\n"
         "📜 Official Rules  \n"
-        f"{format_rules()}  \n\n"
+        f"{format_rules(g)}  \n\n"
         f"📢 Hosted by: {HOST_NAME}  \n\n"
         f"{LINE}\n"
         "👇 Tap below to join the giveaway 👇"
     )
 
 
-def build_live_text(remaining: int) -> str:
-    duration = int(data.get("duration_seconds", 1) or 1)
+# static fields are filled in once per title / prize / rules / winner
+# count; ticks and joins only format the slots (PostTemplate)
+LIVE_POST = PostTemplate("live_post", (
+    f"{LINE}\n"
+    "⚡ {title} ⚡\n"
+    f"{LINE}\n\n"
+    "🎁 PRIZE POOL 🌟\n"
+    "{prize}\n\n"
+    "👥 Total Participants: {count}  \n"
+    "🏆 Total Winners: {winners}  \n\n"
+    "🎯 Winner Selection\n"
+    "• 100% Random & Fair  \n"
+    "• Auto System  \n\n"
+    "⏱️ Time Remaining: {remaining}  \n"
+    "📊 Live Progress\n"
+    "{progress}  \n\n"
+    "📜 Official Rules  \n"
+    "{rules}  \n\n"
+    "📢 Hosted by: {host}  \n\n"
+    f"{LINE}\n"
+    "👇 Tap below to join the giveaway 👇"
+), static=("title", "prize", "winners", "rules", "host"))
+
+CLOSED_POST = PostTemplate("closed_post", (
+    f"{LINE2}\n"
+    "🚫 GIVEAWAY CLOSED 🚫\n"
+    f"{LINE2}\n\n"
+    "⏰ The giveaway has officially ended.  \n"
+    "🔒 All entries are now locked.\n\n"
+    "📊 Giveaway Summary  \n"
+    "🎁 Prize: {prize}  \n\n"
+    "👥 Total Participants: {count}  \n"
+    "🏆 Total Winners: {winners}  \n\n"
+    "🎯 Winners will be announced very soon.  \n"
+    "Please stay tuned for the final results.\n\n"
+    "✨ Best of luck to everyone!\n\n"
+    "— {host} ⚡\n"
+    f"{LINE2}"
+), static=("prize", "winners", "host"))
+
+WINNERS_POST = PostTemplate("winners_post", (
+    "🏆 GIVEAWAY WINNER ANNOUNCEMENT 🏆\n"
+    "\n"
+    "🆔 Giveaway ID: {gid}\n"
+    "⚡ {title} ⚡\n"
+    "\n"
+    "🎁 PRIZE: {prize}\n"
+    "📦 Prize Delivery: {delivered}/{total}\n"
+    "\n"
+    "👑 WINNERS LIST\n"
+    "{winners}"
+    "\n"
+    "👇 Click the button below to claim your prize\n"
+    "\n"
+    "⏳ Rule: Claim within 24 hours — after that, prize expires."
+), static=("gid", "title", "prize"))
+
+SELECTION_POST = PostTemplate("selection_post", (
+    f"{LINE}\n"
+    "🎲 LIVE RANDOM WINNER SELECTION\n"
+    f"{LINE}\n\n"
+    "⚡ {title} ⚡\n\n"
+    "🎁 GIVEAWAY SUMMARY  \n"
+    "🏆 Prize: {prize}  \n"
+    "✅ Winners Selected: {selected}/{total}\n\n"
+    "📌 Important Rule  \n"
+    "Users without a valid @username  \n"
+    "are automatically excluded.\n\n"
+    "{spin} Selection Progress: {percent}%  \n"
+    "📊 Progress Bar: {bar}  \n\n"
+    "🕒 Time Remaining: {remaining}  \n"
+    "🔐 System Mode: 100% Random • Fair • Auto  \n\n"
+    f"{LINE}\n"
+    "👥 LIVE ENTRIES SHOWCASE\n"
+    f"{LINE}\n"
+    "{c1} Now Showing → {line1}  \n"
+    "{c2} Now Showing → {line2}  \n"
+    "{c3} Now Showing → {line3}  \n"
+    f"{LINE}"
+), static=("title", "prize", "total"))
+
+
+def post_key(g) -> tuple:
+    # what the static part of a giveaway's posts is built from
+    return g.get("title", "POWER POINT BREAK GIVEAWAY"), g.get("prize"), g.get("rules"), g.get("winner_count")
+
+
+def post_static(g) -> dict:
+    return {
+        "title": g.get("title", "POWER POINT BREAK GIVEAWAY"),
+        "prize": g.get("prize", ""),
+        "winners": g.get("winner_count", 0),
+        "rules": format_rules(g),
+        "host": HOST_NAME,
+    }
+
+
+def build_live_text(g, remaining: int) -> str:
+    duration = int(g.get("duration_seconds", 1) or 1)
     elapsed = max(0, duration - remaining)
     percent = int(round((elapsed / float(duration)) * 100))
-    return (
-        f"{LINE}\n"
-        f"⚡ {data.get('title','POWER POINT BREAK GIVEAWAY')} ⚡\n"
-        f"{LINE}\n\n"
-        "🎁 PRIZE POOL 🌟\n"
-        f"{data.get('prize','')}\n\n"
-        f"👥 Total Participants: {participants_count()}  \n"
-        f"🏆 Total Winners: {data.get('winner_count',0)}  \n\n"
-        "🎯 Winner Selection\n"
-        "• 100% Random & Fair  \n"
-        "• Auto System  \n\n"
-        f"⏱️ Time Remaining: {format_hms(remaining)}  \n"
-        "📊 Live Progress\n"
-        f"{build_progress(percent)}  \n\n"
-        "📜 Official Rules  \n"
-        f"{format_rules()}  \n\n"
-        f"📢 Hosted by: {HOST_NAME}  \n\n"
-        f"{LINE}\n"
-        "👇 Tap below to join the giveaway 👇"
-    )
+    s = LIVE_POST.segments(post_key(g), lambda: post_static(g))
+    return f"{s[0]}{participants_count(g)}{s[1]}{format_hms(remaining)}{s[2]}{build_progress(percent)}{s[3]}"
 
 
-def build_closed_simple_text() -> str:
-    prize = (data.get("prize") or "").strip()
-    return (
-        f"{LINE2}\n"
-        "🚫 GIVEAWAY CLOSED 🚫\n"
-        f"{LINE2}\n\n"
-        "⏰ The giveaway has officially ended.  \n"
-        "🔒 All entries are now locked.\n\n"
-        "📊 Giveaway Summary  \n"
-        f"🎁 Prize: {prize}  \n\n"
-        f"👥 Total Participants: {participants_count()}  \n"
-        f"🏆 Total Winners: {data.get('winner_count',0)}  \n\n"
-        "🎯 Winners will be announced very soon.  \n"
-        "Please stay tuned for the final results.\n\n"
-        "✨ Best of luck to everyone!\n\n"
-        f"— {HOST_NAME} ⚡\n"
-        f"{LINE2}"
+def build_closed_simple_text(g) -> str:
+    s = CLOSED_POST.segments(
+        post_key(g), lambda: {"prize": (g.get("prize") or "").strip(), "winners": g.get("winner_count", 0), "host": HOST_NAME},
     )
+    return f"{s[0]}{participants_count(g)}{s[1]}"
 
 
 def build_winners_post_text(gid: str, title: str, prize: str, winners_map: dict, delivered_map: dict) -> str:
@@ -680,26 +1130,15 @@ def build_winners_post_text(gid: str, title: str, prize: str, winners_map: dict,
     total_winners = len(winners_map or {})
 
     lines = []
-    lines.append("🏆 GIVEAWAY WINNER ANNOUNCEMENT 🏆")
-    lines.append("")
-    lines.append(f"🆔 Giveaway ID: {gid}")
-    lines.append(f"⚡ {title} ⚡")
-    lines.append("")
-    lines.append(f"🎁 PRIZE: {prize}")
-    lines.append(f"📦 Prize Delivery: {delivered_count}/{total_winners}")
-    lines.append("")
-    lines.append("👑 WINNERS LIST")
     i = 1
     for uid, info in winners_map.items():
         uname = (info or {}).get("username", "") or ""
         mark = "  Delivery ✅" if delivered_map.get(uid) else ""
-        lines.append(f"{i}️⃣ 👤 {uname} | 🆔 {uid}{mark}")
+        lines.append(f"{i}️⃣ 👤 {uname} | 🆔 {uid}{mark}\n")
         i += 1
-    lines.append("")
-    lines.append("👇 Click the button below to claim your prize")
-    lines.append("")
-    lines.append("⏳ Rule: Claim within 24 hours — after that, prize expires.")
-    return "\n".join(lines)
+    s = WINNERS_POST.segments((gid, title, prize), lambda: {"gid": gid, "title": title, "prize": prize})
+    winners = "".join(lines)
+    return f"{s[0]}{delivered_count}{s[1]}{total_winners}{s[2]}{winners}{s[3]}"
 
 
 def build_live_autodraw_text(title: str, prize: str, selected_count: int, total_winners: int,
@@ -707,95 +1146,126 @@ def build_live_autodraw_text(title: str, prize: str, selected_count: int, total_
                             line1: str, c1: str,
                             line2: str, c2: str,
                             line3: str, c3: str) -> str:
-    bar = build_progress(percent)
+    s = SELECTION_POST.segments((title, prize, total_winners), lambda: {"title": title, "prize": prize, "total": total_winners})
     return (
-        f"{LINE}\n"
-        "🎲 LIVE RANDOM WINNER SELECTION\n"
-        f"{LINE}\n\n"
-        f"⚡ {title} ⚡\n\n"
-        "🎁 GIVEAWAY SUMMARY  \n"
-        f"🏆 Prize: {prize}  \n"
-        f"✅ Winners Selected: {selected_count}/{total_winners}\n\n"
-        "📌 Important Rule  \n"
-        "Users without a valid @username  \n"
-        "are automatically excluded.\n\n"
-        f"{spin} Selection Progress: {percent}%  \n"
-        f"📊 Progress Bar: {bar}  \n\n"
-        f"🕒 Time Remaining: {format_hms(remaining)}  \n"
-        "🔐 System Mode: 100% Random • Fair • Auto  \n\n"
-        f"{LINE}\n"
-        "👥 LIVE ENTRIES SHOWCASE\n"
-        f"{LINE}\n"
-        f"{c1} Now Showing → {line1}  \n"
-        f"{c2} Now Showing → {line2}  \n"
-        f"{c3} Now Showing → {line3}  \n"
-        f"{LINE}"
+        f"{s[0]}{selected_count}{s[1]}{spin}{s[2]}{percent}{s[3]}{build_progress(percent)}{s[4]}{format_hms(remaining)}"
+        f"{s[5]}{c1}{s[6]}{line1}{s[7]}{c2}{s[8]}{line2}{s[9]}{c3}{s[10]}{line3}{s[11]}"
     )
 
 
 # =========================================================
 # LIVE COUNTDOWN (CHANNEL GIVEAWAY POST)
 # =========================================================
-def stop_live_countdown():
-    global countdown_job
-    if countdown_job is not None:
+def stop_live_countdown(g):
+    if g.countdown_job is not None:
         try:
-            countdown_job.schedule_removal()
+            g.countdown_job.schedule_removal()
         except Exception:
             pass
-    countdown_job = None
+    g.countdown_job = None
+    stop_live_post(g)
+
+
+def stop_live_post(g):
+    if g.live_post is not None:
+        g.live_post.stop()
+    g.live_post = None
+
+
+def live_remaining(g) -> int:
+    start_ts = g.get("start_time")
+    duration = int(g.get("duration_seconds", 1) or 1)
+    if not start_ts:
+        return duration
+    elapsed = int((datetime.utcnow() - datetime.utcfromtimestamp(start_ts)).total_seconds())
+    return max(0, duration - elapsed)
+
+
+def render_live_post(g):
+    # called by the LivePost timer right before each edit
+    with locks.run:
+        if not g.get("active"):
+            return None
+        return build_live_text(g, live_remaining(g))
+
+
+def request_live_edit(bot, g):
+    with locks.run:
+        live_mid = g.get("live_message_id")
+        if not live_mid or not g.get("active"):
+            return
+        if g.live_post is None or g.live_post.message_id != live_mid:
+            stop_live_post(g)
+            g.live_post = LivePost(
+                bot, g.chat_id, live_mid, lambda: render_live_post(g),
+                reply_markup=join_button_markup(g.gid),
+                min_interval=LIVE_EDIT_MIN_INTERVAL,
+            )
+        lp = g.live_post
+    lp.request()
 
 
-def start_live_countdown(job_queue):
-    global countdown_job
-    stop_live_countdown()
-    countdown_job = job_queue.run_repeating(live_tick, interval=5, first=0, name="live_countdown")
+def start_live_countdown(job_queue, g):
+    stop_live_countdown(g)
+    g.countdown_job = job_queue.run_repeating(
+        live_tick, interval=5, first=0, context=g.gid, name=f"live_countdown:{g.gid}"
+    )
 
 
+@timed_job("live_tick")
 def live_tick(context: CallbackContext):
+    g = giveaways.get(context.job.context)
+    if g is None:
+        context.job.schedule_removal()
+        return
+
     with lock:
-        if not data.get("active"):
-            stop_live_countdown()
+        if not g.get("active"):
+            stop_live_countdown(g)
             return
 
-        start_time = data.get("start_time")
+        start_time = g.get("start_time")
         if start_time is None:
-            data["start_time"] = now_ts()
-            save_data()
-            start_time = data["start_time"]
+            g["start_time"] = now_ts()
+            save_data(g.path("start_time"))
+            start_time = g["start_time"]
 
         start = datetime.utcfromtimestamp(start_time)
-        duration = int(data.get("duration_seconds", 1) or 1)
+        duration = int(g.get("duration_seconds", 1) or 1)
         elapsed = int((datetime.utcnow() - start).total_seconds())
         remaining = duration - elapsed
 
-        live_mid = data.get("live_message_id")
+        live_mid = g.get("live_message_id")
 
         if remaining <= 0:
             # close giveaway
-            data["active"] = False
-            data["closed"] = True
-            save_data()
+            g["active"] = False
+            g["closed"] = True
+            save_data(g.path("active"), g.path("closed"))
+            flush_data()
+            # workers see the close from here on: take their last joins
+            cluster_ingest(context.bot)
 
             # delete live message
+            stop_live_post(g)
             if live_mid:
                 try:
-                    context.bot.delete_message(chat_id=CHANNEL_ID, message_id=live_mid)
+                    context.bot.delete_message(chat_id=g.chat_id, message_id=live_mid)
                 except Exception:
                     pass
 
             # post closed message
             try:
-                m = context.bot.send_message(chat_id=CHANNEL_ID, text=build_closed_simple_text())
-                data["closed_message_id"] = m.message_id
-                save_data()
+                m = context.bot.send_message(chat_id=g.chat_id, text=build_closed_simple_text(g))
+                g["closed_message_id"] = m.message_id
+                save_data(g.path("closed_message_id"))
             except Exception:
                 pass
 
             # if autodraw enabled => start auto selection in channel
             if data.get("autodraw_enabled"):
                 try:
-                    start_autodraw_channel_progress(context.job_queue, context.bot)
+                    start_autodraw_channel_progress(context.job_queue, context.bot, g)
                 except Exception:
                     pass
             else:
@@ -805,78 +1275,75 @@ def live_tick(context: CallbackContext):
                         chat_id=ADMIN_ID,
                         text=(
                             "✅ Giveaway closed.\n\n"
+                            f"Giveaway ID: {g.gid}\n"
                             "Auto Draw is OFF.\n"
-                            "Use /draw to select winners (manual)."
+                            f"Use /draw {g.gid} to select winners (manual)."
                         ),
                     )
                 except Exception:
                     pass
 
-            stop_live_countdown()
+            stop_live_countdown(g)
             return
 
         if not live_mid:
             return
 
-    # edit outside lock
-    try:
-        context.bot.edit_message_text(
-            chat_id=CHANNEL_ID,
-            message_id=live_mid,
-            text=build_live_text(remaining),
-            reply_markup=join_button_markup(),
-        )
-    except Exception:
-        pass
+    # coalesced with join-driven edits, sent outside the lock
+    request_live_edit(context.bot, g)
+
+
+def stop_giveaway_jobs(g):
+    stop_live_countdown(g)
+    stop_draw_jobs(g)
+    stop_auto_selection_job(g)
+
+
+def finish_giveaway(g):
+    # winners are in history now; the running giveaway is dropped
+    stop_giveaway_jobs(g)
+    with lock:
+        giveaways.remove(g.gid)
+        save_data(("giveaways", g.gid))
 
 
 # =========================================================
 # AUTO SELECTION (CHANNEL) - 10 MIN + LIVE SHOWCASE + BUTTONS
 # =========================================================
-def stop_auto_selection_job():
-    global auto_sel_job
-    if auto_sel_job is not None:
+def stop_auto_selection_job(g):
+    if g.auto_sel_job is not None:
         try:
-            auto_sel_job.schedule_removal()
+            g.auto_sel_job.schedule_removal()
         except Exception:
             pass
-    auto_sel_job = None
-
-
-def start_autodraw_channel_progress(job_queue, bot):
-    global auto_sel_job
-    stop_auto_selection_job()
-
-    # eligible participants (must have valid @username)
-    with lock:
-        parts = list((data.get("participants", {}) or {}).items())
-
-    eligible = []
-    for uid, info in parts:
-        uname = (info or {}).get("username", "") or ""
-        uname = uname.strip()
-        if is_valid_username(uname):
-            eligible.append((str(uid), uname))
+    g.auto_sel_job = None
 
-    # if no eligible, still show a post (system running)
-    if not eligible:
-        eligible = [("0", "@username")]
 
-    # showcase deck
-    deck = []
+def showcase_picker(g):
+    """pick(exclude_ids) -> (uid, "@name") for the showcase lines of g's selection post."""
+    deck = deque()
 
     def refill_deck():
+        # eligible (@username) users only: a random handful per refill from
+        # the draw index, not a copy of every participant
         nonlocal deck
-        deck = eligible[:]
-        random.shuffle(deck)
+        with locks.participants:
+            parts = g.get("participants", {}) or {}
+            deck = deque(
+                (uid, ((parts.get(uid) or {}).get("username", "") or "").strip())
+                for uid in eligible_index(g).sample(SHOWCASE_DECK_SIZE)
+            )
+
+        # if no eligible, still show a post (system running)
+        if not deck:
+            deck = deque([("0", "@username")])
 
     def pick_next_excluding(exclude_ids):
-        nonlocal deck
         tries = 0
         while True:
             if not deck:
                 refill_deck()
-            uid, uname = deck.pop(0)
+            uid, uname = deck.popleft()
             if uid not in exclude_ids:
                 return (uid, uname)
             deck.append((uid, uname))
@@ -885,28 +1352,35 @@ def start_autodraw_channel_progress(job_queue, bot):
                 return (uid, uname)
 
     refill_deck()
+    return pick_next_excluding
 
-    with lock:
-        total_winners = max(1, int(data.get("winner_count", 1) or 1))
-        title = (data.get("title") or "POWER POINT BREAK").strip()
-        prize = (data.get("prize") or "").strip()
 
-    # Selection pool: unique eligible users
-    eligible_ids = [u for u, _ in eligible if u != "0"]
-    random.shuffle(eligible_ids)
+def start_autodraw_channel_progress(job_queue, bot, g):
+    stop_auto_selection_job(g)
 
-    # first join champion ONLY if eligible with username
-    with lock:
-        first_uid = str(data.get("first_winner_id") or "")
-        first_uname = (data.get("first_winner_username", "") or "").strip()
+    pick_next_excluding = showcase_picker(g)
 
-    selected = []
-    if first_uid and first_uid in eligible_ids and is_valid_username(first_uname):
-        selected.append(first_uid)
-        eligible_ids = [x for x in eligible_ids if x != first_uid]
+    with lock:
+        total_winners = max(1, int(g.get("winner_count", 1) or 1))
+        title = (g.get("title") or "POWER POINT BREAK").strip()
+        prize = (g.get("prize") or "").strip()
+
+    # winners are sampled up front from the eligible index; the pick
+    # schedule only reveals them one by one
+    with locks.participants:
+        idx = eligible_index(g)
+        first_uid = str(g.get("first_winner_id") or "")
+        first_uname = (g.get("first_winner_username", "") or "").strip()
+
+        # first join champion ONLY if eligible with username
+        selected = []
+        if first_uid and first_uid in idx and is_valid_username(first_uname):
+            selected.append(first_uid)
+        # winners in reveal order, the champion (already revealed) first
+        pool = selected + idx.sample(total_winners - len(selected), exclude=selected)
+        max_possible = len(idx)
 
     # total possible
-    max_possible = len(selected) + len(eligible_ids)
     if max_possible <= 0:
         total_winners = 1
     else:
@@ -922,11 +1396,11 @@ def start_autodraw_channel_progress(job_queue, bot):
 
     # start post
     m = bot.send_message(
-        chat_id=CHANNEL_ID,
+        chat_id=g.chat_id,
         text=build_live_autodraw_text(
             title=title,
             prize=prize,
-            selected_count=len([u for u in selected if u != "0"]),
+            selected_count=len(selected),
             total_winners=total_winners,
             percent=0,
             remaining=AUTO_DRAW_DURATION_SECONDS,
@@ -935,81 +1409,135 @@ def start_autodraw_channel_progress(job_queue, bot):
             line2=format_entry(l2[0], l2[1]), c2=c2,
             line3=format_entry(l3[0], l3[1]), c3=c3,
         ),
-        reply_markup=selection_buttons_markup(),
+        reply_markup=selection_buttons_markup(g.gid),
     )
 
     try:
-        bot.pin_chat_message(chat_id=CHANNEL_ID, message_id=m.message_id, disable_notification=True)
+        bot.pin_chat_message(chat_id=g.chat_id, message_id=m.message_id, disable_notification=True)
     except Exception:
         pass
 
-    with lock:
-        data["autodraw_message_id"] = m.message_id
-        data["autodraw_start_ts"] = now_ts()
-        data["autodraw_bonus_winners"] = {}
-        data["lucky_draw_winner_uid"] = None
-        save_data()
+    start_ts = now_ts()
 
+    # what is fixed for the whole run (post, pre-sampled winners, pick
+    # schedule) is saved once in g["autodraw_state"]; each tick checkpoints
+    # only g["autodraw_cursor"] (showcase + how many winners are revealed),
+    # a few hundred bytes whatever the winner count. A restart resumes
+    # both: same post, same winners, the rest of the pick schedule
     state = {
         "mid": m.message_id,
-        "start_ts": now_ts(),
+        "start_ts": start_ts,
+
+        "pool": pool,
+        "total_winners": total_winners,
+
+        "pick_schedule": pick_schedule,
+
+        "title": title,
+        "prize": prize,
+    }
+    cursor = {
         "tick": 0,
         "tick_idx": 0,
 
-        "t1": now_ts(),
-        "t2": now_ts(),
-        "t3": now_ts(),
+        "t1": start_ts,
+        "t2": start_ts,
+        "t3": start_ts,
 
         "line1": l1,
         "line2": l2,
         "line3": l3,
 
-        "selected": selected[:],
-        "pool": eligible_ids[:],
-        "total_winners": total_winners,
+        "picked": len(selected),
+    }
 
-        "pick_schedule": pick_schedule,
+    with lock:
+        g["autodraw_message_id"] = m.message_id
+        g["autodraw_start_ts"] = start_ts
+        g["autodraw_bonus_winners"] = {}
+        g["lucky_winners"] = {}
+        g["autodraw_state"] = state
+        g["autodraw_cursor"] = cursor
+        g.slots.reset()
+        save_data(*[g.path(k) for k in (
+            "autodraw_message_id", "autodraw_start_ts", "autodraw_bonus_winners", "lucky_winners",
+            "autodraw_state", "autodraw_cursor",
+        )])
+
+    run_autodraw_channel_progress(job_queue, g, pick_next_excluding)
 
-        "title": title,
-        "prize": prize,
-    }
 
+AUTODRAW_CURSOR_KEYS = ("tick", "tick_idx", "t1", "t2", "t3", "line1", "line2", "line3")
+
+
+def autodraw_cursor(g, state: dict) -> dict:
+    # checkpoints written before the cursor had its own key carry it (and
+    # the revealed winners) inside autodraw_state: split them out once
+    with lock:
+        cursor = g.get("autodraw_cursor")
+        if cursor is None:
+            selected = state.pop("selected", None) or []
+            state["pool"] = selected + (state.get("pool") or [])
+            cursor = {k: state.pop(k) for k in AUTODRAW_CURSOR_KEYS if k in state}
+            cursor["picked"] = len(selected)
+            g["autodraw_cursor"] = cursor
+            save_data(g.path("autodraw_state"), g.path("autodraw_cursor"))
+    return cursor
+
+
+def run_autodraw_channel_progress(job_queue, g, pick_next_excluding=None):
+    # ticks of the selection post, driven by g["autodraw_state"] / g["autodraw_cursor"]
+    state = g.get("autodraw_state")
+    cursor = autodraw_cursor(g, state)
+    if pick_next_excluding is None:
+        pick_next_excluding = showcase_picker(g)
+    seed_lucky_slots(g)
+
+    @timed_job("autodraw_tick")
     def tick(context: CallbackContext):
-        # compute
-        state["tick"] += 1
-        elapsed = int(now_ts() - state["start_ts"])
-        remaining = max(0, AUTO_DRAW_DURATION_SECONDS - elapsed)
-        percent = int(round(min(100, (elapsed / float(AUTO_DRAW_DURATION_SECONDS)) * 100)))
-        spin = SPINNER[(state["tick"] - 1) % len(SPINNER)]
-
-        n = now_ts()
-
-        # showcase changes 5/7/9 seconds
-        if n - state["t1"] >= SHOW_LINE1_SEC:
-            state["line1"] = pick_next_excluding({state["line2"][0], state["line3"][0]})
-            state["t1"] = n
-
-        if n - state["t2"] >= SHOW_LINE2_SEC:
-            state["line2"] = pick_next_excluding({state["line1"][0], state["line3"][0]})
-            state["t2"] = n
-
-        if n - state["t3"] >= SHOW_LINE3_SEC:
-            state["line3"] = pick_next_excluding({state["line1"][0], state["line2"][0]})
-            state["t3"] = n
-
-        # pick winners at random schedule (no fixed interval)
-        picked_count = len([u for u in state["selected"] if u != "0"])
-        if picked_count < state["total_winners"]:
-            if should_pick_now(elapsed, state["pick_schedule"], picked_count):
-                if state["pool"]:
-                    state["selected"].append(state["pool"].pop(0))
-
-        # count includes Lucky winner
         with lock:
-            bonus = data.get("autodraw_bonus_winners", {}) or {}
+            # stop once the giveaway is finalized (or reset)
+            if giveaways.get(g.gid) is not g or g.get("autodraw_state") is not state:
+                return
+
+            # compute
+            cursor["tick"] += 1
+            elapsed = int(now_ts() - state["start_ts"])
+            remaining = max(0, AUTO_DRAW_DURATION_SECONDS - elapsed)
+            percent = int(round(min(100, (elapsed / float(AUTO_DRAW_DURATION_SECONDS)) * 100)))
+            spin = SPINNER[(cursor["tick"] - 1) % len(SPINNER)]
+
+            n = now_ts()
+
+            # showcase changes 5/7/9 seconds
+            if n - cursor["t1"] >= SHOW_LINE1_SEC:
+                cursor["line1"] = pick_next_excluding({cursor["line2"][0], cursor["line3"][0]})
+                cursor["t1"] = n - (n - cursor["t1"]) % SHOW_LINE1_SEC
+
+            if n - cursor["t2"] >= SHOW_LINE2_SEC:
+                cursor["line2"] = pick_next_excluding({cursor["line1"][0], cursor["line3"][0]})
+                cursor["t2"] = n - (n - cursor["t2"]) % SHOW_LINE2_SEC
+
+            if n - cursor["t3"] >= SHOW_LINE3_SEC:
+                cursor["line3"] = pick_next_excluding({cursor["line1"][0], cursor["line2"][0]})
+                cursor["t3"] = n - (n - cursor["t3"]) % SHOW_LINE3_SEC
+
+            # reveal the next pre-sampled winner at random schedule (no fixed interval)
+            picked_count = cursor["picked"]
+            if picked_count < min(state["total_winners"], len(state["pool"])):
+                if should_pick_now(elapsed, state["pick_schedule"], picked_count):
+                    cursor["picked"] = picked_count + 1
+
+            cursor["tick_idx"] = ticks.idx
+
+            # checkpoint the cursor only (write-behind: coalesced with the next flush)
+            save_data(g.path("autodraw_cursor"))
+
+            # count includes Lucky winner
+            bonus = g.get("autodraw_bonus_winners", {}) or {}
         bonus_count = len(bonus)
 
-        selected_count = len([u for u in state["selected"] if u != "0"]) + bonus_count
+        selected_count = cursor["picked"] + bonus_count
 
         c1, c2, c3 = pick_three_distinct_colors()
 
@@ -1021,57 +1549,59 @@ def start_autodraw_channel_progress(job_queue, bot):
             percent=percent,
             remaining=remaining,
             spin=spin,
-            line1=format_entry(state["line1"][0], state["line1"][1]), c1=c1,
-            line2=format_entry(state["line2"][0], state["line2"][1]), c2=c2,
-            line3=format_entry(state["line3"][0], state["line3"][1]), c3=c3,
+            line1=format_entry(cursor["line1"][0], cursor["line1"][1]), c1=c1,
+            line2=format_entry(cursor["line2"][0], cursor["line2"][1]), c2=c2,
+            line3=format_entry(cursor["line3"][0], cursor["line3"][1]), c3=c3,
         )
 
         try:
-            context.bot.edit_message_text(
-                chat_id=CHANNEL_ID,
-                message_id=state["mid"],
-                text=text,
-                reply_markup=selection_buttons_markup(),
-            )
+            with api_priority(COSMETIC):
+                context.bot.edit_message_text(
+                    chat_id=g.chat_id,
+                    message_id=state["mid"],
+                    text=text,
+                    reply_markup=selection_buttons_markup(g.gid),
+                )
         except Exception:
             pass
 
         if remaining <= 0:
             # finalize: remove closed + selection, post winners
-            autodraw_finalize_from_state(context, state)
-            stop_auto_selection_job()
+            autodraw_finalize_from_state(context, g, state, cursor)
+            finish_giveaway(g)
             return
 
-        # schedule next tick
-        nxt = AUTO_TICK_INTERVALS[state["tick_idx"] % len(AUTO_TICK_INTERVALS)]
-        state["tick_idx"] += 1
-        context.job_queue.run_once(tick, when=nxt)
+        # schedule next tick: next deadline on the monotonic clock (late ticks
+        # are skipped, not queued), the last one exactly at the end of the run
+        left = max(0.0, state["start_ts"] + AUTO_DRAW_DURATION_SECONDS - now_ts())
+        g.auto_sel_job = context.job_queue.run_once(tick, when=ticks.next_delay(limit=left))
 
-    auto_sel_job = job_queue.run_once(tick, when=0)
+    ticks = TickClock(AUTO_TICK_INTERVALS, idx=cursor["tick_idx"], name="autodraw_tick")
+    g.auto_sel_job = job_queue.run_once(tick, when=0)
 
 
-def autodraw_finalize_from_state(context: CallbackContext, state: dict):
+def autodraw_finalize_from_state(context: CallbackContext, g, state: dict, cursor: dict):
     # remove closed + selection messages
     with lock:
-        closed_mid = data.get("closed_message_id")
-        auto_mid = data.get("autodraw_message_id")
+        closed_mid = g.get("closed_message_id")
+        auto_mid = g.get("autodraw_message_id")
 
     if closed_mid:
         try:
-            context.bot.delete_message(chat_id=CHANNEL_ID, message_id=closed_mid)
+            context.bot.delete_message(chat_id=g.chat_id, message_id=closed_mid)
         except Exception:
             pass
 
     if auto_mid:
         try:
-            context.bot.delete_message(chat_id=CHANNEL_ID, message_id=auto_mid)
+            context.bot.delete_message(chat_id=g.chat_id, message_id=auto_mid)
         except Exception:
             pass
 
     # build winners map
     with lock:
-        participants = data.get("participants", {}) or {}
-        bonus = (data.get("autodraw_bonus_winners", {}) or {}).copy()
+        participants = g.get("participants", {}) or {}
+        bonus = (g.get("autodraw_bonus_winners", {}) or {}).copy()
 
     winners_map = {}
 
@@ -1081,8 +1611,8 @@ def autodraw_finalize_from_state(context: CallbackContext, state: dict):
         if is_valid_username(uname):
             winners_map[str(uid)] = {"username": uname}
 
-    # add selected winners (valid username only)
-    for uid in (state.get("selected") or []):
+    # add revealed winners (valid username only)
+    for uid in (state.get("pool") or [])[:cursor.get("picked", 0)]:
         uid = str(uid)
         info = participants.get(uid, {}) or {}
         uname = (info.get("username", "") or "").strip()
@@ -1097,7 +1627,7 @@ def autodraw_finalize_from_state(context: CallbackContext, state: dict):
     winners_items = list(winners_map.items())[:total_winners]
     winners_map = {k: v for k, v in winners_items}
 
-    gid = make_gid()
+    gid = g.gid
     ts = now_ts()
 
     snapshot = {
@@ -1109,6 +1639,7 @@ def autodraw_finalize_from_state(context: CallbackContext, state: dict):
         "created_ts": ts,
         "claim_expires_ts": ts + CLAIM_WINDOW_SECONDS,
         "winners_message_id": None,
+        "chat_id": g.chat_id,
     }
 
     with lock:
@@ -1118,13 +1649,19 @@ def autodraw_finalize_from_state(context: CallbackContext, state: dict):
         data["latest_gid"] = gid
 
         # clear running selection references
-        data["closed_message_id"] = None
-        data["autodraw_message_id"] = None
-        data["autodraw_start_ts"] = None
-        save_data()
+        g["closed_message_id"] = None
+        g["autodraw_message_id"] = None
+        g["autodraw_start_ts"] = None
+        g["autodraw_state"] = None
+        g["autodraw_cursor"] = None
+        save_data(("history", gid), "latest_gid", *[g.path(k) for k in (
+            "closed_message_id", "autodraw_message_id", "autodraw_start_ts", "autodraw_state", "autodraw_cursor",
+        )])
+        publish_claims(gid)
 
     # winner log
     with lock:
+        base = len(data["winner_log"])
         for uid, info in winners_map.items():
             data["winner_log"].append({
                 "gid": gid,
@@ -1133,7 +1670,8 @@ def autodraw_finalize_from_state(context: CallbackContext, state: dict):
                 "prize": snapshot["prize"],
                 "date": format_date(ts),
             })
-        save_data()
+        save_data(*[("winner_log", i) for i in range(base, len(data["winner_log"]))])
+        flush_data()
 
     text = build_winners_post_text(
         gid=gid,
@@ -1144,10 +1682,11 @@ def autodraw_finalize_from_state(context: CallbackContext, state: dict):
     )
 
     try:
-        m = context.bot.send_message(chat_id=CHANNEL_ID, text=text, reply_markup=claim_button_markup(gid))
+        m = context.bot.send_message(chat_id=g.chat_id, text=text, reply_markup=claim_button_markup(gid))
         with lock:
             data["history"][gid]["winners_message_id"] = m.message_id
-            save_data()
+            save_data(("history", gid, "winners_message_id"))
+            publish_claims(gid)
     except Exception:
         pass
 
@@ -1155,21 +1694,20 @@ def autodraw_finalize_from_state(context: CallbackContext, state: dict):
 # =========================================================
 # MANUAL DRAW (ADMIN) - PREVIEW + APPROVE
 # =========================================================
-def stop_draw_jobs():
-    global draw_job, draw_finalize_job
-    if draw_job is not None:
+def stop_draw_jobs(g):
+    if g.draw_job is not None:
         try:
-            draw_job.schedule_removal()
+            g.draw_job.schedule_removal()
         except Exception:
             pass
-    draw_job = None
+    g.draw_job = None
 
-    if draw_finalize_job is not None:
+    if g.draw_finalize_job is not None:
         try:
-            draw_finalize_job.schedule_removal()
+            g.draw_finalize_job.schedule_removal()
         except Exception:
             pass
-    draw_finalize_job = None
+    g.draw_finalize_job = None
 
 
 def build_draw_progress_text(percent: int, spin: str) -> str:
@@ -1186,22 +1724,33 @@ def build_draw_progress_text(percent: int, spin: str) -> str:
     )
 
 
-def start_draw_progress(context: CallbackContext, admin_chat_id: int):
-    global draw_job, draw_finalize_job
-    stop_draw_jobs()
+def start_draw_progress(context: CallbackContext, admin_chat_id: int, g):
+    stop_draw_jobs(g)
 
     msg = context.bot.send_message(
         chat_id=admin_chat_id,
         text=build_draw_progress_text(0, SPINNER[0]),
     )
 
-    ctx = {
-        "admin_chat_id": admin_chat_id,
-        "admin_msg_id": msg.message_id,
-        "start_ts": now_ts(),
-        "tick": 0,
-    }
+    # checkpointed: a restart resumes the progress message and the finalize
+    with lock:
+        g["draw_state"] = {
+            "admin_chat_id": admin_chat_id,
+            "admin_msg_id": msg.message_id,
+            "start_ts": now_ts(),
+        }
+        save_data(g.path("draw_state"))
+
+    run_draw_progress(context.job_queue, g)
+
+
+def run_draw_progress(job_queue, g):
+    # progress ticks + finalize of the manual draw in g["draw_state"]
+    stop_draw_jobs(g)
+    ctx = dict(g.get("draw_state") or {}, gid=g.gid, tick=0)
+    elapsed = max(0.0, now_ts() - float(ctx["start_ts"]))
 
+    @timed_job("draw_tick")
     def draw_tick(job_ctx: CallbackContext):
         jd = job_ctx.job.context
         tick = int(jd.get("tick", 0)) + 1
@@ -1212,38 +1761,45 @@ def start_draw_progress(context: CallbackContext, admin_chat_id: int):
         spin = SPINNER[(tick - 1) % len(SPINNER)]
 
         try:
-            job_ctx.bot.edit_message_text(
-                chat_id=jd["admin_chat_id"],
-                message_id=jd["admin_msg_id"],
-                text=build_draw_progress_text(percent, spin),
-            )
+            with api_priority(COSMETIC):
+                job_ctx.bot.edit_message_text(
+                    chat_id=jd["admin_chat_id"],
+                    message_id=jd["admin_msg_id"],
+                    text=build_draw_progress_text(percent, spin),
+                )
         except Exception:
             pass
 
-    draw_job = context.job_queue.run_repeating(
+    g.draw_job = job_queue.run_repeating(
         draw_tick,
         interval=DRAW_UPDATE_INTERVAL,
         first=0,
         context=ctx,
-        name="draw_progress_job",
+        name=f"draw_progress_job:{g.gid}",
     )
 
-    draw_finalize_job = context.job_queue.run_once(
+    g.draw_finalize_job = job_queue.run_once(
         draw_finalize,
-        when=DRAW_DURATION_SECONDS,
+        when=max(0.0, DRAW_DURATION_SECONDS - elapsed),
         context=ctx,
-        name="draw_finalize_job",
+        name=f"draw_finalize_job:{g.gid}",
     )
 
 
+@timed_job("draw_finalize")
 def draw_finalize(context: CallbackContext):
-    stop_draw_jobs()
     jd = context.job.context
+    g = giveaways.get(jd.get("gid"))
+    if g is None:
+        return
+    stop_draw_jobs(g)
     admin_chat_id = jd["admin_chat_id"]
     admin_msg_id = jd["admin_msg_id"]
 
     with lock:
-        participants = data.get("participants", {}) or {}
+        g["draw_state"] = None
+        save_data(g.path("draw_state"))
+        participants = g.get("participants", {}) or {}
         if not participants:
             try:
                 context.bot.edit_message_text(
@@ -1255,15 +1811,9 @@ def draw_finalize(context: CallbackContext):
                 pass
             return
 
-        # eligible = username only
-        eligible = []
-        for uid, info in participants.items():
-            uname = (info or {}).get("username", "") or ""
-            uname = uname.strip()
-            if is_valid_username(uname):
-                eligible.append((str(uid), uname))
-
-        if not eligible:
+        # eligible = username only, not banned (EligibleIndex)
+        idx = eligible_index(g)
+        if not len(idx):
             try:
                 context.bot.edit_message_text(
                     chat_id=admin_chat_id,
@@ -1274,42 +1824,38 @@ def draw_finalize(context: CallbackContext):
                 pass
             return
 
-        total = max(1, int(data.get("winner_count", 1) or 1))
-        total = min(total, len(eligible))
+        total = max(1, int(g.get("winner_count", 1) or 1))
+        total = min(total, len(idx))
 
         # first join champ if eligible
-        first_uid = str(data.get("first_winner_id") or "")
-        first_uname = (data.get("first_winner_username", "") or "").strip()
+        first_uid = str(g.get("first_winner_id") or "")
+        first_uname = (g.get("first_winner_username", "") or "").strip()
 
         winners = {}
-        pool = eligible[:]
-        random.shuffle(pool)
-
-        if first_uid and is_valid_username(first_uname):
+        if first_uid and first_uid in idx and is_valid_username(first_uname):
             winners[first_uid] = {"username": first_uname}
-            pool = [(u, n) for (u, n) in pool if u != first_uid]
 
-        for uid, uname in pool:
-            if len(winners) >= total:
-                break
+        for uid in idx.sample(total - len(winners), exclude=winners):
+            uname = ((participants.get(uid) or {}).get("username", "") or "").strip()
             winners[uid] = {"username": uname}
 
         # build preview text (admin)
-        gid = make_gid()
+        gid = g.gid
         ts = now_ts()
         snapshot = {
             "gid": gid,
-            "title": (data.get("title") or "").strip(),
-            "prize": (data.get("prize") or "").strip(),
+            "title": (g.get("title") or "").strip(),
+            "prize": (g.get("prize") or "").strip(),
             "winners": winners,
             "delivered": {},
             "created_ts": ts,
             "claim_expires_ts": ts + CLAIM_WINDOW_SECONDS,
             "winners_message_id": None,
+            "chat_id": g.chat_id,
         }
 
-        data["_pending_snapshot"] = snapshot
-        save_data()
+        g["_pending_snapshot"] = snapshot
+        save_data(g.path("_pending_snapshot"))
 
     preview_text = build_winners_post_text(
         gid=snapshot["gid"],
@@ -1324,19 +1870,69 @@ def draw_finalize(context: CallbackContext):
             chat_id=admin_chat_id,
             message_id=admin_msg_id,
             text=preview_text,
-            reply_markup=winners_approve_markup(),
+            reply_markup=winners_approve_markup(g.gid),
         )
     except Exception:
         context.bot.send_message(
             chat_id=admin_chat_id,
             text=preview_text,
-            reply_markup=winners_approve_markup(),
+            reply_markup=winners_approve_markup(g.gid),
         )
 
 
+def resume_draws(job_queue):
+    # draws cut off by a restart continue from their checkpoint (same
+    # post / progress message, remaining schedule); a draw whose time ran
+    # out meanwhile finalizes at its first tick
+    for g in giveaways.all():
+        if g.get("autodraw_state"):
+            run_autodraw_channel_progress(job_queue, g)
+        if g.get("draw_state"):
+            run_draw_progress(job_queue, g)
+
+
 # =========================================================
 # COMMANDS (ADMIN + USERS)
 # =========================================================
+def giveaway_status(g) -> str:
+    if g.get("active"):
+        return "RUNNING"
+    if g.get("closed"):
+        return "CLOSED"
+    return "DRAFT"
+
+
+def pick_giveaway(update: Update, context: CallbackContext, command: str, status=None, empty_text="", args=None):
+    """
+    /command <Giveaway ID> -> that giveaway.
+    /command               -> the only giveaway in `status`; with several
+                              running at once the admin gets the ID list.
+    Returns None after replying when nothing was picked. `args` overrides
+    the command arguments.
+    """
+    if args is None:
+        args = getattr(context, "args", None) or []
+    if args:
+        g = giveaways.get(args[0].strip())
+        if g is None:
+            update.message.reply_text(f"Giveaway not found: {args[0].strip()}")
+        return g
+
+    cands = [g for g in giveaways.all() if status is None or giveaway_status(g) == status]
+    if len(cands) == 1:
+        return cands[0]
+    if not cands:
+        if empty_text:
+            update.message.reply_text(empty_text)
+        return None
+
+    lines = ["Several giveaways match. Send the command with a Giveaway ID:", ""]
+    for g in cands:
+        lines.append(f"/{command} {g.gid} — {(g.get('title') or '').strip()} ({giveaway_status(g)})")
+    update.message.reply_text("\n".join(lines))
+    return None
+
+
 def cmd_start(update: Update, context: CallbackContext):
     u = update.effective_user
 
@@ -1401,10 +1997,11 @@ def cmd_panel(update: Update, context: CallbackContext):
     update.message.reply_text(
         "🛠 ADMIN CONTROL PANEL\n\n"
         "📌 GIVEAWAY\n"
-        "/newgiveaway\n"
-        "/participants\n"
-        "/endgiveaway\n"
-        "/draw\n"
+        "/newgiveaway [channel]\n"
+        "/giveaways\n"
+        "/participants [id] [@user | id]\n"
+        "/endgiveaway [id]\n"
+        "/draw [id]\n"
         "/autodraw\n\n"
         "✅ VERIFY SYSTEM\n"
         "/addverifylink\n"
@@ -1418,6 +2015,8 @@ def cmd_panel(update: Update, context: CallbackContext):
         "/prizeDelivered\n\n"
         "📜 WINNER HISTORY\n"
         "/winnerlist\n\n"
+        "📤 EXPORT\n"
+        "/export [participants | bans | winners] [csv | jsonl] [id]\n\n"
         "♻️ RESET\n"
         "/reset"
     )
@@ -1478,68 +2077,149 @@ def cmd_removeverifylink(update: Update, context: CallbackContext):
 
 
 def cmd_newgiveaway(update: Update, context: CallbackContext):
-    global admin_state, data
+    global admin_state, admin_draft_gid
     if not is_admin(update):
         return
 
-    stop_live_countdown()
-    stop_draw_jobs()
-    stop_auto_selection_job()
+    # optional channel: /newgiveaway -100123 or /newgiveaway @channel
+    args = getattr(context, "args", None) or []
+    chat_id = CHANNEL_ID
+    if args:
+        chat_id = channel_ref(args[0])
+        if not chat_id:
+            update.message.reply_text("Invalid channel. Use /newgiveaway -100... or /newgiveaway @channel")
+            return
 
     with lock:
-        keep_perma = data.get("permanent_block", {}) or {}
-        keep_verify = data.get("verify_targets", []) or {}
+        # an unposted draft is replaced; running giveaways are not touched
+        old = giveaways.get(admin_draft_gid)
+        if old is not None and giveaway_status(old) == "DRAFT":
+            giveaways.remove(old.gid)
+            save_data(("giveaways", old.gid))
 
-        data.clear()
-        data.update(fresh_default_data())
-        data["permanent_block"] = keep_perma
-        data["verify_targets"] = keep_verify
-        save_data()
+        gid = make_gid()
+        while gid in giveaways or gid in (data.get("history", {}) or {}) or gid in archive:
+            gid = make_gid()
+        giveaways.create(gid, fresh_giveaway(chat_id))
+        save_data(("giveaways", gid))
+        admin_draft_gid = gid
 
     admin_state = "title"
     update.message.reply_text(
         f"{LINE2}\n"
         "🆕 NEW GIVEAWAY SETUP\n"
         f"{LINE2}\n\n"
+        f"Giveaway ID: {gid}\n"
+        f"Channel: {chat_id}\n\n"
         "STEP 1 — GIVEAWAY TITLE\n\n"
         "Send Giveaway Title:"
     )
 
 
-def cmd_participants(update: Update, context: CallbackContext):
+def cmd_giveaways(update: Update, context: CallbackContext):
     if not is_admin(update):
         return
-    parts = data.get("participants", {}) or {}
-    if not parts:
-        update.message.reply_text("👥 Participants list is empty.")
+    items = giveaways.all()
+    if not items:
+        update.message.reply_text("No giveaways right now. Start one with /newgiveaway")
         return
 
+    lines = [LINE2, "📋 GIVEAWAYS", LINE2, ""]
+    for g in items:
+        lines.append(f"🆔 {g.gid} — {giveaway_status(g)}")
+        lines.append(f"   {(g.get('title') or '').strip() or 'Untitled'}")
+        lines.append(f"   Channel: {g.chat_id} | Participants: {participants_count(g)}")
+        lines.append("")
+    update.message.reply_text("\n".join(lines))
+
+
+def build_participants_page(g, page: int):
+    # renders one page straight from the participants table: O(page size)
+    with locks.participants:
+        parts = g["participants"]
+        total = len(parts)
+        pages = max(1, -(-total // PARTICIPANTS_PAGE_SIZE))
+        page = min(max(0, page), pages - 1)
+        start = page * PARTICIPANTS_PAGE_SIZE
+        rows = [parts.row(i) for i in range(start, min(total, start + PARTICIPANTS_PAGE_SIZE))]
+    if not rows:
+        return "👥 Participants list is empty.", None
+
     lines = [
         LINE2,
         "👥 PARTICIPANTS LIST (ADMIN)",
         LINE2,
-        f"Total Participants: {len(parts)}",
+        f"Giveaway ID: {g.gid}",
+        f"Total Participants: {total}  •  Page {page + 1}/{pages}",
         "",
     ]
-    i = 1
-    for uid, info in parts.items():
-        uname = (info or {}).get("username", "")
+    for i, (uid, uname, _) in enumerate(rows, start + 1):
         lines.append(f"{i}. {uname or 'N/A'} | User ID: {uid}")
-        i += 1
+    return "\n".join(lines), participants_page_markup(g.gid, page, pages)
 
-    update.message.reply_text("\n".join(lines))
+
+def build_participants_search(g, text: str):
+    # username / User ID prefix lookup (ParticipantTable.search, no scan);
+    # the index is sorted outside the participants lock
+    with locks.participants:
+        parts = g["participants"]
+    parts.prepare_search(locks.participants)
+    with locks.participants:
+        total, found = parts.search(text, PARTICIPANTS_PAGE_SIZE)
+        rows = [(i + 1,) + parts.row(i) for i in found]
+
+    lines = [
+        LINE2,
+        "👥 PARTICIPANTS SEARCH (ADMIN)",
+        LINE2,
+        f"Giveaway ID: {g.gid}",
+        f"🔎 Search: {text}",
+        f"Matches: {total}",
+        "",
+    ]
+    if total > len(rows):
+        lines.insert(-1, f"Showing {len(rows)} of them — send a longer prefix to narrow it down.")
+    if not rows:
+        lines.append("No participant matches.")
+    for i, uid, uname, _ in rows:
+        lines.append(f"{i}. {uname or 'N/A'} | User ID: {uid}")
+    return "\n".join(lines), participants_search_markup(g.gid)
+
+
+def cmd_participants(update: Update, context: CallbackContext):
+    if not is_admin(update):
+        return
+    # /participants [Giveaway ID] [@username | User ID prefix]
+    args = list(getattr(context, "args", None) or [])
+    search = ""
+    if args and args[0].strip() not in giveaways:
+        search, args = " ".join(args), []
+    elif len(args) > 1:
+        search, args = " ".join(args[1:]), args[:1]
+    g = pick_giveaway(update, context, "participants", empty_text="👥 Participants list is empty.", args=args)
+    if g is None:
+        return
+    if search:
+        text, markup = build_participants_search(g, search)
+    else:
+        text, markup = build_participants_page(g, 0)
+    update.message.reply_text(text, reply_markup=markup)
 
 
 def cmd_endgiveaway(update: Update, context: CallbackContext):
     if not is_admin(update):
         return
-    if not data.get("active"):
+    g = pick_giveaway(update, context, "endgiveaway", status="RUNNING",
+                      empty_text="No active giveaway is running right now.")
+    if g is None:
+        return
+    if not g.get("active"):
         update.message.reply_text("No active giveaway is running right now.")
         return
 
     kb = InlineKeyboardMarkup(
         [[
-            InlineKeyboardButton("✅ Confirm End", callback_data="end_confirm"),
+            InlineKeyboardButton("✅ Confirm End", callback_data=f"end_confirm:{g.gid}"),
             InlineKeyboardButton("❌ Cancel", callback_data="end_cancel"),
         ]]
     )
@@ -1547,6 +2227,8 @@ def cmd_endgiveaway(update: Update, context: CallbackContext):
         f"{LINE2}\n"
         "⚠️ END GIVEAWAY CONFIRMATION\n"
         f"{LINE2}\n\n"
+        f"Giveaway ID: {g.gid}\n"
+        f"{(g.get('title') or '').strip()}\n\n"
         "Are you sure you want to end this giveaway now?",
         reply_markup=kb
     )
@@ -1555,13 +2237,16 @@ def cmd_endgiveaway(update: Update, context: CallbackContext):
 def cmd_draw(update: Update, context: CallbackContext):
     if not is_admin(update):
         return
-    if not data.get("closed"):
+    g = pick_giveaway(update, context, "draw", status="CLOSED", empty_text="Giveaway is not closed yet.")
+    if g is None:
+        return
+    if not g.get("closed"):
         update.message.reply_text("Giveaway is not closed yet.")
         return
     if data.get("autodraw_enabled"):
         update.message.reply_text("Auto Draw is ON. Manual /draw is not required.")
         return
-    start_draw_progress(context, update.effective_chat.id)
+    start_draw_progress(context, update.effective_chat.id, g)
 
 
 def cmd_blockpermanent(update: Update, context: CallbackContext):
@@ -1577,7 +2262,8 @@ def cmd_blockpermanent(update: Update, context: CallbackContext):
         "User ID only OR username + id\n\n"
         "Examples:\n"
         "7297292\n"
-        "@MinexxProo | 7297292"
+        "@MinexxProo | 7297292\n\n"
+        "Large list? Upload it as a .txt / .csv file."
     )
 
 
@@ -1621,7 +2307,8 @@ def cmd_blocklist(update: Update, context: CallbackContext):
     lines.append("📌 BAN LISTS")
     lines.append(LINE2)
     lines.append("")
-    lines.append(f"OLD WINNER MODE: {data.get('old_winner_mode','skip').upper()}")
+    modes = sorted({(g.get("old_winner_mode") or "skip").upper() for g in giveaways.all()}) or ["SKIP"]
+    lines.append(f"OLD WINNER MODE: {' / '.join(modes)}")
     lines.append("")
 
     lines.append("⛔ OLD WINNER BLOCK LIST")
@@ -1669,13 +2356,14 @@ def cmd_winnerlist(update: Update, context: CallbackContext):
     if not is_admin(update):
         return
 
-    logs = data.get("winner_log", []) or []
+    # last 50 (older ones come from the archive)
+    logs = (data.get("winner_log", []) or [])[-50:]
+    if len(logs) < 50:
+        logs = archive.log_tail(50 - len(logs)) + logs
     if not logs:
         update.message.reply_text("No winner history found yet.")
         return
 
-    # last 50
-    logs = logs[-50:]
     lines = [LINE2, "📜 WINNER HISTORY", LINE2, ""]
     for i, row in enumerate(reversed(logs), start=1):
         lines.append(f"{i}) Giveaway ID: {row.get('gid','')}")
@@ -1698,11 +2386,218 @@ def cmd_reset(update: Update, context: CallbackContext):
     update.message.reply_text("Confirm reset?", reply_markup=kb)
 
 
+# =========================================================
+# EXPORT (CSV / JSONL DOCUMENT)
+# =========================================================
+EXPORT_COLLECTIONS = ("participants", "bans", "winners")
+
+
+def export_rows(what: str, g=None):
+    """(file name, columns, rows iterator, expected row count) for /export."""
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+
+    if what == "participants":
+        parts = g.get("participants")
+        with locks.participants:
+            total = len(parts)
+
+        def fetch(start, stop):
+            # a restart / relaunch swaps the table: the export ends there
+            if g.get("participants") is not parts:
+                return []
+            return [(i + 1,) + parts.row(i) for i in range(start, min(stop, len(parts)))]
+
+        rows = chunked(locks.participants, fetch, total, EXPORT_CHUNK_ROWS)
+        return f"participants-{g.gid}-{stamp}", ("n", "user_id", "username", "name"), rows, total
+
+    if what == "bans":
+        # ids are copied in one short hold, usernames read chunk by chunk
+        with locks.bans:
+            keys = [("permanent", uid) for uid in (data.get("permanent_block", {}) or {})]
+            keys += [("old_winner", uid) for uid in (data.get("old_winners", {}) or {})]
+
+        def fetch(start, stop):
+            lists = {"permanent": data.get("permanent_block", {}) or {},
+                     "old_winner": data.get("old_winners", {}) or {}}
+            out = []
+            for kind, uid in keys[start:stop]:
+                info = lists[kind].get(uid)
+                if info is not None:
+                    out.append((kind, uid, (info or {}).get("username", "")))
+            return out
+
+        rows = chunked(locks.bans, fetch, len(keys), EXPORT_CHUNK_ROWS)
+        return f"bans-{stamp}", ("list", "user_id", "username"), rows, len(keys)
+
+    # winner_log grows with every draw: archived rows first, then the ones
+    # in memory, read in chunks like participants
+    with locks.history:
+        archived = archive.log_count()
+        total = len(data.get("winner_log", []) or [])
+
+    def fetch(start, stop):
+        return [
+            (row.get("gid", ""), row.get("prize", ""), row.get("date", ""), row.get("username", ""), row.get("uid", ""))
+            for row in (data.get("winner_log", []) or [])[start:stop]
+        ]
+
+    def fetch_archived(start, stop):
+        return [
+            (row.get("gid", ""), row.get("prize", ""), row.get("date", ""), row.get("username", ""), row.get("uid", ""))
+            for row in archive.log_rows(start, stop)
+        ]
+
+    rows = itertools.chain(
+        chunked(locks.history, fetch_archived, archived, EXPORT_CHUNK_ROWS),
+        chunked(locks.history, fetch, total, EXPORT_CHUNK_ROWS),
+    )
+    return f"winners-{stamp}", ("giveaway_id", "prize", "date", "username", "user_id"), rows, archived + total
+
+
+def run_export(bot, chat_id, what: str, fmt: str, g=None):
+    # export worker thread: no state lock is held here (see export_rows)
+    try:
+        name, columns, rows, expected = export_rows(what, g)
+        exporter.export(
+            bot, chat_id, what, name, columns, rows, fmt=fmt, expected=expected,
+            caption=f"📤 {what.title()} export" + (f" | Giveaway ID: {g.gid}" if g is not None else "") + "\nRows: {rows}",
+        )
+    except Exception as e:
+        try:
+            bot.send_message(chat_id=chat_id, text=f"❌ Export failed: {e}")
+        except Exception:
+            pass
+
+
+def cmd_export(update: Update, context: CallbackContext):
+    if not is_admin(update):
+        return
+    # /export [participants | bans | winners] [csv | jsonl] [Giveaway ID]
+    what, fmt, rest = "participants", "csv", []
+    for arg in getattr(context, "args", None) or []:
+        low = arg.strip().lower()
+        if low in EXPORT_COLLECTIONS:
+            what = low
+        elif low in EXPORT_FORMATS:
+            fmt = low
+        else:
+            rest.append(arg)
+
+    g = None
+    if what == "participants":
+        g = pick_giveaway(update, context, "export", empty_text="👥 Participants list is empty.", args=rest[:1])
+        if g is None:
+            return
+
+    if not exporter.submit(what, run_export, context.bot, update.effective_chat.id, what, fmt, g):
+        update.message.reply_text(f"⏳ Another bulk job is running ({exporter.busy()}). Try again when it is done.")
+        return
+    update.message.reply_text(f"⏳ Exporting {what} as {fmt.upper()}... the file will be sent here.")
+
+
+# =========================================================
+# BAN LIST IMPORT (UPLOADED FILE)
+# =========================================================
+BAN_IMPORT_STATES = {"perma_block_list": "permanent_block", "old_winner_block_list": "old_winners"}
+BAN_IMPORT_TITLES = {"permanent_block": "PERMANENT BLOCK", "old_winners": "OLD WINNER BLOCK"}
+
+
+def ban_import_text(target: str, imp: BanImport, done: bool = False) -> str:
+    head = "✅ IMPORT DONE" if done else "📥 IMPORTING…"
+    return (
+        f"{LINE2}\n"
+        f"{head} ({BAN_IMPORT_TITLES[target]})\n"
+        f"{LINE2}\n\n"
+        f"Lines Read: {imp.lines}\n"
+        f"New Added: {len(imp.entries)}\n"
+        f"Already listed / repeated: {imp.duplicates}\n"
+        f"Invalid lines: {imp.invalid}"
+    )
+
+
+def run_ban_import(bot, file_id: str, target: str, chat_id, message_id):
+    # background worker: the file is parsed chunk by chunk, each chunk is
+    # checked against the ban lists under the bans region only; the new ids
+    # are committed at the end in one batched save_data
+    imp = BanImport(tag=user_tag)
+    last_edit = [0.0]
+
+    def status(text, force=False):
+        if not force and now_ts() - last_edit[0] < BAN_IMPORT_PROGRESS_INTERVAL:
+            return
+        last_edit[0] = now_ts()
+        try:
+            if force:
+                bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+            else:
+                with api_priority(COSMETIC):
+                    bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+        except Exception:
+            pass
+
+    try:
+        with downloaded(bot, file_id) as f:
+            for chunk in read_chunks(f, BAN_IMPORT_CHUNK_LINES):
+                pairs = imp.parse(chunk)
+                with locks.bans:
+                    known = [data.get("permanent_block", {}) or {}]
+                    if target == "old_winners":
+                        known.append(data.get("old_winners", {}) or {})
+                    imp.keep(pairs, *known)
+                status(ban_import_text(target, imp))
+
+        rows = {uid: {"username": uname} for uid, uname in imp.entries.items()}
+        with lock:
+            lst = data.get(target, {}) or {}
+            fresh = [uid for uid in rows if uid not in lst]
+            for uid in fresh:
+                lst[uid] = rows[uid]
+            data[target] = lst
+            if fresh:
+                save_data(*[(target, uid) for uid in fresh])
+            if target == "permanent_block":
+                index_ban(*fresh)
+        status(ban_import_text(target, imp, done=True), force=True)
+    except Exception as e:
+        status(f"❌ Ban list import failed: {e}", force=True)
+
+
+def admin_document_handler(update: Update, context: CallbackContext):
+    global admin_state
+    if not is_admin(update):
+        return
+    target = BAN_IMPORT_STATES.get(admin_state)
+    doc = update.message.document if update.message else None
+    if target is None or doc is None:
+        return
+
+    if not (doc.file_name or "").lower().endswith((".txt", ".csv")):
+        update.message.reply_text("Send a .txt or .csv file (one user per line).")
+        return
+    if (doc.file_size or 0) > BAN_IMPORT_MAX_BYTES:
+        update.message.reply_text(f"File is too large (max {BAN_IMPORT_MAX_BYTES // 2**20} MB).")
+        return
+
+    msg = update.message.reply_text("📥 Import queued…")
+    if not exporter.submit("ban import", run_ban_import, context.bot, doc.file_id, target, msg.chat_id, msg.message_id):
+        msg.edit_text(f"⏳ Another bulk job is running ({exporter.busy()}). Send the file again when it is done.")
+        return
+
+    if admin_state == "old_winner_block_list":
+        admin_state = "rules"
+        update.message.reply_text("Old winner block list is importing (progress above).\n\nNow send Giveaway Rules (multi-line):")
+    else:
+        admin_state = None
+
+
 # =========================================================
 # ADMIN TEXT FLOW
 # =========================================================
+SETUP_STATES = ("title", "prize", "winners", "duration", "old_winner_mode", "old_winner_block_list", "rules")
+
+
 def admin_text_handler(update: Update, context: CallbackContext):
-    global admin_state, data
+    global admin_state
     if not is_admin(update):
         return
     if admin_state is None:
@@ -1723,7 +2618,7 @@ def admin_text_handler(update: Update, context: CallbackContext):
             targets = data.get("verify_targets", []) or []
             targets.append({"ref": ref, "display": ref})
             data["verify_targets"] = targets
-            save_data()
+            save_data("verify_targets")
 
         update.message.reply_text(f"✅ Verify target added: {ref}")
         admin_state = None
@@ -1744,7 +2639,7 @@ def admin_text_handler(update: Update, context: CallbackContext):
 
             if n == 11:
                 data["verify_targets"] = []
-                save_data()
+                save_data("verify_targets")
                 admin_state = None
                 update.message.reply_text("✅ All verify targets removed.")
                 return
@@ -1755,25 +2650,31 @@ def admin_text_handler(update: Update, context: CallbackContext):
 
             removed = targets.pop(n - 1)
             data["verify_targets"] = targets
-            save_data()
+            save_data("verify_targets")
 
         admin_state = None
         update.message.reply_text(f"✅ Removed: {removed.get('display','')}")
         return
 
-    # GIVEAWAY SETUP FLOW
+    # GIVEAWAY SETUP FLOW (the draft created by /newgiveaway)
+    g = giveaways.get(admin_draft_gid)
+    if admin_state in SETUP_STATES and (g is None or giveaway_status(g) != "DRAFT"):
+        admin_state = None
+        update.message.reply_text("Giveaway setup expired. Start again with /newgiveaway")
+        return
+
     if admin_state == "title":
         with lock:
-            data["title"] = msg
-            save_data()
+            g["title"] = msg
+            save_data(g.path("title"))
         admin_state = "prize"
         update.message.reply_text("✅ Title saved.\n\nSend Giveaway Prize (multi-line allowed):")
         return
 
     if admin_state == "prize":
         with lock:
-            data["prize"] = msg
-            save_data()
+            g["prize"] = msg
+            save_data(g.path("prize"))
         admin_state = "winners"
         update.message.reply_text("✅ Prize saved.\n\nSend Total Winner Count (1 - 1000000):")
         return
@@ -1784,8 +2685,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             return
         count = max(1, min(1000000, int(msg)))
         with lock:
-            data["winner_count"] = count
-            save_data()
+            g["winner_count"] = count
+            save_data(g.path("winner_count"))
         admin_state = "duration"
         update.message.reply_text("✅ Winner count saved.\n\nSend Giveaway Duration (e.g. 30 Second / 5 Minute / 1 Hour):")
         return
@@ -1796,8 +2697,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             update.message.reply_text("Invalid duration. Example: 30 Second / 5 Minute / 1 Hour")
             return
         with lock:
-            data["duration_seconds"] = seconds
-            save_data()
+            g["duration_seconds"] = seconds
+            save_data(g.path("duration_seconds"))
 
         admin_state = "old_winner_mode"
         update.message.reply_text(
@@ -1817,17 +2718,17 @@ def admin_text_handler(update: Update, context: CallbackContext):
 
         if msg == "2":
             with lock:
-                data["old_winner_mode"] = "skip"
-                data["old_winners"] = {}
-                save_data()
+                g["old_winner_mode"] = "skip"
+                save_data(g.path("old_winner_mode"))
             admin_state = "rules"
             update.message.reply_text("✅ Old Winner Mode: SKIP\n\nNow send Giveaway Rules (multi-line):")
             return
 
+        # the old winner list is shared by every giveaway in "block" mode,
+        # so new entries are added to it instead of replacing it
         with lock:
-            data["old_winner_mode"] = "block"
-            data["old_winners"] = {}
-            save_data()
+            g["old_winner_mode"] = "block"
+            save_data(g.path("old_winner_mode"))
 
         admin_state = "old_winner_block_list"
         update.message.reply_text(
@@ -1836,7 +2737,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             f"{LINE2}\n\n"
             "Send old winners list (one per line):\n"
             "@username | user_id\n"
-            "or user_id"
+            "or user_id\n\n"
+            "Large list? Upload it as a .txt / .csv file."
         )
         return
 
@@ -1850,18 +2752,18 @@ def admin_text_handler(update: Update, context: CallbackContext):
             for uid, uname in entries:
                 ow[uid] = {"username": uname}
             data["old_winners"] = ow
-            save_data()
+            save_data(*[("old_winners", uid) for uid, _ in entries])
         admin_state = "rules"
         update.message.reply_text("✅ Old winner block list saved.\n\nNow send Giveaway Rules (multi-line):")
         return
 
     if admin_state == "rules":
         with lock:
-            data["rules"] = msg
-            save_data()
+            g["rules"] = msg
+            save_data(g.path("rules"))
         admin_state = None
         update.message.reply_text("✅ Rules saved.\n\nPreview:")
-        update.message.reply_text(build_preview_text(), reply_markup=preview_markup())
+        update.message.reply_text(build_preview_text(g), reply_markup=preview_markup(g.gid))
         return
 
     # PERMANENT BLOCK
@@ -1876,7 +2778,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             for uid, uname in entries:
                 perma[uid] = {"username": uname}
             data["permanent_block"] = perma
-            save_data()
+            save_data(*[("permanent_block", uid) for uid, _ in entries])
+            index_ban(*[uid for uid, _ in entries])
         admin_state = None
         update.message.reply_text(
             "✅ Permanent block saved.\n"
@@ -1897,7 +2800,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             if uid in perma:
                 del perma[uid]
                 data["permanent_block"] = perma
-                save_data()
+                save_data(("permanent_block", uid))
+                index_unban(uid)
                 update.message.reply_text("✅ Unbanned from Permanent Block.")
             else:
                 update.message.reply_text("This user is not in Permanent Block list.")
@@ -1915,13 +2819,31 @@ def admin_text_handler(update: Update, context: CallbackContext):
             if uid in ow:
                 del ow[uid]
                 data["old_winners"] = ow
-                save_data()
+                save_data(("old_winners", uid))
                 update.message.reply_text("✅ Unbanned from Old Winner Block.")
             else:
                 update.message.reply_text("This user is not in Old Winner Block list.")
         admin_state = None
         return
 
+    # PARTICIPANTS BROWSER (jump / search input)
+    if admin_state in ("participants_jump", "participants_search"):
+        g = giveaways.get(context.user_data.get("parts_gid", ""))
+        if g is None:
+            admin_state = None
+            update.message.reply_text("Giveaway not found.")
+            return
+        if admin_state == "participants_jump":
+            if not msg.isdigit():
+                update.message.reply_text("Send a page number.")
+                return
+            text, markup = build_participants_page(g, int(msg) - 1)
+        else:
+            text, markup = build_participants_search(g, msg)
+        admin_state = None
+        update.message.reply_text(text, reply_markup=markup)
+        return
+
     # PRIZE DELIVERED
     if admin_state == "prize_delivered_list":
         entries = parse_user_lines(msg)
@@ -1931,7 +2853,7 @@ def admin_text_handler(update: Update, context: CallbackContext):
 
         with lock:
             gid = data.get("latest_gid")
-            if not gid or gid not in (data.get("history", {}) or {}):
+            if not find_history(gid):
                 update.message.reply_text("No giveaway winners post found to update.")
                 admin_state = None
                 return
@@ -1949,10 +2871,12 @@ def admin_text_handler(update: Update, context: CallbackContext):
 
             snap["delivered"] = delivered
             data["history"][gid] = snap
-            save_data()
+            save_data(("history", gid, "delivered"))
+            publish_claims(gid)
 
         # update channel winners post
         mid = snap.get("winners_message_id")
+        chat_id = snap.get("chat_id") or CHANNEL_ID
         if mid:
             try:
                 text = build_winners_post_text(
@@ -1963,7 +2887,7 @@ def admin_text_handler(update: Update, context: CallbackContext):
                     delivered_map=snap.get("delivered", {}),
                 )
                 context.bot.edit_message_text(
-                    chat_id=CHANNEL_ID,
+                    chat_id=chat_id,
                     message_id=mid,
                     text=text,
                     reply_markup=claim_button_markup(gid),
@@ -1983,518 +2907,788 @@ def admin_text_handler(update: Update, context: CallbackContext):
 # =========================================================
 # CALLBACK HANDLER
 # =========================================================
-def cb_handler(update: Update, context: CallbackContext):
+def callback_giveaway(query, gid: str, fallback=None):
+    """
+    "join:<gid>" -> that giveaway. Buttons posted before giveaways had ids
+    carry none: they are matched by their channel message, or fall back to
+    the only candidate in `fallback`.
+    """
+    if gid:
+        return giveaways.get(gid)
+    msg = getattr(query, "message", None)
+    if msg is not None:
+        g = giveaways.by_message(getattr(msg, "chat_id", None), msg.message_id)
+        if g is not None:
+            return g
+    if fallback is not None and len(fallback) == 1:
+        return fallback[0]
+    return None
+
+
+callbacks = CallbackRouter(":", is_admin=lambda uid: uid == str(ADMIN_ID))
+
+
+# AutoDraw toggles
+@callbacks.route("autodraw_on", "autodraw_off", admin=True)
+def cb_autodraw_toggle(query, context, uid, arg):
+    on = query.data == "autodraw_on"
+    with lock:
+        data["autodraw_enabled"] = on
+        save_data("autodraw_enabled")
+    query.answer("Auto Draw turned ON ✅" if on else "Auto Draw turned OFF ⛔", show_alert=True)
+
+
+# Participants browser (admin): page buttons, jump / search prompts
+def parts_giveaway(query, arg):
+    # "<gid>:<page>" -> (giveaway, page); answers the query
+    gid, _, page = arg.partition(":")
+    g = giveaways.get(gid)
+    if g is None:
+        query.answer("Giveaway not found.", show_alert=True)
+    else:
+        query.answer()
+    return g, page
+
+
+@callbacks.route("parts_page", prefix=True, admin=True)
+def cb_parts_page(query, context, uid, arg):
+    g, page = parts_giveaway(query, arg)
+    if g is None:
+        return
+    text, markup = build_participants_page(g, int(page) if page.isdigit() else 0)
+    try:
+        query.edit_message_text(text, reply_markup=markup)
+    except Exception:
+        pass
+
+
+@callbacks.route("parts_jump", prefix=True, admin=True)
+def cb_parts_jump(query, context, uid, arg):
     global admin_state
-    query = update.callback_query
-    qd = query.data
-    uid = str(query.from_user.id)
+    g, _ = parts_giveaway(query, arg)
+    if g is None:
+        return
+    context.user_data["parts_gid"] = g.gid
+    admin_state = "participants_jump"
+    query.message.reply_text("🔢 Send a page number.")
 
-    # AutoDraw toggles
-    if qd == "autodraw_on":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        with lock:
-            data["autodraw_enabled"] = True
-            save_data()
-        query.answer("Auto Draw turned ON ✅", show_alert=True)
+
+@callbacks.route("parts_search", prefix=True, admin=True)
+def cb_parts_search(query, context, uid, arg):
+    global admin_state
+    g, _ = parts_giveaway(query, arg)
+    if g is None:
         return
+    context.user_data["parts_gid"] = g.gid
+    admin_state = "participants_search"
+    query.message.reply_text("🔎 Send a @username or User ID (a prefix is enough).")
 
-    if qd == "autodraw_off":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        with lock:
-            data["autodraw_enabled"] = False
-            save_data()
-        query.answer("Auto Draw turned OFF ⛔", show_alert=True)
+
+# Entry Rule
+@callbacks.route("entry_rule")
+def cb_entry_rule(query, context, uid, arg):
+    try:
+        query.answer(popup_entry_rule(), show_alert=True)
+    except Exception:
+        pass
+
+
+# Try Your Luck (Lucky Draw)
+def lucky_slot(window: int) -> str:
+    return f"lucky:{window}"
+
+
+def seed_lucky_slots(g):
+    # windows already won in this run (saved state) back into g.slots;
+    # lucky_draw_winner_uid is the single window of older data
+    with lock:
+        won = dict(g.get("lucky_winners") or {})
+        legacy = g.get("lucky_draw_winner_uid")
+        bonus = dict(g.get("autodraw_bonus_winners") or {})
+    if legacy and LUCKY_WINDOWS:
+        won.setdefault(str(LUCKY_WINDOWS[0]), legacy)
+    g.slots.seed({
+        lucky_slot(int(w)): (wuid, (bonus.get(wuid) or {}).get("username", "@username"))
+        for w, wuid in won.items()
+    })
+
+
+def record_lucky_winner(g, start_ts, window: int, uid: str, uname: str):
+    with lock:
+        if g.get("autodraw_start_ts") != start_ts:
+            return  # that auto selection is over
+        won = g.get("lucky_winners") or {}
+        won[str(window)] = uid
+        g["lucky_winners"] = won
+        b = g.get("autodraw_bonus_winners", {}) or {}
+        b[uid] = {"username": uname}
+        g["autodraw_bonus_winners"] = b
+        save_data(g.path("lucky_winners"), g.path("autodraw_bonus_winners", uid))
+
+
+@callbacks.route("try_luck", prefix=True)
+@clicks.guard("try_luck", transient=(popup_lucky_not_available(), popup_lucky_window_closed()))
+def cb_try_luck(query, context, uid, arg):
+    tg_user = query.from_user
+    uname = user_tag(tg_user.username or "")
+
+    if not is_valid_username(uname):
+        query.answer(popup_no_username_required(), show_alert=True)
         return
 
-    # Entry Rule
-    if qd == "entry_rule":
-        try:
-            query.answer(popup_entry_rule(), show_alert=True)
-        except Exception:
-            pass
+    g = callback_giveaway(query, arg)
+    if g is None:
+        query.answer(popup_lucky_not_available(), show_alert=True)
         return
 
-    # Try Your Luck (Lucky Draw)
-    if qd == "try_luck":
-        tg_user = query.from_user
-        uid_str = str(tg_user.id)
-        uname = user_tag(tg_user.username or "")
+    # plain reads, no lock: a click only needs the run's start time
+    mid = g.get("autodraw_message_id")
+    start_ts = g.get("autodraw_start_ts")
 
-        if not is_valid_username(uname):
-            query.answer(popup_no_username_required(), show_alert=True)
-            return
+    # must be running auto selection
+    if not mid or not start_ts:
+        query.answer(popup_lucky_not_available(), show_alert=True)
+        return
 
-        with lock:
-            mid = data.get("autodraw_message_id")
-            start_ts = data.get("autodraw_start_ts")
-            lucky_uid = data.get("lucky_draw_winner_uid")
-            bonus = data.get("autodraw_bonus_winners", {}) or {}
-
-        # must be running auto selection
-        if not mid or not start_ts:
-            query.answer("⏳ Not available right now.", show_alert=True)
+    elapsed = int(now_ts() - float(start_ts))
+    remaining = max(0, AUTO_DRAW_DURATION_SECONDS - elapsed)
+
+    # STRICT: allowed only during a window (one second each)
+    if remaining not in LUCKY_WINDOWS:
+        # show the winner of the window that just passed, if any
+        past = [w for w in LUCKY_WINDOWS if w > remaining]
+        held = g.slots.get(lucky_slot(past[-1])) if past else None
+        if held:
+            query.answer(popup_lucky_closed(held[1], held[0]), show_alert=True)
             return
+        query.answer(popup_lucky_window_closed(), show_alert=True)
+        return
 
-        elapsed = int(now_ts() - float(start_ts))
-        remaining = max(0, AUTO_DRAW_DURATION_SECONDS - elapsed)
+    # first click wins: compare-and-set on the window's slot, no lock
+    winner, w_uname, won = g.slots.claim(lucky_slot(remaining), uid, uname)
+    if winner != uid:
+        query.answer(popup_lucky_closed(w_uname, winner), show_alert=True)
+        return
 
-        # STRICT: allowed only when remaining == 08:48
-        if remaining != LUCKY_TRIGGER_REMAINING:
-            # show winner info if already taken
-            if lucky_uid and lucky_uid in bonus:
-                w_uname = bonus[lucky_uid].get("username", "@username")
-                query.answer(popup_lucky_closed(w_uname, lucky_uid), show_alert=True)
-                return
+    query.answer(popup_lucky_win(uname, uid), show_alert=True)
 
-            query.answer(
-                "⏰ LUCKY DRAW CLOSED\n\n"
-                "The Lucky Draw window has just ended.\n"
-                "This slot is no longer available.\n\n"
-                "Please wait for the final winners announcement.",
-                show_alert=True
-            )
-            return
+    # side-effect phase: the selection post picks the winner up next tick
+    if won:
+        side_effects.defer(record_lucky_winner, g, start_ts, remaining, uid, uname)
 
-        # first click wins (race-safe)
-        with lock:
-            # already taken
-            if data.get("lucky_draw_winner_uid"):
-                if data["lucky_draw_winner_uid"] == uid_str:
-                    query.answer(popup_lucky_win(uname, uid_str), show_alert=True)
-                    return
-
-                lucky_uid2 = data["lucky_draw_winner_uid"]
-                b2 = data.get("autodraw_bonus_winners", {}) or {}
-                w_uname = (b2.get(lucky_uid2, {}) or {}).get("username", "@username")
-                query.answer(popup_lucky_closed(w_uname, lucky_uid2), show_alert=True)
-                return
 
-            # save winner
-            data["lucky_draw_winner_uid"] = uid_str
-            b = data.get("autodraw_bonus_winners", {}) or {}
-            b[uid_str] = {"username": uname}
-            data["autodraw_bonus_winners"] = b
-            save_data()
+# Preview actions
+def preview_draft(query, arg):
+    # the draft a preview button belongs to, or None (query answered)
+    g = giveaways.get(arg or admin_draft_gid)
+    if g is None or giveaway_status(g) != "DRAFT":
+        query.answer("This preview is no longer available.", show_alert=True)
+        return None
+    return g
+
 
-        query.answer(popup_lucky_win(uname, uid_str), show_alert=True)
+def drop_draft(g):
+    global admin_draft_gid
+    with lock:
+        giveaways.remove(g.gid)
+        save_data(("giveaways", g.gid))
+        if admin_draft_gid == g.gid:
+            admin_draft_gid = None
+
+
+@callbacks.route("preview_approve", prefix=True, admin=True)
+def cb_preview_approve(query, context, uid, arg):
+    global admin_draft_gid
+    g = preview_draft(query, arg)
+    if g is None:
         return
+    query.answer()
+    try:
+        duration = int(g.get("duration_seconds", 0) or 1)
+        m = context.bot.send_message(
+            chat_id=g.chat_id,
+            text=build_live_text(g, duration),
+            reply_markup=join_button_markup(g.gid),
+        )
 
-    # Preview actions
-    if qd.startswith("preview_"):
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
+        with lock:
+            g["live_message_id"] = m.message_id
+            g["active"] = True
+            g["closed"] = False
+            g["start_time"] = now_ts()
+            g["closed_message_id"] = None
+
+            # reset per-giveaway state
+            g["participants"] = ParticipantTable()
+            g["first_winner_id"] = None
+            g["first_winner_username"] = ""
+            g["first_winner_name"] = ""
+
+            g["autodraw_message_id"] = None
+            g["autodraw_start_ts"] = None
+            g["autodraw_bonus_winners"] = {}
+            g["lucky_winners"] = {}
+            g["autodraw_state"] = None
+            g["autodraw_cursor"] = None
+            g["draw_state"] = None
+
+            g.slots.reset()
+
+            save_data(g.path())
+            if admin_draft_gid == g.gid:
+                admin_draft_gid = None
+
+        start_live_countdown(context.job_queue, g)
+        query.edit_message_text(f"✅ Giveaway approved and posted to channel.\nGiveaway ID: {g.gid}")
+    except Exception as e:
+        query.edit_message_text(f"Failed to post in channel. Make sure bot is admin.\nError: {e}")
+
+
+@callbacks.route("preview_reject", prefix=True, admin=True)
+def cb_preview_reject(query, context, uid, arg):
+    g = preview_draft(query, arg)
+    if g is None:
+        return
+    query.answer()
+    drop_draft(g)
+    query.edit_message_text("❌ Giveaway rejected.")
 
-        if qd == "preview_approve":
-            query.answer()
-            try:
-                duration = int(data.get("duration_seconds", 0) or 1)
-                m = context.bot.send_message(
-                    chat_id=CHANNEL_ID,
-                    text=build_live_text(duration),
-                    reply_markup=join_button_markup(),
-                )
 
-                with lock:
-                    data["live_message_id"] = m.message_id
-                    data["active"] = True
-                    data["closed"] = False
-                    data["start_time"] = now_ts()
-                    data["closed_message_id"] = None
-
-                    # reset per-giveaway state
-                    data["participants"] = {}
-                    data["first_winner_id"] = None
-                    data["first_winner_username"] = ""
-                    data["first_winner_name"] = ""
-
-                    data["autodraw_message_id"] = None
-                    data["autodraw_start_ts"] = None
-                    data["autodraw_bonus_winners"] = {}
-                    data["lucky_draw_winner_uid"] = None
-
-                    save_data()
-
-                start_live_countdown(context.job_queue)
-                query.edit_message_text("✅ Giveaway approved and posted to channel.")
-            except Exception as e:
-                query.edit_message_text(f"Failed to post in channel. Make sure bot is admin.\nError: {e}")
-            return
+@callbacks.route("preview_edit", prefix=True, admin=True)
+def cb_preview_edit(query, context, uid, arg):
+    g = preview_draft(query, arg)
+    if g is None:
+        return
+    query.answer()
+    drop_draft(g)
+    query.edit_message_text("✏️ Edit Mode\n\nStart again with /newgiveaway")
 
-        if qd == "preview_reject":
-            query.answer()
-            query.edit_message_text("❌ Giveaway rejected.")
-            return
 
-        if qd == "preview_edit":
-            query.answer()
-            query.edit_message_text("✏️ Edit Mode\n\nStart again with /newgiveaway")
-            return
+# End giveaway confirm/cancel
+@callbacks.route("end_confirm", prefix=True, admin=True)
+def cb_end_confirm(query, context, uid, arg):
+    query.answer()
 
-    # End giveaway confirm/cancel
-    if qd == "end_confirm":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
+    g = callback_giveaway(query, arg, fallback=giveaways.active())
+    with lock:
+        if g is None or not g.get("active"):
+            query.edit_message_text("No active giveaway is running right now.")
             return
-        query.answer()
+        g["active"] = False
+        g["closed"] = True
+        save_data(g.path("active"), g.path("closed"))
+        flush_data()
+        cluster_ingest(context.bot)
+
+    # delete live post
+    stop_live_post(g)
+    live_mid = g.get("live_message_id")
+    if live_mid:
+        try:
+            context.bot.delete_message(chat_id=g.chat_id, message_id=live_mid)
+        except Exception:
+            pass
 
+    # post closed post
+    try:
+        m = context.bot.send_message(chat_id=g.chat_id, text=build_closed_simple_text(g))
         with lock:
-            if not data.get("active"):
-                query.edit_message_text("No active giveaway is running right now.")
-                return
-            data["active"] = False
-            data["closed"] = True
-            save_data()
+            g["closed_message_id"] = m.message_id
+            save_data(g.path("closed_message_id"))
+    except Exception:
+        pass
 
-        # delete live post
-        live_mid = data.get("live_message_id")
-        if live_mid:
-            try:
-                context.bot.delete_message(chat_id=CHANNEL_ID, message_id=live_mid)
-            except Exception:
-                pass
+    stop_live_countdown(g)
 
-        # post closed post
+    # auto draw behavior
+    if data.get("autodraw_enabled"):
         try:
-            m = context.bot.send_message(chat_id=CHANNEL_ID, text=build_closed_simple_text())
-            with lock:
-                data["closed_message_id"] = m.message_id
-                save_data()
+            start_autodraw_channel_progress(context.job_queue, context.bot, g)
         except Exception:
             pass
+        query.edit_message_text("✅ Giveaway closed. Auto selection started in channel.")
+    else:
+        query.edit_message_text("✅ Giveaway closed. Use /draw (manual).")
 
-        stop_live_countdown()
 
-        # auto draw behavior
-        if data.get("autodraw_enabled"):
-            try:
-                start_autodraw_channel_progress(context.job_queue, context.bot)
-            except Exception:
-                pass
-            query.edit_message_text("✅ Giveaway closed. Auto selection started in channel.")
-        else:
-            query.edit_message_text("✅ Giveaway closed. Use /draw (manual).")
+@callbacks.route("end_cancel", admin=True)
+def cb_end_cancel(query, context, uid, arg):
+    query.answer()
+    query.edit_message_text("❌ Cancelled. Giveaway is still running.")
 
-        return
 
-    if qd == "end_cancel":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
-        query.edit_message_text("❌ Cancelled. Giveaway is still running.")
-        return
+# Reset confirm/cancel
+@callbacks.route("reset_confirm", admin=True)
+def cb_reset_confirm(query, context, uid, arg):
+    global admin_draft_gid
+    query.answer()
 
-    # Reset confirm/cancel
-    if qd == "reset_confirm":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
+    for g in giveaways.all():
+        stop_giveaway_jobs(g)
 
-        stop_live_countdown()
-        stop_draw_jobs()
-        stop_auto_selection_job()
+    with lock:
+        keep_perma = data.get("permanent_block", {}) or {}
+        keep_verify = data.get("verify_targets", []) or []
+        keep_hist = data.get("history", {}) or {}
+        keep_log = data.get("winner_log", []) or []
 
-        with lock:
-            keep_perma = data.get("permanent_block", {}) or {}
-            keep_verify = data.get("verify_targets", []) or []
-            keep_hist = data.get("history", {}) or {}
-            keep_log = data.get("winner_log", []) or []
+        data.clear()
+        data.update(fresh_default_data())
+        data["permanent_block"] = keep_perma
+        data["verify_targets"] = keep_verify
+        data["history"] = keep_hist
+        data["winner_log"] = keep_log
+        giveaways.bind(data)
+        publish_claims()
+        admin_draft_gid = None
+        save_data()
 
-            data.clear()
-            data.update(fresh_default_data())
-            data["permanent_block"] = keep_perma
-            data["verify_targets"] = keep_verify
-            data["history"] = keep_hist
-            data["winner_log"] = keep_log
-            save_data()
+    query.edit_message_text("✅ Reset completed. Start with /newgiveaway")
 
-        query.edit_message_text("✅ Reset completed. Start with /newgiveaway")
-        return
 
-    if qd == "reset_cancel":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
-        query.edit_message_text("❌ Reset cancelled.")
-        return
+@callbacks.route("reset_cancel", admin=True)
+def cb_reset_cancel(query, context, uid, arg):
+    query.answer()
+    query.edit_message_text("❌ Reset cancelled.")
 
-    # Unban choose
-    if qd == "unban_permanent":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
-        admin_state = "unban_permanent_input"
-        query.edit_message_text("Send User ID (or @name | id) to unban from Permanent Block:")
-        return
 
-    if qd == "unban_oldwinner":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
-        admin_state = "unban_oldwinner_input"
-        query.edit_message_text("Send User ID (or @name | id) to unban from Old Winner Block:")
-        return
+# Unban choose
+@callbacks.route("unban_permanent", admin=True)
+def cb_unban_permanent(query, context, uid, arg):
+    global admin_state
+    query.answer()
+    admin_state = "unban_permanent_input"
+    query.edit_message_text("Send User ID (or @name | id) to unban from Permanent Block:")
 
-    # removeban choose confirm
-    if qd in ("reset_permanent_ban", "reset_oldwinner_ban"):
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
 
-        if qd == "reset_permanent_ban":
-            kb = InlineKeyboardMarkup(
-                [[
-                    InlineKeyboardButton("✅ Confirm Reset Permanent", callback_data="confirm_reset_permanent"),
-                    InlineKeyboardButton("❌ Cancel", callback_data="cancel_reset_ban"),
-                ]]
-            )
-            query.edit_message_text("Confirm reset Permanent Ban List?", reply_markup=kb)
-            return
+@callbacks.route("unban_oldwinner", admin=True)
+def cb_unban_oldwinner(query, context, uid, arg):
+    global admin_state
+    query.answer()
+    admin_state = "unban_oldwinner_input"
+    query.edit_message_text("Send User ID (or @name | id) to unban from Old Winner Block:")
 
-        if qd == "reset_oldwinner_ban":
-            kb = InlineKeyboardMarkup(
-                [[
-                    InlineKeyboardButton("✅ Confirm Reset Old Winner", callback_data="confirm_reset_oldwinner"),
-                    InlineKeyboardButton("❌ Cancel", callback_data="cancel_reset_ban"),
-                ]]
-            )
-            query.edit_message_text("Confirm reset Old Winner Ban List?", reply_markup=kb)
-            return
 
-    if qd == "cancel_reset_ban":
-        query.answer()
-        admin_state = None
-        query.edit_message_text("Cancelled.")
+# removeban choose confirm
+@callbacks.route("reset_permanent_ban", admin=True)
+def cb_reset_permanent_ban(query, context, uid, arg):
+    query.answer()
+    kb = InlineKeyboardMarkup(
+        [[
+            InlineKeyboardButton("✅ Confirm Reset Permanent", callback_data="confirm_reset_permanent"),
+            InlineKeyboardButton("❌ Cancel", callback_data="cancel_reset_ban"),
+        ]]
+    )
+    query.edit_message_text("Confirm reset Permanent Ban List?", reply_markup=kb)
+
+
+@callbacks.route("reset_oldwinner_ban", admin=True)
+def cb_reset_oldwinner_ban(query, context, uid, arg):
+    query.answer()
+    kb = InlineKeyboardMarkup(
+        [[
+            InlineKeyboardButton("✅ Confirm Reset Old Winner", callback_data="confirm_reset_oldwinner"),
+            InlineKeyboardButton("❌ Cancel", callback_data="cancel_reset_ban"),
+        ]]
+    )
+    query.edit_message_text("Confirm reset Old Winner Ban List?", reply_markup=kb)
+
+
+@callbacks.route("cancel_reset_ban")
+def cb_cancel_reset_ban(query, context, uid, arg):
+    global admin_state
+    query.answer()
+    admin_state = None
+    query.edit_message_text("Cancelled.")
+
+
+@callbacks.route("confirm_reset_permanent", admin=True)
+def cb_confirm_reset_permanent(query, context, uid, arg):
+    query.answer()
+    with lock:
+        data["permanent_block"] = {}
+        save_data("permanent_block")
+        index_rebuild()
+    query.edit_message_text("✅ Permanent Ban List has been reset.")
+
+
+@callbacks.route("confirm_reset_oldwinner", admin=True)
+def cb_confirm_reset_oldwinner(query, context, uid, arg):
+    query.answer()
+    with lock:
+        data["old_winners"] = {}
+        save_data("old_winners")
+    query.edit_message_text("✅ Old Winner Ban List has been reset.")
+
+
+# Join giveaway ("join:<gid>"; plain "join_giveaway" on old posts)
+@callbacks.route("join", prefix=True)
+@callbacks.route("join_giveaway")
+@clicks.guard("join")
+def cb_join(query, context, uid, arg):
+    g = callback_giveaway(query, arg)
+    if g is None or not g.get("active"):
+        query.answer("This giveaway is not active right now.", show_alert=True)
         return
 
-    if qd == "confirm_reset_permanent":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
-        with lock:
-            data["permanent_block"] = {}
-            save_data()
-        query.edit_message_text("✅ Permanent Ban List has been reset.")
+    # decision phase: in-memory state (and the cached verify check)
+    # decides the popup; persistence and the live post edit run after
+    # the query has been answered
+
+    # permanent / old winner block
+    with locks.bans:
+        banned = uid in (data.get("permanent_block", {}) or {})
+        old_winner = uid in (data.get("old_winners", {}) or {})
+    if banned:
+        query.answer(popup_permanent_blocked(), show_alert=True)
+        return
+    if g.get("old_winner_mode") == "block" and old_winner:
+        query.answer(popup_old_winner_blocked(), show_alert=True)
         return
 
-    if qd == "confirm_reset_oldwinner":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
-        with lock:
-            data["old_winners"] = {}
-            save_data()
-        query.edit_message_text("✅ Old Winner Ban List has been reset.")
+    with locks.participants:
+        already = uid in (g.get("participants", {}) or {})
+    if already:
+        query.answer(popup_already_joined(), show_alert=True)
         return
 
-    # Join giveaway
-    if qd == "join_giveaway":
-        if not data.get("active"):
-            query.answer("This giveaway is not active right now.", show_alert=True)
-            return
+    # verify required targets (membership cache, network on a miss)
+    if not verify_user_join(context.bot, int(uid)):
+        query.answer(popup_verify_required(), show_alert=True)
+        return
 
-        # verify required targets
-        if not verify_user_join(context.bot, int(uid)):
-            query.answer(popup_verify_required(), show_alert=True)
-            return
+    tg_user = query.from_user
+    uname = user_tag(tg_user.username or "")
+    full_name = (tg_user.full_name or "").strip()
 
-        # permanent block
-        with lock:
-            if uid in (data.get("permanent_block", {}) or {}):
-                query.answer(popup_permanent_blocked(), show_alert=True)
-                return
+    # save participant (re-checked: a second click may have won the race)
+    with locks.participants:
+        paths = []
+        if uid not in (g.get("participants", {}) or {}):
+            paths = [g.path("participants", uid)]
 
-            # old winner block
-            if data.get("old_winner_mode") == "block":
-                if uid in (data.get("old_winners", {}) or {}):
-                    query.answer(popup_old_winner_blocked(), show_alert=True)
-                    return
+            # first join winner
+            if not g.get("first_winner_id"):
+                g["first_winner_id"] = uid
+                g["first_winner_username"] = uname
+                g["first_winner_name"] = full_name
+                paths += [g.path(k) for k in ("first_winner_id", "first_winner_username", "first_winner_name")]
+
+            g["participants"][uid] = {"username": uname, "name": full_name}
+            index_join(g, uid, uname)
+        first = g.get("first_winner_id") == uid
+
+    # popup
+    if not paths:
+        query.answer(popup_already_joined(), show_alert=True)
+        return
+    if first:
+        query.answer(popup_first_join(uname or "@username", uid), show_alert=True)
+    else:
+        query.answer(popup_join_success(uname or "@username", uid), show_alert=True)
 
-            # already joined?
-            if uid in (data.get("participants", {}) or {}):
-                query.answer(popup_already_joined(), show_alert=True)
-                return
+    # side-effect phase: journal record, then the live post (coalesced)
+    side_effects.defer(save_region, locks.participants, *paths)
+    side_effects.defer(request_live_edit, context.bot, g)
 
-        tg_user = query.from_user
-        uname = user_tag(tg_user.username or "")
-        full_name = (tg_user.full_name or "").strip()
 
-        # save participant
-        with lock:
-            # first join winner
-            if not data.get("first_winner_id"):
-                data["first_winner_id"] = uid
-                data["first_winner_username"] = uname
-                data["first_winner_name"] = full_name
+# Winners Approve/Reject (manual draw)
+@callbacks.route("winners_approve", prefix=True, admin=True)
+def cb_winners_approve(query, context, uid, arg):
+    query.answer()
 
-            data["participants"][uid] = {"username": uname, "name": full_name}
-            save_data()
+    g = callback_giveaway(query, arg, fallback=[x for x in giveaways.all() if x.get("_pending_snapshot")])
+    with lock:
+        snap = g.get("_pending_snapshot") if g is not None else None
+        if not snap:
+            query.edit_message_text("No pending winners snapshot found.")
+            return
+
+        gid = snap["gid"]
+        data["history"][gid] = snap
+        data["latest_gid"] = gid
 
-        # update live post
+        # clear pending
+        g.pop("_pending_snapshot", None)
+        save_data(("history", gid), "latest_gid", g.path("_pending_snapshot"))
+        publish_claims(gid)
+        flush_data()
+
+    # remove closed message from channel
+    with lock:
+        closed_mid = g.get("closed_message_id")
+    if closed_mid:
         try:
-            with lock:
-                live_mid = data.get("live_message_id")
-                start_ts = data.get("start_time")
-                duration = int(data.get("duration_seconds", 1) or 1)
-            if live_mid and start_ts:
-                start = datetime.utcfromtimestamp(start_ts)
-                elapsed = int((datetime.utcnow() - start).total_seconds())
-                remaining = max(0, duration - elapsed)
-                context.bot.edit_message_text(
-                    chat_id=CHANNEL_ID,
-                    message_id=live_mid,
-                    text=build_live_text(remaining),
-                    reply_markup=join_button_markup(),
-                )
+            context.bot.delete_message(chat_id=g.chat_id, message_id=closed_mid)
         except Exception:
             pass
-
-        # popup
         with lock:
-            if data.get("first_winner_id") == uid:
-                query.answer(popup_first_join(uname or "@username", uid), show_alert=True)
-            else:
-                query.answer(popup_join_success(uname or "@username", uid), show_alert=True)
-        return
+            g["closed_message_id"] = None
+            save_data(g.path("closed_message_id"))
 
-    # Winners Approve/Reject (manual draw)
-    if qd == "winners_approve":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
+    # post winners in channel
+    text = build_winners_post_text(
+        gid=gid,
+        title=snap.get("title", ""),
+        prize=snap.get("prize", ""),
+        winners_map=snap.get("winners", {}),
+        delivered_map=snap.get("delivered", {}),
+    )
 
+    try:
+        m = context.bot.send_message(chat_id=g.chat_id, text=text, reply_markup=claim_button_markup(gid))
         with lock:
-            snap = data.get("_pending_snapshot")
-            if not snap:
-                query.edit_message_text("No pending winners snapshot found.")
-                return
+            data["history"][gid]["winners_message_id"] = m.message_id
 
-            gid = snap["gid"]
-            data["history"][gid] = snap
-            data["latest_gid"] = gid
+            # winner log
+            ts = snap.get("created_ts", now_ts())
+            base = len(data["winner_log"])
+            for wuid, winfo in (snap.get("winners") or {}).items():
+                data["winner_log"].append({
+                    "gid": gid,
+                    "username": winfo.get("username", ""),
+                    "uid": wuid,
+                    "prize": snap.get("prize", ""),
+                    "date": format_date(ts),
+                })
+            save_data(
+                ("history", gid, "winners_message_id"),
+                *[("winner_log", i) for i in range(base, len(data["winner_log"]))]
+            )
+            publish_claims(gid)
+            flush_data()
 
-            # clear pending
-            data.pop("_pending_snapshot", None)
-            save_data()
+        query.edit_message_text("✅ Approved! Winners list posted to channel.")
+    except Exception as e:
+        query.edit_message_text(f"Failed to post winners in channel: {e}")
+    finish_giveaway(g)
 
-        # remove closed message from channel
-        with lock:
-            closed_mid = data.get("closed_message_id")
-        if closed_mid:
-            try:
-                context.bot.delete_message(chat_id=CHANNEL_ID, message_id=closed_mid)
-            except Exception:
-                pass
-            with lock:
-                data["closed_message_id"] = None
-                save_data()
-
-        # post winners in channel
-        text = build_winners_post_text(
-            gid=gid,
-            title=snap.get("title", ""),
-            prize=snap.get("prize", ""),
-            winners_map=snap.get("winners", {}),
-            delivered_map=snap.get("delivered", {}),
-        )
 
-        try:
-            m = context.bot.send_message(chat_id=CHANNEL_ID, text=text, reply_markup=claim_button_markup(gid))
-            with lock:
-                data["history"][gid]["winners_message_id"] = m.message_id
-
-                # winner log
-                ts = snap.get("created_ts", now_ts())
-                for wuid, winfo in (snap.get("winners") or {}).items():
-                    data["winner_log"].append({
-                        "gid": gid,
-                        "username": winfo.get("username", ""),
-                        "uid": wuid,
-                        "prize": snap.get("prize", ""),
-                        "date": format_date(ts),
-                    })
-                save_data()
-
-            query.edit_message_text("✅ Approved! Winners list posted to channel.")
-        except Exception as e:
-            query.edit_message_text(f"Failed to post winners in channel: {e}")
-        return
-
-    if qd == "winners_reject":
-        if uid != str(ADMIN_ID):
-            query.answer("Admin only.", show_alert=True)
-            return
-        query.answer()
+@callbacks.route("winners_reject", prefix=True, admin=True)
+def cb_winners_reject(query, context, uid, arg):
+    query.answer()
+    g = callback_giveaway(query, arg, fallback=[x for x in giveaways.all() if x.get("_pending_snapshot")])
+    if g is not None:
         with lock:
-            data.pop("_pending_snapshot", None)
-            save_data()
-        query.edit_message_text("❌ Rejected! Winners list will NOT be posted.")
+            g.pop("_pending_snapshot", None)
+            save_data(g.path("_pending_snapshot"))
+    query.edit_message_text("❌ Rejected! Winners list will NOT be posted.")
+
+
+# Claim Prize (per giveaway id)
+@callbacks.route("claim", prefix=True)
+@clicks.guard("claim")
+def cb_claim(query, context, uid, gid):
+    # immutable copy: never waits on joins or history writers
+    snap = claims.get(gid)
+
+    if not snap:
+        query.answer(popup_giveaway_completed(), show_alert=True)
         return
 
-    # Claim Prize (per giveaway id)
-    if qd.startswith("claim:"):
-        gid = qd.split(":", 1)[1].strip()
-        with lock:
-            hist = data.get("history", {}) or {}
-            snap = hist.get(gid)
+    winners_map = snap.get("winners", {}) or {}
+    delivered_map = snap.get("delivered", {}) or {}
+    exp = float(snap.get("claim_expires_ts") or 0)
 
-        if not snap:
+    # after long time => giveaway completed for everyone
+    if exp and now_ts() > exp + POST_COMPLETE_AFTER_SECONDS:
+        query.answer(popup_giveaway_completed(), show_alert=True)
+        return
+
+    # not winner
+    if uid not in winners_map:
+        # after expiry => completed (requested)
+        if exp and now_ts() > exp:
             query.answer(popup_giveaway_completed(), show_alert=True)
-            return
+        else:
+            query.answer(popup_claim_not_winner(), show_alert=True)
+        return
 
-        winners_map = snap.get("winners", {}) or {}
-        delivered_map = snap.get("delivered", {}) or {}
-        exp = float(snap.get("claim_expires_ts") or 0)
-        created = float(snap.get("created_ts") or 0)
+    uname = (winners_map.get(uid, {}) or {}).get("username", "@username")
 
-        # after long time => giveaway completed for everyone
-        if exp and now_ts() > exp + POST_COMPLETE_AFTER_SECONDS:
-            query.answer(popup_giveaway_completed(), show_alert=True)
-            return
+    # delivered?
+    if delivered_map.get(uid):
+        query.answer(popup_claim_delivered(uname, uid), show_alert=True)
+        return
 
-        # not winner
-        if uid not in winners_map:
-            # after expiry => completed (requested)
-            if exp and now_ts() > exp:
-                query.answer(popup_giveaway_completed(), show_alert=True)
-            else:
-                query.answer(popup_claim_not_winner(), show_alert=True)
-            return
+    # expired?
+    if exp and now_ts() > exp:
+        query.answer(popup_prize_expired(), show_alert=True)
+        return
 
-        uname = (winners_map.get(uid, {}) or {}).get("username", "@username")
+    query.answer(popup_claim_winner(uname, uid), show_alert=True)
 
-        # delivered?
-        if delivered_map.get(uid):
-            query.answer(popup_claim_delivered(uname, uid), show_alert=True)
-            return
 
-        # expired?
-        if exp and now_ts() > exp:
-            query.answer(popup_prize_expired(), show_alert=True)
-            return
+cb_handler = callbacks
+
+
+# =========================================================
+# CLUSTER (MULTI-PROCESS JOINS)
+# =========================================================
+# routes decided by the worker processes (cluster_forward hands them over)
+cluster_callbacks = CallbackRouter(":", is_admin=lambda uid: uid == str(ADMIN_ID))
+
+
+@cluster_callbacks.route("join", prefix=True)
+@cluster_callbacks.route("join_giveaway")
+@clicks.guard("join")
+def cb_cluster_join(query, context, uid, arg):
+    # worker process: cb_join against `shared` instead of `data`; the
+    # join itself is one sqlite transaction that rechecks run and bans
+    msg = getattr(query, "message", None)
+    run = shared.giveaway(
+        arg or None,
+        chat_id=getattr(msg, "chat_id", None) if msg is not None else None,
+        message_id=msg.message_id if msg is not None else None,
+    )
+    if run is None or not run["active"]:
+        query.answer("This giveaway is not active right now.", show_alert=True)
+        return
+
+    kinds = shared.bans(uid)
+    if "permanent" in kinds:
+        query.answer(popup_permanent_blocked(), show_alert=True)
+        return
+    if run["old_winner_mode"] == "block" and "old_winner" in kinds:
+        query.answer(popup_old_winner_blocked(), show_alert=True)
+        return
+
+    if shared.joined(run["gid"], uid):
+        query.answer(popup_already_joined(), show_alert=True)
+        return
 
-        query.answer(popup_claim_winner(uname, uid), show_alert=True)
+    if not verify_user_join(context.bot, int(uid), shared.meta("verify_targets", [])):
+        query.answer(popup_verify_required(), show_alert=True)
         return
 
+    tg_user = query.from_user
+    uname = user_tag(tg_user.username or "")
+    full_name = (tg_user.full_name or "").strip()
+
+    result, first_uid = shared.join(run["gid"], uid, uname, full_name)
+    if result == "inactive":
+        query.answer("This giveaway is not active right now.", show_alert=True)
+    elif result == "permanent":
+        query.answer(popup_permanent_blocked(), show_alert=True)
+    elif result == "old_winner":
+        query.answer(popup_old_winner_blocked(), show_alert=True)
+    elif result == "already":
+        query.answer(popup_already_joined(), show_alert=True)
+    elif first_uid == uid:
+        query.answer(popup_first_join(uname or "@username", uid), show_alert=True)
+    else:
+        query.answer(popup_join_success(uname or "@username", uid), show_alert=True)
+
+
+def cluster_forward(update, context):
+    # the callback handler in cluster mode: join clicks go to the worker
+    # owning the user, everything else is handled here
+    query = update.callback_query
+    r, _ = cluster_callbacks.resolve(query.data)
+    if r is None:
+        return callbacks(update, context)
+    if not cluster.submit(query.from_user.id, update.to_dict()):
+        # the user's worker is backed up: say so instead of holding this thread
+        query.answer(popup_busy(), show_alert=True)
+
+
+cluster_forward.route_label = callbacks.route_label
+
+
+def cluster_ingest(bot):
+    """Pull the joins the workers made since the last call into `data`."""
+    global cluster_seq
+    if shared is None:
+        return
+    touched = {}
+    while True:
+        rows = shared.joins_since(cluster_seq)
+        if not rows:
+            break
+        # a row pulled twice (close and job at once) is skipped the second time
+        found = {gid: giveaways.get(gid) for gid in {r[1] for r in rows}}
+        with locks.participants:
+            paths = []
+            for _, gid, uid, uname, full_name in rows:
+                g = found[gid]
+                if g is None or uid in g["participants"]:
+                    continue
+                g["participants"][uid] = {"username": uname, "name": full_name}
+                index_join(g, uid, uname)
+                paths.append(g.path("participants", uid))
+                touched[gid] = g
+
+            # first join winner, as decided by the workers
+            firsts = shared.first_joins([gid for gid, g in touched.items() if not g.get("first_winner_id")])
+            for gid, (uid, uname, full_name) in firsts.items():
+                g = touched[gid]
+                g["first_winner_id"] = uid
+                g["first_winner_username"] = uname
+                g["first_winner_name"] = full_name
+                paths += [g.path(k) for k in ("first_winner_id", "first_winner_username", "first_winner_name")]
+            if paths:
+                save_data(*paths)
+            cluster_seq = max(cluster_seq, rows[-1][0])
+    for g in touched.values():
+        request_live_edit(bot, g)
+
+
+@timed_job("cluster_ingest")
+def cluster_ingest_job(context: CallbackContext):
     try:
-        query.answer()
+        cluster_ingest(context.bot)
     except Exception:
         pass
 
 
+def cluster_worker_setup(make_bot, idx: int):
+    # runs in the forked worker: threads do not survive a fork, so the
+    # verify cache (and its pool) is created anew, with its own Bot
+    global membership
+    membership = MembershipCache(
+        positive_ttl=VERIFY_CACHE_TTL, negative_ttl=VERIFY_CACHE_NEGATIVE_TTL,
+        max_size=VERIFY_CACHE_SIZE, workers=VERIFY_WORKERS,
+    )
+    bot = make_bot()
+
+    def handle(payload: dict):
+        cluster_callbacks(Update.de_json(payload, bot), SimpleNamespace(bot=bot, user_data={}))
+    return handle
+
+
+def worker_bot():
+    return Bot(BOT_TOKEN, request=Request(con_pool_size=CLUSTER_THREADS + VERIFY_WORKERS))
+
+
+def start_cluster(make_bot=worker_bot):
+    """Open CLUSTER_DB, mirror `data` into it and fork the workers (before any other thread starts)."""
+    global shared, cluster, cluster_seq
+    shared = SharedState(CLUSTER_DB, fsync=JOURNAL_FSYNC)
+    with lock:
+        shared.snapshot(data)
+    # joins workers made before a restart are pulled again (known ones are skipped)
+    cluster_seq = 0
+    cluster = WorkerPool(
+        CLUSTER_WORKERS, partial(cluster_worker_setup, make_bot),
+        threads=CLUSTER_THREADS, queue_size=CLUSTER_QUEUE_SIZE,
+    ).start()
+
+
+def start_cluster_ingest(bot, job_queue):
+    cluster_ingest(bot)
+    job_queue.run_repeating(cluster_ingest_job, interval=CLUSTER_SYNC_INTERVAL, first=CLUSTER_SYNC_INTERVAL)
+
+
+def stop_cluster(bot):
+    global shared, cluster
+    if cluster is None:
+        return
+    cluster.stop()
+    cluster_ingest(bot)
+    shared.close()
+    shared = cluster = None
+
+
 # =========================================================
 # MAIN
 # =========================================================
@@ -2502,7 +3696,18 @@ def main():
     if not BOT_TOKEN:
         raise SystemExit("BOT_TOKEN missing in .env")
 
-    updater = Updater(BOT_TOKEN, use_context=True)
+    # cluster workers are forked first, while this is the only thread
+    if CLUSTER_WORKERS > 0:
+        start_cluster()
+
+    # every Bot API call is instrumented (calls / latency / errors by method);
+    # rate-limited ones go through the outbound gateway
+    gateway = ApiGateway(
+        global_rate=API_GLOBAL_RATE, chat_rate=API_CHAT_RATE, group_per_minute=API_GROUP_PER_MINUTE,
+        chat_burst=API_CHAT_BURST, workers=API_SENDERS, cosmetic_max_age=API_COSMETIC_MAX_AGE,
+    )
+    request = GatewayRequest(gateway, con_pool_size=8 + VERIFY_WORKERS + API_SENDERS)
+    updater = Updater(bot=Bot(BOT_TOKEN, request=request), use_context=True)
     dp = updater.dispatcher
 
     # base
@@ -2511,6 +3716,7 @@ def main():
 
     # giveaway
     dp.add_handler(CommandHandler("newgiveaway", cmd_newgiveaway))
+    dp.add_handler(CommandHandler("giveaways", cmd_giveaways))
     dp.add_handler(CommandHandler("participants", cmd_participants))
     dp.add_handler(CommandHandler("endgiveaway", cmd_endgiveaway))
     dp.add_handler(CommandHandler("draw", cmd_draw))
@@ -2530,20 +3736,45 @@ def main():
     dp.add_handler(CommandHandler("prizeDelivered", cmd_prize_delivered))
     dp.add_handler(CommandHandler("winnerlist", cmd_winnerlist))
 
+    # export
+    dp.add_handler(CommandHandler("export", cmd_export))
+
     # reset
     dp.add_handler(CommandHandler("reset", cmd_reset))
 
     # admin text handler + callbacks
     dp.add_handler(MessageHandler(Filters.text & ~Filters.command, admin_text_handler))
-    dp.add_handler(CallbackQueryHandler(cb_handler))
+    dp.add_handler(MessageHandler(Filters.document, admin_document_handler))
+    dp.add_handler(CallbackQueryHandler(cluster_forward if cluster is not None else cb_handler))
+    instrument_dispatcher(dp)
 
-    # resume systems after restart
-    if data.get("active"):
-        start_live_countdown(updater.job_queue)
+    if METRICS_PORT:
+        start_http_server(METRICS_LISTEN, METRICS_PORT)
 
-    print("Bot is running (ENGLISH, PTB v13 style) ...")
-    updater.start_polling()
-    updater.idle()
+    # resume systems after restart
+    for g in giveaways.active():
+        start_live_countdown(updater.job_queue, g)
+    resume_draws(updater.job_queue)
+    if cluster is not None:
+        start_cluster_ingest(updater.bot, updater.job_queue)
+    updater.job_queue.run_repeating(history_archive_job, interval=HISTORY_ARCHIVE_INTERVAL, first=0)
+
+    if UPDATE_MODE == "webhook":
+        server = WebhookServer(
+            dp, listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT, path=WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE,
+        )
+        run_webhook(updater, server, webhook_url=WEBHOOK_URL, max_connections=WEBHOOK_MAX_CONNECTIONS)
+    else:
+        print("Bot is running (ENGLISH, PTB v13 style) ...")
+        updater.start_polling()
+        updater.idle()
+    stop_cluster(updater.bot)
+    side_effects.close()
+    exporter.close()
+    membership.close()
+    store.close()
+    archive.close()
 
 
 if __name__ == "__main__":
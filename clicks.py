@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import wraps
+
+from metrics import counter
+
+CLICKS = counter("giveaway_user_clicks_total", "User button clicks by route and result (passed / suppressed).", ("route", "result"))
+
+
+class _Recorder:
+    """Callback query stand-in that remembers the popup it was answered with."""
+
+    __slots__ = ("query", "popup")
+
+    def __init__(self, query):
+        self.query = query
+        self.popup = None
+
+    def answer(self, text=None, show_alert=False, **kw):
+        self.popup = (text, show_alert) if text else None
+        return self.query.answer(text, show_alert=show_alert, **kw)
+
+    def __getattr__(self, name):
+        return getattr(self.query, name)
+
+
+# =========================================================
+# REPEAT CLICK LIMITER (USER BUTTONS)
+# =========================================================
+class ClickLimiter:
+    """
+    Per-user sliding window in front of the user buttons (join, claim,
+    lucky draw). Of the clicks one user makes on one button (route + arg),
+    at most `limit` per `window` seconds reach the handler; the others are
+    answered with the popup the last handled click got, straight from
+    memory: no state lock, no verify check, no Bot API call besides the
+    answer itself.
+
+    While `limit` clicks on a button are still inside the handler, repeats
+    get the `processing` popup instead of a second concurrent run.
+
+    Popups listed as `transient` for a route (the answer can change any
+    second, e.g. "not open yet") are not remembered, so the next click
+    goes through. Entries live in `shards` tables picked by user id, each
+    with its own lock and capped at max_size / shards entries (LRU).
+    window <= 0 turns the limiter off.
+    """
+
+    def __init__(self, window: float = 2.0, limit: int = 1, max_size: int = 100000,
+                 shards: int = 16, clock=time.monotonic,
+                 processing: str = "⏳ Still working on your last tap, one moment…"):
+        self.window = float(window)
+        self.limit = max(1, int(limit))
+        self.shards = max(1, int(shards))
+        self.shard_size = max(1, int(max_size) // self.shards)
+        self.clock = clock
+        self.processing = (processing, False)
+        self._tables = [OrderedDict() for _ in range(self.shards)]  # key -> [passed times, popup, in flight]
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+
+    def _shard(self, uid: str) -> int:
+        return hash(uid) % self.shards
+
+    def hit(self, uid: str, key):
+        """Popup to repeat for this click, or None when it should be handled."""
+        if self.window <= 0:
+            return None
+        i = self._shard(uid)
+        now = self.clock()
+        with self._locks[i]:
+            table = self._tables[i]
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = [deque(maxlen=self.limit), None, 0]
+                while len(table) > self.shard_size:
+                    table.popitem(last=False)
+            else:
+                table.move_to_end(key)
+            if entry[2] >= self.limit:
+                return self.processing
+            times = entry[0]
+            while times and times[0] <= now - self.window:
+                times.popleft()
+            if len(times) >= self.limit and entry[1] is not None:
+                return entry[1]
+            times.append(now)
+            entry[2] += 1
+            return None
+
+    def done(self, uid: str, key, popup):
+        """The handler of a click hit() let through returned; popup is what it answered."""
+        i = self._shard(uid)
+        with self._locks[i]:
+            entry = self._tables[i].get(key)
+            if entry is not None:
+                entry[1] = popup
+                entry[2] = max(0, entry[2] - 1)
+
+    def guard(self, route: str, transient=()):
+        """Decorator for router handlers fn(query, context, uid, arg)."""
+        transient = frozenset(transient)
+
+        def deco(fn):
+            @wraps(fn)
+            def wrapper(query, context, uid, arg):
+                key = (uid, route, arg)
+                popup = self.hit(uid, key)
+                if popup is not None:
+                    CLICKS.inc(route, "suppressed")
+                    try:
+                        query.answer(popup[0], show_alert=popup[1])
+                    except Exception:
+                        pass
+                    return None
+                CLICKS.inc(route, "passed")
+                rec = _Recorder(query)
+                try:
+                    return fn(rec, context, uid, arg)
+                finally:
+                    if self.window > 0:
+                        popup = rec.popup
+                        self.done(uid, key, None if popup is None or popup[0] in transient else popup)
+            return wrapper
+        return deco
+
+    def __len__(self):
+        return sum(len(t) for t in self._tables)
@@ -0,0 +1,454 @@
+import json
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+
+from metrics import REGISTRY, counter
+from storage import dump_json
+
+CLUSTER_UPDATES = counter("giveaway_cluster_updates_total", "Updates handed to worker processes, by result.", ("result",))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS giveaway (
+    gid             TEXT PRIMARY KEY,
+    active          INTEGER NOT NULL DEFAULT 0,
+    chat_id         TEXT,
+    message_id      INTEGER,
+    old_winner_mode TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS ban (
+    kind TEXT NOT NULL,
+    uid  TEXT NOT NULL,
+    PRIMARY KEY (kind, uid)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS participant (
+    seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+    gid      TEXT NOT NULL,
+    uid      TEXT NOT NULL,
+    username TEXT NOT NULL DEFAULT '',
+    name     TEXT NOT NULL DEFAULT '',
+    UNIQUE (gid, uid)
+);
+CREATE TABLE IF NOT EXISTS first_join (
+    gid      TEXT PRIMARY KEY,
+    uid      TEXT NOT NULL,
+    username TEXT NOT NULL DEFAULT '',
+    name     TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# data key -> ban kind
+BAN_KINDS = {"permanent_block": "permanent", "old_winners": "old_winner"}
+# giveaway fields the workers need to decide a join
+RUN_FIELDS = ("active", "chat_id", "live_message_id", "old_winner_mode")
+FIRST_FIELDS = ("first_winner_id", "first_winner_username", "first_winner_name")
+
+
+def _path(p) -> tuple:
+    return tuple(p) if isinstance(p, (tuple, list)) else (p,)
+
+
+# =========================================================
+# SHARED STATE (SQLITE WAL)
+# =========================================================
+class SharedState:
+    """
+    What worker processes need to decide a join, in one sqlite file
+    shared by all of them: giveaway runs (active, chat, old winner mode),
+    bans, verify targets, and the joins themselves.
+
+    The bot process keeps `data` as the source of truth for everything
+    else and mirrors the fields above from save_data() (record() /
+    snapshot(), same paths as the store), so a ban or a closed giveaway
+    is visible to every worker as soon as it is saved. Joins go the
+    other way: workers insert them here (join() decides the first joiner
+    and rechecks run and bans in the same write transaction) and the bot
+    process pulls them with joins_since().
+
+    One connection per thread and process (connections never cross a
+    fork).
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._local = threading.local()
+        with self._conn() as c:
+            c.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        loc = self._local
+        if getattr(loc, "pid", None) != os.getpid():
+            loc.pid = os.getpid()
+            loc.conn = None
+        if loc.conn is None:
+            c = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=" + ("FULL" if self.fsync else "NORMAL"))
+            loc.conn = c
+        return loc.conn
+
+    # ---------- bot process: mirror of data ----------
+    def record(self, data: dict, *paths):
+        """Mirror the given save_data() paths (caller holds their region lock)."""
+        paths = [p for p in map(_path, paths) if self._mirrored(p)]
+        if not paths:
+            return
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            for p in paths:
+                key = p[0]
+                if key in BAN_KINDS:
+                    self._put_bans(c, data, key, p[1:2])
+                elif key == "verify_targets":
+                    self._put_meta(c, key, data.get(key) or [])
+                elif len(p) == 1:
+                    self._put_giveaways(c, data)
+                else:
+                    self._put_giveaway(c, p[1], (data.get("giveaways") or {}).get(p[1]))
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _mirrored(p: tuple) -> bool:
+        if p[0] in BAN_KINDS or p[0] == "verify_targets":
+            return True
+        if p[0] != "giveaways":
+            return False
+        if len(p) <= 2:
+            return True
+        # single joins come from the workers; a replaced table is a new run
+        return p[2] in RUN_FIELDS or p[2] in FIRST_FIELDS or (p[2] == "participants" and len(p) == 3)
+
+    def snapshot(self, data: dict):
+        """Mirror everything (startup, bulk changes)."""
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            for key in BAN_KINDS:
+                self._put_bans(c, data, key, ())
+            self._put_meta(c, "verify_targets", data.get("verify_targets") or [])
+            self._put_giveaways(c, data)
+            for gid, state in (data.get("giveaways") or {}).items():
+                parts = (state or {}).get("participants")
+                if parts:
+                    c.executemany(
+                        "INSERT OR IGNORE INTO participant(gid, uid, username, name) VALUES(?, ?, ?, ?)",
+                        [(gid, uid, uname, name) for uid, uname, name in parts.rows()],
+                    )
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+
+    def _put_bans(self, c, data, key, uids):
+        kind = BAN_KINDS[key]
+        current = data.get(key) or {}
+        if not uids:
+            c.execute("DELETE FROM ban WHERE kind=?", (kind,))
+            c.executemany("INSERT INTO ban(kind, uid) VALUES(?, ?)", [(kind, str(u)) for u in current])
+            return
+        uid = str(uids[0])
+        if uid in current:
+            c.execute("INSERT OR IGNORE INTO ban(kind, uid) VALUES(?, ?)", (kind, uid))
+        else:
+            c.execute("DELETE FROM ban WHERE kind=? AND uid=?", (kind, uid))
+
+    def _put_meta(self, c, key, value):
+        c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", (key, dump_json(value)))
+
+    def _put_giveaways(self, c, data):
+        states = data.get("giveaways") or {}
+        gone = [r[0] for r in c.execute("SELECT gid FROM giveaway") if r[0] not in states]
+        for gid in gone:
+            self._put_giveaway(c, gid, None)
+        for gid, state in states.items():
+            self._put_giveaway(c, gid, state)
+
+    def _put_giveaway(self, c, gid, state):
+        if state is None:
+            for table in ("giveaway", "participant", "first_join"):
+                c.execute(f"DELETE FROM {table} WHERE gid=?", (gid,))
+            return
+        row = c.execute("SELECT active FROM giveaway WHERE gid=?", (gid,)).fetchone()
+        was_active = bool(row and row[0])
+        active = bool(state.get("active"))
+        c.execute(
+            "INSERT OR REPLACE INTO giveaway(gid, active, chat_id, message_id, old_winner_mode) VALUES(?, ?, ?, ?, ?)",
+            (gid, int(active), str(state.get("chat_id") or ""), state.get("live_message_id"),
+             str(state.get("old_winner_mode") or "")),
+        )
+        if not was_active and not (state.get("participants") or {}):
+            # a fresh run (approve / reset): no worker could join in between
+            c.execute("DELETE FROM participant WHERE gid=?", (gid,))
+            c.execute("DELETE FROM first_join WHERE gid=?", (gid,))
+        first = state.get("first_winner_id")
+        if first:
+            c.execute(
+                "INSERT OR IGNORE INTO first_join(gid, uid, username, name) VALUES(?, ?, ?, ?)",
+                (gid, str(first), state.get("first_winner_username") or "", state.get("first_winner_name") or ""),
+            )
+
+    # ---------- bot process: joins made by workers ----------
+    def joins_since(self, seq: int, limit: int = 10000) -> list:
+        """(seq, gid, uid, username, name) rows after `seq`, oldest first."""
+        cur = self._conn().execute(
+            "SELECT seq, gid, uid, username, name FROM participant WHERE seq > ? ORDER BY seq LIMIT ?",
+            (int(seq), int(limit)),
+        )
+        return cur.fetchall()
+
+    def last_seq(self) -> int:
+        row = self._conn().execute("SELECT MAX(seq) FROM participant").fetchone()
+        return int(row[0] or 0)
+
+    def first_joins(self, gids) -> dict:
+        c = self._conn()
+        out = {}
+        for gid in gids:
+            row = c.execute("SELECT uid, username, name FROM first_join WHERE gid=?", (gid,)).fetchone()
+            if row:
+                out[gid] = row
+        return out
+
+    # ---------- worker processes ----------
+    def giveaway(self, gid=None, chat_id=None, message_id=None):
+        """Run row of gid (or of the giveaway owning a channel message) as a dict, or None."""
+        c = self._conn()
+        if gid:
+            row = c.execute("SELECT gid, active, old_winner_mode FROM giveaway WHERE gid=?", (gid,)).fetchone()
+        elif message_id:
+            row = c.execute(
+                "SELECT gid, active, old_winner_mode FROM giveaway WHERE message_id=? AND (chat_id=? OR ?='')",
+                (message_id, str(chat_id or ""), str(chat_id or "")),
+            ).fetchone()
+        else:
+            row = None
+        if row is None:
+            return None
+        return {"gid": row[0], "active": bool(row[1]), "old_winner_mode": row[2]}
+
+    def bans(self, uid: str) -> set:
+        return {r[0] for r in self._conn().execute("SELECT kind FROM ban WHERE uid=?", (str(uid),))}
+
+    def meta(self, key: str, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def joined(self, gid: str, uid: str) -> bool:
+        c = self._conn()
+        return c.execute("SELECT 1 FROM participant WHERE gid=? AND uid=?", (gid, str(uid))).fetchone() is not None
+
+    def first(self, gid: str):
+        """(uid, username) of the first joiner, or None."""
+        return self._conn().execute("SELECT uid, username FROM first_join WHERE gid=?", (gid,)).fetchone()
+
+    def join(self, gid: str, uid: str, username: str, name: str):
+        """
+        Add uid to gid in one write transaction. Returns (result, first uid):
+        result is "joined", "already", "inactive", "permanent" or
+        "old_winner" (the run and bans are checked again under the write
+        lock, so a ban or close saved before this commits wins).
+        """
+        uid = str(uid)
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            row = c.execute("SELECT active, old_winner_mode FROM giveaway WHERE gid=?", (gid,)).fetchone()
+            kinds = {r[0] for r in c.execute("SELECT kind FROM ban WHERE uid=?", (uid,))}
+            if row is None or not row[0]:
+                result = "inactive"
+            elif "permanent" in kinds:
+                result = "permanent"
+            elif row[1] == "block" and "old_winner" in kinds:
+                result = "old_winner"
+            else:
+                cur = c.execute(
+                    "INSERT OR IGNORE INTO participant(gid, uid, username, name) VALUES(?, ?, ?, ?)",
+                    (gid, uid, username, name),
+                )
+                result = "joined" if cur.rowcount == 1 else "already"
+                if result == "joined":
+                    c.execute(
+                        "INSERT OR IGNORE INTO first_join(gid, uid, username, name) VALUES(?, ?, ?, ?)",
+                        (gid, uid, username, name),
+                    )
+            first = c.execute("SELECT uid FROM first_join WHERE gid=?", (gid,)).fetchone()
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        return result, (first[0] if first else None)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+
+# =========================================================
+# WORKER PROCESSES
+# =========================================================
+def _counter_deltas(last: dict, now: dict) -> dict:
+    out = {}
+    for name, values in now.items():
+        old = last.get(name, {})
+        d = {k: v - old.get(k, 0) for k, v in values.items() if v != old.get(k, 0)}
+        if d:
+            out[name] = d
+    return out
+
+
+def _report(stats, last: dict) -> dict:
+    # counter increments since `last` to the parent; returns the new baseline
+    now = REGISTRY.counters()
+    deltas = _counter_deltas(last, now)
+    if deltas:
+        stats.put(deltas)
+    return now
+
+
+def _worker_main(idx: int, q, setup, threads: int, done, stats, interval: float):
+    last = REGISTRY.counters()  # values inherited at the fork are the parent's
+    handle = setup(idx)
+
+    def loop():
+        while True:
+            payload = q.get()
+            if payload is None:
+                return
+            try:
+                handle(payload)
+            except Exception:
+                CLUSTER_UPDATES.inc("error")
+            with done.get_lock():
+                done.value += 1
+
+    ts = [threading.Thread(target=loop, name=f"cluster-{idx}-{i}", daemon=True) for i in range(threads)]
+    for t in ts:
+        t.start()
+    stopping = threading.Event()
+
+    def reporter():
+        nonlocal last
+        while not stopping.wait(interval):
+            last = _report(stats, last)
+
+    r = threading.Thread(target=reporter, name=f"cluster-{idx}-stats", daemon=True)
+    r.start()
+    for t in ts:
+        t.join()
+    stopping.set()
+    r.join()
+    _report(stats, last)
+
+
+class WorkerPool:
+    """
+    `workers` forked processes, each running `threads` handler threads.
+    submit() picks the process by key (the user id), so one user's clicks
+    keep their order and always meet the same per-process caches.
+
+    setup(idx) runs in the child right after the fork and returns the
+    handle(payload) callable; being forked, the child starts from the
+    parent's module state and must open its own connections / Bot there.
+    start() must run before the process starts any other thread: a lock
+    another thread holds at the fork (a queue, logging, metrics) stays
+    held forever in the child.
+
+    Queues are bounded and submit() never waits: when the user's worker
+    is full it returns False and the caller answers the click itself.
+
+    Counters the workers bump (clicks, Bot API calls, errors) are sent to
+    the parent every `stats_interval` seconds and added to its registry,
+    so /metrics covers the whole cluster. Histograms stay per process.
+
+    Scaling: a worker only takes the verify check and the join write off
+    the bot process; the update still goes through the bot process (parse,
+    route, pickle onto a pipe) and every join is a sqlite write
+    transaction on CLUSTER_DB, serialized across workers, that the bot
+    process reads back. On one CPU that overhead is pure cost: in
+    loadtest.py (5000 joins) one process does about 2300 joins/s, two
+    workers about 1300 and four about 1200. Workers pay off only with
+    spare cores and Bot API latency (getChatMember) to overlap, which is
+    why CLUSTER_WORKERS defaults to 0.
+    """
+
+    def __init__(self, workers: int, setup, threads: int = 4, queue_size: int = 1000,
+                 stats_interval: float = 5.0):
+        self.workers = max(1, int(workers))
+        self.threads = max(1, int(threads))
+        self.setup = setup
+        ctx = multiprocessing.get_context("fork")
+        per_worker = max(1, int(queue_size) // self.workers)
+        self._queues = [ctx.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._done = ctx.Value("q", 0)
+        self._submitted = 0
+        self._submitted_lock = threading.Lock()
+        self._stats = ctx.Queue()  # counter deltas from the workers
+        self._merger = None
+        args = (self.threads, self._done, self._stats, max(0.1, float(stats_interval)))
+        self._procs = [
+            ctx.Process(target=_worker_main, args=(i, q, setup) + args, name=f"cluster-worker-{i}", daemon=True)
+            for i, q in enumerate(self._queues)
+        ]
+
+    def start(self):
+        if threading.active_count() > 1:
+            raise RuntimeError("WorkerPool.start() must run before any other thread is started")
+        for p in self._procs:
+            p.start()
+        self._merger = threading.Thread(target=self._merge, name="cluster-stats", daemon=True)
+        self._merger.start()
+        return self
+
+    def _merge(self):
+        while True:
+            deltas = self._stats.get()
+            if deltas is None:
+                return
+            REGISTRY.add_counters(deltas)
+
+    def submit(self, key: int, payload: dict) -> bool:
+        try:
+            self._queues[int(key) % self.workers].put_nowait(payload)
+        except queue.Full:
+            CLUSTER_UPDATES.inc("rejected")
+            return False
+        CLUSTER_UPDATES.inc("submitted")
+        with self._submitted_lock:
+            self._submitted += 1
+        return True
+
+    def submitted(self) -> int:
+        """Updates handed to the workers so far."""
+        return self._submitted
+
+    def handled(self) -> int:
+        """Updates the workers finished (handled or failed) so far."""
+        return self._done.value
+
+    def stop(self, timeout: float = 10.0):
+        # workers drain what was already queued
+        for q in self._queues:
+            for _ in range(self.threads):
+                q.put(None)
+        for p in self._procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        # their last counter deltas are queued ahead of this
+        if self._merger is not None:
+            self._stats.put(None)
+            self._merger.join(timeout)
+            self._merger = None
@@ -0,0 +1,104 @@
+import random
+from array import array
+
+
+# =========================================================
+# ELIGIBLE PARTICIPANTS INDEX
+# =========================================================
+class EligibleIndex:
+    """
+    Ids of the participants a draw may pick (valid @username, not banned),
+    maintained at join / ban time instead of rescanning the participants
+    dict at every draw.
+
+    Ids live in one contiguous array('q'); `_slots` is an open-addressing
+    hash index id -> position (as in ParticipantTable, no int objects or
+    dict entry per id), so discard() moves the last id into the hole
+    (O(1)) and sample(k) picks k random positions (O(k)) without copying
+    the array. `source` is the participants dict the index was built
+    from: when a giveaway gets a new dict (restart, relaunch) the index
+    is rebuilt.
+    """
+
+    EMPTY, DELETED = -1, -2
+
+    def __init__(self, source=None, uids=()):
+        self.source = source
+        self._ids = array("q")
+        self._slots = array("q", [self.EMPTY]) * 8
+        self._used = 0  # filled + deleted slots
+        for uid in uids:
+            self.add(uid)
+
+    def _probe(self, key: int) -> int:
+        # slot holding `key`, or the empty slot it would go into
+        slots, ids = self._slots, self._ids
+        mask = len(slots) - 1
+        perturb = key & 0x7FFFFFFFFFFFFFFF
+        i = perturb & mask
+        while True:
+            r = slots[i]
+            if r == self.EMPTY or (r >= 0 and ids[r] == key):
+                return i
+            perturb >>= 5
+            i = (i * 5 + perturb + 1) & mask
+
+    def _reindex(self):
+        # drops deleted slots; at most a quarter full afterwards
+        size = 8
+        while size < 4 * len(self._ids):
+            size *= 2
+        self._slots = array("q", [self.EMPTY]) * size
+        for pos, key in enumerate(self._ids):
+            self._slots[self._probe(key)] = pos
+        self._used = len(self._ids)
+
+    def add(self, uid) -> bool:
+        key = int(uid)
+        slot = self._probe(key)
+        if self._slots[slot] >= 0:
+            return False
+        self._slots[slot] = len(self._ids)
+        self._ids.append(key)
+        self._used += 1
+        if 2 * self._used > len(self._slots):
+            self._reindex()
+        return True
+
+    def discard(self, uid) -> bool:
+        try:
+            key = int(uid)
+        except (TypeError, ValueError):
+            return False
+        slot = self._probe(key)
+        i = self._slots[slot]
+        if i < 0:
+            return False
+        self._slots[slot] = self.DELETED
+        last = len(self._ids) - 1
+        if i < last:
+            key = self._ids[last]
+            self._slots[self._probe(key)] = i
+            self._ids[i] = key
+        self._ids.pop()
+        return True
+
+    def __contains__(self, uid):
+        try:
+            return self._slots[self._probe(int(uid))] >= 0
+        except (TypeError, ValueError):
+            return False
+
+    def __len__(self):
+        return len(self._ids)
+
+    def sample(self, k: int, exclude=(), rnd=random) -> list:
+        """Up to k distinct random ids (str), none of them in `exclude`."""
+        skip = {int(u) for u in exclude if u in self}
+        n = len(self._ids)
+        k = max(0, min(int(k), n - len(skip)))
+        if not k:
+            return []
+        slots = rnd.sample(range(n), k + len(skip))
+        out = [str(self._ids[i]) for i in slots if self._ids[i] not in skip]
+        return out[:k]
@@ -0,0 +1,144 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import counter, histogram
+
+EXPORTS = counter("giveaway_exports_total", "/export runs by collection and outcome.", ("what", "outcome"))
+EXPORT_SECONDS = histogram("giveaway_export_seconds", "Time to write one /export file.", ("what",))
+
+FORMATS = ("csv", "jsonl")
+
+
+def chunked(region, fetch, total: int, size: int = 5000):
+    """
+    Rows of a collection read `size` at a time: fetch(start, stop) runs
+    under `region` for each slice of 0..total and returns that slice's
+    rows (fewer when the collection shrank meanwhile). The lock is dropped
+    between chunks, so writers wait for one chunk, never for the export.
+    """
+    size = max(1, int(size))
+    for start in range(0, max(0, int(total)), size):
+        with region:
+            rows = fetch(start, min(start + size, total))
+        yield from rows
+
+
+# leading characters a spreadsheet reads as a formula (user-chosen names
+# and titles end up in these cells)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def write_rows(path: str, columns, rows, fmt: str = "csv", compress: bool = False) -> int:
+    """Stream `rows` (tuples in `columns` order) into `path`; returns the row count."""
+    raw = gzip.open(path, "wb", compresslevel=6) if compress else open(path, "wb")
+    n = 0
+    with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            for row in rows:
+                f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                f.write("\n")
+                n += 1
+        else:
+            w = csv.writer(f)
+            w.writerow(columns)
+            for row in rows:
+                w.writerow([csv_cell(v) for v in row])
+                n += 1
+    return n
+
+
+# =========================================================
+# BACKGROUND EXPORTS
+# =========================================================
+class Exporter:
+    """
+    Runs /export jobs (and other bulk admin jobs: ban list imports) on
+    one background thread, one at a time: a large export reads its
+    collection in chunks (see chunked()) instead of holding the state
+    lock while the file is written and uploaded.
+
+    Files go to a temporary directory and are removed once sent. Exports
+    expected to have at least `gzip_rows` rows are gzip-compressed;
+    files over `max_bytes` (Telegram's upload limit) are not sent.
+    """
+
+    def __init__(self, gzip_rows: int = 50000, max_bytes: int = 50 * 2**20, tmpdir=None):
+        self.gzip_rows = max(0, int(gzip_rows))
+        self.max_bytes = int(max_bytes)
+        self.tmpdir = tmpdir
+        self._pool = None
+        self._busy = None  # label of the running export
+        self._lock = threading.Lock()
+
+    def busy(self):
+        return self._busy
+
+    def submit(self, label: str, fn, *args) -> bool:
+        """Start fn(*args) in the background; False when an export is running."""
+        with self._lock:
+            if self._busy is not None:
+                return False
+            self._busy = label
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+            pool = self._pool
+        pool.submit(self._run, fn, args)
+        return True
+
+    def _run(self, fn, args):
+        try:
+            fn(*args)
+        finally:
+            with self._lock:
+                self._busy = None
+
+    def export(self, bot, chat_id, what: str, name: str, columns, rows, fmt: str = "csv",
+               expected: int = 0, caption: str = "") -> int:
+        """
+        Write `rows` to <name>.<fmt>[.gz] and send it to chat_id. Returns the
+        row count; raises on failure (the file is removed either way).
+        """
+        fmt = fmt if fmt in FORMATS else "csv"
+        compress = expected >= self.gzip_rows
+        filename = f"{name}.{fmt}" + (".gz" if compress else "")
+        fd, path = tempfile.mkstemp(prefix="export-", suffix="-" + filename, dir=self.tmpdir)
+        os.close(fd)
+        outcome = "error"
+        try:
+            with EXPORT_SECONDS.time(what):
+                n = write_rows(path, columns, rows, fmt, compress)
+            size = os.path.getsize(path)
+            if size > self.max_bytes:
+                outcome = "too_large"
+                raise ValueError(f"{filename} is {size / 2**20:.1f} MB, over the {self.max_bytes / 2**20:.0f} MB upload limit")
+            with open(path, "rb") as f:
+                bot.send_document(
+                    chat_id=chat_id, document=f, filename=filename,
+                    caption=(caption or "").format(rows=n),
+                )
+            outcome = "sent"
+            return n
+        finally:
+            EXPORTS.inc(what, outcome)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -0,0 +1,274 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from telegram.error import RetryAfter, TelegramError
+
+from metrics import InstrumentedRequest, counter
+
+# priority classes (lower goes first)
+ANSWER = 0    # callback answers (not in LIMITED: sent directly, never queued)
+POST = 1      # sends: winner posts, closed posts, admin replies
+NORMAL = 2    # other edits, deletes, pins
+COSMETIC = 3  # progress / countdown edits: merged per message, dropped when stale
+
+PRIORITY_NAMES = ("answer", "post", "normal", "cosmetic")
+
+# methods that count against Telegram's message limits go through the queue
+LIMITED = {
+    "sendMessage": POST,
+    "sendDocument": POST,
+    "sendPhoto": POST,
+    "copyMessage": POST,
+    "forwardMessage": POST,
+    "editMessageText": NORMAL,
+    "editMessageReplyMarkup": NORMAL,
+    "deleteMessage": NORMAL,
+    "pinChatMessage": NORMAL,
+    "unpinChatMessage": NORMAL,
+}
+# everything else (answerCallbackQuery, getChatMember, getUpdates ...) is
+# sent directly from the calling thread
+
+GATEWAY_QUEUED = counter("giveaway_api_gateway_requests_total", "Outbound requests by priority and outcome.",
+                         ("priority", "outcome"))
+
+_local = threading.local()
+
+
+@contextmanager
+def api_priority(priority: int):
+    """Bot API calls made inside this block use `priority`."""
+    prev = getattr(_local, "priority", None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = prev
+
+
+class Dropped(TelegramError):
+    """A queued cosmetic edit was older than the gateway's max age."""
+
+
+# =========================================================
+# TOKEN BUCKET
+# =========================================================
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self.blocked_until = 0.0  # RetryAfter from Telegram
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def ready_at(self, now: float) -> float:
+        """Monotonic time a token is available (<= now: right away)."""
+        self._refill(now)
+        at = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(at, self.blocked_until)
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class _Request:
+    __slots__ = ("priority", "chat", "merge_key", "fn", "futures", "created", "tries")
+
+    def __init__(self, priority, chat, merge_key, fn, future):
+        self.priority = priority
+        self.chat = chat
+        self.merge_key = merge_key
+        self.fn = fn
+        self.futures = [future]
+        self.created = time.monotonic()
+        self.tries = 0
+
+
+# =========================================================
+# OUTBOUND GATEWAY
+# =========================================================
+class ApiGateway:
+    """
+    Priority queue in front of the rate-limited Bot API methods.
+
+    A request is sent when both the global bucket and its chat's bucket
+    have a token. Higher classes go first, and each chat has at most one
+    request in flight, so its messages keep their order. A cosmetic
+    edit replaces a still-queued edit of the same message: both callers
+    get the result of the newer one. Cosmetic edits older than
+    `cosmetic_max_age` are dropped. RetryAfter blocks the chat for the
+    server-given delay and requeues the request, up to `max_retries`.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, group_per_minute: float = 20,
+                 chat_burst: float = 3, workers: int = 4, cosmetic_max_age: float = 30, max_retries: int = 3):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = float(chat_rate)
+        self.group_rate = float(group_per_minute) / 60.0
+        self.chat_burst = float(chat_burst)
+        self.workers = max(1, int(workers))
+        self.cosmetic_max_age = float(cosmetic_max_age)
+        self.max_retries = max(0, int(max_retries))
+
+        self._cv = threading.Condition(threading.Lock())
+        self._queues = [deque() for _ in PRIORITY_NAMES]
+        self._merge = {}  # merge key -> queued _Request
+        self._buckets = {}
+        self._busy = set()  # chats with a request in flight
+        self._threads = []
+
+    # ---------- submit ----------
+    def call(self, method: str, data: dict, fn):
+        """Run fn() (the HTTP call) through the queue and return its result."""
+        priority = getattr(_local, "priority", None)
+        if priority is None:
+            priority = LIMITED.get(method, NORMAL)
+        chat = str((data or {}).get("chat_id", ""))
+        merge_key = None
+        if priority == COSMETIC and method == "editMessageText":
+            merge_key = (chat, str((data or {}).get("message_id", "")))
+        return self.submit(priority, chat, fn, merge_key).result()
+
+    def submit(self, priority: int, chat: str, fn, merge_key=None) -> Future:
+        fut = Future()
+        with self._cv:
+            self._start()
+            if merge_key is not None:
+                queued = self._merge.get(merge_key)
+                if queued is not None:
+                    queued.fn = fn
+                    queued.futures.append(fut)
+                    GATEWAY_QUEUED.inc(PRIORITY_NAMES[priority], "merged")
+                    return fut
+            req = _Request(priority, chat, merge_key, fn, fut)
+            if merge_key is not None:
+                self._merge[merge_key] = req
+            self._queues[priority].append(req)
+            self._cv.notify()
+        return fut
+
+    def pending(self) -> int:
+        with self._cv:
+            return sum(len(q) for q in self._queues)
+
+    # ---------- scheduling ----------
+    def _bucket(self, chat: str) -> TokenBucket:
+        b = self._buckets.get(chat)
+        if b is None:
+            # negative ids are groups / channels (20 messages a minute)
+            rate = self.group_rate if chat.startswith("-") else self.chat_rate
+            b = self._buckets[chat] = TokenBucket(rate, self.chat_burst)
+        return b
+
+    def _next(self):
+        """Pop the first sendable request, or return how long to wait. cv held."""
+        now = time.monotonic()
+        wait = None
+        global_at = self.global_bucket.ready_at(now)
+        for q in self._queues:
+            for req in list(q):
+                if req.priority == COSMETIC and now - req.created > self.cosmetic_max_age:
+                    q.remove(req)
+                    self._unmerge(req)
+                    self._resolve(req, exc=Dropped("stale cosmetic edit dropped"))
+                    GATEWAY_QUEUED.inc(PRIORITY_NAMES[req.priority], "dropped")
+                    continue
+                if req.chat in self._busy:
+                    continue
+                at = max(global_at, self._bucket(req.chat).ready_at(now))
+                if at <= now:
+                    q.remove(req)
+                    self._unmerge(req)
+                    self.global_bucket.take(now)
+                    self._bucket(req.chat).take(now)
+                    self._busy.add(req.chat)
+                    return req, 0.0
+                wait = at - now if wait is None else min(wait, at - now)
+        return None, wait
+
+    def _unmerge(self, req):
+        if req.merge_key is not None and self._merge.get(req.merge_key) is req:
+            del self._merge[req.merge_key]
+
+    @staticmethod
+    def _resolve(req, result=None, exc=None):
+        for fut in req.futures:
+            if exc is not None:
+                fut.set_exception(exc)
+            else:
+                fut.set_result(result)
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    req, wait = self._next()
+                    if req is not None:
+                        break
+                    self._cv.wait(wait)
+
+            try:
+                result = req.fn()
+            except RetryAfter as e:
+                with self._cv:
+                    self._busy.discard(req.chat)
+                    req.tries += 1
+                    if req.tries <= self.max_retries:
+                        self._bucket(req.chat).blocked_until = time.monotonic() + float(e.retry_after)
+                        self._queues[req.priority].appendleft(req)
+                        if req.merge_key is not None and req.merge_key not in self._merge:
+                            self._merge[req.merge_key] = req
+                        GATEWAY_QUEUED.inc(PRIORITY_NAMES[req.priority], "retry_after")
+                        self._cv.notify_all()
+                        continue
+                    self._cv.notify_all()
+                GATEWAY_QUEUED.inc(PRIORITY_NAMES[req.priority], "error")
+                self._resolve(req, exc=e)
+                continue
+            except Exception as e:
+                with self._cv:
+                    self._busy.discard(req.chat)
+                    self._cv.notify_all()
+                GATEWAY_QUEUED.inc(PRIORITY_NAMES[req.priority], "error")
+                self._resolve(req, exc=e)
+                continue
+
+            with self._cv:
+                self._busy.discard(req.chat)
+                self._cv.notify_all()
+            GATEWAY_QUEUED.inc(PRIORITY_NAMES[req.priority], "sent")
+            self._resolve(req, result=result)
+
+    def _start(self):
+        # cv held
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"api-gateway-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+
+class GatewayRequest(InstrumentedRequest):
+    """PTB HTTP layer that sends rate-limited methods through an ApiGateway."""
+
+    __slots__ = ("gateway",)
+
+    def __init__(self, gateway: ApiGateway, **kwargs):
+        super().__init__(**kwargs)
+        self.gateway = gateway
+
+    def post(self, url: str, data, timeout=None):
+        method = url.rsplit("/", 1)[-1]
+        send = super().post
+        if method not in LIMITED:
+            return send(url, data, timeout=timeout)
+        return self.gateway.call(method, data, lambda: send(url, data, timeout=timeout))
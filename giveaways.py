@@ -0,0 +1,117 @@
+import threading
+
+from slots import SlotTable
+
+
+# =========================================================
+# GIVEAWAY OBJECTS
+# =========================================================
+class Giveaway:
+    """
+    One giveaway. `state` is the dict persisted under data["giveaways"][gid]
+    (title, participants, live post ids, draw state ...). Jobs, the live
+    post editor and the slot table are runtime only and are rebuilt after
+    a restart.
+    """
+
+    def __init__(self, gid: str, state: dict):
+        self.gid = gid
+        self.state = state
+
+        self.countdown_job = None
+        self.live_post = None
+        self.auto_sel_job = None
+        self.auto_finalize_job = None
+        self.draw_job = None
+        self.draw_finalize_job = None
+        self.eligible = None  # EligibleIndex, rebuilt when participants is replaced
+        self.slots = SlotTable()  # single-winner slots (Lucky Draw windows)
+
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def __getitem__(self, key):
+        return self.state[key]
+
+    def __setitem__(self, key, value):
+        self.state[key] = value
+
+    def pop(self, key, default=None):
+        return self.state.pop(key, default)
+
+    def path(self, *keys) -> tuple:
+        # save_data() path of a field inside this giveaway
+        return ("giveaways", self.gid) + keys
+
+    @property
+    def chat_id(self):
+        return self.state.get("chat_id")
+
+    def owns_message(self, chat_id, message_id) -> bool:
+        if not message_id:
+            return False
+        if chat_id is not None and str(chat_id) != str(self.chat_id):
+            return False
+        return message_id in (self.state.get("live_message_id"), self.state.get("autodraw_message_id"))
+
+
+class GiveawayManager:
+    """
+    gid -> Giveaway, backed by the data["giveaways"] dict so that
+    save_data(g.path(...)) persists through the normal store.
+    Mutations happen under the caller's state lock.
+    """
+
+    def __init__(self, lock=None):
+        self.lock = lock or threading.RLock()
+        self._root = {}
+        self._items = {}
+
+    def bind(self, data: dict):
+        # (re)attach to a freshly loaded / reset data dict, keeping runtime
+        # handles of giveaways that still exist
+        with self.lock:
+            self._root = data.setdefault("giveaways", {})
+            old = self._items
+            self._items = {}
+            for gid, state in self._root.items():
+                g = old.get(gid) or Giveaway(gid, state)
+                g.state = state
+                self._items[gid] = g
+
+    def create(self, gid: str, state: dict) -> Giveaway:
+        with self.lock:
+            self._root[gid] = state
+            g = Giveaway(gid, state)
+            self._items[gid] = g
+            return g
+
+    def get(self, gid):
+        if not gid:
+            return None
+        with self.lock:
+            return self._items.get(gid)
+
+    def remove(self, gid):
+        with self.lock:
+            self._root.pop(gid, None)
+            return self._items.pop(gid, None)
+
+    def all(self) -> list:
+        with self.lock:
+            return list(self._items.values())
+
+    def active(self) -> list:
+        return [g for g in self.all() if g.get("active")]
+
+    def by_message(self, chat_id, message_id):
+        for g in self.all():
+            if g.owns_message(chat_id, message_id):
+                return g
+        return None
+
+    def __contains__(self, gid):
+        return gid in self._items
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,107 @@
+import time
+import threading
+
+from telegram.error import BadRequest, RetryAfter
+
+from gateway import COSMETIC, api_priority
+
+
+# =========================================================
+# COALESCED LIVE POST EDITOR
+# =========================================================
+class LivePost:
+    """
+    One editor per channel message.
+
+    request() only marks the post dirty and never touches the network.
+    A timer thread sends at most one edit per `min_interval` seconds,
+    renders the text at send time (so a burst of joins becomes one edit
+    with the latest count), skips the call when the text is unchanged and
+    waits Telegram's retry_after on flood control.
+    """
+
+    def __init__(self, bot, chat_id, message_id, render, reply_markup=None, min_interval: float = 3.0):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.render = render  # () -> text, or None to skip
+        self.reply_markup = reply_markup
+        self.min_interval = max(0.0, float(min_interval))
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._busy = False
+        self._dirty = False
+        self._closed = False
+        self._next_at = 0.0
+        self._last_text = None
+
+    def request(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._dirty = True
+            if self._timer is None and not self._busy:
+                self._schedule()
+
+    def stop(self):
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self):
+        # lock held
+        delay = max(0.0, self._next_at - time.monotonic())
+        t = threading.Timer(delay, self._fire)
+        t.daemon = True
+        self._timer = t
+        t.start()
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+            if self._closed or not self._dirty:
+                return
+            self._dirty = False
+            self._busy = True
+
+        delay = 0.0
+        try:
+            delay = self._edit()
+        finally:
+            with self._lock:
+                self._busy = False
+                self._next_at = time.monotonic() + delay
+                if self._dirty and not self._closed and self._timer is None:
+                    self._schedule()
+
+    def _edit(self) -> float:
+        try:
+            text = self.render()
+        except Exception:
+            text = None
+        if not text or text == self._last_text:
+            return 0.0
+
+        try:
+            with api_priority(COSMETIC):
+                self.bot.edit_message_text(
+                    chat_id=self.chat_id,
+                    message_id=self.message_id,
+                    text=text,
+                    reply_markup=self.reply_markup,
+                )
+            self._last_text = text
+        except RetryAfter as e:
+            # flood control: try again (with a fresh render) after the wait
+            with self._lock:
+                self._dirty = True
+            return float(e.retry_after) + 0.5
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                self._last_text = text
+        except Exception:
+            pass
+        return self.min_interval
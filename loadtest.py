@@ -0,0 +1,470 @@
+"""
+Offline load test for the giveaway hot paths (no Telegram, no network).
+
+Runs cb_handler / admin_text_handler through a real PTB Dispatcher and the
+job callbacks (live_tick, autodraw tick, draw finalize) by hand, against an
+in-process FakeBot with configurable API latency and RetryAfter injection.
+
+  python loadtest.py                                  # both bots, 1k/10k/100k
+  python loadtest.py --bots main --sizes 10000 --latency-ms 5 --retry-after-rate 0.01
+  DATA_BACKEND=sqlite python loadtest.py --sizes 1000
+  python loadtest.py --sizes 10000 --workers 0,1,2,4,8     # cluster mode scaling
+
+Each (bot, size, workers) runs in its own process with a fresh temp data
+file. With --workers N > 0 join clicks go to N forked worker processes
+(CLUSTER_WORKERS); joins/sec then counts until the workers have handled
+every click and their joins are pulled back in, and "join callback" is
+the ingress side (hand-over) only.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from queue import Queue
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# callback_data / flag names that differ between the two bots
+ROUTES = {
+    "main": {
+        "preview_approve": "preview_approve|{gid}",
+        "join": "join_giveaway|{gid}",
+        "end": "end_confirm|{gid}",
+        "winners_approve": "winners_approve|{gid}",
+        "claim": "claim_prize|{gid}",
+        "autodraw_flag": "auto_draw",
+        "stop_autodraw": "stop_auto_draw_finalize",
+    },
+    "bot": {
+        "preview_approve": "preview_approve:{gid}",
+        "join": "join:{gid}",
+        "end": "end_confirm:{gid}",
+        "winners_approve": "winners_approve:{gid}",
+        "claim": "claim:{gid}",
+        "autodraw_flag": "autodraw_enabled",
+        "stop_autodraw": "stop_auto_selection_job",
+    },
+}
+
+
+# =========================================================
+# FAKE TELEGRAM
+# =========================================================
+class FakeBot:
+    """
+    Accepts any Bot API method. Every call sleeps `latency` seconds and
+    raises RetryAfter with probability `retry_rate` (reads excluded).
+    answer_callback_query records the time since `clock.t0` (set per update
+    by the harness) before its latency: handler start to answer sent.
+    """
+
+    READS = ("get_chat_member", "get_me", "get_chat")
+
+    def __init__(self, latency: float = 0.0, retry_rate: float = 0.0, retry_after: int = 1, seed: int = 1):
+        self.latency = latency
+        self.retry_rate = retry_rate
+        self.retry_after = retry_after
+        self.defaults = None
+        self.arbitrary_callback_data = False
+        self.username = "loadtest_bot"
+
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._mid = 1000
+        self.calls = {}
+        self.retries = 0
+        self.clock = threading.local()
+        self.answers = []
+
+    def _call(self, method: str, kw: dict):
+        from telegram.error import RetryAfter
+
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self._mid += 1
+            mid = self._mid
+            fail = method not in self.READS and self._rnd.random() < self.retry_rate
+            if fail:
+                self.retries += 1
+        t0 = getattr(self.clock, "t0", None)
+        if method == "answer_callback_query" and t0 is not None:
+            self.answers.append(time.perf_counter() - t0)
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise RetryAfter(self.retry_after)
+        if method == "get_chat_member":
+            return types.SimpleNamespace(status="member")
+        return types.SimpleNamespace(message_id=mid, chat_id=kw.get("chat_id"), text=kw.get("text", ""))
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return lambda *a, **kw: self._call(method, kw)
+
+
+class FakeJob:
+    def __init__(self, callback, context=None, name=None):
+        self.callback = callback
+        self.context = context
+        self.name = name
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+
+class FakeJobQueue:
+    """Jobs are only recorded; the load test runs them by hand."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def run_once(self, callback, when, context=None, name=None, **kw):
+        job = FakeJob(callback, context, name)
+        self.jobs.append(job)
+        return job
+
+    def run_repeating(self, callback, interval, first=None, context=None, name=None, **kw):
+        return self.run_once(callback, first, context, name)
+
+# =========================================================
+# INSTRUMENTATION
+# =========================================================
+class TimedLock:
+    """Wraps one state region's RLock and records outermost wait/hold times."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.local = threading.local()
+        self.waits = []
+        self.holds = []
+
+    def acquire(self, *a, **kw):
+        t0 = time.perf_counter()
+        ok = self.inner.acquire(*a, **kw)
+        if ok:
+            depth = getattr(self.local, "depth", 0)
+            if depth == 0:
+                now = time.perf_counter()
+                self.waits.append(now - t0)
+                self.local.start = now
+            self.local.depth = depth + 1
+        return ok
+
+    def release(self):
+        depth = self.local.depth - 1
+        self.local.depth = depth
+        if depth == 0:
+            self.holds.append(time.perf_counter() - self.local.start)
+        self.inner.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def timed(fn, sink: list):
+    def wrapper(*a, **kw):
+        t0 = time.perf_counter()
+        try:
+            return fn(*a, **kw)
+        finally:
+            sink.append(time.perf_counter() - t0)
+    return wrapper
+
+
+def pct(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))] * 1000.0
+
+
+def summary(values: list) -> dict:
+    return {
+        "n": len(values),
+        "p50_ms": pct(values, 50),
+        "p99_ms": pct(values, 99),
+        "max_ms": max(values) * 1000.0 if values else 0.0,
+        "total_s": sum(values),
+    }
+
+# =========================================================
+# ONE RUN (child process)
+# =========================================================
+def run_one(modname: str, size: int, workers: int, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ.update({
+        "BOT_TOKEN": "123456:loadtest",
+        "ADMIN_ID": "1",
+        "CHANNEL_ID": "-100",
+        "DATA_FILE": os.path.join(tmp, "data.json"),
+        "LIVE_EDIT_MIN_INTERVAL": str(args.live_interval),
+        "CLUSTER_WORKERS": str(workers),
+    })
+    sys.path.insert(0, HERE)
+    logging.disable(logging.CRITICAL)
+
+    from telegram import Update
+    from telegram.ext import CallbackContext, CallbackQueryHandler, CommandHandler, Dispatcher, Filters, MessageHandler
+
+    m = importlib.import_module(modname)
+    routes = ROUTES[modname]
+
+    # instrument: wrap each state region's RLock (same locks underneath)
+    region_locks = {}
+    for r in m.locks.regions:
+        r.inner = region_locks[r.name] = TimedLock(r.inner)
+    save_times = []
+    m.save_data = timed(m.save_data, save_times)
+
+    bot = FakeBot(latency=args.latency_ms / 1000.0, retry_rate=args.retry_after_rate, retry_after=args.retry_after)
+    jq = FakeJobQueue()
+    dp = Dispatcher(bot, Queue(), job_queue=jq, workers=0, use_context=True)
+    dp.add_handler(CommandHandler("newgiveaway", m.cmd_newgiveaway))
+    dp.add_handler(CommandHandler("endgiveaway", m.cmd_endgiveaway))
+    dp.add_handler(CommandHandler("draw", m.cmd_draw))
+    dp.add_handler(MessageHandler(Filters.text & ~Filters.command, m.admin_text_handler))
+    errors = []
+    dp.add_error_handler(lambda u, c: errors.append(type(c.error).__name__))
+
+    seq = [0]
+
+    def user(uid: int) -> dict:
+        return {"id": uid, "is_bot": False, "first_name": f"U{uid}", "username": f"user{uid}"}
+
+    def message(uid: int, text: str) -> Update:
+        seq[0] += 1
+        msg = {"message_id": seq[0], "date": int(time.time()), "chat": {"id": uid, "type": "private"},
+               "from": user(uid), "text": text}
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return Update.de_json({"update_id": seq[0], "message": msg}, bot)
+
+    def callback(uid: int, data: str) -> Update:
+        seq[0] += 1
+        return Update.de_json({"update_id": seq[0], "callback_query": {
+            "id": str(seq[0]), "from": user(uid), "chat_instance": "1", "data": data,
+            "message": {"message_id": 1, "date": int(time.time()), "chat": {"id": -100, "type": "channel"}},
+        }}, bot)
+
+    def process(update, sink=None):
+        t0 = bot.clock.t0 = time.perf_counter()
+        dp.process_update(update)
+        bot.clock.t0 = None
+        if sink is not None:
+            sink.append(time.perf_counter() - t0)
+
+    def run_job(job, sink):
+        ctx = CallbackContext(dp)
+        ctx.job = job
+        t0 = time.perf_counter()
+        try:
+            job.callback(ctx)
+        except Exception as e:
+            errors.append(type(e).__name__)
+        sink.append(time.perf_counter() - t0)
+
+    out = {"bot": modname, "size": size, "workers": workers, "backend": os.getenv("DATA_BACKEND", "json")}
+    admin = int(os.environ["ADMIN_ID"])
+
+    # setup through admin_text_handler
+    if args.verify_targets:
+        m.data["verify_targets"] = [{"ref": f"-100{i}", "display": f"target{i}"} for i in range(args.verify_targets)]
+    if workers:
+        # forked here, before any thread of the run has started
+        m.start_cluster(make_bot=lambda: FakeBot(latency=args.latency_ms / 1000.0))
+        m.start_cluster_ingest(bot, jq)
+        dp.add_handler(CallbackQueryHandler(m.cluster_forward))
+    else:
+        dp.add_handler(CallbackQueryHandler(m.cb_handler))
+    admin_lat = []
+    process(message(admin, "/newgiveaway"))
+    gid = m.admin_draft_gid or m.giveaways.all()[-1].gid
+    for text in ("Load test", "Prize", str(args.winners), "1 Hour", "2", "rule 1\nrule 2"):
+        process(message(admin, text), admin_lat)
+    out["admin_text"] = summary(admin_lat)
+    process(callback(admin, routes["preview_approve"].format(gid=gid)))
+    g = m.giveaways.get(gid)
+
+    # joins: one worker per thread, users routed by id like webhook mode
+    join_lat = [[] for _ in range(args.threads)]
+    base = 10_000
+
+    def joiner(k):
+        for i in range(k, size, args.threads):
+            process(callback(base + i, routes["join"].format(gid=gid)), join_lat[k])
+
+    del bot.answers[:]
+    t_start = time.perf_counter()
+    threads = [threading.Thread(target=joiner, args=(k,)) for k in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if workers:
+        deadline = time.monotonic() + 300
+        # clicks a full worker queue turned away were answered in-process
+        while m.cluster.handled() < m.cluster.submitted() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        m.cluster_ingest(bot)
+        out["cluster_rejected"] = size - m.cluster.submitted()
+    elapsed = time.perf_counter() - t_start
+    lat = [x for part in join_lat for x in part]
+    out["joins"] = summary(lat)
+    out["join_answers"] = summary(bot.answers)
+    t0 = time.perf_counter()
+    if hasattr(m, "side_effects"):
+        m.side_effects.drain()
+    out["side_effects_drain_ms"] = (time.perf_counter() - t0) * 1000.0
+    out["joins_per_sec"] = size / elapsed if elapsed else 0.0
+    out["participants"] = m.participants_count(g)
+
+    # live countdown ticks
+    live = []
+    for _ in range(args.ticks):
+        if g.countdown_job is not None:
+            run_job(g.countdown_job, live)
+    out["live_tick"] = summary(live)
+
+    # close, autodraw showcase ticks, then manual draw + approve
+    process(callback(admin, routes["end"].format(gid=gid)))
+    auto = []
+    m.start_autodraw_channel_progress(jq, bot, g)
+    for _ in range(args.ticks):
+        if g.auto_sel_job is not None:
+            run_job(g.auto_sel_job, auto)
+    getattr(m, routes["stop_autodraw"])(g)
+    out["autodraw_tick"] = summary(auto)
+
+    m.data[routes["autodraw_flag"]] = False
+    process(message(admin, f"/draw {gid}"))
+    draw_ticks, finalize = [], []
+    for _ in range(args.ticks):
+        if g.draw_job is not None:
+            run_job(g.draw_job, draw_ticks)
+    if g.draw_finalize_job is not None:
+        run_job(g.draw_finalize_job, finalize)
+    out["draw_tick"] = summary(draw_ticks)
+    out["draw_finalize"] = summary(finalize)
+    process(callback(admin, routes["winners_approve"].format(gid=gid)))
+
+    # claims: every winner plus as many non-winners
+    snap = (m.data.get("history", {}) or {}).get(gid) or {}
+    winners = [int(u) for u in (snap.get("winners") or {})]
+    others = [base + i for i in range(min(size, len(winners) + 100))]
+    claim_lat = []
+    for uid in winners + others:
+        process(callback(uid, routes["claim"].format(gid=gid)), claim_lat)
+    out["claims"] = summary(claim_lat)
+    out["winners"] = len(winners)
+
+    # storage
+    out["save_data"] = summary(save_times)
+    t0 = time.perf_counter()
+    if hasattr(m, "flush_data"):
+        m.flush_data()
+    if hasattr(m.store, "flush"):
+        m.store.flush()
+    out["final_flush_ms"] = (time.perf_counter() - t0) * 1000.0
+    size_bytes = 0
+    for name in os.listdir(tmp):
+        size_bytes += os.path.getsize(os.path.join(tmp, name))
+    out["data_bytes"] = size_bytes
+
+    out["lock_hold"] = {name: summary(tl.holds) for name, tl in region_locks.items()}
+    out["lock_wait"] = {name: summary(tl.waits) for name, tl in region_locks.items()}
+    out["api_calls"] = dict(bot.calls)
+    out["retry_after_injected"] = bot.retries
+    out["errors"] = {e: errors.count(e) for e in set(errors)}
+
+    if workers:
+        m.stop_cluster(bot)
+    if hasattr(m, "side_effects"):
+        m.side_effects.close()
+    m.membership.close()
+    m.store.close()
+    return out
+
+# =========================================================
+# REPORT
+# =========================================================
+def print_report(r: dict):
+    def line(name, s):
+        return f"  {name:<18} n={s['n']:<7} p50 {s['p50_ms']:8.3f} ms  p99 {s['p99_ms']:8.3f} ms  max {s['max_ms']:8.2f} ms"
+
+    print(f"== {r['bot']}.py  participants={r['participants']}/{r['size']}  workers={r['workers']}  backend={r['backend']}")
+    print(f"  joins/sec       {r['joins_per_sec']:.0f}")
+    if r["workers"]:
+        print(f"  worker queue full, answered in-process: {r['cluster_rejected']}")
+    print(line("join callback", r["joins"]))
+    print(line("join answer", r["join_answers"]) + f"  side effects drained in {r['side_effects_drain_ms']:.0f} ms")
+    print(line("claim callback", r["claims"]))
+    print(line("admin text", r["admin_text"]))
+    print(line("live_tick", r["live_tick"]))
+    print(line("autodraw tick", r["autodraw_tick"]))
+    print(line("draw tick", r["draw_tick"]))
+    print(line("draw finalize", r["draw_finalize"]))
+    print(line("save_data", r["save_data"]) + f"  total {r['save_data']['total_s']:.2f} s")
+    print(f"  final flush     {r['final_flush_ms']:.1f} ms  data on disk {r['data_bytes'] / 1024:.0f} KiB")
+    for name, s in r["lock_hold"].items():
+        print(line(f"hold {name}", s) + f"  total {s['total_s']:.2f} s")
+    for name, s in r["lock_wait"].items():
+        print(line(f"wait {name}", s))
+    print(f"  RetryAfter injected {r['retry_after_injected']}  handler errors {r['errors'] or 0}")
+    print()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bots", default="main,bot")
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--threads", type=int, default=8, help="concurrent update workers")
+    ap.add_argument("--latency-ms", type=float, default=1.0, help="fake Bot API latency per call")
+    ap.add_argument("--retry-after-rate", type=float, default=0.0, help="share of API calls raising RetryAfter")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--verify-targets", type=int, default=1)
+    ap.add_argument("--winners", type=int, default=10)
+    ap.add_argument("--ticks", type=int, default=20, help="job callback runs per kind")
+    ap.add_argument("--live-interval", type=float, default=3.0)
+    ap.add_argument("--workers", default="0", help="cluster worker processes per run (0 = single process)")
+    ap.add_argument("--json", action="store_true", help="print raw results as JSON lines")
+    ap.add_argument("--child", nargs=3, metavar=("BOT", "SIZE", "WORKERS"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], int(args.child[1]), int(args.child[2]), args)))
+        return
+
+    passthrough = [a for a in sys.argv[1:] if a != "--json"]
+    for modname in [b.strip() for b in args.bots.split(",") if b.strip()]:
+        for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+                proc = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), *passthrough, "--child", modname, str(size), str(workers)],
+                    capture_output=True, text=True, cwd=HERE,
+                )
+                if proc.returncode != 0:
+                    print(f"== {modname}.py size={size} workers={workers} FAILED\n{proc.stderr[-2000:]}")
+                    continue
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import copy
+import threading
+from contextlib import ExitStack
+from types import MappingProxyType
+
+from metrics import InstrumentedLock
+
+
+class LockOrderError(RuntimeError):
+    pass
+
+
+# =========================================================
+# STATE REGIONS
+# =========================================================
+# Lock order (always acquire left to right, never back):
+#   run -> participants -> bans -> history
+#
+#   run           giveaways dict, per-giveaway run/draw fields, flags, jobs
+#   participants  g["participants"] and g["first_winner_*"] of every giveaway
+#   bans          permanent_block, old_winners, verify_targets
+#   history       history snapshots, winner_log / winner_history
+REGIONS = ("run", "participants", "bans", "history")
+
+# top-level data key -> regions needed to read/write it consistently
+KEY_REGIONS = {
+    "giveaways": ("run", "participants"),
+    "permanent_block": ("bans",),
+    "old_winners": ("bans",),
+    "verify_targets": ("bans",),
+    "history": ("history",),
+    "winner_log": ("history",),
+    "winner_history": ("history",),
+}
+
+
+class RegionLock:
+    """
+    Reentrant lock for one region. Taking a region while the thread holds
+    a later one (and not this one) raises LockOrderError instead of
+    risking a deadlock.
+    """
+
+    def __init__(self, name: str, rank: int, held: threading.local):
+        self.name = name
+        self.rank = rank
+        self._held = held  # shared by all regions: thread -> {rank: depth}
+        self.inner = InstrumentedLock(threading.RLock(), name)
+
+    def _ranks(self) -> dict:
+        ranks = getattr(self._held, "ranks", None)
+        if ranks is None:
+            ranks = self._held.ranks = {}
+        return ranks
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        ranks = self._ranks()
+        if self.rank not in ranks and ranks and max(ranks) > self.rank:
+            later = REGIONS[max(ranks)]
+            raise LockOrderError(f"lock '{self.name}' taken while holding '{later}'")
+        ok = self.inner.acquire(blocking, timeout)
+        if ok:
+            ranks[self.rank] = ranks.get(self.rank, 0) + 1
+        return ok
+
+    def release(self):
+        ranks = self._ranks()
+        depth = ranks[self.rank] - 1
+        if depth:
+            ranks[self.rank] = depth
+        else:
+            del ranks[self.rank]
+        self.inner.release()
+
+    def held(self) -> bool:
+        return self.rank in self._ranks()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class StateLocks:
+    """
+    One RegionLock per region. Used as a lock itself (`with locks:`) it
+    takes every region in order: that is the old global lock, kept for
+    bulk operations (reset, full snapshots, draw commits).
+    """
+
+    def __init__(self):
+        held = threading.local()
+        self.regions = [RegionLock(name, i, held) for i, name in enumerate(REGIONS)]
+        for r in self.regions:
+            setattr(self, r.name, r)
+
+    def hold(self, *names):
+        """Context manager taking the named regions in lock order."""
+        stack = ExitStack()
+        for r in self.regions:
+            if r.name in names:
+                stack.enter_context(r)
+        return stack
+
+    def for_key(self, key):
+        # regions guarding one top-level data key (unknown keys -> run)
+        return self.hold(*KEY_REGIONS.get(key, ("run",)))
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        for r in self.regions:
+            r.acquire()
+        return True
+
+    def release(self):
+        for r in reversed(self.regions):
+            r.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# =========================================================
+# COPY-ON-WRITE SNAPSHOTS
+# =========================================================
+class SnapshotMap:
+    """
+    Read-mostly mapping for lock-free readers (claim lookups).
+
+    Writers (under the region lock that guards the source) publish a
+    private copy of each changed value and swap in a new dict; readers
+    get() from whatever dict is current and never see a half-applied
+    change.
+    """
+
+    def __init__(self):
+        self._view = MappingProxyType({})
+
+    def get(self, key, default=None):
+        return self._view.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._view
+
+    def __len__(self):
+        return len(self._view)
+
+    def set(self, key, value):
+        nxt = dict(self._view)
+        if value is None:
+            nxt.pop(key, None)
+        else:
+            nxt[key] = copy.deepcopy(value)
+        self._view = MappingProxyType(nxt)
+
+    def replace(self, items: dict):
+        self._view = MappingProxyType({k: copy.deepcopy(v) for k, v in (items or {}).items()})
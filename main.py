@@ -27,14 +27,16 @@
 # =========================================================
 
 import os
-import json
 import random
-import threading
 import secrets
+from collections import deque
 from datetime import datetime
+from functools import partial
+from types import SimpleNamespace
 
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.utils.request import Request
 from telegram.ext import (
     Updater,
     CommandHandler,
@@ -44,6 +46,32 @@ from telegram.ext import (
     CallbackContext,
 )
 
+from archive import HistoryArchive, archive_due
+from banimport import BanImport, downloaded, read_chunks
+from clicks import ClickLimiter
+from cluster import SharedState, WorkerPool
+from eligibility import EligibleIndex
+from export import FORMATS as EXPORT_FORMATS, Exporter, chunked
+from gateway import COSMETIC, ApiGateway, GatewayRequest, api_priority
+from giveaways import GiveawayManager
+from live_post import LivePost
+from locks import SnapshotMap, StateLocks
+from membership import MembershipCache
+from metrics import (
+    SAVE_SECONDS,
+    instrument_dispatcher,
+    observe_store,
+    start_http_server,
+    timed_job,
+)
+from participants import ParticipantTable
+from pipeline import SideEffects
+from router import CallbackRouter
+from storage import open_store
+from templates import PostTemplate
+from ticker import TickClock
+from webhook import WebhookServer, run_webhook
+
 # =========================
 # LOAD ENV
 # =========================
@@ -60,29 +88,149 @@ CHANNEL_LINK = os.getenv("CHANNEL_LINK", "https://t.me/PowerPointBreak")
 ADMIN_CONTACT = os.getenv("ADMIN_CONTACT", "@MinexxProo")
 DATA_FILE = os.getenv("DATA_FILE", "giveaway_data.json")
 
+# "json" = DATA_FILE snapshot + journal, "sqlite" = indexed tables in DATA_DB
+# (an existing DATA_FILE is migrated into DATA_DB on first start)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "json").strip().lower()
+DATA_DB = os.getenv("DATA_DB", os.path.splitext(DATA_FILE)[0] + ".db")
+
+# finished giveaways nobody can claim anymore move out of memory into
+# HISTORY_ARCHIVE_DB (checked at startup and every HISTORY_ARCHIVE_INTERVAL seconds)
+HISTORY_ARCHIVE_DB = os.getenv("HISTORY_ARCHIVE_DB", os.path.splitext(DATA_FILE)[0] + ".archive.db")
+HISTORY_ARCHIVE_INTERVAL = float(os.getenv("HISTORY_ARCHIVE_INTERVAL", "3600"))
+
+# journal is folded into a fresh DATA_FILE snapshot every N records
+JOURNAL_COMPACT_EVERY = int(os.getenv("JOURNAL_COMPACT_EVERY", "5000"))
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "0") == "1"
+
+# write-behind: joins only mark state dirty, a flusher writes the batch
+# after SAVE_FLUSH_INTERVAL seconds (the durability window) or after
+# SAVE_FLUSH_MAX_PENDING changes. 0 = write through on every change.
+SAVE_FLUSH_INTERVAL = float(os.getenv("SAVE_FLUSH_INTERVAL", "1.0"))
+SAVE_FLUSH_MAX_PENDING = int(os.getenv("SAVE_FLUSH_MAX_PENDING", "500"))
+
+# live channel post: joins and ticks only mark it dirty, at most one
+# edit per LIVE_EDIT_MIN_INTERVAL seconds goes out (latest count wins)
+LIVE_EDIT_MIN_INTERVAL = float(os.getenv("LIVE_EDIT_MIN_INTERVAL", "3"))
+
+# verify targets: get_chat_member answers are cached per (target, user);
+# "not joined" expires quickly so users who join the target get in soon
+VERIFY_CACHE_TTL = float(os.getenv("VERIFY_CACHE_TTL", "300"))
+VERIFY_CACHE_NEGATIVE_TTL = float(os.getenv("VERIFY_CACHE_NEGATIVE_TTL", "15"))
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "100000"))
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", "8"))
+
+# user buttons (join / claim / lucky draw): a user's clicks on one button
+# beyond CLICK_LIMIT per CLICK_WINDOW seconds are answered with the last
+# popup again, without reaching the handler. 0 = off.
+CLICK_WINDOW = float(os.getenv("CLICK_WINDOW", "2"))
+CLICK_LIMIT = int(os.getenv("CLICK_LIMIT", "1"))
+CLICK_CACHE_SIZE = int(os.getenv("CLICK_CACHE_SIZE", "100000"))
+
+# multi-process joins: join clicks are handed to CLUSTER_WORKERS forked
+# worker processes (by user id, CLUSTER_THREADS handlers each) that decide
+# them against CLUSTER_DB (sqlite WAL: runs, bans, verify targets, joins);
+# this process pulls their joins every CLUSTER_SYNC_INTERVAL seconds.
+# Everything else stays here. 0 = off; on a single CPU workers are slower
+# than 0 (IPC + a sqlite write per join, see cluster.WorkerPool).
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", "0"))
+CLUSTER_THREADS = int(os.getenv("CLUSTER_THREADS", "4"))
+CLUSTER_QUEUE_SIZE = int(os.getenv("CLUSTER_QUEUE_SIZE", "1000"))
+CLUSTER_SYNC_INTERVAL = float(os.getenv("CLUSTER_SYNC_INTERVAL", "0.5"))
+CLUSTER_DB = os.getenv("CLUSTER_DB", os.path.splitext(DATA_FILE)[0] + ".cluster.db")
+
+# update ingestion: "polling" (default) or "webhook" (local HTTP listener,
+# WEBHOOK_URL is registered with Telegram when set). A WEBHOOK_LISTEN
+# other than loopback (behind a reverse proxy) requires WEBHOOK_SECRET.
+UPDATE_MODE = os.getenv("UPDATE_MODE", "polling").strip().lower()
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").strip()
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "").strip()
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
+# Prometheus text endpoint (handler / job / Bot API / save_data / lock
+# timings) on METRICS_LISTEN:METRICS_PORT/metrics. 0 = off.
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# outbound Bot API gateway: sends / edits / deletes / pins are queued by
+# priority (posts > edits > progress edits) under a global and a per-chat
+# token bucket; callback answers and reads are never queued
+API_GLOBAL_RATE = float(os.getenv("API_GLOBAL_RATE", "30"))            # per second
+API_CHAT_RATE = float(os.getenv("API_CHAT_RATE", "1"))                 # per second, private chats
+API_GROUP_PER_MINUTE = float(os.getenv("API_GROUP_PER_MINUTE", "20"))  # groups / channels
+API_CHAT_BURST = float(os.getenv("API_CHAT_BURST", "3"))
+API_SENDERS = int(os.getenv("API_SENDERS", "4"))
+API_COSMETIC_MAX_AGE = float(os.getenv("API_COSMETIC_MAX_AGE", "30"))
+
+# /export: collections are read EXPORT_CHUNK_ROWS rows per lock hold;
+# files expected to reach EXPORT_GZIP_ROWS rows are sent gzip-compressed
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_GZIP_ROWS = int(os.getenv("EXPORT_GZIP_ROWS", "50000"))
+
 # =========================
 # THREAD SAFE STORAGE
 # =========================
-lock = threading.RLock()
+# state is split into regions with their own locks (run, participants,
+# bans, history; see locks.py for the lock order). `lock` takes all of
+# them and is kept for bulk changes; hot paths take only their region.
+locks = StateLocks()
+lock = locks
+store = open_store(
+    DATA_BACKEND, DATA_FILE, DATA_DB, lock,
+    compact_every=JOURNAL_COMPACT_EVERY, fsync=JOURNAL_FSYNC,
+    flush_interval=SAVE_FLUSH_INTERVAL, flush_max_pending=SAVE_FLUSH_MAX_PENDING,
+    observer=observe_store,
+)
+# expired history snapshots, read on demand
+archive = HistoryArchive(HISTORY_ARCHIVE_DB, fsync=JOURNAL_FSYNC)
+membership = MembershipCache(
+    positive_ttl=VERIFY_CACHE_TTL, negative_ttl=VERIFY_CACHE_NEGATIVE_TTL,
+    max_size=VERIFY_CACHE_SIZE, workers=VERIFY_WORKERS,
+)
+# repeat clicks on user buttons, answered from the last popup
+clicks = ClickLimiter(window=CLICK_WINDOW, limit=CLICK_LIMIT, max_size=CLICK_CACHE_SIZE)
+# saves and live post edits queued by callbacks after they have answered
+side_effects = SideEffects()
+# /export files are written and uploaded on their own background thread
+exporter = Exporter(gzip_rows=EXPORT_GZIP_ROWS)
 
 # =========================
 # GLOBAL STATE
 # =========================
 data = {}
 admin_state = None
+admin_draft_gid = None  # giveaway being set up by /newgiveaway
+
+# gid -> Giveaway (per-giveaway state lives in data["giveaways"][gid],
+# its jobs and live post editor on the object)
+giveaways = GiveawayManager(locks.run)
 
-countdown_job = None
-draw_job = None
-draw_finalize_job = None
-auto_draw_finalize_job = None
+# history snapshots as seen by claim buttons (copy-on-write, read without locks)
+claims = SnapshotMap()
+
+# cluster mode (start_cluster): state shared with the workers, the pool,
+# and the last participant row pulled from `shared`
+shared = None
+cluster = None
+cluster_seq = 0
 
 # =========================
 # CONSTANTS
 # =========================
 SPINNER = ["🔄", "🔃", "🔁", "🔂", "🌀", "⚙️", "⏳", "⌛"]
 SHOW_COLORS = ["🟣", "🟠", "🟢", "🔵", "🟡", "🔴", "⚪", "⚫"]
+SHOWCASE_DECK_SIZE = 64  # showcase names drawn per deck refill
 
 LIVE_UPDATE_INTERVAL = 5  # seconds
+PARTICIPANTS_PAGE_SIZE = 50  # /participants rows per page (messages are capped at 4096 chars)
+
+BAN_IMPORT_MAX_BYTES = 20 * 2**20  # bots can download files up to 20 MB
+BAN_IMPORT_CHUNK_LINES = 5000
+BAN_IMPORT_PROGRESS_INTERVAL = 2  # seconds between progress edits
 
 DRAW_DURATION_SECONDS = 40
 DRAW_UPDATE_INTERVAL = 1  # stable
@@ -94,11 +242,38 @@ SHOW_LINE1_SEC = 5
 SHOW_LINE2_SEC = 7
 SHOW_LINE3_SEC = 9
 
+# history snapshots stay in memory this long after their claim window
+# closed, then move to the archive
+POST_COMPLETE_AFTER_SECONDS = 24 * 3600
+
 # =========================
 # DATA / STORAGE
 # =========================
 def fresh_default_data():
     return {
+        "verify_targets": [],  # [{"ref": "-100..." or "@xxx", "display": "..."}]
+
+        "permanent_block": {},  # uid(str) -> {"username": "@x" or ""}
+        "old_winners": {},      # uid(str) -> {"username": "@x" or ""}
+
+        # AutoDraw
+        "auto_draw": False,
+
+        # running giveaways: gid -> fresh_giveaway()
+        "giveaways": {},
+
+        # Giveaway history snapshots (claim uses gid)
+        "history": {},
+
+        # Winner history for /winnerlist
+        "winner_history": [],
+    }
+
+
+def fresh_giveaway(chat_id) -> dict:
+    return {
+        "chat_id": chat_id,  # channel the giveaway is posted in
+
         "active": False,
         "closed": False,
 
@@ -113,14 +288,9 @@ def fresh_default_data():
         "live_message_id": None,
         "closed_message_id": None,
 
-        "participants": {},  # uid(str) -> {"username": "@x" or "", "name": ""}
-
-        "verify_targets": [],  # [{"ref": "-100..." or "@xxx", "display": "..."}]
-
-        "permanent_block": {},  # uid(str) -> {"username": "@x" or ""}
+        "participants": ParticipantTable(),  # uid(str) -> {"username": "@x" or "", "name": ""}
 
-        "old_winner_mode": "skip",  # "block" or "skip"
-        "old_winners": {},          # uid(str) -> {"username": "@x" or ""}
+        "old_winner_mode": "skip",  # "block" or "skip" (data["old_winners"])
 
         "first_winner_id": None,
         "first_winner_username": "",
@@ -131,23 +301,37 @@ def fresh_default_data():
         "pending_winners_text": "",
         "pending_winners_gid": "",
 
-        # AutoDraw
-        "auto_draw": False,
         "autodraw_message_id": None,
 
-        # Giveaway history snapshots (claim uses gid)
-        "history": {},
-
-        # Winner history for /winnerlist
-        "winner_history": [],
+        # running draws, checkpointed so a restart resumes them
+        "autodraw_state": None,  # selection post: start time, showcase, tick cadence
+        "draw_state": None,      # manual draw: admin progress message, start time
     }
 
 
+# keys of the old single-giveaway layout (moved into data["giveaways"])
+LEGACY_GIVEAWAY_KEYS = tuple(k for k in fresh_giveaway(None) if k != "chat_id")
+
+
+def migrate_single_giveaway(d: dict) -> bool:
+    """
+    Older data files kept one giveaway in top-level keys. Move it into
+    data["giveaways"] (under a new giveaway id) so it keeps running.
+    """
+    legacy = {k: d.pop(k) for k in LEGACY_GIVEAWAY_KEYS if k in d}
+    if not any(legacy.values()):
+        return False  # nothing but empty leftovers: no rewrite needed
+    if legacy.get("active") or legacy.get("closed") or legacy.get("participants"):
+        g = fresh_giveaway(CHANNEL_ID)
+        g.update(legacy)
+        d.setdefault("giveaways", {})[make_gid(d)] = g
+    return True
+
+
 def load_data():
     base = fresh_default_data()
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f)
+        d = store.load()  # snapshot + journal replay (or sqlite tables)
     except Exception:
         d = {}
 
@@ -155,8 +339,6 @@ def load_data():
         d.setdefault(k, v)
 
     # normalize types
-    if not isinstance(d.get("participants"), dict):
-        d["participants"] = {}
     if not isinstance(d.get("verify_targets"), list):
         d["verify_targets"] = []
     if not isinstance(d.get("permanent_block"), dict):
@@ -167,16 +349,107 @@ def load_data():
         d["history"] = {}
     if not isinstance(d.get("winner_history"), list):
         d["winner_history"] = []
+    if not isinstance(d.get("giveaways"), dict):
+        d["giveaways"] = {}
+
+    if migrate_single_giveaway(d):
+        store.snapshot(d)
+
+    for gid, g in d["giveaways"].items():
+        for k, v in fresh_giveaway(CHANNEL_ID).items():
+            g.setdefault(k, v)
+        if not isinstance(g.get("participants"), ParticipantTable):
+            parts = g.get("participants")
+            g["participants"] = ParticipantTable(parts if isinstance(parts, dict) else None)
     return d
 
 
-def save_data():
-    with lock:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+def save_data(*paths):
+    """
+    save_data("active", ("participants", uid))  -> append only those values to the journal
+    save_data()                                 -> rewrite the full snapshot (bulk changes)
+    """
+    with SAVE_SECONDS.time():
+        if paths:
+            # caller holds the region lock of these paths
+            store.record(data, *paths)
+            if shared is not None:
+                shared.record(data, *paths)
+        else:
+            with lock:
+                store.snapshot(data)
+                if shared is not None:
+                    shared.snapshot(data)
 
 
-data = load_data()
+def save_region(region, *paths):
+    # deferred save_data(*paths): the callback answered and released
+    # `region` before this runs
+    with region:
+        save_data(*paths)
+
+
+def flush_data():
+    # critical transitions (close, winners, reset) must hit disk now
+    try:
+        store.flush()
+    except Exception:
+        pass
+
+
+def publish_claims(*gids):
+    # claim lookups read `claims` without any lock: republish after every
+    # change to data["history"] (caller holds the history region)
+    hist = data.get("history", {}) or {}
+    if not gids:
+        claims.replace(hist)
+    for gid in gids:
+        claims.set(gid, hist.get(gid))
+
+
+def find_history(gid: str):
+    # snapshot of gid, moved back from the archive when it was archived
+    # (caller holds the history region)
+    hist = data.setdefault("history", {})
+    snap = hist.get(gid)
+    if snap is None and gid:
+        snap = archive.get(gid)
+        if snap is not None:
+            hist[gid] = snap
+            save_data(("history", gid))
+            publish_claims(gid)
+    return snap
+
+
+def archive_history(now=None) -> int:
+    """
+    Move snapshots whose claim window closed more than
+    POST_COMPLETE_AFTER_SECONDS ago to the archive (winner_history is
+    capped and stays). Claim buttons of those read the archive.
+    """
+    now = now_ts() if now is None else now
+    with locks.history:
+        hist = data.get("history", {}) or {}
+        old = {gid: snap for gid, snap in hist.items() if archive_due(snap, now, POST_COMPLETE_AFTER_SECONDS)}
+        if not old:
+            return 0
+
+        # on disk before it leaves the data file
+        archive.put(old)
+        for gid in old:
+            hist.pop(gid, None)
+        save_data(*[("history", gid) for gid in old])
+        publish_claims()  # one swap instead of one copy per archived gid
+    return len(old)
+
+
+@timed_job("history_archive")
+def history_archive_job(context: CallbackContext):
+    try:
+        archive_history()
+    except Exception:
+        pass
+
 
 # =========================
 # HELPERS
@@ -199,8 +472,8 @@ def user_tag(username: str) -> str:
     return u if u.startswith("@") else "@" + u
 
 
-def participants_count() -> int:
-    return len(data.get("participants", {}))
+def participants_count(g) -> int:
+    return len(g.get("participants", {}))
 
 
 def format_hms(seconds: int) -> str:
@@ -241,8 +514,8 @@ def parse_duration(text: str) -> int:
     return num
 
 
-def format_rules() -> str:
-    rules = (data.get("rules") or "").strip()
+def format_rules(g) -> str:
+    rules = (g.get("rules") or "").strip()
     if not rules:
         return (
             "• Must join the official channel\n"
@@ -272,22 +545,17 @@ def normalize_verify_ref(text: str) -> str:
     return ""
 
 
-def verify_user_join(bot, user_id: int) -> bool:
-    targets = data.get("verify_targets", []) or []
+def verify_user_join(bot, user_id: int, targets=None) -> bool:
+    # cluster workers pass the targets from `shared`
+    if targets is None:
+        targets = data.get("verify_targets", []) or []
     if not targets:
         return True
-    for t in targets:
-        ref = (t or {}).get("ref", "")
-        if not ref:
-            return False
-        try:
-            member = bot.get_chat_member(chat_id=ref, user_id=user_id)
-            status = getattr(member, "status", None)
-            if status not in ("member", "administrator", "creator"):
-                return False
-        except Exception:
-            return False
-    return True
+
+    refs = [(t or {}).get("ref", "") for t in targets]
+    if not all(refs):
+        return False
+    return membership.check(bot, refs, user_id)
 
 
 def parse_user_lines(text: str):
@@ -312,18 +580,29 @@ def parse_user_lines(text: str):
     return out
 
 
-def make_gid() -> str:
+def make_gid(d=None) -> str:
+    # unique across finished (history) and running giveaways
     with lock:
-        hist = data.get("history", {}) or {}
+        d = data if d is None else d
+        hist = d.get("history", {}) or {}
+        running = d.get("giveaways", {}) or {}
         while True:
             part1 = secrets.randbelow(900) + 100
             part2 = secrets.randbelow(900) + 100
             part3 = secrets.randbelow(9000) + 1000
             gid = f"P{part1}-P{part2}-B{part3}"
-            if gid not in hist:
+            if gid not in hist and gid not in running and gid not in archive:
                 return gid
 
 
+def channel_ref(text: str):
+    # "/newgiveaway -100123" or "@channel" -> chat id for send_message
+    ref = normalize_verify_ref(text)
+    if ref.startswith("-"):
+        return int(ref)
+    return ref
+
+
 def format_entry(uid: str, uname: str) -> str:
     uname = (uname or "").strip()
     if uname:
@@ -335,12 +614,59 @@ def is_valid_username(uname: str) -> bool:
     uname = (uname or "").strip()
     return bool(uname.startswith("@") and len(uname) > 1)
 
+
+def eligible_index(g) -> EligibleIndex:
+    # draw pool of g: built from its participants dict once, then kept up
+    # to date by joins and bans (caller holds the participants region)
+    parts = g.get("participants")
+    idx = g.eligible
+    if idx is None or idx.source is not parts:
+        with locks.bans:
+            perma = data.get("permanent_block", {}) or {}
+            idx = g.eligible = EligibleIndex(parts, (
+                uid for uid, uname, _ in parts.rows()
+                if uid not in perma and is_valid_username(uname)
+            ))
+    return idx
+
+
+def index_join(g, uid: str, uname: str):
+    # caller holds the participants region; a ban that raced the join is seen here
+    if not is_valid_username(uname):
+        return
+    idx = eligible_index(g)
+    with locks.bans:
+        if uid not in (data.get("permanent_block", {}) or {}):
+            idx.add(uid)
+
+
+def index_ban(*uids):
+    # caller holds all regions (`with lock`)
+    for g in giveaways.all():
+        if g.eligible is not None:
+            for uid in uids:
+                g.eligible.discard(uid)
+
+
+def index_rebuild():
+    # after a load or a reset of the ban list (caller holds all regions)
+    for g in giveaways.all():
+        g.eligible = None
+        eligible_index(g)
+
+
+data = load_data()
+giveaways.bind(data)
+publish_claims()
+with lock:
+    index_rebuild()
+
 # =========================
 # MARKUPS
 # =========================
-def join_button_markup():
+def join_button_markup(gid: str):
     return InlineKeyboardMarkup(
-        [[InlineKeyboardButton("🎁✨ JOIN GIVEAWAY NOW ✨🎁", callback_data="join_giveaway")]]
+        [[InlineKeyboardButton("🎁✨ JOIN GIVEAWAY NOW ✨🎁", callback_data=f"join_giveaway|{gid}")]]
     )
 
 
@@ -350,27 +676,56 @@ def claim_button_markup(gid: str):
     )
 
 
-def winners_approve_markup():
+def winners_approve_markup(gid: str):
     return InlineKeyboardMarkup(
         [[
-            InlineKeyboardButton("✅ Approve & Post", callback_data="winners_approve"),
-            InlineKeyboardButton("❌ Reject", callback_data="winners_reject"),
+            InlineKeyboardButton("✅ Approve & Post", callback_data=f"winners_approve|{gid}"),
+            InlineKeyboardButton("❌ Reject", callback_data=f"winners_reject|{gid}"),
         ]]
     )
 
 
-def preview_markup():
+def preview_markup(gid: str):
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton("✔️ Approve & Post", callback_data=f"preview_approve|{gid}"),
+                InlineKeyboardButton("❌ Reject Giveaway", callback_data=f"preview_reject|{gid}"),
+            ],
+            [InlineKeyboardButton("✏️ Edit Again", callback_data=f"preview_edit|{gid}")],
+        ]
+    )
+
+
+def participants_page_markup(gid: str, page: int, pages: int):
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("⏮", callback_data=f"parts_page|{gid}|0"))
+        nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"parts_page|{gid}|{page - 1}"))
+    nav.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=f"parts_jump|{gid}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"parts_page|{gid}|{page + 1}"))
+        nav.append(InlineKeyboardButton("⏭", callback_data=f"parts_page|{gid}|{pages - 1}"))
     return InlineKeyboardMarkup(
         [
+            nav,
             [
-                InlineKeyboardButton("✔️ Approve & Post", callback_data="preview_approve"),
-                InlineKeyboardButton("❌ Reject Giveaway", callback_data="preview_reject"),
+                InlineKeyboardButton("🔢 Jump to Page", callback_data=f"parts_jump|{gid}"),
+                InlineKeyboardButton("🔎 Search", callback_data=f"parts_search|{gid}"),
             ],
-            [InlineKeyboardButton("✏️ Edit Again", callback_data="preview_edit")],
         ]
     )
 
 
+def participants_search_markup(gid: str):
+    return InlineKeyboardMarkup(
+        [[
+            InlineKeyboardButton("⬅️ Back to List", callback_data=f"parts_page|{gid}|0"),
+            InlineKeyboardButton("🔎 New Search", callback_data=f"parts_search|{gid}"),
+        ]]
+    )
+
+
 def verify_add_more_done_markup():
     return InlineKeyboardMarkup(
         [[
@@ -380,10 +735,10 @@ def verify_add_more_done_markup():
     )
 
 
-def end_confirm_markup():
+def end_confirm_markup(gid: str):
     return InlineKeyboardMarkup(
         [[
-            InlineKeyboardButton("✅ Confirm End", callback_data="end_confirm"),
+            InlineKeyboardButton("✅ Confirm End", callback_data=f"end_confirm|{gid}"),
             InlineKeyboardButton("❌ Cancel", callback_data="end_cancel"),
         ]]
     )
@@ -448,6 +803,14 @@ def popup_first_winner(username: str, uid: str) -> str:
     )
 
 
+def popup_busy() -> str:
+    return (
+        "⏳ TOO MANY REQUESTS\n"
+        "We're handling a lot of joins right now.\n"
+        "Please tap JOIN GIVEAWAY again in a few seconds."
+    )
+
+
 def popup_already_joined() -> str:
     return (
         "🚫 ENTRY UNSUCCESSFUL\n"
@@ -530,19 +893,19 @@ def popup_giveaway_completed() -> str:
 # =========================
 # TEXT BUILDERS
 # =========================
-def build_preview_text() -> str:
-    remaining = int(data.get("duration_seconds", 0) or 0)
+def build_preview_text(g) -> str:
+    remaining = int(g.get("duration_seconds", 0) or 0)
     progress = build_progress(0)
-    title = (data.get("title") or "").strip()
+    title = (g.get("title") or "").strip()
     return (
         "━━━━━━━━━━━━━━━━━━━━\n"
         "🔍 GIVEAWAY PREVIEW (ADMIN)\n"
         "━━━━━━━━━━━━━━━━━━━━\n\n"
         f"{title}\n\n"
         "🎁 Prize:\n"
-        f"{data.get('prize','')}\n\n"
+        f"{g.get('prize','')}\n\n"
         f"👥 Total Participants: 0\n"
-        f"🏆 Total Winners: {data.get('winner_count',0)}\n\n"
+        f"🏆 Total Winners: {g.get('winner_count',0)}\n\n"
         "🎯 Winner Selection\n"
         "• 100% Random & Fair\n"
         "• Auto System\n\n"
@@ -550,54 +913,113 @@ def build_preview_text() -> str:
         "📊 Live Progress\n"
         f"{progress}\n\n"
         "📜 Official Rules\n"
-        f"{format_rules()}\n\n"
+        f"{format_rules(g)}\n\n"
         f"📢 Hosted by: {HOST_NAME}\n\n"
         "━━━━━━━━━━━━━━━━━━━━\n"
         "👇 Tap below to join the giveaway 👇"
     )
 
 
-def build_live_text(remaining: int) -> str:
-    title = (data.get("title") or "").strip()
-    duration = int(data.get("duration_seconds", 1) or 1)
+# static fields are filled in once per title / prize / rules / winner
+# count; ticks and joins only format the slots (PostTemplate)
+LIVE_POST = PostTemplate("live_post", (
+    "━━━━━━━━━━━━━━━━━━━━\n"
+    "{title}\n"
+    "━━━━━━━━━━━━━━━━━━━━\n\n"
+    "🎁 PRIZE POOL 🌟\n"
+    "{prize}\n\n"
+    "👥 Total Participants: {count}  \n"
+    "🏆 Total Winners: {winners}  \n\n"
+    "🎯 Winner Selection\n"
+    "• 100% Random & Fair  \n"
+    "• Auto System  \n\n"
+    "⏱️ Time Remaining: {remaining}  \n"
+    "📊 Live Progress\n"
+    "{progress}  \n\n"
+    "📜 Official Rules  \n"
+    "{rules}  \n\n"
+    "📢 Hosted by: {host}  \n\n"
+    "━━━━━━━━━━━━━━━━━━━━\n"
+    "👇 Tap below to join the giveaway 👇"
+), static=("title", "prize", "winners", "rules", "host"))
+
+CLOSED_POST = PostTemplate("closed_post", (
+    "━━━━━━━━━━━━━━━━━━━━━━\n"
+    "🚫 GIVEAWAY OFFICIALLY CLOSED 🚫\n"
+    "━━━━━━━━━━━━━━━━━━━━━━\n\n"
+    "⏰ The giveaway has officially ended.\n"
+    "🔒 All entries are now closed.\n\n"
+    "👥 Total Participants: {count}\n"
+    "🏆 Total Winners: {winners}\n\n"
+    "Winner selection will be announced shortly.\n\n"
+    "— {host} ⚡"
+), static=("winners", "host"))
+
+AUTODRAW_POST = PostTemplate("selection_post", (
+    "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+    "🎲 AUTO RANDOM WINNER SELECTION\n"
+    "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+    "{spin} Selecting winners: {percent}%\n"
+    "📊 Progress: {bar}\n\n"
+    "🕒 Time Remaining: {remaining}\n"
+    "🔐 100% Random • Fair • Auto System\n"
+    "📌 Rule: Users without a valid @username are automatically excluded.\n\n"
+    "👥 Live Entries Showcase\n"
+    "{c1} ➤ Now showing: {line1}\n"
+    "{c2} ➤ Now showing: {line2}\n"
+    "{c3} ➤ Now showing: {line3}"
+))
+
+WINNERS_POST = PostTemplate("winners_post", (
+    "🏆 GIVEAWAY WINNER ANNOUNCEMENT 🏆\n"
+    "\n"
+    "{host}\n"
+    "\n"
+    "🆔 Giveaway ID: {gid}\n"
+    "\n"
+    "🎁 PRIZE:\n"
+    "{prize}\n"
+    "\n"
+    "📦 Prize Delivery: {delivered}/{total}\n"
+    "\n"
+    "🥇 ⭐ FIRST JOIN CHAMPION ⭐\n"
+    "{first}\n"
+    "\n"
+    "👑 OTHER WINNERS\n"
+    "{others}"
+    "\n"
+    "👇 Click the button below to claim your prize\n"
+    "\n"
+    "⏳ Rule: Claim within 24 hours — after that, prize expires."
+), static=("host", "gid", "prize"))
+
+
+def post_key(g) -> tuple:
+    # what the static part of a giveaway's posts is built from
+    return g.get("title"), g.get("prize"), g.get("rules"), g.get("winner_count")
+
+
+def post_static(g) -> dict:
+    return {
+        "title": (g.get("title") or "").strip(),
+        "prize": g.get("prize", ""),
+        "winners": g.get("winner_count", 0),
+        "rules": format_rules(g),
+        "host": HOST_NAME,
+    }
+
+
+def build_live_text(g, remaining: int) -> str:
+    duration = int(g.get("duration_seconds", 1) or 1)
     elapsed = max(0, duration - max(0, remaining))
     percent = int(round(min(100, (elapsed / float(duration)) * 100)))
-    progress = build_progress(percent)
-
-    return (
-        "━━━━━━━━━━━━━━━━━━━━\n"
-        f"{title}\n"
-        "━━━━━━━━━━━━━━━━━━━━\n\n"
-        "🎁 PRIZE POOL 🌟\n"
-        f"{data.get('prize','')}\n\n"
-        f"👥 Total Participants: {participants_count()}  \n"
-        f"🏆 Total Winners: {data.get('winner_count',0)}  \n\n"
-        "🎯 Winner Selection\n"
-        "• 100% Random & Fair  \n"
-        "• Auto System  \n\n"
-        f"⏱️ Time Remaining: {format_hms(remaining)}  \n"
-        "📊 Live Progress\n"
-        f"{progress}  \n\n"
-        "📜 Official Rules  \n"
-        f"{format_rules()}  \n\n"
-        f"📢 Hosted by: {HOST_NAME}  \n\n"
-        "━━━━━━━━━━━━━━━━━━━━\n"
-        "👇 Tap below to join the giveaway 👇"
-    )
+    s = LIVE_POST.segments(post_key(g), lambda: post_static(g))
+    return f"{s[0]}{participants_count(g)}{s[1]}{format_hms(remaining)}{s[2]}{build_progress(percent)}{s[3]}"
 
 
-def build_closed_simple_text() -> str:
-    return (
-        "━━━━━━━━━━━━━━━━━━━━━━\n"
-        "🚫 GIVEAWAY OFFICIALLY CLOSED 🚫\n"
-        "━━━━━━━━━━━━━━━━━━━━━━\n\n"
-        "⏰ The giveaway has officially ended.\n"
-        "🔒 All entries are now closed.\n\n"
-        f"👥 Total Participants: {participants_count()}\n"
-        f"🏆 Total Winners: {data.get('winner_count',0)}\n\n"
-        "Winner selection will be announced shortly.\n\n"
-        f"— {HOST_NAME} ⚡"
-    )
+def build_closed_simple_text(g) -> str:
+    s = CLOSED_POST.segments(post_key(g), lambda: post_static(g))
+    return f"{s[0]}{participants_count(g)}{s[1]}"
 
 
 def build_draw_progress_text(percent: int, spin: str) -> str:
@@ -618,119 +1040,84 @@ def build_autodraw_text(percent: int, remaining: int, spin: str,
                        line1: str, c1: str,
                        line2: str, c2: str,
                        line3: str, c3: str) -> str:
-    bar = build_progress(percent)
+    s = AUTODRAW_POST.segments(None, dict)
     return (
-        "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        "🎲 AUTO RANDOM WINNER SELECTION\n"
-        "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-        f"{spin} Selecting winners: {percent}%\n"
-        f"📊 Progress: {bar}\n\n"
-        f"🕒 Time Remaining: {format_hms(remaining)}\n"
-        "🔐 100% Random • Fair • Auto System\n"
-        "📌 Rule: Users without a valid @username are automatically excluded.\n\n"
-        "👥 Live Entries Showcase\n"
-        f"{c1} ➤ Now showing: {line1}\n"
-        f"{c2} ➤ Now showing: {line2}\n"
-        f"{c3} ➤ Now showing: {line3}"
+        f"{s[0]}{spin}{s[1]}{percent}{s[2]}{build_progress(percent)}{s[3]}{format_hms(remaining)}"
+        f"{s[4]}{c1}{s[5]}{line1}{s[6]}{c2}{s[7]}{line2}{s[8]}{c3}{s[9]}{line3}{s[10]}"
     )
 
 
-def build_winners_post_text(gid: str, first_uid: str, first_user: str, others: list, delivered: dict) -> str:
+def build_winners_post_text(gid: str, prize: str, first_uid: str, first_user: str, others: list, delivered: dict) -> str:
     delivered = delivered or {}
     total = 1 + len(others)
     delivered_count = sum(1 for k in delivered if delivered.get(k))
 
-    prize = (data.get("prize") or "").strip()
-    lines = []
-    lines.append("🏆 GIVEAWAY WINNER ANNOUNCEMENT 🏆")
-    lines.append("")
-    lines.append(f"{HOST_NAME}")
-    lines.append("")
-    lines.append(f"🆔 Giveaway ID: {gid}")
-    lines.append("")
-    lines.append("🎁 PRIZE:")
-    lines.append(f"{prize}")
-    lines.append("")
-    lines.append(f"📦 Prize Delivery: {delivered_count}/{total}")
-    lines.append("")
-    lines.append("🥇 ⭐ FIRST JOIN CHAMPION ⭐")
-
+    prize = (prize or "").strip()
+    first_lines = []
     fflag = "✅ Delivered" if delivered.get(first_uid) else ""
     if first_user:
         if fflag:
-            lines.append(f"👑 {first_user} | 🆔 {first_uid} | {fflag}")
+            first_lines.append(f"👑 {first_user} | 🆔 {first_uid} | {fflag}")
         else:
-            lines.append(f"👑 {first_user}")
-            lines.append(f"🆔 {first_uid}")
+            first_lines.append(f"👑 {first_user}")
+            first_lines.append(f"🆔 {first_uid}")
     else:
         if fflag:
-            lines.append(f"👑 User | 🆔 {first_uid} | {fflag}")
+            first_lines.append(f"👑 User | 🆔 {first_uid} | {fflag}")
         else:
-            lines.append("👑 User")
-            lines.append(f"🆔 {first_uid}")
+            first_lines.append("👑 User")
+            first_lines.append(f"🆔 {first_uid}")
 
-    lines.append("")
-    lines.append("👑 OTHER WINNERS")
+    lines = []
     i = 1
     for uid, uname in others:
         flag = "✅ Delivered" if delivered.get(uid) else ""
         if uname:
             if flag:
-                lines.append(f"{i}️⃣ 👤 {uname} | 🆔 {uid} | {flag}")
+                lines.append(f"{i}️⃣ 👤 {uname} | 🆔 {uid} | {flag}\n")
             else:
-                lines.append(f"{i}️⃣ 👤 {uname} | 🆔 {uid}")
+                lines.append(f"{i}️⃣ 👤 {uname} | 🆔 {uid}\n")
         else:
             if flag:
-                lines.append(f"{i}️⃣ 👤 User | 🆔 {uid} | {flag}")
+                lines.append(f"{i}️⃣ 👤 User | 🆔 {uid} | {flag}\n")
             else:
-                lines.append(f"{i}️⃣ 👤 User | 🆔 {uid}")
+                lines.append(f"{i}️⃣ 👤 User | 🆔 {uid}\n")
         i += 1
 
-    lines.append("")
-    lines.append("👇 Click the button below to claim your prize")
-    lines.append("")
-    lines.append("⏳ Rule: Claim within 24 hours — after that, prize expires.")
-    return "\n".join(lines)
+    first = "\n".join(first_lines)
+    rest = "".join(lines)
+    s = WINNERS_POST.segments((gid, prize), lambda: {"host": HOST_NAME, "gid": gid, "prize": prize})
+    return f"{s[0]}{delivered_count}{s[1]}{total}{s[2]}{first}{s[3]}{rest}{s[4]}"
 
 # =========================
 # WINNER SELECTION CORE
 # =========================
-def select_winners_core():
-    participants = data.get("participants", {}) or {}
-
-    # ✅ Exclude users without @username
-    participants = {
-        str(uid): info
-        for uid, info in participants.items()
-        if is_valid_username((info or {}).get("username", ""))
-    }
-
-    if not participants:
+def select_winners_core(g):
+    # caller holds the lock; eligible = @username and not banned (EligibleIndex)
+    participants = g.get("participants", {}) or {}
+    idx = eligible_index(g)
+    if not len(idx):
         return None
 
-    winner_count = int(data.get("winner_count", 1)) or 1
+    winner_count = int(g.get("winner_count", 1)) or 1
     winner_count = max(1, winner_count)
 
-    # first join champion must also be valid username; otherwise pick first valid
-    first_uid = data.get("first_winner_id")
+    # first join champion must also be eligible; otherwise pick the earliest eligible joiner
+    first_uid = g.get("first_winner_id")
     if first_uid:
         first_uid = str(first_uid)
-    if not first_uid or first_uid not in participants:
-        first_uid = next(iter(participants.keys()))
+    if not first_uid or first_uid not in idx:
+        first_uid = next(uid for uid in participants if uid in idx)
         info = participants.get(first_uid, {}) or {}
-        data["first_winner_id"] = first_uid
-        data["first_winner_username"] = info.get("username", "")
-        data["first_winner_name"] = info.get("name", "")
+        g["first_winner_id"] = first_uid
+        g["first_winner_username"] = info.get("username", "")
+        g["first_winner_name"] = info.get("name", "")
 
-    first_uname = (data.get("first_winner_username", "") or "").strip()
+    first_uname = (g.get("first_winner_username", "") or "").strip()
     if not first_uname:
         first_uname = (participants.get(first_uid, {}) or {}).get("username", "")
 
-    pool = [uid for uid in participants.keys() if uid != first_uid]
-    needed = max(0, winner_count - 1)
-    needed = min(needed, len(pool))
-
-    selected = random.sample(pool, needed) if needed > 0 else []
+    selected = idx.sample(winner_count - 1, exclude=(first_uid,))
 
     winners_map = {str(first_uid): {"username": first_uname}}
     others = []
@@ -744,12 +1131,12 @@ def select_winners_core():
 # =========================
 # HISTORY (for /winnerlist)
 # =========================
-def record_winner_history(gid: str, winners_map: dict):
+def record_winner_history(g, winners_map: dict):
     ts = datetime.utcnow()
     date_str = ts.strftime("%d-%m-%Y")
 
-    participants = data.get("participants", {}) or {}
-    first_uid = str(data.get("first_winner_id") or "")
+    participants = g.get("participants", {}) or {}
+    first_uid = str(g.get("first_winner_id") or "")
 
     winners_rows = []
     if first_uid and first_uid in winners_map:
@@ -764,9 +1151,9 @@ def record_winner_history(gid: str, winners_map: dict):
         winners_rows.append({"type": "RANDOM", "username": uname, "user_id": suid})
 
     entry = {
-        "giveaway_id": gid,
-        "title": (data.get("title") or "").strip(),
-        "prize": (data.get("prize") or "").strip(),
+        "giveaway_id": g.gid,
+        "title": (g.get("title") or "").strip(),
+        "prize": (g.get("prize") or "").strip(),
         "date": date_str,
         "winners": winners_rows,
     }
@@ -777,96 +1164,168 @@ def record_winner_history(gid: str, winners_map: dict):
         if len(wh) > 50:
             wh = wh[-50:]
         data["winner_history"] = wh
-        save_data()
+        save_data("winner_history")
+
+
+def history_snapshot(g, winners_map: dict, delivered: dict) -> dict:
+    return {
+        "gid": g.gid,
+        "chat_id": g.chat_id,
+        "title": (g.get("title") or "").strip(),
+        "prize": (g.get("prize") or "").strip(),
+        "winners": winners_map,
+        "delivered": delivered,
+        "created_ts": now_ts(),
+        "claim_expires_ts": now_ts() + 24 * 3600,
+        "admin_contact": ADMIN_CONTACT,
+        "winners_message_id": None,
+    }
 
 # =========================
 # JOBS CONTROL
 # =========================
-def stop_live_countdown():
-    global countdown_job
-    if countdown_job is not None:
+def remove_job(job):
+    if job is not None:
         try:
-            countdown_job.schedule_removal()
+            job.schedule_removal()
         except Exception:
             pass
-    countdown_job = None
 
 
-def stop_draw_jobs():
-    global draw_job, draw_finalize_job
-    if draw_job is not None:
-        try:
-            draw_job.schedule_removal()
-        except Exception:
-            pass
-    draw_job = None
-    if draw_finalize_job is not None:
-        try:
-            draw_finalize_job.schedule_removal()
-        except Exception:
-            pass
-    draw_finalize_job = None
+def stop_live_countdown(g):
+    remove_job(g.countdown_job)
+    g.countdown_job = None
+    stop_live_post(g)
 
 
-def stop_auto_draw_finalize():
-    global auto_draw_finalize_job
-    if auto_draw_finalize_job is not None:
-        try:
-            auto_draw_finalize_job.schedule_removal()
-        except Exception:
-            pass
-    auto_draw_finalize_job = None
+def stop_live_post(g):
+    if g.live_post is not None:
+        g.live_post.stop()
+    g.live_post = None
+
+
+def live_remaining(g) -> int:
+    start_ts = g.get("start_time")
+    duration = int(g.get("duration_seconds", 1) or 1)
+    if not start_ts:
+        return duration
+    elapsed = int((datetime.utcnow() - datetime.utcfromtimestamp(start_ts)).total_seconds())
+    return max(0, duration - elapsed)
+
+
+def render_live_post(g):
+    # called by the LivePost timer right before each edit
+    with locks.run:
+        if not g.get("active"):
+            return None
+        return build_live_text(g, live_remaining(g))
+
+
+def request_live_edit(bot, g):
+    with locks.run:
+        live_mid = g.get("live_message_id")
+        if not live_mid or not g.get("active"):
+            return
+        if g.live_post is None or g.live_post.message_id != live_mid:
+            stop_live_post(g)
+            g.live_post = LivePost(
+                bot, g.chat_id, live_mid, lambda: render_live_post(g),
+                reply_markup=join_button_markup(g.gid),
+                min_interval=LIVE_EDIT_MIN_INTERVAL,
+            )
+        lp = g.live_post
+    lp.request()
+
+
+def stop_draw_jobs(g):
+    remove_job(g.draw_job)
+    g.draw_job = None
+    remove_job(g.draw_finalize_job)
+    g.draw_finalize_job = None
+
+
+def stop_auto_draw_finalize(g):
+    remove_job(g.auto_sel_job)
+    g.auto_sel_job = None
+    remove_job(g.auto_finalize_job)
+    g.auto_finalize_job = None
+
+
+def stop_giveaway_jobs(g):
+    stop_live_countdown(g)
+    stop_draw_jobs(g)
+    stop_auto_draw_finalize(g)
+
+
+def finish_giveaway(g):
+    # winners are posted and live in history: drop the running giveaway
+    stop_giveaway_jobs(g)
+    with lock:
+        giveaways.remove(g.gid)
+        save_data(("giveaways", g.gid))
 
 # =========================
 # LIVE COUNTDOWN
 # =========================
-def start_live_countdown(job_queue):
-    global countdown_job
-    stop_live_countdown()
-    countdown_job = job_queue.run_repeating(live_tick, interval=LIVE_UPDATE_INTERVAL, first=0, name="live_countdown")
+def start_live_countdown(job_queue, g):
+    stop_live_countdown(g)
+    g.countdown_job = job_queue.run_repeating(
+        live_tick, interval=LIVE_UPDATE_INTERVAL, first=0,
+        context=g.gid, name=f"live_countdown:{g.gid}",
+    )
 
 
+@timed_job("live_tick")
 def live_tick(context: CallbackContext):
+    g = giveaways.get(context.job.context)
+    if g is None:
+        context.job.schedule_removal()
+        return
+
     with lock:
-        if not data.get("active"):
-            stop_live_countdown()
+        if not g.get("active"):
+            stop_live_countdown(g)
             return
 
-        start_time = data.get("start_time")
+        start_time = g.get("start_time")
         if start_time is None:
-            data["start_time"] = now_ts()
-            save_data()
-            start_time = data["start_time"]
+            g["start_time"] = now_ts()
+            save_data(g.path("start_time"))
+            start_time = g["start_time"]
 
         start = datetime.utcfromtimestamp(start_time)
-        duration = int(data.get("duration_seconds", 1) or 1)
+        duration = int(g.get("duration_seconds", 1) or 1)
         elapsed = int((datetime.utcnow() - start).total_seconds())
         remaining = duration - elapsed
 
-        live_mid = data.get("live_message_id")
+        live_mid = g.get("live_message_id")
 
         if remaining <= 0:
-            data["active"] = False
-            data["closed"] = True
-            save_data()
-
+            g["active"] = False
+            g["closed"] = True
+            save_data(g.path("active"), g.path("closed"))
+            flush_data()
+            # workers see the close from here on: take their last joins
+            cluster_ingest(context.bot)
+
+            stop_live_post(g)
             if live_mid:
                 try:
-                    context.bot.delete_message(chat_id=CHANNEL_ID, message_id=live_mid)
+                    context.bot.delete_message(chat_id=g.chat_id, message_id=live_mid)
                 except Exception:
                     pass
 
             try:
-                m = context.bot.send_message(chat_id=CHANNEL_ID, text=build_closed_simple_text())
-                data["closed_message_id"] = m.message_id
-                save_data()
+                m = context.bot.send_message(chat_id=g.chat_id, text=build_closed_simple_text(g))
+                g["closed_message_id"] = m.message_id
+                save_data(g.path("closed_message_id"))
             except Exception:
                 pass
 
             # AutoDraw ON -> selection post
             if data.get("auto_draw"):
                 try:
-                    start_autodraw_channel_progress(context.job_queue, context.bot)
+                    start_autodraw_channel_progress(context.job_queue, context.bot, g)
                 except Exception:
                     pass
 
@@ -875,41 +1334,47 @@ def live_tick(context: CallbackContext):
                     chat_id=ADMIN_ID,
                     text=(
                         "⏰ Giveaway Closed!\n\n"
-                        f"Giveaway: {(data.get('title') or '').strip()}\n"
-                        f"Total Participants: {participants_count()}\n\n"
+                        f"Giveaway: {(g.get('title') or '').strip()}\n"
+                        f"Giveaway ID: {g.gid}\n"
+                        f"Total Participants: {participants_count(g)}\n\n"
                         "AutoDraw ON → Auto winners post\n"
-                        "AutoDraw OFF → use /draw"
+                        f"AutoDraw OFF → use /draw {g.gid}"
                     ),
                 )
             except Exception:
                 pass
 
-            stop_live_countdown()
+            stop_live_countdown(g)
             return
 
         if not live_mid:
             return
 
-        try:
-            context.bot.edit_message_text(
-                chat_id=CHANNEL_ID,
-                message_id=live_mid,
-                text=build_live_text(remaining),
-                reply_markup=join_button_markup(),
-            )
-        except Exception:
-            pass
+    # coalesced with join-driven edits, sent outside the lock
+    request_live_edit(context.bot, g)
 
 # =========================
 # MANUAL DRAW (Admin Progress → Preview)
 # =========================
-def start_draw_progress(context: CallbackContext, admin_chat_id: int):
-    global draw_job, draw_finalize_job
-    stop_draw_jobs()
+def start_draw_progress(context: CallbackContext, admin_chat_id: int, g):
+    stop_draw_jobs(g)
 
     msg = context.bot.send_message(chat_id=admin_chat_id, text=build_draw_progress_text(0, SPINNER[0]))
-    ctx = {"admin_chat_id": admin_chat_id, "admin_msg_id": msg.message_id, "start_ts": now_ts(), "tick": 0}
+    # checkpointed: a restart resumes the progress message and the finalize
+    with lock:
+        g["draw_state"] = {"admin_chat_id": admin_chat_id, "admin_msg_id": msg.message_id, "start_ts": now_ts()}
+        save_data(g.path("draw_state"))
+
+    run_draw_progress(context.job_queue, g)
 
+
+def run_draw_progress(job_queue, g):
+    # progress ticks + finalize of the manual draw in g["draw_state"]
+    stop_draw_jobs(g)
+    ctx = dict(g.get("draw_state") or {}, gid=g.gid, tick=0)
+    elapsed = max(0.0, now_ts() - float(ctx["start_ts"]))
+
+    @timed_job("draw_tick")
     def draw_tick(job_ctx: CallbackContext):
         jd = job_ctx.job.context
         jd["tick"] = int(jd.get("tick", 0)) + 1
@@ -919,29 +1384,34 @@ def start_draw_progress(context: CallbackContext, admin_chat_id: int):
         spin = SPINNER[(jd["tick"] - 1) % len(SPINNER)]
 
         try:
-            job_ctx.bot.edit_message_text(
-                chat_id=jd["admin_chat_id"],
-                message_id=jd["admin_msg_id"],
-                text=build_draw_progress_text(percent, spin),
-            )
+            with api_priority(COSMETIC):
+                job_ctx.bot.edit_message_text(
+                    chat_id=jd["admin_chat_id"],
+                    message_id=jd["admin_msg_id"],
+                    text=build_draw_progress_text(percent, spin),
+                )
         except Exception:
             pass
 
         if percent >= 100:
-            stop_draw_jobs()
-            draw_finalize_inner(job_ctx.bot, jd["admin_chat_id"], jd["admin_msg_id"])
+            stop_draw_jobs(g)
+            draw_finalize_inner(job_ctx.bot, g, jd["admin_chat_id"], jd["admin_msg_id"])
 
-    draw_job = context.job_queue.run_repeating(draw_tick, interval=DRAW_UPDATE_INTERVAL, first=0, context=ctx)
-    draw_finalize_job = context.job_queue.run_once(
-        lambda c: draw_finalize_inner(c.bot, ctx["admin_chat_id"], ctx["admin_msg_id"]),
-        when=DRAW_DURATION_SECONDS + 1,
+    g.draw_job = job_queue.run_repeating(draw_tick, interval=DRAW_UPDATE_INTERVAL, first=0, context=ctx)
+    g.draw_finalize_job = job_queue.run_once(
+        timed_job("draw_finalize")(lambda c: draw_finalize_inner(c.bot, g, ctx["admin_chat_id"], ctx["admin_msg_id"])),
+        when=max(0.0, DRAW_DURATION_SECONDS + 1 - elapsed),
         context=ctx
     )
 
 
-def draw_finalize_inner(bot, admin_chat_id: int, admin_msg_id: int):
+def draw_finalize_inner(bot, g, admin_chat_id: int, admin_msg_id: int):
     with lock:
-        sel = select_winners_core()
+        if giveaways.get(g.gid) is not g:
+            return
+        g["draw_state"] = None
+        save_data(g.path("draw_state"))
+        sel = select_winners_core(g)
         if not sel:
             try:
                 bot.edit_message_text(chat_id=admin_chat_id, message_id=admin_msg_id, text="No eligible participants (requires @username).")
@@ -950,56 +1420,51 @@ def draw_finalize_inner(bot, admin_chat_id: int, admin_msg_id: int):
             return
 
         first_uid, first_uname, winners_map, others = sel
-        gid = make_gid()
+        gid = g.gid
         delivered = {}
 
-        text = build_winners_post_text(gid, first_uid, first_uname, others, delivered)
-        data["winners"] = winners_map
-        data["pending_winners_text"] = text
-        data["pending_winners_gid"] = gid
-        save_data()
+        text = build_winners_post_text(gid, g.get("prize"), first_uid, first_uname, others, delivered)
+        g["winners"] = winners_map
+        g["pending_winners_text"] = text
+        g["pending_winners_gid"] = gid
+        save_data(
+            g.path("winners"), g.path("pending_winners_text"), g.path("pending_winners_gid"),
+            g.path("first_winner_id"), g.path("first_winner_username"), g.path("first_winner_name"),
+        )
 
     try:
-        bot.edit_message_text(chat_id=admin_chat_id, message_id=admin_msg_id, text=text, reply_markup=winners_approve_markup())
+        bot.edit_message_text(chat_id=admin_chat_id, message_id=admin_msg_id, text=text, reply_markup=winners_approve_markup(gid))
     except Exception:
-        bot.send_message(chat_id=admin_chat_id, text=text, reply_markup=winners_approve_markup())
+        bot.send_message(chat_id=admin_chat_id, text=text, reply_markup=winners_approve_markup(gid))
 
 # =========================
 # AUTO DRAW (Pinned selection post, 5 minutes)
 # =========================
-def start_autodraw_channel_progress(job_queue, bot):
-    stop_auto_draw_finalize()
-
-    with lock:
-        parts = list((data.get("participants", {}) or {}).items())
-
-    # ✅ Only @username users in showcase
-    queue = []
-    for uid, info in parts:
-        uname = (info or {}).get("username", "") or ""
-        if is_valid_username(uname):
-            queue.append((str(uid), uname.strip()))
-
-    # If nobody has username, keep one fallback (bot must run)
-    if not queue:
-        queue = [("0", "@username")]
-
-    deck = []
+def showcase_picker(g):
+    """pick(exclude_ids) -> (uid, "@name") for the showcase lines of g's selection post."""
+    deck = deque()
 
     def refill_deck():
+        # ✅ Only eligible (@username) users in showcase: a random handful
+        # per refill from the draw index, not a copy of every participant
         nonlocal deck
-        deck = queue[:]
-        random.shuffle(deck)
+        with locks.participants:
+            parts = g.get("participants", {}) or {}
+            deck = deque(
+                (uid, ((parts.get(uid) or {}).get("username", "") or "").strip())
+                for uid in eligible_index(g).sample(SHOWCASE_DECK_SIZE)
+            )
 
-    refill_deck()
+        # If nobody has username, keep one fallback (bot must run)
+        if not deck:
+            deck = deque([("0", "@username")])
 
     def pick_next_excluding(exclude_ids):
-        nonlocal deck
         tries = 0
         while True:
             if not deck:
                 refill_deck()
-            uid, uname = deck.pop(0)
+            uid, uname = deck.popleft()
             if uid not in exclude_ids:
                 return (uid, uname)
             deck.append((uid, uname))
@@ -1007,13 +1472,24 @@ def start_autodraw_channel_progress(job_queue, bot):
             if tries > 50:
                 return (uid, uname)
 
-    def pick_three_distinct_colors():
-        if len(SHOW_COLORS) >= 3:
-            return random.sample(SHOW_COLORS, 3)
-        return ["🟣", "🟠", "🟢"]
+    refill_deck()
+    return pick_next_excluding
+
+
+def pick_three_distinct_colors():
+    if len(SHOW_COLORS) >= 3:
+        return random.sample(SHOW_COLORS, 3)
+    return ["🟣", "🟠", "🟢"]
+
 
+def start_autodraw_channel_progress(job_queue, bot, g):
+    stop_auto_draw_finalize(g)
+
+    pick_next_excluding = showcase_picker(g)
+
+    start_ts = now_ts()
     state = {
-        "start_ts": now_ts(),
+        "start_ts": start_ts,
         "tick": 0,
 
         "line1": ("0", "@username"),
@@ -1024,9 +1500,9 @@ def start_autodraw_channel_progress(job_queue, bot):
         "c2": "🟠",
         "c3": "🟢",
 
-        "t1": now_ts(),
-        "t2": now_ts(),
-        "t3": now_ts(),
+        "t1": start_ts,
+        "t2": start_ts,
+        "t3": start_ts,
 
         "tick_idx": 0,
     }
@@ -1038,7 +1514,7 @@ def start_autodraw_channel_progress(job_queue, bot):
     state["c1"], state["c2"], state["c3"] = c1, c2, c3
 
     m = bot.send_message(
-        chat_id=CHANNEL_ID,
+        chat_id=g.chat_id,
         text=build_autodraw_text(
             0,
             AUTO_DRAW_DURATION_SECONDS,
@@ -1050,42 +1526,65 @@ def start_autodraw_channel_progress(job_queue, bot):
     )
 
     try:
-        bot.pin_chat_message(chat_id=CHANNEL_ID, message_id=m.message_id, disable_notification=True)
+        bot.pin_chat_message(chat_id=g.chat_id, message_id=m.message_id, disable_notification=True)
     except Exception:
         pass
 
+    # g["autodraw_state"] is checkpointed at every tick: a restart resumes
+    # the same pinned post and finalizes on the original schedule
+    state["mid"] = m.message_id
     with lock:
-        data["autodraw_message_id"] = m.message_id
-        save_data()
+        g["autodraw_message_id"] = m.message_id
+        g["autodraw_state"] = state
+        save_data(g.path("autodraw_message_id"), g.path("autodraw_state"))
+
+    run_autodraw_channel_progress(job_queue, g, pick_next_excluding)
 
-    ctx = {"mid": m.message_id}
 
+def run_autodraw_channel_progress(job_queue, g, pick_next_excluding=None):
+    # ticks + finalize of the selection post in g["autodraw_state"]
+    state = g.get("autodraw_state")
+    if pick_next_excluding is None:
+        pick_next_excluding = showcase_picker(g)
+    ctx = {"gid": g.gid, "mid": state["mid"]}
+
+    @timed_job("autodraw_tick")
     def tick(job_ctx: CallbackContext):
-        state["tick"] += 1
+        with lock:
+            # stop once the giveaway is finalized (or reset)
+            if giveaways.get(g.gid) is not g or g.get("autodraw_state") is not state:
+                return
+
+            state["tick"] += 1
 
-        elapsed = int(now_ts() - state["start_ts"])
-        remaining = max(0, AUTO_DRAW_DURATION_SECONDS - elapsed)
-        percent = int(round(min(100, (elapsed / float(AUTO_DRAW_DURATION_SECONDS)) * 100)))
-        spin = SPINNER[(state["tick"] - 1) % len(SPINNER)]
+            elapsed = int(now_ts() - state["start_ts"])
+            remaining = max(0, AUTO_DRAW_DURATION_SECONDS - elapsed)
+            percent = int(round(min(100, (elapsed / float(AUTO_DRAW_DURATION_SECONDS)) * 100)))
+            spin = SPINNER[(state["tick"] - 1) % len(SPINNER)]
 
-        n = now_ts()
+            n = now_ts()
 
-        # 5 / 7 / 9 seconds exact changes
-        if n - state["t1"] >= SHOW_LINE1_SEC:
-            state["line1"] = pick_next_excluding({state["line2"][0], state["line3"][0]})
-            state["t1"] = n
+            # 5 / 7 / 9 seconds exact changes
+            if n - state["t1"] >= SHOW_LINE1_SEC:
+                state["line1"] = pick_next_excluding({state["line2"][0], state["line3"][0]})
+                state["t1"] = n - (n - state["t1"]) % SHOW_LINE1_SEC
 
-        if n - state["t2"] >= SHOW_LINE2_SEC:
-            state["line2"] = pick_next_excluding({state["line1"][0], state["line3"][0]})
-            state["t2"] = n
+            if n - state["t2"] >= SHOW_LINE2_SEC:
+                state["line2"] = pick_next_excluding({state["line1"][0], state["line3"][0]})
+                state["t2"] = n - (n - state["t2"]) % SHOW_LINE2_SEC
 
-        if n - state["t3"] >= SHOW_LINE3_SEC:
-            state["line3"] = pick_next_excluding({state["line1"][0], state["line2"][0]})
-            state["t3"] = n
+            if n - state["t3"] >= SHOW_LINE3_SEC:
+                state["line3"] = pick_next_excluding({state["line1"][0], state["line2"][0]})
+                state["t3"] = n - (n - state["t3"]) % SHOW_LINE3_SEC
 
-        # always 3 different colors per edit
-        c1, c2, c3 = pick_three_distinct_colors()
-        state["c1"], state["c2"], state["c3"] = c1, c2, c3
+            # always 3 different colors per edit
+            c1, c2, c3 = pick_three_distinct_colors()
+            state["c1"], state["c2"], state["c3"] = c1, c2, c3
+
+            state["tick_idx"] = ticks.idx
+
+            # checkpoint (write-behind: coalesced with the next flush)
+            save_data(g.path("autodraw_state"))
 
         text = build_autodraw_text(
             percent, remaining, spin,
@@ -1095,82 +1594,127 @@ def start_autodraw_channel_progress(job_queue, bot):
         )
 
         try:
-            job_ctx.bot.edit_message_text(chat_id=CHANNEL_ID, message_id=ctx["mid"], text=text)
+            with api_priority(COSMETIC):
+                job_ctx.bot.edit_message_text(chat_id=g.chat_id, message_id=ctx["mid"], text=text)
         except Exception:
             pass
 
-        nxt = AUTO_TICK_INTERVALS[state["tick_idx"] % len(AUTO_TICK_INTERVALS)]
-        state["tick_idx"] += 1
-        job_ctx.job_queue.run_once(tick, when=nxt, context=ctx)
+        # next deadline on the monotonic clock; late ticks are skipped, not queued
+        g.auto_sel_job = job_ctx.job_queue.run_once(tick, when=ticks.next_delay(), context=ctx)
 
-    job_queue.run_once(tick, when=0, context=ctx)
-
-    global auto_draw_finalize_job
-    auto_draw_finalize_job = job_queue.run_once(autodraw_finalize, when=AUTO_DRAW_DURATION_SECONDS, context=ctx)
+    remaining = max(0.0, AUTO_DRAW_DURATION_SECONDS - (now_ts() - state["start_ts"]))
+    ticks = TickClock(AUTO_TICK_INTERVALS, idx=state["tick_idx"], name="autodraw_tick")
+    g.auto_sel_job = job_queue.run_once(tick, when=0, context=ctx)
+    g.auto_finalize_job = job_queue.run_once(autodraw_finalize, when=remaining, context=ctx)
 
 
+@timed_job("autodraw_finalize")
 def autodraw_finalize(context: CallbackContext):
-    stop_auto_draw_finalize()
+    g = giveaways.get(context.job.context["gid"])
+    if g is None:
+        return
+    stop_auto_draw_finalize(g)
 
     with lock:
-        sel = select_winners_core()
+        g["autodraw_state"] = None
+        save_data(g.path("autodraw_state"))
+        sel = select_winners_core(g)
         if not sel:
             return
 
         first_uid, first_uname, winners_map, others = sel
-        gid = make_gid()
+        gid = g.gid
         delivered = {}
 
         hist = data.get("history", {}) or {}
-        snap = {
-            "gid": gid,
-            "title": (data.get("title") or "").strip(),
-            "prize": (data.get("prize") or "").strip(),
-            "winners": winners_map,
-            "delivered": delivered,
-            "created_ts": now_ts(),
-            "claim_expires_ts": now_ts() + 24 * 3600,
-            "admin_contact": ADMIN_CONTACT,
-            "winners_message_id": None,
-        }
-        hist[gid] = snap
+        hist[gid] = history_snapshot(g, winners_map, delivered)
         data["history"] = hist
-        save_data()
+        save_data(("history", gid), g.path("first_winner_id"), g.path("first_winner_username"), g.path("first_winner_name"))
+        publish_claims(gid)
 
-        record_winner_history(gid, winners_map)
+        record_winner_history(g, winners_map)
+        flush_data()
 
-        closed_mid = data.get("closed_message_id")
-        auto_mid = data.get("autodraw_message_id")
+        closed_mid = g.get("closed_message_id")
+        auto_mid = g.get("autodraw_message_id")
 
     # delete closed + pinned selection
     if closed_mid:
         try:
-            context.bot.delete_message(chat_id=CHANNEL_ID, message_id=closed_mid)
+            context.bot.delete_message(chat_id=g.chat_id, message_id=closed_mid)
         except Exception:
             pass
     if auto_mid:
         try:
-            context.bot.delete_message(chat_id=CHANNEL_ID, message_id=auto_mid)
+            context.bot.delete_message(chat_id=g.chat_id, message_id=auto_mid)
         except Exception:
             pass
 
-    with lock:
-        data["closed_message_id"] = None
-        data["autodraw_message_id"] = None
-        save_data()
-
-    text = build_winners_post_text(gid, first_uid, first_uname, others, delivered)
+    text = build_winners_post_text(gid, g.get("prize"), first_uid, first_uname, others, delivered)
     try:
-        m = context.bot.send_message(chat_id=CHANNEL_ID, text=text, reply_markup=claim_button_markup(gid))
+        m = context.bot.send_message(chat_id=g.chat_id, text=text, reply_markup=claim_button_markup(gid))
         with lock:
             data["history"][gid]["winners_message_id"] = m.message_id
-            save_data()
+            save_data(("history", gid, "winners_message_id"))
+            publish_claims(gid)
     except Exception:
         pass
 
+    finish_giveaway(g)
+
+
+def resume_draws(job_queue):
+    # draws cut off by a restart continue from their checkpoint (same
+    # pinned post / progress message); one whose time ran out meanwhile
+    # finalizes right away
+    for g in giveaways.all():
+        if g.get("autodraw_state"):
+            run_autodraw_channel_progress(job_queue, g)
+        if g.get("draw_state"):
+            run_draw_progress(job_queue, g)
+
 # =========================
 # COMMANDS
 # =========================
+def giveaway_status(g) -> str:
+    if g.get("active"):
+        return "RUNNING"
+    if g.get("closed"):
+        return "CLOSED"
+    return "DRAFT"
+
+
+def pick_giveaway(update: Update, context: CallbackContext, command: str, status=None, empty_text="", args=None):
+    """
+    /command <Giveaway ID> -> that giveaway.
+    /command               -> the only giveaway in `status`; with several
+                              at once the admin gets the ID list.
+    Returns None after replying when nothing was picked. `args` overrides
+    the command arguments.
+    """
+    if args is None:
+        args = getattr(context, "args", None) or []
+    if args:
+        g = giveaways.get(args[0].strip())
+        if g is None:
+            update.message.reply_text(f"Giveaway not found: {args[0].strip()}")
+        return g
+
+    cands = [g for g in giveaways.all() if status is None or giveaway_status(g) == status]
+    if len(cands) == 1:
+        return cands[0]
+    if not cands:
+        if empty_text:
+            update.message.reply_text(empty_text)
+        return None
+
+    lines = ["Several giveaways match. Send the command with a Giveaway ID:", ""]
+    for g in cands:
+        lines.append(f"/{command} {g.gid} — {(g.get('title') or '').strip()} ({giveaway_status(g)})")
+    update.message.reply_text("\n".join(lines))
+    return None
+
+
 def cmd_start(update: Update, context: CallbackContext):
     u = update.effective_user
     if not u:
@@ -1240,16 +1784,19 @@ def cmd_panel(update: Update, context: CallbackContext):
     update.message.reply_text(
         "🛠 ADMIN CONTROL PANEL\n\n"
         "📌 GIVEAWAY\n"
-        "/newgiveaway\n"
-        "/participants\n"
-        "/endgiveaway\n"
-        "/draw\n\n"
+        "/newgiveaway [channel]\n"
+        "/giveaways\n"
+        "/participants [id] [@user | id]\n"
+        "/endgiveaway [id]\n"
+        "/draw [id]\n\n"
         "⚙️ AUTO DRAW\n"
         f"/Autodraw   (Current: {status})\n\n"
         "📦 PRIZE DELIVERY\n"
         "/prizeDelivered\n\n"
         "🏆 WINNER HISTORY\n"
         "/winnerlist\n\n"
+        "📤 EXPORT\n"
+        "/export [participants | bans | winners] [csv | jsonl] [id]\n\n"
         "🔒 BLOCK SYSTEM\n"
         "/blockpermanent\n"
         "/unban\n"
@@ -1310,70 +1857,141 @@ def cmd_removeverifylink(update: Update, context: CallbackContext):
 
 
 def cmd_newgiveaway(update: Update, context: CallbackContext):
-    global admin_state, data
+    global admin_state, admin_draft_gid
     if not is_admin(update):
         return
 
-    stop_live_countdown()
-    stop_draw_jobs()
-    stop_auto_draw_finalize()
+    # optional channel: /newgiveaway -100123 or /newgiveaway @channel
+    args = getattr(context, "args", None) or []
+    chat_id = CHANNEL_ID
+    if args:
+        chat_id = channel_ref(args[0])
+        if not chat_id:
+            update.message.reply_text("Invalid channel. Use /newgiveaway -100... or /newgiveaway @channel")
+            return
 
     with lock:
-        keep_perma = dict(data.get("permanent_block", {}) or {})
-        keep_verify = list(data.get("verify_targets", []) or [])
-        keep_auto = bool(data.get("auto_draw", False))
-        keep_history = dict(data.get("history", {}) or {})
-        keep_winner_history = list(data.get("winner_history", []) or [])
+        # an unposted draft is replaced; running giveaways are not touched
+        old = giveaways.get(admin_draft_gid)
+        if old is not None and giveaway_status(old) == "DRAFT":
+            giveaways.remove(old.gid)
+            save_data(("giveaways", old.gid))
 
-        data.clear()
-        data.update(fresh_default_data())
-        data["permanent_block"] = keep_perma
-        data["verify_targets"] = keep_verify
-        data["auto_draw"] = keep_auto
-        data["history"] = keep_history
-        data["winner_history"] = keep_winner_history
-        save_data()
+        gid = make_gid()
+        giveaways.create(gid, fresh_giveaway(chat_id))
+        save_data(("giveaways", gid))
+        admin_draft_gid = gid
 
     admin_state = "title"
     update.message.reply_text(
         "━━━━━━━━━━━━━━━━━━━━\n"
         "🆕 NEW GIVEAWAY SETUP\n"
         "━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"Giveaway ID: {gid}\n"
+        f"Channel: {chat_id}\n\n"
         "STEP 1 — Send Giveaway Title (exact):"
     )
 
 
-def cmd_participants(update: Update, context: CallbackContext):
+def cmd_giveaways(update: Update, context: CallbackContext):
     if not is_admin(update):
         return
-    parts = data.get("participants", {})
-    if not parts:
-        update.message.reply_text("👥 Participants List is empty.")
+    items = giveaways.all()
+    if not items:
+        update.message.reply_text("No giveaways right now. Start one with /newgiveaway")
         return
-    lines = ["━━━━━━━━━━━━━━━━━━━━", "👥 PARTICIPANTS LIST", "━━━━━━━━━━━━━━━━━━━━", f"Total: {len(parts)}", ""]
-    i = 1
-    for uid, info in parts.items():
-        uname = (info or {}).get("username", "")
+
+    lines = ["━━━━━━━━━━━━━━━━━━━━", "📋 GIVEAWAYS", "━━━━━━━━━━━━━━━━━━━━", ""]
+    for g in items:
+        lines.append(f"🆔 {g.gid} — {giveaway_status(g)}")
+        lines.append(f"   {(g.get('title') or '').strip() or 'Untitled'}")
+        lines.append(f"   Channel: {g.chat_id} | Participants: {participants_count(g)}")
+        lines.append("")
+    update.message.reply_text("\n".join(lines))
+
+
+def build_participants_page(g, page: int):
+    # renders one page straight from the participants table: O(page size)
+    with locks.participants:
+        parts = g["participants"]
+        total = len(parts)
+        pages = max(1, -(-total // PARTICIPANTS_PAGE_SIZE))
+        page = min(max(0, page), pages - 1)
+        start = page * PARTICIPANTS_PAGE_SIZE
+        rows = [parts.row(i) for i in range(start, min(total, start + PARTICIPANTS_PAGE_SIZE))]
+    if not rows:
+        return "👥 Participants List is empty.", None
+
+    lines = ["━━━━━━━━━━━━━━━━━━━━", "👥 PARTICIPANTS LIST", "━━━━━━━━━━━━━━━━━━━━", f"Total: {total}  •  Page {page + 1}/{pages}", ""]
+    for i, (uid, uname, _) in enumerate(rows, start + 1):
         if uname:
             lines.append(f"{i}. {uname} | User ID: {uid}")
         else:
             lines.append(f"{i}. User ID: {uid}")
-        i += 1
-    update.message.reply_text("\n".join(lines))
+    return "\n".join(lines), participants_page_markup(g.gid, page, pages)
+
+
+def build_participants_search(g, text: str):
+    # username / User ID prefix lookup (ParticipantTable.search, no scan);
+    # the index is sorted outside the participants lock
+    with locks.participants:
+        parts = g["participants"]
+    parts.prepare_search(locks.participants)
+    with locks.participants:
+        total, found = parts.search(text, PARTICIPANTS_PAGE_SIZE)
+        rows = [(i + 1,) + parts.row(i) for i in found]
+
+    lines = ["━━━━━━━━━━━━━━━━━━━━", "👥 PARTICIPANTS LIST", "━━━━━━━━━━━━━━━━━━━━", f"🔎 Search: {text}", f"Matches: {total}", ""]
+    if total > len(rows):
+        lines.insert(-1, f"Showing {len(rows)} of them — send a longer prefix to narrow it down.")
+    if not rows:
+        lines.append("No participant matches.")
+    for i, uid, uname, _ in rows:
+        if uname:
+            lines.append(f"{i}. {uname} | User ID: {uid}")
+        else:
+            lines.append(f"{i}. User ID: {uid}")
+    return "\n".join(lines), participants_search_markup(g.gid)
+
+
+def cmd_participants(update: Update, context: CallbackContext):
+    if not is_admin(update):
+        return
+    # /participants [Giveaway ID] [@username | User ID prefix]
+    args = list(getattr(context, "args", None) or [])
+    search = ""
+    if args and args[0].strip() not in giveaways:
+        search, args = " ".join(args), []
+    elif len(args) > 1:
+        search, args = " ".join(args[1:]), args[:1]
+    g = pick_giveaway(update, context, "participants", empty_text="👥 Participants List is empty.", args=args)
+    if g is None:
+        return
+    if search:
+        text, markup = build_participants_search(g, search)
+    else:
+        text, markup = build_participants_page(g, 0)
+    update.message.reply_text(text, reply_markup=markup)
 
 
 def cmd_endgiveaway(update: Update, context: CallbackContext):
     if not is_admin(update):
         return
-    if not data.get("active"):
+    g = pick_giveaway(update, context, "endgiveaway", status="RUNNING",
+                      empty_text="No active giveaway is running right now.")
+    if g is None:
+        return
+    if not g.get("active"):
         update.message.reply_text("No active giveaway is running right now.")
         return
     update.message.reply_text(
         "━━━━━━━━━━━━━━━━━━━━\n"
         "⚠️ END GIVEAWAY\n"
         "━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"Giveaway ID: {g.gid}\n"
+        f"{(g.get('title') or '').strip()}\n\n"
         "Are you sure you want to end now?",
-        reply_markup=end_confirm_markup()
+        reply_markup=end_confirm_markup(g.gid)
     )
 
 
@@ -1383,13 +2001,17 @@ def cmd_draw(update: Update, context: CallbackContext):
     if data.get("auto_draw"):
         update.message.reply_text("Auto Draw is ON. Winners will be posted automatically after giveaway ends.")
         return
-    if not data.get("closed"):
+    g = pick_giveaway(update, context, "draw", status="CLOSED",
+                      empty_text="Giveaway is not closed yet or no giveaway running.")
+    if g is None:
+        return
+    if not g.get("closed"):
         update.message.reply_text("Giveaway is not closed yet or no giveaway running.")
         return
-    if not data.get("participants", {}):
+    if not g.get("participants", {}):
         update.message.reply_text("No participants to draw winners from.")
         return
-    start_draw_progress(context, update.effective_chat.id)
+    start_draw_progress(context, update.effective_chat.id, g)
 
 
 def cmd_blockpermanent(update: Update, context: CallbackContext):
@@ -1402,7 +2024,8 @@ def cmd_blockpermanent(update: Update, context: CallbackContext):
         "🔒 PERMANENT BLOCK\n"
         "━━━━━━━━━━━━━━━━━━━━\n\n"
         "Send list (one per line):\n"
-        "User ID OR @username | user_id"
+        "User ID OR @username | user_id\n\n"
+        "Large list? Upload it as a .txt / .csv file."
     )
 
 
@@ -1433,7 +2056,8 @@ def cmd_blocklist(update: Update, context: CallbackContext):
     lines.append("📌 BAN LISTS")
     lines.append("━━━━━━━━━━━━━━━━━━━━")
     lines.append("")
-    lines.append(f"OLD WINNER MODE: {data.get('old_winner_mode','skip').upper()}")
+    modes = sorted({(g.get("old_winner_mode") or "skip").upper() for g in giveaways.all()})
+    lines.append(f"OLD WINNER MODE: {' / '.join(modes) or 'SKIP'}")
     lines.append("")
 
     lines.append("⛔ OLD WINNER BLOCK LIST")
@@ -1539,11 +2163,206 @@ def cmd_winnerlist(update: Update, context: CallbackContext):
 
     update.message.reply_text("\n".join(lines))
 
+# =========================
+# EXPORT (CSV / JSONL DOCUMENT)
+# =========================
+EXPORT_COLLECTIONS = ("participants", "bans", "winners")
+
+
+def export_rows(what: str, g=None):
+    """(file name, columns, rows iterator, expected row count) for /export."""
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+
+    if what == "participants":
+        parts = g.get("participants")
+        with locks.participants:
+            total = len(parts)
+
+        def fetch(start, stop):
+            # a restart / relaunch swaps the table: the export ends there
+            if g.get("participants") is not parts:
+                return []
+            return [(i + 1,) + parts.row(i) for i in range(start, min(stop, len(parts)))]
+
+        rows = chunked(locks.participants, fetch, total, EXPORT_CHUNK_ROWS)
+        return f"participants-{g.gid}-{stamp}", ("n", "user_id", "username", "name"), rows, total
+
+    if what == "bans":
+        # ids are copied in one short hold, usernames read chunk by chunk
+        with locks.bans:
+            keys = [("permanent", uid) for uid in (data.get("permanent_block", {}) or {})]
+            keys += [("old_winner", uid) for uid in (data.get("old_winners", {}) or {})]
+
+        def fetch(start, stop):
+            lists = {"permanent": data.get("permanent_block", {}) or {},
+                     "old_winner": data.get("old_winners", {}) or {}}
+            out = []
+            for kind, uid in keys[start:stop]:
+                info = lists[kind].get(uid)
+                if info is not None:
+                    out.append((kind, uid, (info or {}).get("username", "")))
+            return out
+
+        rows = chunked(locks.bans, fetch, len(keys), EXPORT_CHUNK_ROWS)
+        return f"bans-{stamp}", ("list", "user_id", "username"), rows, len(keys)
+
+    # winner history is capped at 50 giveaways: copied in one hold
+    with locks.history:
+        rows = []
+        for entry in data.get("winner_history", []) or []:
+            for w in entry.get("winners", []) or []:
+                rows.append((
+                    entry.get("giveaway_id", ""), entry.get("title", ""), entry.get("prize", ""),
+                    entry.get("date", ""), w.get("type", ""), w.get("username", ""), w.get("user_id", ""),
+                ))
+    columns = ("giveaway_id", "title", "prize", "date", "type", "username", "user_id")
+    return f"winners-{stamp}", columns, iter(rows), len(rows)
+
+
+def run_export(bot, chat_id, what: str, fmt: str, g=None):
+    # export worker thread: no state lock is held here (see export_rows)
+    try:
+        name, columns, rows, expected = export_rows(what, g)
+        exporter.export(
+            bot, chat_id, what, name, columns, rows, fmt=fmt, expected=expected,
+            caption=f"📤 {what.title()} export" + (f" | Giveaway ID: {g.gid}" if g is not None else "") + "\nRows: {rows}",
+        )
+    except Exception as e:
+        try:
+            bot.send_message(chat_id=chat_id, text=f"❌ Export failed: {e}")
+        except Exception:
+            pass
+
+
+def cmd_export(update: Update, context: CallbackContext):
+    if not is_admin(update):
+        return
+    # /export [participants | bans | winners] [csv | jsonl] [Giveaway ID]
+    what, fmt, rest = "participants", "csv", []
+    for arg in getattr(context, "args", None) or []:
+        low = arg.strip().lower()
+        if low in EXPORT_COLLECTIONS:
+            what = low
+        elif low in EXPORT_FORMATS:
+            fmt = low
+        else:
+            rest.append(arg)
+
+    g = None
+    if what == "participants":
+        g = pick_giveaway(update, context, "export", empty_text="👥 Participants List is empty.", args=rest[:1])
+        if g is None:
+            return
+
+    if not exporter.submit(what, run_export, context.bot, update.effective_chat.id, what, fmt, g):
+        update.message.reply_text(f"⏳ Another bulk job is running ({exporter.busy()}). Try again when it is done.")
+        return
+    update.message.reply_text(f"⏳ Exporting {what} as {fmt.upper()}... the file will be sent here.")
+
+
+# =========================
+# BAN LIST IMPORT (UPLOADED FILE)
+# =========================
+BAN_IMPORT_STATES = {"perma_block_list": "permanent_block", "old_winner_block_list": "old_winners"}
+BAN_IMPORT_TITLES = {"permanent_block": "PERMANENT BLOCK", "old_winners": "OLD WINNER BLOCK"}
+
+
+def ban_import_text(target: str, imp: BanImport, done: bool = False) -> str:
+    head = "✅ IMPORT DONE" if done else "📥 IMPORTING…"
+    return (
+        "━━━━━━━━━━━━━━━━━━━━\n"
+        f"{head} ({BAN_IMPORT_TITLES[target]})\n"
+        "━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"Lines read: {imp.lines}\n"
+        f"New users: {len(imp.entries)}\n"
+        f"Already listed / repeated: {imp.duplicates}\n"
+        f"Invalid lines: {imp.invalid}"
+    )
+
+
+def run_ban_import(bot, file_id: str, target: str, chat_id, message_id):
+    # background worker: the file is parsed chunk by chunk, each chunk is
+    # checked against the ban lists under the bans region only; the new ids
+    # are committed at the end in one batched save_data
+    imp = BanImport(tag=user_tag)
+    last_edit = [0.0]
+
+    def status(text, force=False):
+        if not force and now_ts() - last_edit[0] < BAN_IMPORT_PROGRESS_INTERVAL:
+            return
+        last_edit[0] = now_ts()
+        try:
+            if force:
+                bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+            else:
+                with api_priority(COSMETIC):
+                    bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+        except Exception:
+            pass
+
+    try:
+        with downloaded(bot, file_id) as f:
+            for chunk in read_chunks(f, BAN_IMPORT_CHUNK_LINES):
+                pairs = imp.parse(chunk)
+                with locks.bans:
+                    known = [data.get("permanent_block", {}) or {}]
+                    if target == "old_winners":
+                        known.append(data.get("old_winners", {}) or {})
+                    imp.keep(pairs, *known)
+                status(ban_import_text(target, imp))
+
+        rows = {uid: {"username": uname} for uid, uname in imp.entries.items()}
+        with lock:
+            lst = data.get(target, {}) or {}
+            fresh = [uid for uid in rows if uid not in lst]
+            for uid in fresh:
+                lst[uid] = rows[uid]
+            data[target] = lst
+            if fresh:
+                save_data(*[(target, uid) for uid in fresh])
+            if target == "permanent_block":
+                index_ban(*fresh)
+        status(ban_import_text(target, imp, done=True), force=True)
+    except Exception as e:
+        status(f"❌ Ban list import failed: {e}", force=True)
+
+
+def admin_document_handler(update: Update, context: CallbackContext):
+    global admin_state
+    if not is_admin(update):
+        return
+    target = BAN_IMPORT_STATES.get(admin_state)
+    doc = update.message.document if update.message else None
+    if target is None or doc is None:
+        return
+
+    if not (doc.file_name or "").lower().endswith((".txt", ".csv")):
+        update.message.reply_text("Send a .txt or .csv file (one user per line).")
+        return
+    if (doc.file_size or 0) > BAN_IMPORT_MAX_BYTES:
+        update.message.reply_text(f"File is too large (max {BAN_IMPORT_MAX_BYTES // 2**20} MB).")
+        return
+
+    msg = update.message.reply_text("📥 Import queued…")
+    if not exporter.submit("ban import", run_ban_import, context.bot, doc.file_id, target, msg.chat_id, msg.message_id):
+        msg.edit_text(f"⏳ Another bulk job is running ({exporter.busy()}). Send the file again when it is done.")
+        return
+
+    if admin_state == "old_winner_block_list":
+        admin_state = "rules"
+        update.message.reply_text("Old winner list is importing (progress above).\nNow send Giveaway Rules:")
+    else:
+        admin_state = None
+
+
 # =========================
 # ADMIN TEXT FLOW
 # =========================
+SETUP_STATES = ("title", "prize", "winners", "duration", "old_winner_mode", "old_winner_block_list", "rules")
+
+
 def admin_text_handler(update: Update, context: CallbackContext):
-    global admin_state, data
+    global admin_state
     if not is_admin(update):
         return
     if admin_state is None:
@@ -1563,7 +2382,7 @@ def admin_text_handler(update: Update, context: CallbackContext):
             targets = data.get("verify_targets", []) or []
             targets.append({"ref": ref, "display": ref})
             data["verify_targets"] = targets
-            save_data()
+            save_data("verify_targets")
         update.message.reply_text("✅ Verify target added!", reply_markup=verify_add_more_done_markup())
         return
 
@@ -1577,7 +2396,7 @@ def admin_text_handler(update: Update, context: CallbackContext):
             targets = data.get("verify_targets", []) or []
             if n == 11:
                 data["verify_targets"] = []
-                save_data()
+                save_data("verify_targets")
                 admin_state = None
                 update.message.reply_text("✅ All verify targets removed!")
                 return
@@ -1586,24 +2405,30 @@ def admin_text_handler(update: Update, context: CallbackContext):
                 return
             targets.pop(n - 1)
             data["verify_targets"] = targets
-            save_data()
+            save_data("verify_targets")
         admin_state = None
         update.message.reply_text("✅ Removed!")
         return
 
-    # GIVEAWAY SETUP
+    # GIVEAWAY SETUP (the draft created by /newgiveaway)
+    g = giveaways.get(admin_draft_gid)
+    if admin_state in SETUP_STATES and (g is None or giveaway_status(g) != "DRAFT"):
+        admin_state = None
+        update.message.reply_text("Giveaway setup expired. Start again with /newgiveaway")
+        return
+
     if admin_state == "title":
         with lock:
-            data["title"] = msg
-            save_data()
+            g["title"] = msg
+            save_data(g.path("title"))
         admin_state = "prize"
         update.message.reply_text("✅ Title saved!\n\nNow send Giveaway Prize (exact):")
         return
 
     if admin_state == "prize":
         with lock:
-            data["prize"] = msg
-            save_data()
+            g["prize"] = msg
+            save_data(g.path("prize"))
         admin_state = "winners"
         update.message.reply_text("✅ Prize saved!\n\nNow send Total Winner Count:")
         return
@@ -1613,8 +2438,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             update.message.reply_text("Send a valid number.")
             return
         with lock:
-            data["winner_count"] = max(1, min(1000000, int(msg)))
-            save_data()
+            g["winner_count"] = max(1, min(1000000, int(msg)))
+            save_data(g.path("winner_count"))
         admin_state = "duration"
         update.message.reply_text("✅ Saved!\n\nSend Duration (e.g. 30 Second / 5 Minute / 1 Hour):")
         return
@@ -1625,8 +2450,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             update.message.reply_text("Invalid duration.")
             return
         with lock:
-            data["duration_seconds"] = seconds
-            save_data()
+            g["duration_seconds"] = seconds
+            save_data(g.path("duration_seconds"))
 
         admin_state = "old_winner_mode"
         update.message.reply_text(
@@ -1645,19 +2470,20 @@ def admin_text_handler(update: Update, context: CallbackContext):
             return
         if msg == "2":
             with lock:
-                data["old_winner_mode"] = "skip"
-                data["old_winners"] = {}
-                save_data()
+                g["old_winner_mode"] = "skip"
+                save_data(g.path("old_winner_mode"))
             admin_state = "rules"
             update.message.reply_text("Send Giveaway Rules (multi-line):")
             return
 
         with lock:
-            data["old_winner_mode"] = "block"
-            data["old_winners"] = {}
-            save_data()
+            g["old_winner_mode"] = "block"
+            save_data(g.path("old_winner_mode"))
         admin_state = "old_winner_block_list"
-        update.message.reply_text("Send old winners list (one per line): @user | id OR id")
+        update.message.reply_text(
+            "Send old winners list (one per line): @user | id OR id\n"
+            "Large list? Upload it as a .txt / .csv file."
+        )
         return
 
     if admin_state == "old_winner_block_list":
@@ -1670,18 +2496,18 @@ def admin_text_handler(update: Update, context: CallbackContext):
             for uid, uname in entries:
                 ow[str(uid)] = {"username": uname}
             data["old_winners"] = ow
-            save_data()
+            save_data(*[("old_winners", str(uid)) for uid, _ in entries])
         admin_state = "rules"
         update.message.reply_text("✅ Old winner list saved!\nNow send Giveaway Rules:")
         return
 
     if admin_state == "rules":
         with lock:
-            data["rules"] = msg
-            save_data()
+            g["rules"] = msg
+            save_data(g.path("rules"))
         admin_state = None
         update.message.reply_text("✅ Rules saved!\nShowing preview…")
-        update.message.reply_text(build_preview_text(), reply_markup=preview_markup())
+        update.message.reply_text(build_preview_text(g), reply_markup=preview_markup(g.gid))
         return
 
     # PERMANENT BLOCK
@@ -1695,16 +2521,35 @@ def admin_text_handler(update: Update, context: CallbackContext):
             for uid, uname in entries:
                 perma[str(uid)] = {"username": uname}
             data["permanent_block"] = perma
-            save_data()
+            save_data(*[("permanent_block", str(uid)) for uid, _ in entries])
+            index_ban(*[str(uid) for uid, _ in entries])
         admin_state = None
         update.message.reply_text("✅ Permanent block saved!")
         return
 
+    # PARTICIPANTS BROWSER (jump / search input)
+    if admin_state in ("participants_jump", "participants_search"):
+        g = giveaways.get(context.user_data.get("parts_gid", ""))
+        if g is None:
+            admin_state = None
+            update.message.reply_text("Giveaway not found.")
+            return
+        if admin_state == "participants_jump":
+            if not msg.isdigit():
+                update.message.reply_text("Send a page number.")
+                return
+            text, markup = build_participants_page(g, int(msg) - 1)
+        else:
+            text, markup = build_participants_search(g, msg)
+        admin_state = None
+        update.message.reply_text(text, reply_markup=markup)
+        return
+
     # PRIZE DELIVERY
     if admin_state == "prize_delivered_gid":
         gid = msg.strip()
         with lock:
-            snap = (data.get("history", {}) or {}).get(gid)
+            snap = find_history(gid)
         if not snap:
             update.message.reply_text("Giveaway ID not found.")
             return
@@ -1722,7 +2567,7 @@ def admin_text_handler(update: Update, context: CallbackContext):
 
         with lock:
             hist = data.get("history", {}) or {}
-            snap = hist.get(gid)
+            snap = find_history(gid)
             if not snap:
                 admin_state = None
                 update.message.reply_text("Giveaway not found.")
@@ -1742,7 +2587,8 @@ def admin_text_handler(update: Update, context: CallbackContext):
             snap["winners"] = winners
             hist[gid] = snap
             data["history"] = hist
-            save_data()
+            save_data(("history", gid))
+            publish_claims(gid)
 
         # update winners post
         try:
@@ -1753,18 +2599,17 @@ def admin_text_handler(update: Update, context: CallbackContext):
             wmid = snap2.get("winners_message_id")
 
             keys = list(wmap.keys())
-            first_uid = str(data.get("first_winner_id") or (keys[0] if keys else ""))
-            if first_uid not in wmap and keys:
-                first_uid = keys[0]
+            # winners map keeps the first-join winner first
+            first_uid = keys[0] if keys else ""
             first_uname = (wmap.get(first_uid, {}) or {}).get("username", "")
 
             others = [(u, (wmap.get(u, {}) or {}).get("username", "")) for u in keys if u != first_uid]
 
-            new_text = build_winners_post_text(gid, first_uid, first_uname, others, dmap)
+            new_text = build_winners_post_text(gid, snap2.get("prize"), first_uid, first_uname, others, dmap)
 
             if wmid:
                 context.bot.edit_message_text(
-                    chat_id=CHANNEL_ID,
+                    chat_id=snap2.get("chat_id") or CHANNEL_ID,
                     message_id=wmid,
                     text=new_text,
                     reply_markup=claim_button_markup(gid),
@@ -1779,563 +2624,779 @@ def admin_text_handler(update: Update, context: CallbackContext):
 # =========================
 # CALLBACK HANDLER
 # =========================
-def cb_handler(update: Update, context: CallbackContext):
-    global admin_state
-    query = update.callback_query
-    qd = query.data
-    uid = str(query.from_user.id)
+def callback_giveaway(query, gid: str, fallback=None):
+    """
+    "join_giveaway|<gid>" -> that giveaway. Buttons posted before giveaways
+    had ids carry none: they are matched by their channel message, or fall
+    back to the only candidate in `fallback`.
+    """
+    if gid:
+        return giveaways.get(gid)
+    msg = getattr(query, "message", None)
+    if msg is not None:
+        g = giveaways.by_message(getattr(msg, "chat_id", None), msg.message_id)
+        if g is not None:
+            return g
+    if fallback is not None and len(fallback) == 1:
+        return fallback[0]
+    return None
 
-    # AutoDraw toggle
-    if qd in ("autodraw_on", "autodraw_off"):
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
-        try:
+
+callbacks = CallbackRouter("|", is_admin=lambda uid: uid == str(ADMIN_ID))
+
+
+# AutoDraw toggle
+@callbacks.route("autodraw_on", "autodraw_off", admin=True)
+def cb_autodraw_toggle(query, context, uid, arg):
+    on = query.data == "autodraw_on"
+    try:
+        query.answer()
+    except Exception:
+        pass
+    with lock:
+        data["auto_draw"] = on
+        save_data("auto_draw")
+    try:
+        query.edit_message_text("✅ Auto Draw is ON." if on else "✅ Auto Draw is OFF.")
+    except Exception:
+        pass
+
+
+# Participants browser (admin): page buttons, jump / search prompts
+def parts_giveaway(query, arg):
+    # "<gid>|<page>" -> (giveaway, page); answers the query
+    gid, _, page = arg.partition("|")
+    g = giveaways.get(gid)
+    try:
+        if g is None:
+            query.answer("Giveaway not found.", show_alert=True)
+        else:
             query.answer()
-        except Exception:
-            pass
-        with lock:
-            data["auto_draw"] = (qd == "autodraw_on")
-            save_data()
-        try:
-            query.edit_message_text("✅ Auto Draw is ON." if qd == "autodraw_on" else "✅ Auto Draw is OFF.")
-        except Exception:
-            pass
+    except Exception:
+        pass
+    return g, page
+
+
+@callbacks.route("parts_page", prefix=True, admin=True)
+def cb_parts_page(query, context, uid, arg):
+    g, page = parts_giveaway(query, arg)
+    if g is None:
         return
+    text, markup = build_participants_page(g, int(page) if page.isdigit() else 0)
+    try:
+        query.edit_message_text(text, reply_markup=markup)
+    except Exception:
+        pass
 
-    # Verify buttons
-    if qd == "verify_add_more":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
-        try:
-            query.answer()
-        except Exception:
-            pass
-        admin_state = "add_verify"
-        try:
-            query.edit_message_text("Send another Chat ID or @username:")
-        except Exception:
-            pass
+
+@callbacks.route("parts_jump", prefix=True, admin=True)
+def cb_parts_jump(query, context, uid, arg):
+    global admin_state
+    g, _ = parts_giveaway(query, arg)
+    if g is None:
         return
+    context.user_data["parts_gid"] = g.gid
+    admin_state = "participants_jump"
+    query.message.reply_text("🔢 Send a page number.")
 
-    if qd == "verify_add_done":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
-        try:
-            query.answer()
-        except Exception:
-            pass
-        admin_state = None
-        try:
-            query.edit_message_text("✅ Verify setup completed.")
-        except Exception:
-            pass
+
+@callbacks.route("parts_search", prefix=True, admin=True)
+def cb_parts_search(query, context, uid, arg):
+    global admin_state
+    g, _ = parts_giveaway(query, arg)
+    if g is None:
         return
+    context.user_data["parts_gid"] = g.gid
+    admin_state = "participants_search"
+    query.message.reply_text("🔎 Send a @username or User ID (a prefix is enough).")
 
-    # Preview approve/reject/edit
-    if qd.startswith("preview_"):
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
 
-        if qd == "preview_approve":
-            try:
-                query.answer()
-            except Exception:
-                pass
+# Verify buttons
+@callbacks.route("verify_add_more", admin=True)
+def cb_verify_add_more(query, context, uid, arg):
+    global admin_state
+    try:
+        query.answer()
+    except Exception:
+        pass
+    admin_state = "add_verify"
+    try:
+        query.edit_message_text("Send another Chat ID or @username:")
+    except Exception:
+        pass
 
-            try:
-                duration = int(data.get("duration_seconds", 0)) or 1
-                m = context.bot.send_message(chat_id=CHANNEL_ID, text=build_live_text(duration), reply_markup=join_button_markup())
-
-                with lock:
-                    data["live_message_id"] = m.message_id
-                    data["active"] = True
-                    data["closed"] = False
-                    data["start_time"] = now_ts()
-                    data["closed_message_id"] = None
-
-                    data["participants"] = {}
-                    data["winners"] = {}
-                    data["pending_winners_text"] = ""
-                    data["pending_winners_gid"] = ""
-                    data["first_winner_id"] = None
-                    data["first_winner_username"] = ""
-                    data["first_winner_name"] = ""
-                    data["autodraw_message_id"] = None
-                    save_data()
-
-                start_live_countdown(context.job_queue)
-                query.edit_message_text("✅ Giveaway approved and posted to channel!")
-            except Exception as e:
-                query.edit_message_text(f"Failed to post in channel.\nError: {e}")
-            return
 
-        if qd == "preview_reject":
-            try:
-                query.answer()
-            except Exception:
-                pass
-            query.edit_message_text("❌ Giveaway rejected.")
-            return
+@callbacks.route("verify_add_done", admin=True)
+def cb_verify_add_done(query, context, uid, arg):
+    global admin_state
+    try:
+        query.answer()
+    except Exception:
+        pass
+    admin_state = None
+    try:
+        query.edit_message_text("✅ Verify setup completed.")
+    except Exception:
+        pass
 
-        if qd == "preview_edit":
-            try:
-                query.answer()
-            except Exception:
-                pass
-            query.edit_message_text("✏️ Edit Mode: Start again with /newgiveaway")
-            return
 
-    # End giveaway confirm/cancel
-    if qd == "end_confirm":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
+# Preview approve/reject/edit
+def preview_draft(query, arg):
+    # the draft a preview button belongs to, or None (query answered)
+    g = callback_giveaway(query, arg or admin_draft_gid)
+    if g is None or giveaway_status(g) != "DRAFT":
         try:
             query.answer()
+            query.edit_message_text("This giveaway draft is no longer available.")
         except Exception:
             pass
+        return None
+    return g
 
-        with lock:
-            if not data.get("active"):
-                try:
-                    query.edit_message_text("No active giveaway.")
-                except Exception:
-                    pass
-                return
-            data["active"] = False
-            data["closed"] = True
-            save_data()
 
-        live_mid = data.get("live_message_id")
-        if live_mid:
-            try:
-                context.bot.delete_message(chat_id=CHANNEL_ID, message_id=live_mid)
-            except Exception:
-                pass
+def drop_draft(g):
+    global admin_draft_gid
+    with lock:
+        giveaways.remove(g.gid)
+        save_data(("giveaways", g.gid))
+        if admin_draft_gid == g.gid:
+            admin_draft_gid = None
 
-        try:
-            m = context.bot.send_message(chat_id=CHANNEL_ID, text=build_closed_simple_text())
-            with lock:
-                data["closed_message_id"] = m.message_id
-                save_data()
-        except Exception:
-            pass
 
-        if data.get("auto_draw"):
-            try:
-                start_autodraw_channel_progress(context.job_queue, context.bot)
-            except Exception:
-                pass
+@callbacks.route("preview_approve", prefix=True, admin=True)
+def cb_preview_approve(query, context, uid, arg):
+    global admin_draft_gid
+    g = preview_draft(query, arg)
+    if g is None:
+        return
+    try:
+        query.answer()
+    except Exception:
+        pass
 
-        stop_live_countdown()
-        try:
-            query.edit_message_text("✅ Giveaway Closed.")
-        except Exception:
-            pass
+    try:
+        duration = int(g.get("duration_seconds", 0)) or 1
+        m = context.bot.send_message(chat_id=g.chat_id, text=build_live_text(g, duration), reply_markup=join_button_markup(g.gid))
+
+        with lock:
+            g["live_message_id"] = m.message_id
+            g["active"] = True
+            g["closed"] = False
+            g["start_time"] = now_ts()
+            g["closed_message_id"] = None
+
+            g["participants"] = ParticipantTable()
+            g["winners"] = {}
+            g["pending_winners_text"] = ""
+            g["pending_winners_gid"] = ""
+            g["first_winner_id"] = None
+            g["first_winner_username"] = ""
+            g["first_winner_name"] = ""
+            g["autodraw_message_id"] = None
+            g["autodraw_state"] = None
+            g["draw_state"] = None
+            save_data(("giveaways", g.gid))
+            if admin_draft_gid == g.gid:
+                admin_draft_gid = None
+
+        start_live_countdown(context.job_queue, g)
+        query.edit_message_text(f"✅ Giveaway approved and posted to channel!\nGiveaway ID: {g.gid}")
+    except Exception as e:
+        query.edit_message_text(f"Failed to post in channel.\nError: {e}")
+
+
+@callbacks.route("preview_reject", prefix=True, admin=True)
+def cb_preview_reject(query, context, uid, arg):
+    g = preview_draft(query, arg)
+    if g is None:
         return
+    drop_draft(g)
+    try:
+        query.answer()
+    except Exception:
+        pass
+    query.edit_message_text("❌ Giveaway rejected.")
 
-    if qd == "end_cancel":
-        if uid != str(ADMIN_ID):
+
+@callbacks.route("preview_edit", prefix=True, admin=True)
+def cb_preview_edit(query, context, uid, arg):
+    g = preview_draft(query, arg)
+    if g is None:
+        return
+    drop_draft(g)
+    try:
+        query.answer()
+    except Exception:
+        pass
+    query.edit_message_text("✏️ Edit Mode: Start again with /newgiveaway")
+
+
+# End giveaway confirm/cancel
+@callbacks.route("end_confirm", prefix=True, admin=True)
+def cb_end_confirm(query, context, uid, arg):
+    try:
+        query.answer()
+    except Exception:
+        pass
+
+    g = callback_giveaway(query, arg, fallback=giveaways.active())
+    with lock:
+        if g is None or not g.get("active"):
             try:
-                query.answer("Admin only.", show_alert=True)
+                query.edit_message_text("No active giveaway.")
             except Exception:
                 pass
             return
+        g["active"] = False
+        g["closed"] = True
+        save_data(g.path("active"), g.path("closed"))
+        flush_data()
+        cluster_ingest(context.bot)
+
+    stop_live_post(g)
+    live_mid = g.get("live_message_id")
+    if live_mid:
         try:
-            query.answer()
-            query.edit_message_text("❌ Cancelled.")
+            context.bot.delete_message(chat_id=g.chat_id, message_id=live_mid)
         except Exception:
             pass
-        return
 
-    # Reset
-    if qd == "reset_confirm":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
+    try:
+        m = context.bot.send_message(chat_id=g.chat_id, text=build_closed_simple_text(g))
+        with lock:
+            g["closed_message_id"] = m.message_id
+            save_data(g.path("closed_message_id"))
+    except Exception:
+        pass
+
+    if data.get("auto_draw"):
         try:
-            query.answer()
+            start_autodraw_channel_progress(context.job_queue, context.bot, g)
         except Exception:
             pass
 
-        stop_live_countdown()
-        stop_draw_jobs()
-        stop_auto_draw_finalize()
+    stop_live_countdown(g)
+    try:
+        query.edit_message_text("✅ Giveaway Closed.")
+    except Exception:
+        pass
+
+
+@callbacks.route("end_cancel", admin=True)
+def cb_end_cancel(query, context, uid, arg):
+    try:
+        query.answer()
+        query.edit_message_text("❌ Cancelled.")
+    except Exception:
+        pass
 
-        with lock:
-            keep_perma = dict(data.get("permanent_block", {}) or {})
-            keep_verify = list(data.get("verify_targets", []) or [])
-            keep_auto = bool(data.get("auto_draw", False))
-            keep_history = dict(data.get("history", {}) or {})
-            keep_winner_history = list(data.get("winner_history", []) or [])
-
-            data.clear()
-            data.update(fresh_default_data())
-            data["permanent_block"] = keep_perma
-            data["verify_targets"] = keep_verify
-            data["auto_draw"] = keep_auto
-            data["history"] = keep_history
-            data["winner_history"] = keep_winner_history
-            save_data()
 
+# Reset
+@callbacks.route("reset_confirm", admin=True)
+def cb_reset_confirm(query, context, uid, arg):
+    global admin_draft_gid
+    try:
+        query.answer()
+    except Exception:
+        pass
+
+    for g in giveaways.all():
+        stop_giveaway_jobs(g)
+
+    with lock:
+        keep_perma = dict(data.get("permanent_block", {}) or {})
+        keep_verify = list(data.get("verify_targets", []) or [])
+        keep_auto = bool(data.get("auto_draw", False))
+        keep_history = dict(data.get("history", {}) or {})
+        keep_winner_history = list(data.get("winner_history", []) or [])
+
+        data.clear()
+        data.update(fresh_default_data())
+        data["permanent_block"] = keep_perma
+        data["verify_targets"] = keep_verify
+        data["auto_draw"] = keep_auto
+        data["history"] = keep_history
+        data["winner_history"] = keep_winner_history
+        giveaways.bind(data)
+        publish_claims()
+        admin_draft_gid = None
+        save_data()
+
+    try:
+        query.edit_message_text("✅ Reset completed.")
+    except Exception:
+        pass
+
+
+@callbacks.route("reset_cancel")
+def cb_reset_cancel(query, context, uid, arg):
+    try:
+        query.answer()
+        query.edit_message_text("Cancelled.")
+    except Exception:
+        pass
+
+
+# Unban choose
+@callbacks.route("unban_permanent", admin=True)
+def cb_unban_permanent(query, context, uid, arg):
+    global admin_state
+    admin_state = "unban_permanent_input"
+    try:
+        query.answer()
+        query.edit_message_text("Send User ID (or @name | id) to unban from Permanent Block:")
+    except Exception:
+        pass
+
+
+@callbacks.route("unban_oldwinner", admin=True)
+def cb_unban_oldwinner(query, context, uid, arg):
+    global admin_state
+    admin_state = "unban_oldwinner_input"
+    try:
+        query.answer()
+        query.edit_message_text("Send User ID (or @name | id) to unban from Old Winner Block:")
+    except Exception:
+        pass
+
+
+@callbacks.route("reset_permanent_ban", admin=True)
+def cb_reset_permanent_ban(query, context, uid, arg):
+    with lock:
+        data["permanent_block"] = {}
+        save_data("permanent_block")
+        index_rebuild()
+    try:
+        query.answer()
+        query.edit_message_text("✅ Permanent Ban List has been reset.")
+    except Exception:
+        pass
+
+
+@callbacks.route("reset_oldwinner_ban", admin=True)
+def cb_reset_oldwinner_ban(query, context, uid, arg):
+    with lock:
+        data["old_winners"] = {}
+        save_data("old_winners")
+    try:
+        query.answer()
+        query.edit_message_text("✅ Old Winner Ban List has been reset.")
+    except Exception:
+        pass
+
+
+# Join giveaway
+@callbacks.route("join_giveaway", prefix=True)
+@clicks.guard("join")
+def cb_join(query, context, uid, arg):
+    # decision phase: in-memory state (and the cached verify check)
+    # decides the popup; persistence and the live post edit run after
+    # the query has been answered
+    g = callback_giveaway(query, arg)
+    if g is None or not g.get("active"):
         try:
-            query.edit_message_text("✅ Reset completed.")
+            query.answer("This giveaway is not active right now.", show_alert=True)
         except Exception:
             pass
         return
 
-    if qd == "reset_cancel":
+    with locks.bans:
+        banned = uid in (data.get("permanent_block", {}) or {})
+        old_winner = uid in (data.get("old_winners", {}) or {})
+
+    if banned:
         try:
-            query.answer()
-            query.edit_message_text("Cancelled.")
+            query.answer(popup_permanent_blocked(), show_alert=True)
         except Exception:
             pass
         return
 
-    # Unban choose
-    if qd == "unban_permanent":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
-        admin_state = "unban_permanent_input"
+    if g.get("old_winner_mode") == "block" and old_winner:
         try:
-            query.answer()
-            query.edit_message_text("Send User ID (or @name | id) to unban from Permanent Block:")
+            query.answer(popup_old_winner_blocked(), show_alert=True)
         except Exception:
             pass
         return
 
-    if qd == "unban_oldwinner":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
-        admin_state = "unban_oldwinner_input"
+    tg_user = query.from_user
+    uname = user_tag(tg_user.username or "")
+    full_name = (tg_user.full_name or "").strip()
+
+    with locks.participants:
+        first_uid = g.get("first_winner_id")
+        first_uname = g.get("first_winner_username", "")
+        joined = uid in (g.get("participants", {}) or {})
+
+    if first_uid and uid == str(first_uid):
         try:
-            query.answer()
-            query.edit_message_text("Send User ID (or @name | id) to unban from Old Winner Block:")
+            query.answer(popup_first_winner(uname or first_uname or "@username", uid), show_alert=True)
         except Exception:
             pass
         return
 
-    if qd == "reset_permanent_ban":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
-        with lock:
-            data["permanent_block"] = {}
-            save_data()
+    if joined:
         try:
-            query.answer()
-            query.edit_message_text("✅ Permanent Ban List has been reset.")
+            query.answer(popup_already_joined(), show_alert=True)
         except Exception:
             pass
         return
 
-    if qd == "reset_oldwinner_ban":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
-        with lock:
-            data["old_winners"] = {}
-            save_data()
+    # membership cache; get_chat_member only on a miss
+    if not verify_user_join(context.bot, int(uid)):
         try:
-            query.answer()
-            query.edit_message_text("✅ Old Winner Ban List has been reset.")
+            query.answer(popup_verify_required(), show_alert=True)
         except Exception:
             pass
         return
 
-    # Join giveaway
-    if qd == "join_giveaway":
-        if not data.get("active"):
-            try:
-                query.answer("This giveaway is not active right now.", show_alert=True)
-            except Exception:
-                pass
-            return
-
-        if not verify_user_join(context.bot, int(uid)):
-            try:
-                query.answer(popup_verify_required(), show_alert=True)
-            except Exception:
-                pass
-            return
-
-        if uid in (data.get("permanent_block", {}) or {}):
-            try:
-                query.answer(popup_permanent_blocked(), show_alert=True)
-            except Exception:
-                pass
-            return
+    with locks.participants:
+        paths = []
+        if uid not in (g.get("participants", {}) or {}):
+            paths = [g.path("participants", uid)]
+            if not g.get("first_winner_id"):
+                g["first_winner_id"] = uid
+                g["first_winner_username"] = uname
+                g["first_winner_name"] = full_name
+                paths += [g.path("first_winner_id"), g.path("first_winner_username"), g.path("first_winner_name")]
+            g["participants"][uid] = {"username": uname, "name": full_name}
+            index_join(g, uid, uname)
+        first = g.get("first_winner_id") == uid
+
+    if not paths:
+        popup = popup_already_joined()  # a second click won the race
+    elif first:
+        popup = popup_first_winner(uname or "@username", uid)
+    else:
+        popup = popup_join_success(uname or "@Username", uid)
+    try:
+        query.answer(popup, show_alert=True)
+    except Exception:
+        pass
 
-        if data.get("old_winner_mode") == "block":
-            if uid in (data.get("old_winners", {}) or {}):
-                try:
-                    query.answer(popup_old_winner_blocked(), show_alert=True)
-                except Exception:
-                    pass
-                return
+    # side-effect phase
+    if paths:
+        side_effects.defer(save_region, locks.participants, *paths)
+        side_effects.defer(request_live_edit, context.bot, g)
 
-        with lock:
-            first_uid = data.get("first_winner_id")
 
-        if first_uid and uid == str(first_uid):
-            tg_user = query.from_user
-            uname = user_tag(tg_user.username or "") or data.get("first_winner_username", "") or "@username"
-            try:
-                query.answer(popup_first_winner(uname, uid), show_alert=True)
-            except Exception:
-                pass
-            return
+# Winners approve/reject (manual)
+@callbacks.route("winners_approve", prefix=True, admin=True)
+def cb_winners_approve(query, context, uid, arg):
+    try:
+        query.answer()
+    except Exception:
+        pass
 
-        if uid in (data.get("participants", {}) or {}):
-            try:
-                query.answer(popup_already_joined(), show_alert=True)
-            except Exception:
-                pass
-            return
+    g = callback_giveaway(query, arg, fallback=[x for x in giveaways.all() if x.get("pending_winners_gid")])
+    with lock:
+        gid = ((g.get("pending_winners_gid") if g is not None else "") or "").strip()
+        winners_map = dict(g.get("winners", {}) or {}) if g is not None else {}
+        text = ((g.get("pending_winners_text") if g is not None else "") or "").strip()
 
-        tg_user = query.from_user
-        uname = user_tag(tg_user.username or "")
-        full_name = (tg_user.full_name or "").strip()
+    if not gid or not winners_map or not text:
+        try:
+            query.edit_message_text("No pending winners.")
+        except Exception:
+            pass
+        return
 
-        with lock:
-            if not data.get("first_winner_id"):
-                data["first_winner_id"] = uid
-                data["first_winner_username"] = uname
-                data["first_winner_name"] = full_name
+    with lock:
+        hist = data.get("history", {}) or {}
+        if gid not in hist:
+            hist[gid] = history_snapshot(g, winners_map, {})
+            data["history"] = hist
+            save_data(("history", gid))
+            publish_claims(gid)
 
-            data["participants"][uid] = {"username": uname, "name": full_name}
-            save_data()
+    record_winner_history(g, winners_map)
+    flush_data()
 
-        # update live post immediately
+    closed_mid = g.get("closed_message_id")
+    if closed_mid:
         try:
-            live_mid = data.get("live_message_id")
-            start_ts = data.get("start_time")
-            if live_mid and start_ts:
-                start = datetime.utcfromtimestamp(start_ts)
-                duration = int(data.get("duration_seconds", 1) or 1)
-                elapsed = int((datetime.utcnow() - start).total_seconds())
-                remaining = duration - elapsed
-                if remaining < 0:
-                    remaining = 0
-                context.bot.edit_message_text(
-                    chat_id=CHANNEL_ID,
-                    message_id=live_mid,
-                    text=build_live_text(remaining),
-                    reply_markup=join_button_markup(),
-                )
+            context.bot.delete_message(chat_id=g.chat_id, message_id=closed_mid)
         except Exception:
             pass
-
         with lock:
-            if data.get("first_winner_id") == uid:
-                try:
-                    query.answer(popup_first_winner(uname or "@username", uid), show_alert=True)
-                except Exception:
-                    pass
-            else:
-                try:
-                    query.answer(popup_join_success(uname or "@Username", uid), show_alert=True)
-                except Exception:
-                    pass
-        return
+            g["closed_message_id"] = None
+            save_data(g.path("closed_message_id"))
 
-    # Winners approve/reject (manual)
-    if qd == "winners_approve":
-        if uid != str(ADMIN_ID):
-            try:
-                query.answer("Admin only.", show_alert=True)
-            except Exception:
-                pass
-            return
+    try:
+        m = context.bot.send_message(chat_id=g.chat_id, text=text, reply_markup=claim_button_markup(gid))
+        with lock:
+            data["history"][gid]["winners_message_id"] = m.message_id
+            save_data(("history", gid, "winners_message_id"))
+            publish_claims(gid)
+        finish_giveaway(g)
+        query.edit_message_text("✅ Approved! Winners posted to channel.")
+    except Exception as e:
         try:
-            query.answer()
+            query.edit_message_text(f"Failed to post winners: {e}")
         except Exception:
             pass
 
+
+@callbacks.route("winners_reject", prefix=True, admin=True)
+def cb_winners_reject(query, context, uid, arg):
+    try:
+        query.answer()
+    except Exception:
+        pass
+    g = callback_giveaway(query, arg, fallback=[x for x in giveaways.all() if x.get("pending_winners_gid")])
+    if g is not None:
         with lock:
-            gid = (data.get("pending_winners_gid") or "").strip()
-            winners_map = dict(data.get("winners", {}) or {})
-            text = (data.get("pending_winners_text") or "").strip()
+            g["pending_winners_text"] = ""
+            g["pending_winners_gid"] = ""
+            save_data(g.path("pending_winners_text"), g.path("pending_winners_gid"))
+    try:
+        query.edit_message_text("❌ Rejected! Winners will NOT be posted.")
+    except Exception:
+        pass
 
-        if not gid or not winners_map or not text:
-            try:
-                query.edit_message_text("No pending winners.")
-            except Exception:
-                pass
-            return
 
-        with lock:
-            hist = data.get("history", {}) or {}
-            if gid not in hist:
-                hist[gid] = {
-                    "gid": gid,
-                    "title": (data.get("title") or "").strip(),
-                    "prize": (data.get("prize") or "").strip(),
-                    "winners": winners_map,
-                    "delivered": {},
-                    "created_ts": now_ts(),
-                    "claim_expires_ts": now_ts() + 24 * 3600,
-                    "admin_contact": ADMIN_CONTACT,
-                    "winners_message_id": None,
-                }
-                data["history"] = hist
-                save_data()
-
-        record_winner_history(gid, winners_map)
-
-        closed_mid = data.get("closed_message_id")
-        if closed_mid:
-            try:
-                context.bot.delete_message(chat_id=CHANNEL_ID, message_id=closed_mid)
-            except Exception:
-                pass
-            with lock:
-                data["closed_message_id"] = None
-                save_data()
+# Claim prize per giveaway id
+@callbacks.route("claim_prize", prefix=True)
+@clicks.guard("claim")
+def cb_claim(query, context, uid, gid):
+    # immutable copy: never waits on joins or history writers
+    # (archived giveaways: one indexed read of the archive)
+    snap = claims.get(gid) or archive.get(gid)
 
+    if not snap:
         try:
-            m = context.bot.send_message(chat_id=CHANNEL_ID, text=text, reply_markup=claim_button_markup(gid))
-            with lock:
-                data["history"][gid]["winners_message_id"] = m.message_id
-                data["pending_winners_text"] = ""
-                data["pending_winners_gid"] = ""
-                save_data()
-            query.edit_message_text("✅ Approved! Winners posted to channel.")
-        except Exception as e:
-            try:
-                query.edit_message_text(f"Failed to post winners: {e}")
-            except Exception:
-                pass
+            query.answer(popup_giveaway_completed(), show_alert=True)
+        except Exception:
+            pass
         return
 
-    if qd == "winners_reject":
-        if uid != str(ADMIN_ID):
+    winners = snap.get("winners", {}) or {}
+    delivered = snap.get("delivered", {}) or {}
+    exp_ts = snap.get("claim_expires_ts")
+    now = now_ts()
+
+    # after 24h rules
+    if exp_ts and now > float(exp_ts):
+        if uid in winners:
             try:
-                query.answer("Admin only.", show_alert=True)
+                query.answer(popup_prize_expired(), show_alert=True)
             except Exception:
                 pass
             return
         try:
-            query.answer()
+            query.answer(popup_giveaway_completed(), show_alert=True)
         except Exception:
             pass
-        with lock:
-            data["pending_winners_text"] = ""
-            data["pending_winners_gid"] = ""
-            save_data()
+        return
+
+    # within 24h
+    if uid not in winners:
         try:
-            query.edit_message_text("❌ Rejected! Winners will NOT be posted.")
+            query.answer(popup_claim_not_winner(), show_alert=True)
         except Exception:
             pass
         return
 
-    # Claim prize per giveaway id
-    if qd.startswith("claim_prize|"):
-        gid = qd.split("|", 1)[1].strip()
-
-        with lock:
-            snap = (data.get("history", {}) or {}).get(gid)
+    # delivered check
+    if delivered.get(uid):
+        uname = winners.get(uid, {}).get("username", "") or "@username"
+        try:
+            query.answer(popup_prize_already_delivered(uname, uid, snap.get("admin_contact", ADMIN_CONTACT)), show_alert=True)
+        except Exception:
+            pass
+        return
 
-        if not snap:
-            try:
-                query.answer(popup_giveaway_completed(), show_alert=True)
-            except Exception:
-                pass
-            return
+    uname = winners.get(uid, {}).get("username", "") or "@username"
+    try:
+        query.answer(
+            popup_claim_winner(
+                username=uname,
+                uid=uid,
+                title=snap.get("title", ""),
+                prize=snap.get("prize", ""),
+                admin_contact=snap.get("admin_contact", ADMIN_CONTACT),
+            ),
+            show_alert=True
+        )
+    except Exception:
+        pass
 
-        winners = snap.get("winners", {}) or {}
-        delivered = snap.get("delivered", {}) or {}
-        exp_ts = snap.get("claim_expires_ts")
-        now = now_ts()
 
-        # after 24h rules
-        if exp_ts and now > float(exp_ts):
-            if uid in winners:
-                try:
-                    query.answer(popup_prize_expired(), show_alert=True)
-                except Exception:
-                    pass
-                return
-            try:
-                query.answer(popup_giveaway_completed(), show_alert=True)
-            except Exception:
-                pass
-            return
+cb_handler = callbacks
 
-        # within 24h
-        if uid not in winners:
-            try:
-                query.answer(popup_claim_not_winner(), show_alert=True)
-            except Exception:
-                pass
-            return
+# =========================
+# CLUSTER (MULTI-PROCESS JOINS)
+# =========================
+# routes decided by the worker processes (cluster_forward hands them over)
+cluster_callbacks = CallbackRouter("|", is_admin=lambda uid: uid == str(ADMIN_ID))
+
+
+@cluster_callbacks.route("join_giveaway", prefix=True)
+@clicks.guard("join")
+def cb_cluster_join(query, context, uid, arg):
+    # worker process: cb_join against `shared` instead of `data`; the
+    # join itself is one sqlite transaction that rechecks run and bans
+    msg = getattr(query, "message", None)
+    run = shared.giveaway(
+        arg or None,
+        chat_id=getattr(msg, "chat_id", None) if msg is not None else None,
+        message_id=msg.message_id if msg is not None else None,
+    )
+    result = "inactive" if run is None or not run["active"] else ""
+    if not result:
+        kinds = shared.bans(uid)
+        if "permanent" in kinds:
+            result = "permanent"
+        elif run["old_winner_mode"] == "block" and "old_winner" in kinds:
+            result = "old_winner"
+
+    tg_user = query.from_user
+    uname = user_tag(tg_user.username or "")
+    full_name = (tg_user.full_name or "").strip()
+
+    first = None
+    if not result:
+        first = shared.first(run["gid"])
+        if first and uid == first[0]:
+            result = "first"
+        elif shared.joined(run["gid"], uid):
+            result = "already"
+        elif not verify_user_join(context.bot, int(uid), shared.meta("verify_targets", [])):
+            result = "verify"
+        else:
+            result, first_uid = shared.join(run["gid"], uid, uname, full_name)
+            if result == "joined" and first_uid == uid:
+                result = "first"
+
+    if result == "inactive":
+        popup = "This giveaway is not active right now."
+    elif result == "permanent":
+        popup = popup_permanent_blocked()
+    elif result == "old_winner":
+        popup = popup_old_winner_blocked()
+    elif result == "first":
+        popup = popup_first_winner(uname or (first[1] if first else "") or "@username", uid)
+    elif result == "already":
+        popup = popup_already_joined()
+    elif result == "verify":
+        popup = popup_verify_required()
+    else:
+        popup = popup_join_success(uname or "@Username", uid)
+    try:
+        query.answer(popup, show_alert=True)
+    except Exception:
+        pass
 
-        # delivered check
-        if delivered.get(uid):
-            uname = winners.get(uid, {}).get("username", "") or "@username"
-            try:
-                query.answer(popup_prize_already_delivered(uname, uid, snap.get("admin_contact", ADMIN_CONTACT)), show_alert=True)
-            except Exception:
-                pass
-            return
 
-        uname = winners.get(uid, {}).get("username", "") or "@username"
+def cluster_forward(update, context):
+    # the callback handler in cluster mode: join clicks go to the worker
+    # owning the user, everything else is handled here
+    query = update.callback_query
+    r, _ = cluster_callbacks.resolve(query.data)
+    if r is None:
+        return callbacks(update, context)
+    if not cluster.submit(query.from_user.id, update.to_dict()):
+        # the user's worker is backed up: say so instead of holding this thread
         try:
-            query.answer(
-                popup_claim_winner(
-                    username=uname,
-                    uid=uid,
-                    title=snap.get("title", ""),
-                    prize=snap.get("prize", ""),
-                    admin_contact=snap.get("admin_contact", ADMIN_CONTACT),
-                ),
-                show_alert=True
-            )
+            query.answer(popup_busy(), show_alert=True)
         except Exception:
             pass
-        return
 
+
+cluster_forward.route_label = callbacks.route_label
+
+
+def cluster_ingest(bot):
+    """Pull the joins the workers made since the last call into `data`."""
+    global cluster_seq
+    if shared is None:
+        return
+    touched = {}
+    while True:
+        rows = shared.joins_since(cluster_seq)
+        if not rows:
+            break
+        # a row pulled twice (close and job at once) is skipped the second time
+        found = {gid: giveaways.get(gid) for gid in {r[1] for r in rows}}
+        with locks.participants:
+            paths = []
+            for _, gid, uid, uname, full_name in rows:
+                g = found[gid]
+                if g is None or uid in g["participants"]:
+                    continue
+                g["participants"][uid] = {"username": uname, "name": full_name}
+                index_join(g, uid, uname)
+                paths.append(g.path("participants", uid))
+                touched[gid] = g
+            # the first joiner was decided by the workers
+            firsts = shared.first_joins([gid for gid, g in touched.items() if not g.get("first_winner_id")])
+            for gid, (uid, uname, full_name) in firsts.items():
+                g = touched[gid]
+                g["first_winner_id"] = uid
+                g["first_winner_username"] = uname
+                g["first_winner_name"] = full_name
+                paths += [g.path("first_winner_id"), g.path("first_winner_username"), g.path("first_winner_name")]
+            if paths:
+                save_data(*paths)
+            cluster_seq = max(cluster_seq, rows[-1][0])
+    for g in touched.values():
+        request_live_edit(bot, g)
+
+
+@timed_job("cluster_ingest")
+def cluster_ingest_job(context: CallbackContext):
     try:
-        query.answer()
+        cluster_ingest(context.bot)
     except Exception:
         pass
 
+
+def cluster_worker_setup(make_bot, idx: int):
+    # runs in the forked worker: threads do not survive a fork, so the
+    # verify cache (and its pool) is created anew, with its own Bot
+    global membership
+    membership = MembershipCache(
+        positive_ttl=VERIFY_CACHE_TTL, negative_ttl=VERIFY_CACHE_NEGATIVE_TTL,
+        max_size=VERIFY_CACHE_SIZE, workers=VERIFY_WORKERS,
+    )
+    bot = make_bot()
+
+    def handle(payload: dict):
+        cluster_callbacks(Update.de_json(payload, bot), SimpleNamespace(bot=bot, user_data={}))
+    return handle
+
+
+def worker_bot():
+    return Bot(BOT_TOKEN, request=Request(con_pool_size=CLUSTER_THREADS + VERIFY_WORKERS))
+
+
+def start_cluster(make_bot=worker_bot):
+    """Open CLUSTER_DB, mirror `data` into it and fork the workers (before any other thread starts)."""
+    global shared, cluster, cluster_seq
+    shared = SharedState(CLUSTER_DB, fsync=JOURNAL_FSYNC)
+    with lock:
+        shared.snapshot(data)
+    # joins workers made before a restart are pulled again (known ones are skipped)
+    cluster_seq = 0
+    cluster = WorkerPool(
+        CLUSTER_WORKERS, partial(cluster_worker_setup, make_bot),
+        threads=CLUSTER_THREADS, queue_size=CLUSTER_QUEUE_SIZE,
+    ).start()
+
+
+def start_cluster_ingest(bot, job_queue):
+    cluster_ingest(bot)
+    job_queue.run_repeating(cluster_ingest_job, interval=CLUSTER_SYNC_INTERVAL, first=CLUSTER_SYNC_INTERVAL)
+
+
+def stop_cluster(bot):
+    global shared, cluster
+    if cluster is None:
+        return
+    cluster.stop()
+    cluster_ingest(bot)
+    shared.close()
+    shared = cluster = None
+
 # =========================
 # MAIN
 # =========================
@@ -2343,7 +3404,18 @@ def main():
     if not BOT_TOKEN:
         raise SystemExit("BOT_TOKEN missing in .env")
 
-    updater = Updater(BOT_TOKEN, use_context=True)
+    # cluster workers are forked first, while this is the only thread
+    if CLUSTER_WORKERS > 0:
+        start_cluster()
+
+    # every Bot API call is instrumented (calls / latency / errors by method);
+    # rate-limited ones go through the outbound gateway
+    gateway = ApiGateway(
+        global_rate=API_GLOBAL_RATE, chat_rate=API_CHAT_RATE, group_per_minute=API_GROUP_PER_MINUTE,
+        chat_burst=API_CHAT_BURST, workers=API_SENDERS, cosmetic_max_age=API_COSMETIC_MAX_AGE,
+    )
+    request = GatewayRequest(gateway, con_pool_size=8 + VERIFY_WORKERS + API_SENDERS)
+    updater = Updater(bot=Bot(BOT_TOKEN, request=request), use_context=True)
     dp = updater.dispatcher
 
     # basic
@@ -2356,6 +3428,7 @@ def main():
 
     # giveaway
     dp.add_handler(CommandHandler("newgiveaway", cmd_newgiveaway))
+    dp.add_handler(CommandHandler("giveaways", cmd_giveaways))
     dp.add_handler(CommandHandler("participants", cmd_participants))
     dp.add_handler(CommandHandler("endgiveaway", cmd_endgiveaway))
     dp.add_handler(CommandHandler("draw", cmd_draw))
@@ -2369,6 +3442,9 @@ def main():
     # winnerlist
     dp.add_handler(CommandHandler("winnerlist", cmd_winnerlist))
 
+    # export
+    dp.add_handler(CommandHandler("export", cmd_export))
+
     # bans
     dp.add_handler(CommandHandler("blockpermanent", cmd_blockpermanent))
     dp.add_handler(CommandHandler("unban", cmd_unban))
@@ -2380,15 +3456,37 @@ def main():
 
     # handlers
     dp.add_handler(MessageHandler(Filters.text & ~Filters.command, admin_text_handler))
-    dp.add_handler(CallbackQueryHandler(cb_handler))
+    dp.add_handler(MessageHandler(Filters.document, admin_document_handler))
+    dp.add_handler(CallbackQueryHandler(cluster_forward if cluster is not None else cb_handler))
+    instrument_dispatcher(dp)
 
-    # resume
-    if data.get("active"):
-        start_live_countdown(updater.job_queue)
+    if METRICS_PORT:
+        start_http_server(METRICS_LISTEN, METRICS_PORT)
 
-    print("Bot is running (PTB v13 non-async) ...")
-    updater.start_polling()
-    updater.idle()
+    # resume
+    for g in giveaways.active():
+        start_live_countdown(updater.job_queue, g)
+    resume_draws(updater.job_queue)
+    if cluster is not None:
+        start_cluster_ingest(updater.bot, updater.job_queue)
+    updater.job_queue.run_repeating(history_archive_job, interval=HISTORY_ARCHIVE_INTERVAL, first=0)
+
+    if UPDATE_MODE == "webhook":
+        server = WebhookServer(
+            dp, listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT, path=WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE,
+        )
+        run_webhook(updater, server, webhook_url=WEBHOOK_URL, max_connections=WEBHOOK_MAX_CONNECTIONS)
+    else:
+        print("Bot is running (PTB v13 non-async) ...")
+        updater.start_polling()
+        updater.idle()
+    stop_cluster(updater.bot)
+    side_effects.close()
+    exporter.close()
+    membership.close()
+    store.close()
+    archive.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOINED_STATUSES = ("member", "administrator", "creator")
+
+
+# =========================================================
+# MEMBERSHIP CACHE (VERIFY TARGETS)
+# =========================================================
+class MembershipCache:
+    """
+    get_chat_member results keyed by (target ref, user id).
+
+    Positive and negative answers expire separately (a user who was not
+    a member yet should be re-checked soon after joining the target), the
+    table is capped at `max_size` entries with LRU eviction, and misses
+    across targets are checked in parallel so a join costs the slowest
+    target instead of the sum of all of them.
+    """
+
+    def __init__(self, positive_ttl: float = 300, negative_ttl: float = 15,
+                 max_size: int = 100000, workers: int = 8):
+        self.positive_ttl = float(positive_ttl)
+        self.negative_ttl = float(negative_ttl)
+        self.max_size = max(1, int(max_size))
+        self.workers = max(1, int(workers))
+
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # (ref, uid) -> (ok, expires_at)
+        self._pool = None
+
+    def get(self, ref, user_id):
+        key = (ref, int(user_id))
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None:
+                return None
+            ok, expires_at = hit
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return ok
+
+    def put(self, ref, user_id, ok: bool):
+        ttl = self.positive_ttl if ok else self.negative_ttl
+        if ttl <= 0:
+            return
+        key = (ref, int(user_id))
+        with self._lock:
+            self._items[key] = (bool(ok), time.monotonic() + ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._items.clear()
+                return
+            uid = int(user_id)
+            for key in [k for k in self._items if k[1] == uid]:
+                del self._items[key]
+
+    def __len__(self):
+        return len(self._items)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="verify")
+            return self._pool
+
+    def _fetch(self, bot, ref, user_id):
+        """True/False for a definite answer, None when the call failed."""
+        try:
+            member = bot.get_chat_member(chat_id=ref, user_id=user_id)
+        except Exception:
+            return None
+        return getattr(member, "status", None) in JOINED_STATUSES
+
+    def check(self, bot, refs, user_id) -> bool:
+        """True only if user_id is a member of every ref."""
+        missing = []
+        for ref in refs:
+            ok = self.get(ref, user_id)
+            if ok is False:
+                return False
+            if ok is None:
+                missing.append(ref)
+        if not missing:
+            return True
+
+        if len(missing) == 1:
+            results = [self._fetch(bot, missing[0], user_id)]
+        else:
+            pool = self._executor()
+            results = list(pool.map(lambda r: self._fetch(bot, r, user_id), missing))
+
+        joined = True
+        for ref, ok in zip(missing, results):
+            if ok is None:
+                # API error: fail this click but don't remember it
+                joined = False
+                continue
+            self.put(ref, user_id, ok)
+            if not ok:
+                joined = False
+        return joined
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,320 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telegram.utils.request import Request
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOCK_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+MAX_SERIES = 500  # per metric; further label sets are folded into "other"
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra="") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+# =========================================================
+# METRIC TYPES
+# =========================================================
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, values) -> tuple:
+        key = tuple(str(v) for v in values)
+        if key not in self._values and len(self._values) >= MAX_SERIES:
+            key = ("other",) * len(self.labelnames)
+        return key
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [bucket counts..., +Inf], sum, count
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            key = tuple(str(v) for v in labels)
+            s = self._series.get(key)
+            if s is None:
+                if len(self._series) >= MAX_SERIES:
+                    key = ("other",) * len(self.labelnames)
+                    s = self._series.get(key)
+                if s is None:
+                    s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        out = []
+        for key, (counts, total, n) in items:
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le_s = "+Inf" if le == float("inf") else repr(le)
+                le_label = 'le="' + le_s + '"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le_label)} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counters(self) -> dict:
+        """{name: {labels: value}} of every counter (shipped between processes)."""
+        out = {}
+        for m in self._metrics:
+            if isinstance(m, Counter):
+                with m._lock:
+                    out[m.name] = dict(m._values)
+        return out
+
+    def add_counters(self, deltas: dict):
+        """Add {name: {labels: amount}} from another process to the counters here."""
+        by_name = {m.name: m for m in self._metrics if isinstance(m, Counter)}
+        for name, values in deltas.items():
+            m = by_name.get(name)
+            if m is not None:
+                for labels, amount in values.items():
+                    m.inc(*labels, amount=amount)
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text, labels=()) -> Counter:
+    return REGISTRY.add(Counter(name, help_text, labels))
+
+
+def histogram(name, help_text, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.add(Histogram(name, help_text, labels, buckets))
+
+
+HANDLER_SECONDS = histogram("giveaway_handler_seconds", "Update handler latency (cmd_*, cb:<callback route>, text).", ("handler",))
+ANSWER_SECONDS = histogram("giveaway_callback_answer_seconds", "Handler start to answerCallbackQuery sent.", ("handler",))
+HANDLER_ERRORS = counter("giveaway_handler_errors_total", "Exceptions raised by update handlers.", ("handler",))
+JOB_SECONDS = histogram("giveaway_job_seconds", "Job callback (tick) latency.", ("job",))
+API_SECONDS = histogram("giveaway_bot_api_seconds", "Telegram Bot API call latency.", ("method",))
+API_CALLS = counter("giveaway_bot_api_calls_total", "Telegram Bot API calls.", ("method",))
+API_ERRORS = counter("giveaway_bot_api_errors_total", "Telegram Bot API calls that raised.", ("method", "error"))
+SAVE_SECONDS = histogram("giveaway_save_data_seconds", "save_data() call latency (incl. state lock wait).")
+STORE_SECONDS = histogram("giveaway_store_write_seconds", "Store write latency by operation.", ("op",))
+STORE_BYTES = histogram("giveaway_store_write_bytes", "Payload bytes per store write.", ("op",), BYTES_BUCKETS)
+LOCK_WAIT = histogram("giveaway_lock_wait_seconds", "Time spent waiting for a lock.", ("lock",), LOCK_BUCKETS)
+LOCK_HOLD = histogram("giveaway_lock_hold_seconds", "Time a lock was held (outermost acquire).", ("lock",), LOCK_BUCKETS)
+WEBHOOK_UPDATES = counter("giveaway_webhook_updates_total", "Webhook updates by result.", ("result",))
+
+# =========================================================
+# INSTRUMENTATION HELPERS
+# =========================================================
+def timed_job(name: str):
+    """Decorator for job callbacks: latency under JOB_SECONDS{job=name}."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*a, **kw):
+            with JOB_SECONDS.time(name):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+
+def callback_prefix(data: str) -> str:
+    # "join:P1-..." / "claim_prize|P1-..." -> "join" / "claim_prize"
+    data = data or ""
+    for i, ch in enumerate(data):
+        if ch in ":|":
+            return data[:i]
+    return data[:32]
+
+
+_trace = threading.local()  # handler running on this thread (label, start)
+
+
+def _timed_handler(fn, name=None):
+    # routers (router.CallbackRouter) name the route a callback_data goes to
+    route_label = getattr(fn, "route_label", None) or (lambda data: "cb:" + callback_prefix(data))
+
+    @wraps(fn)
+    def wrapper(update, context):
+        label = name
+        if label is None:
+            query = getattr(update, "callback_query", None)
+            label = route_label(getattr(query, "data", "") if query else "")
+        t0 = time.perf_counter()
+        _trace.label, _trace.start = label, t0
+        try:
+            return fn(update, context)
+        except Exception:
+            HANDLER_ERRORS.inc(label)
+            raise
+        finally:
+            _trace.start = None
+            HANDLER_SECONDS.observe(time.perf_counter() - t0, label)
+    return wrapper
+
+
+def observe_answer():
+    # called when this thread's handler answers its callback query
+    start = getattr(_trace, "start", None)
+    if start is not None:
+        ANSWER_SECONDS.observe(time.perf_counter() - start, _trace.label)
+
+
+def instrument_dispatcher(dp):
+    """Wrap every registered handler; callback queries are keyed by route (or callback_data prefix)."""
+    from telegram.ext import CallbackQueryHandler, CommandHandler
+
+    for handlers in dp.handlers.values():
+        for h in handlers:
+            if isinstance(h, CallbackQueryHandler):
+                h.callback = _timed_handler(h.callback)
+            elif isinstance(h, CommandHandler):
+                h.callback = _timed_handler(h.callback, h.callback.__name__)
+            else:
+                h.callback = _timed_handler(h.callback, getattr(h.callback, "__name__", "handler"))
+
+
+def observe_store(op: str, seconds: float, nbytes: int):
+    # storage.py observer hook
+    STORE_SECONDS.observe(seconds, op)
+    STORE_BYTES.observe(nbytes, op)
+
+
+class InstrumentedLock:
+    """RLock wrapper recording wait time and outermost hold time."""
+
+    def __init__(self, inner=None, name: str = "state"):
+        self.inner = inner if inner is not None else threading.RLock()
+        self.name = name
+        self._local = threading.local()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        t0 = time.perf_counter()
+        ok = self.inner.acquire(blocking, timeout)
+        if ok:
+            depth = getattr(self._local, "depth", 0)
+            if depth == 0:
+                now = time.perf_counter()
+                LOCK_WAIT.observe(now - t0, self.name)
+                self._local.since = now
+            self._local.depth = depth + 1
+        return ok
+
+    def release(self):
+        depth = self._local.depth - 1
+        self._local.depth = depth
+        if depth == 0:
+            LOCK_HOLD.observe(time.perf_counter() - self._local.since, self.name)
+        self.inner.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class InstrumentedRequest(Request):
+    """PTB HTTP layer with per-method call counts, latency and error classes."""
+
+    def post(self, url: str, data, timeout=None):
+        method = url.rsplit("/", 1)[-1]
+        API_CALLS.inc(method)
+        if method == "answerCallbackQuery":
+            observe_answer()
+        t0 = time.perf_counter()
+        try:
+            return super().post(url, data, timeout=timeout)
+        except Exception as e:
+            API_ERRORS.inc(method, type(e).__name__)
+            raise
+        finally:
+            API_SECONDS.observe(time.perf_counter() - t0, method)
+
+# =========================================================
+# HTTP ENDPOINT
+# =========================================================
+def start_http_server(host: str = "127.0.0.1", port: int = 9108, registry: Registry = REGISTRY):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, int(port)), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    return httpd
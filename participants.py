@@ -0,0 +1,321 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+
+# =========================================================
+# STRING POOL
+# =========================================================
+class StringPool:
+    """
+    One column of short strings packed into a single UTF-8 buffer:
+    row i is _buf[_start[i]:_start[i] + _len[i]]. No str object per row;
+    replacing a value appends the new bytes (the old ones are dropped at
+    the next load, which rebuilds the pool).
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._start = array("I")
+        self._len = array("H")
+
+    def _put(self, s: str):
+        b = (s or "").encode("utf-8")[:0xFFFF]
+        start = len(self._buf)
+        self._buf += b
+        return start, len(b)
+
+    def append(self, s: str):
+        start, n = self._put(s)
+        self._start.append(start)
+        self._len.append(n)
+
+    def __setitem__(self, i: int, s: str):
+        if self[i] != s:
+            self._start[i], self._len[i] = self._put(s)
+
+    def __getitem__(self, i: int) -> str:
+        n = self._len[i]
+        if not n:
+            return ""
+        s = self._start[i]
+        return self._buf[s:s + n].decode("utf-8")
+
+    def __delitem__(self, i: int):
+        del self._start[i]
+        del self._len[i]
+
+    def __len__(self):
+        return len(self._start)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def copy(self) -> "StringPool":
+        p = StringPool()
+        p._buf = bytearray(self._buf)
+        p._start = self._start[:]
+        p._len = self._len[:]
+        return p
+
+
+# =========================================================
+# COMPACT PARTICIPANT TABLE
+# =========================================================
+class ParticipantTable(MutableMapping):
+    """
+    g["participants"]: uid(str) -> {"username": "@x", "name": ""}, stored
+    column-wise instead of one dict per participant.
+
+      _ids        array('q') of user ids, in join order (row = position)
+      _usernames  StringPool, one entry per row
+      _names      StringPool, one entry per row
+      _slots      open-addressing hash index: uid -> row (-1 = empty)
+
+    Lookups, `in`, len() and iteration (join order) behave like the dict it
+    replaces; t[uid] builds a fresh {"username", "name"} dict, so changes
+    go through t[uid] = {...}. Removing a row is O(n) (rows shift to keep
+    the join order and the index is rebuilt); nothing on the hot paths
+    removes participants.
+    """
+
+    JSON_TAG = "__table__"
+
+    def __init__(self, rows=None):
+        self._ids = array("q")
+        self._usernames = StringPool()
+        self._names = StringPool()
+        self._slots = array("q", [-1]) * 8
+        self._search = None  # SearchIndex, built on first search()
+        self._version = 0  # bumped by removals / renames (they drop _search)
+        if rows:
+            self.update(rows)
+
+    # ---------- hash index ----------
+    def _probe(self, key: int) -> int:
+        # slot holding `key`, or the empty slot it would go into
+        slots, ids = self._slots, self._ids
+        mask = len(slots) - 1
+        perturb = key & 0x7FFFFFFFFFFFFFFF
+        i = perturb & mask
+        while True:
+            r = slots[i]
+            if r < 0 or ids[r] == key:
+                return i
+            perturb >>= 5
+            i = (i * 5 + perturb + 1) & mask
+
+    def _reindex(self, size: int):
+        self._slots = array("q", [-1]) * size
+        for row, key in enumerate(self._ids):
+            self._slots[self._probe(key)] = row
+
+    def _row(self, uid):
+        try:
+            key = int(uid)
+        except (TypeError, ValueError):
+            return None
+        r = self._slots[self._probe(key)]
+        return r if r >= 0 else None
+
+    # ---------- mapping ----------
+    def __getitem__(self, uid):
+        i = self._row(uid)
+        if i is None:
+            raise KeyError(uid)
+        return {"username": self._usernames[i], "name": self._names[i]}
+
+    def __setitem__(self, uid, info):
+        info = info or {}
+        uname = info.get("username", "") or ""
+        name = info.get("name", "") or ""
+        key = int(uid)
+        slot = self._probe(key)
+        i = self._slots[slot]
+        if i >= 0:
+            if self._usernames[i] != uname:
+                self._search = None
+                self._version += 1
+            self._usernames[i] = uname
+            self._names[i] = name
+            return
+        self._slots[slot] = len(self._ids)
+        self._ids.append(key)
+        self._usernames.append(uname)
+        self._names.append(name)
+        if 2 * len(self._ids) > len(self._slots):
+            self._reindex(len(self._slots) * 4)
+
+    def __delitem__(self, uid):
+        i = self._row(uid)
+        if i is None:
+            raise KeyError(uid)
+        del self._ids[i]
+        del self._usernames[i]
+        del self._names[i]
+        self._reindex(len(self._slots))
+        self._search = None
+        self._version += 1
+
+    def __contains__(self, uid):
+        return self._row(uid) is not None
+
+    def __iter__(self):
+        return (str(uid) for uid in self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __repr__(self):
+        return f"ParticipantTable({len(self)} rows)"
+
+    # ---------- direct lookups (no per-row dict) ----------
+    def username(self, uid, default: str = "") -> str:
+        i = self._row(uid)
+        return default if i is None else self._usernames[i]
+
+    def row(self, i: int) -> tuple:
+        """(uid, username, name) of row i (0 = first joiner)."""
+        return str(self._ids[i]), self._usernames[i], self._names[i]
+
+    def search(self, text: str, limit: int = 50):
+        """
+        Rows whose user id or username starts with `text` ("@" and case
+        ignored): (total matches, up to `limit` of those rows, listed in
+        join order).
+        """
+        if self._search is None or self._search.stale():
+            idx = SearchIndex(self)
+            idx.build()
+            self._search = idx
+        return self._search.find(text, limit)
+
+    def prepare_search(self, lock):
+        """
+        Bring the search index up to date without sorting under `lock`
+        (the lock guarding this table): the columns are copied under it,
+        sorted after it is released, and the index is installed unless a
+        removal or rename happened meanwhile. Rows appended in between are
+        in the index's scanned tail.
+        """
+        with lock:
+            if self._search is not None and not self._search.stale():
+                return
+            version = self._version
+            ids, usernames = self._ids[:], self._usernames.copy()
+        idx = SearchIndex(self)
+        idx.build(ids, usernames)
+        with lock:
+            if self._version == version and (self._search is None or self._search.built < idx.built):
+                self._search = idx
+
+    def first(self):
+        """uid (str) of the earliest joiner still in the table."""
+        return str(self._ids[0]) if self._ids else None
+
+    def rows(self):
+        """(uid, username, name) in join order."""
+        for i, uid in enumerate(self._ids):
+            yield str(uid), self._usernames[i], self._names[i]
+
+    # ---------- snapshot encoding ----------
+    def to_json(self) -> dict:
+        return {
+            self.JSON_TAG: "participants",
+            "ids": self._ids.tolist(),
+            "usernames": list(self._usernames),
+            "names": list(self._names),
+        }
+
+    @classmethod
+    def from_json(cls, obj: dict) -> "ParticipantTable":
+        # bulk load: fill the columns, then build the index once
+        t = cls()
+        usernames = obj.get("usernames") or []
+        names = obj.get("names") or []
+        for i, uid in enumerate(obj.get("ids") or []):
+            t._ids.append(int(uid))
+            t._usernames.append(usernames[i] if i < len(usernames) else "")
+            t._names.append(names[i] if i < len(names) else "")
+        size = 8
+        while size < 4 * len(t._ids):
+            size *= 2
+        t._reindex(size)
+        return t
+
+
+# =========================================================
+# PREFIX SEARCH
+# =========================================================
+def username_key(uname: str) -> str:
+    return (uname or "").strip().lstrip("@").lower()
+
+
+class SearchIndex:
+    """
+    Prefix search over a ParticipantTable without a scan:
+
+      by_id    user ids sorted (with their rows); an id prefix is one id
+               range per digit count, each found with bisect
+      by_name  rows sorted by lowercased username, searched with bisect
+
+    Rows appended after the last build are scanned directly; once that
+    tail passes `max(1024, built / 8)` rows the index is stale and gets
+    rebuilt. Removals and username changes drop the index
+    (ParticipantTable._search).
+    """
+
+    def __init__(self, table: ParticipantTable):
+        self.table = table
+        self.built = 0
+        self.by_id = array("q")
+        self.id_rows = array("I")
+        self.by_name = array("I")
+
+    def stale(self) -> bool:
+        return len(self.table._ids) - self.built > max(1024, self.built // 8)
+
+    def build(self, ids=None, usernames=None):
+        # from copies of the table's columns (prepare_search) or the table itself
+        ids = self.table._ids if ids is None else ids
+        usernames = self.table._usernames if usernames is None else usernames
+        n = len(ids)
+        order = sorted(range(n), key=ids.__getitem__)
+        self.by_id = array("q", (ids[i] for i in order))
+        self.id_rows = array("I", order)
+        self.by_name = array("I", sorted(range(n), key=lambda i: username_key(usernames[i])))
+        self.built = n
+
+    def find(self, text: str, limit: int):
+        t = self.table
+        q = username_key(text)
+        if not q:
+            return 0, []
+        total = 0
+        rows = []
+
+        if q.isdigit():
+            if q[0] != "0":
+                base = int(q)
+                for extra in range(0, 20 - len(q)):
+                    lo = base * 10 ** extra
+                    if self.by_id and lo > self.by_id[-1]:
+                        break
+                    a = bisect_left(self.by_id, lo)
+                    b = bisect_left(self.by_id, (base + 1) * 10 ** extra)
+                    total += b - a
+                    rows.extend(self.id_rows[a:min(b, a + limit)])
+            match = lambda i: str(t._ids[i]).startswith(q)
+        else:
+            key = lambda i: username_key(t._usernames[i])
+            a = bisect_left(self.by_name, q, key=key)
+            b = bisect_left(self.by_name, q + "\U0010ffff", key=key)
+            total += b - a
+            rows.extend(self.by_name[a:min(b, a + limit)])
+            match = lambda i: username_key(t._usernames[i]).startswith(q)
+
+        for i in range(self.built, len(t._ids)):
+            if match(i):
+                total += 1
+                rows.append(i)
+        return total, sorted(rows)[:limit]
@@ -0,0 +1,69 @@
+import queue
+import threading
+
+from metrics import counter
+
+SIDE_EFFECTS = counter("giveaway_side_effects_total", "Deferred callback side effects by outcome.", ("outcome",))
+
+
+# =========================================================
+# DEFERRED SIDE EFFECTS (AFTER THE CALLBACK ANSWER)
+# =========================================================
+class SideEffects:
+    """
+    Work a callback does after it has answered the query: persistence,
+    live post edits. One background thread runs it in submission order,
+    so journal records keep the order of the in-memory changes they
+    describe. When `max_pending` items are waiting, defer() runs the
+    work inline instead of buffering without limit.
+    """
+
+    def __init__(self, max_pending: int = 10000, name: str = "side-effects"):
+        self.name = name
+        self._q = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def defer(self, fn, *args):
+        self._start()
+        try:
+            self._q.put_nowait((fn, args))
+            SIDE_EFFECTS.inc("deferred")
+        except queue.Full:
+            SIDE_EFFECTS.inc("inline")
+            self._call(fn, args)
+
+    def pending(self) -> int:
+        return self._q.unfinished_tasks
+
+    def drain(self):
+        """Block until everything deferred so far has run."""
+        if self._thread is not None:
+            self._q.join()
+
+    def close(self):
+        self.drain()
+
+    @staticmethod
+    def _call(fn, args):
+        try:
+            fn(*args)
+        except Exception:
+            SIDE_EFFECTS.inc("error")
+
+    def _run(self):
+        while True:
+            fn, args = self._q.get()
+            try:
+                self._call(fn, args)
+            finally:
+                self._q.task_done()
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                t = threading.Thread(target=self._run, name=self.name, daemon=True)
+                t.start()
+                self._thread = t
@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+Route = namedtuple("Route", "name fn admin")
+
+
+# =========================================================
+# CALLBACK ROUTER
+# =========================================================
+class CallbackRouter:
+    """
+    callback_data -> handler, in at most two dict lookups whatever the
+    number of buttons: first the whole callback_data among the exact
+    routes ("reset_confirm"), then the part before `sep` among the prefix
+    routes ("join:<gid>" -> "join"; a bare "join" matches too, with an
+    empty arg).
+
+    Handlers are registered with @router.route(...) and called as
+    fn(query, context, uid, arg). admin=True routes answer "Admin only."
+    to anyone `is_admin(uid)` rejects, before the handler runs. Unknown
+    callback_data gets an empty answer so the button stops spinning.
+
+    The router is itself the update callback; instrument_dispatcher()
+    labels its latency by route (route_label), not by raw callback_data.
+    """
+
+    def __init__(self, sep: str, is_admin, denied: str = "Admin only."):
+        self.sep = sep
+        self.is_admin = is_admin
+        self.denied = denied
+        self.exact = {}
+        self.prefixed = {}
+
+    def route(self, *names, prefix: bool = False, admin: bool = False):
+        table = self.prefixed if prefix else self.exact
+
+        def deco(fn):
+            for name in names:
+                if name in table:
+                    raise ValueError(f"callback route {name!r} registered twice")
+                table[name] = Route(name, fn, admin)
+            return fn
+        return deco
+
+    def resolve(self, data: str):
+        """(route, arg) for callback_data; route is None when nothing matches."""
+        data = data or ""
+        r = self.exact.get(data)
+        if r is not None:
+            return r, ""
+        action, _, arg = data.partition(self.sep)
+        return self.prefixed.get(action), arg.strip()
+
+    def route_label(self, data: str) -> str:
+        r, _ = self.resolve(data)
+        return "cb:" + (r.name if r is not None else "unrouted")
+
+    def __call__(self, update, context):
+        query = update.callback_query
+        r, arg = self.resolve(query.data)
+        if r is None:
+            try:
+                query.answer()
+            except Exception:
+                pass
+            return None
+        uid = str(query.from_user.id)
+        if r.admin and not self.is_admin(uid):
+            try:
+                query.answer(self.denied, show_alert=True)
+            except Exception:
+                pass
+            return None
+        return r.fn(query, context, uid, arg)
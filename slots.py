@@ -0,0 +1,39 @@
+# =========================================================
+# SINGLE-WINNER SLOTS
+# =========================================================
+class SlotTable:
+    """
+    Slots that go to exactly one user (a Lucky Draw window ...), decided
+    by compare-and-set: claim() stores the claimant only if the slot is
+    still empty and returns whoever holds it. The CAS is dict.setdefault,
+    a single atomic operation under the GIL, so a burst of clicks on one
+    slot never queues on a lock and exactly one of them wins.
+
+    The table is memory only. The caller persists a winner after
+    answering (claim() says whether this call won), and seed()s decided
+    slots back from saved state after a restart.
+    """
+
+    def __init__(self):
+        self._slots = {}  # slot -> (uid, info)
+
+    def claim(self, slot, uid: str, info=None):
+        """(holder uid, holder info, won): won is True only for the call that filled the slot."""
+        mine = (str(uid), info)
+        held = self._slots.setdefault(slot, mine)
+        return held[0], held[1], held is mine
+
+    def get(self, slot):
+        """(uid, info) of the holder, or None."""
+        return self._slots.get(slot)
+
+    def seed(self, won: dict):
+        # slot -> (uid, info) from saved state; slots decided meanwhile win
+        for slot, held in won.items():
+            self._slots.setdefault(slot, (str(held[0]), held[1]))
+
+    def reset(self):
+        self._slots = {}
+
+    def __len__(self):
+        return len(self._slots)
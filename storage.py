@@ -0,0 +1,887 @@
+import os
+import re
+import sys
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping, MutableMapping
+
+from participants import ParticipantTable
+
+log = logging.getLogger(__name__)
+
+# =========================================================
+# PATH HELPERS
+# =========================================================
+# A "path" addresses one value inside the data dict:
+#   "active"                      -> data["active"]
+#   ("participants", "123")       -> data["participants"]["123"]
+#   ("winner_log", 7)             -> data["winner_log"][7]  (append when 7 == len)
+MISSING = object()
+
+
+def as_path(p) -> tuple:
+    if isinstance(p, (tuple, list)):
+        return tuple(p)
+    return (p,)
+
+
+def get_path(d, path):
+    cur = d
+    for k in path:
+        if isinstance(cur, Mapping):
+            if k not in cur:
+                return MISSING
+            cur = cur[k]
+        elif isinstance(cur, list):
+            try:
+                cur = cur[int(k)]
+            except (ValueError, IndexError):
+                return MISSING
+        else:
+            return MISSING
+    return cur
+
+
+def apply_path(d, path, value=MISSING):
+    # set d[path] = value, or delete it when value is MISSING
+    cur = d
+    for k in path[:-1]:
+        if isinstance(cur, list):
+            try:
+                cur = cur[int(k)]
+            except (ValueError, IndexError):
+                return
+            continue
+        nxt = cur.get(k)
+        if not isinstance(nxt, (MutableMapping, list)):
+            if value is MISSING:
+                return
+            nxt = {}
+            cur[k] = nxt
+        cur = nxt
+
+    last = path[-1]
+    if isinstance(cur, list):
+        i = int(last)
+        if value is MISSING:
+            if i < len(cur):
+                del cur[i]
+        elif i < len(cur):
+            cur[i] = value
+        elif i == len(cur):
+            cur.append(value)
+        return
+
+    if value is MISSING:
+        cur.pop(last, None)
+    else:
+        cur[last] = value
+
+
+def _encode(obj):
+    # compact containers (ParticipantTable) serialize column-wise
+    if isinstance(obj, ParticipantTable):
+        return obj.to_json()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _decode(obj: dict):
+    if obj.get(ParticipantTable.JSON_TAG) == "participants":
+        return ParticipantTable.from_json(obj)
+    return obj
+
+
+def dump_json(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_encode)
+
+
+def load_json(text: str):
+    return json.loads(text, object_hook=_decode)
+
+
+# =========================================================
+# JOURNAL STORE (SNAPSHOT + APPEND-ONLY LOG)
+# =========================================================
+# seq of a record cut off mid-write
+TORN_SEQ = re.compile(rb'\{"s":(\d+)')
+
+
+class JournalStore:
+    """
+    DATA_FILE holds a plain JSON snapshot, DATA_FILE.journal holds one line
+    per mutation:
+      {"s": 12, "p": ["participants", "123"], "v": {...}}
+      {"s": 13, "p": ["_pending_snapshot"], "d": 1}
+    load() = snapshot + replay of every record newer than the snapshot.
+    """
+
+    SEQ_KEY = "_journal_seq"
+
+    def __init__(self, path: str, lock, compact_every: int = 5000, fsync: bool = False):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.old_path = path + ".journal.old"
+        self.lock = lock  # the bot's state lock (consistent view for snapshots)
+        self.compact_every = max(1, int(compact_every))
+        self.fsync = fsync
+
+        self._io = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._fh = None
+        self._seq = 0
+        self._since_compact = 0
+        self._compacting = False
+        self._snap_seq = 0
+        self._rotated_seq = 0
+        self._data = None
+
+    # ---------- load ----------
+    def load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                d = json.load(f, object_hook=_decode)
+        except Exception:
+            d = {}
+        if not isinstance(d, dict):
+            d = {}
+
+        snap_seq = int(d.pop(self.SEQ_KEY, 0) or 0)
+        self._seq = snap_seq
+        self._snap_seq = snap_seq
+
+        replayed = 0
+        for seg in (self.old_path, self.journal_path):
+            replayed += self._replay(seg, d, snap_seq)
+
+        self._since_compact = replayed
+        self._rotated_seq = self._seq  # a leftover .journal.old may reach this far
+        self._data = d
+        return d
+
+    def _replay(self, seg: str, d: dict, snap_seq: int) -> int:
+        n = 0
+        try:
+            f = open(seg, "rb")
+        except FileNotFoundError:
+            return 0
+        end, torn = 0, b""
+        with f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    torn = line  # torn tail write after a crash
+                    break
+                end += len(line)
+                try:
+                    rec = load_json(line.decode("utf-8"))
+                    seq = int(rec["s"])
+                    path = as_path(rec["p"])
+                except Exception:
+                    continue
+                if seq <= snap_seq or not path:
+                    continue
+                apply_path(d, path, MISSING if rec.get("d") else rec.get("v"))
+                self._seq = max(self._seq, seq)
+                n += 1
+        if torn:
+            # cut it off so the next append starts on a line of its own,
+            # and never hand out its seq again
+            m = TORN_SEQ.match(torn)
+            if m:
+                self._seq = max(self._seq, int(m.group(1)))
+            with open(seg, "r+b") as f:
+                f.truncate(end)
+        return n
+
+    # ---------- write ----------
+    def collect(self, data: dict, paths) -> list:
+        # encode current values now (caller holds the state lock)
+        self._data = data
+        out = []
+        for p in paths:
+            path = as_path(p)
+            v = get_path(data, path)
+            out.append((path, None if v is MISSING else dump_json(v)))
+        return out
+
+    def write(self, records: list) -> int:
+        if not records:
+            return 0
+        with self._io:
+            lines = []
+            for path, enc in records:
+                self._seq += 1
+                p = dump_json(list(path))
+                if enc is None:
+                    lines.append(f'{{"s":{self._seq},"p":{p},"d":1}}\n')
+                else:
+                    lines.append(f'{{"s":{self._seq},"p":{p},"v":{enc}}}\n')
+            blob = "".join(lines).encode("utf-8")
+
+            if self._fh is None:
+                self._fh = open(self.journal_path, "ab")
+            self._fh.write(blob)
+            self._fh.flush()
+            if self.fsync:
+                os.fsync(self._fh.fileno())
+
+            self._since_compact += len(records)
+            due = self._since_compact >= self.compact_every and not self._compacting
+
+        if due:
+            self.compact_async()
+        return len(blob)
+
+    def record(self, data: dict, *paths) -> int:
+        return self.write(self.collect(data, paths))
+
+    def flush(self) -> int:
+        return 0
+
+    # ---------- compaction ----------
+    def snapshot(self, data: dict) -> int:
+        self._data = data
+        return self._compact()
+
+    def compact_async(self):
+        with self._io:
+            if self._compacting or self._data is None:
+                return
+            self._compacting = True
+        # per-region locks (StateLocks) -> dump key by key, never all at once
+        target = self._compact_by_key if hasattr(self.lock, "for_key") else self._compact_background
+        t = threading.Thread(target=target, name="journal_compact", daemon=True)
+        t.start()
+
+    def _compact_background(self):
+        try:
+            self._compact()
+        finally:
+            with self._io:
+                self._compacting = False
+
+    def _compact(self) -> int:
+        # lock order: state lock -> compaction lock -> io lock.
+        # the JSON text is captured under the state lock, the file is
+        # written after it is released (unless the caller still holds it).
+        self.lock.acquire()
+        try:
+            self._compact_lock.acquire()
+            try:
+                data = self._data if self._data is not None else {}
+                with self._io:
+                    seq = self._seq
+                    text = dump_json({**data, self.SEQ_KEY: seq})
+                    self._rotate()
+                    self._since_compact = 0
+            except Exception:
+                self._compact_lock.release()
+                raise
+        finally:
+            self.lock.release()
+
+        try:
+            return self._write_snapshot(text, seq)
+        finally:
+            self._compact_lock.release()
+
+    def _compact_by_key(self) -> int:
+        # Background compaction under per-region locks: the journal is
+        # rotated first, then each top-level key is dumped holding only the
+        # regions that guard it (self.lock.for_key). The snapshot may already
+        # contain changes newer than `seq`; replaying them is harmless since
+        # every record sets or deletes a path to an absolute value.
+        # Lock order: compaction lock -> io lock, then region locks with
+        # neither held.
+        try:
+            with self._compact_lock:
+                with self._io:
+                    seq = self._seq
+                    self._rotate()
+                    self._since_compact = 0
+
+            data = self._data if self._data is not None else {}
+            with self.lock.for_key(None):
+                keys = list(data)
+            parts = []
+            for key in keys:
+                with self.lock.for_key(key):
+                    if key in data:
+                        parts.append(dump_json(key) + ":" + dump_json(data[key]))
+            parts.append(dump_json(self.SEQ_KEY) + ":" + str(seq))
+            text = "{" + ",".join(parts) + "}"
+
+            with self._compact_lock:
+                return self._write_snapshot(text, seq)
+        finally:
+            with self._io:
+                self._compacting = False
+
+    def _write_snapshot(self, text: str, seq: int) -> int:
+        # compaction lock held
+        if seq < self._snap_seq:
+            return 0  # a newer snapshot is already on disk
+        blob = text.encode("utf-8")
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._snap_seq = seq
+
+        # the old segment may hold records up to the latest rotation
+        if seq >= self._rotated_seq:
+            try:
+                os.remove(self.old_path)
+            except FileNotFoundError:
+                pass
+        return len(blob)
+
+    def _rotate(self):
+        # move the live journal aside; it stays replayable until the new
+        # snapshot is on disk
+        self._rotated_seq = self._seq
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if not os.path.exists(self.journal_path):
+            return
+        if os.path.exists(self.old_path):
+            with open(self.journal_path, "rb") as src, open(self.old_path, "ab") as dst:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.old_path)
+
+    def close(self):
+        with self._io:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+# =========================================================
+# SQLITE STORE (INDEXED TABLES)
+# =========================================================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kv (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS participants (
+    uid      TEXT PRIMARY KEY,
+    username TEXT NOT NULL DEFAULT '',
+    info     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS participants_username ON participants(username);
+CREATE TABLE IF NOT EXISTS bans (
+    list     TEXT NOT NULL,
+    uid      TEXT NOT NULL,
+    username TEXT NOT NULL DEFAULT '',
+    info     TEXT NOT NULL,
+    PRIMARY KEY (list, uid)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history (
+    gid              TEXT PRIMARY KEY,
+    created_ts       REAL,
+    claim_expires_ts REAL,
+    snapshot         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_expires ON history(claim_expires_ts);
+CREATE TABLE IF NOT EXISTS winner_log (
+    list  TEXT NOT NULL,
+    pos   INTEGER NOT NULL,
+    gid   TEXT NOT NULL DEFAULT '',
+    entry TEXT NOT NULL,
+    PRIMARY KEY (list, pos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS winner_log_gid ON winner_log(gid);
+CREATE TABLE IF NOT EXISTS giveaways (
+    gid   TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (gid, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS giveaway_participants (
+    gid      TEXT NOT NULL,
+    uid      TEXT NOT NULL,
+    username TEXT NOT NULL DEFAULT '',
+    info     TEXT NOT NULL,
+    UNIQUE (gid, uid)
+);
+CREATE INDEX IF NOT EXISTS giveaway_participants_username ON giveaway_participants(gid, username);
+"""
+
+# top-level data keys that live in their own table (everything else -> kv)
+ROW_TABLES = {
+    "participants": "participants",
+    "permanent_block": "bans",
+    "old_winners": "bans",
+    "history": "history",
+    "winner_log": "winner_log",
+    "winner_history": "winner_log",
+}
+
+
+class SqliteStore:
+    """
+    Same interface as JournalStore. Each save_data() path becomes one
+    indexed row write:
+      ("participants", uid)      -> participants row
+      ("permanent_block", uid)   -> bans row (list="permanent_block")
+      ("history", gid, ...)      -> history row
+      ("winner_log", i)          -> winner_log row
+      ("giveaways", gid, key)    -> giveaways row (gid, key)
+      ("giveaways", gid, "participants", uid) -> giveaway_participants row
+      "active"                   -> kv row
+    """
+
+    def __init__(self, path: str, lock, json_path: str = "", fsync: bool = False):
+        self.path = path
+        self.lock = lock
+        self.json_path = json_path
+        self._io = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=" + ("FULL" if fsync else "NORMAL"))
+        self.conn.executescript(SCHEMA)
+
+    # ---------- load ----------
+    def load(self) -> dict:
+        with self._io:
+            migrated = self.conn.execute("SELECT value FROM meta WHERE key='migrated_from'").fetchone()
+        if not migrated:
+            self.migrate_json(self.json_path)
+
+        d = {}
+        with self._io:
+            c = self.conn
+            for key, value in c.execute("SELECT key, value FROM kv"):
+                d[key] = json.loads(value)
+
+            # legacy single-giveaway participants: only present until migrated
+            parts = {}
+            for uid, info in c.execute("SELECT uid, info FROM participants ORDER BY rowid"):
+                parts[uid] = json.loads(info)
+            if parts:
+                d["participants"] = parts
+
+            for lst, uid, info in c.execute("SELECT list, uid, info FROM bans"):
+                d.setdefault(lst, {})[uid] = json.loads(info)
+
+            hist = {}
+            for gid, snap in c.execute("SELECT gid, snapshot FROM history ORDER BY created_ts"):
+                hist[gid] = json.loads(snap)
+            d["history"] = hist
+
+            for lst, entry in c.execute("SELECT list, entry FROM winner_log ORDER BY list, pos"):
+                d.setdefault(lst, []).append(json.loads(entry))
+
+            gws = {}
+            for gid, key, value in c.execute("SELECT gid, key, value FROM giveaways"):
+                gws.setdefault(gid, {})[key] = json.loads(value)
+            for gid, uid, info in c.execute("SELECT gid, uid, info FROM giveaway_participants ORDER BY rowid"):
+                gws.setdefault(gid, {}).setdefault("participants", {})[uid] = json.loads(info)
+            if gws:
+                d["giveaways"] = gws
+        return d
+
+    def migrate_json(self, json_path: str) -> int:
+        # one-shot import of an existing DATA_FILE (+ journal); marks the db
+        # as migrated even when there is nothing to import
+        d = {}
+        if json_path and os.path.exists(json_path):
+            d = JournalStore(json_path, threading.RLock()).load()
+        n = 0
+        with self._io:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                if d:
+                    n = self._write_all(d)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES('migrated_from', ?)",
+                    (json_path or "-",),
+                )
+        return n
+
+    # ---------- write ----------
+    def collect(self, data: dict, paths) -> list:
+        # caller holds the state lock; rows are encoded now, written later
+        out = []
+        for p in paths:
+            path = as_path(p)
+            key = path[0]
+            if key == "giveaways":
+                out.append(self._collect_giveaway(data, path))
+                continue
+            if key not in ROW_TABLES:
+                v = data.get(key, MISSING)
+                out.append(("kv", key, None, None if v is MISSING else dump_json(v)))
+                continue
+
+            coll = data.get(key)
+            if len(path) == 1:
+                rows = []
+                if isinstance(coll, dict):
+                    rows = [(k, dump_json(v)) for k, v in coll.items()]
+                elif isinstance(coll, list):
+                    rows = [(i, dump_json(v)) for i, v in enumerate(coll)]
+                out.append(("table", key, None, rows))
+                continue
+
+            row = get_path(data, path[:2])
+            out.append(("row", key, path[1], None if row is MISSING else dump_json(row)))
+        return out
+
+    def _collect_giveaway(self, data: dict, path: tuple):
+        # ("giveaways",)                          -> every giveaway
+        # ("giveaways", gid)                      -> one giveaway (or its removal)
+        # ("giveaways", gid, key, ...)            -> one field row
+        # ("giveaways", gid, "participants", uid) -> one participant row
+        if len(path) == 1:
+            gws = data.get("giveaways") or {}
+            return ("giveaway", None, None, [(gid, self._encode_giveaway(g)) for gid, g in gws.items()])
+
+        gid = str(path[1])
+        if len(path) == 2:
+            g = get_path(data, path)
+            return ("giveaway", gid, None, None if g is MISSING else self._encode_giveaway(g))
+
+        field = path[2]
+        if field == "participants" and len(path) >= 4:
+            row = get_path(data, path[:4])
+            return ("giveaway_row", gid, str(path[3]), None if row is MISSING else dump_json(row))
+
+        v = get_path(data, path[:3])
+        if field == "participants":
+            rows = [] if not isinstance(v, Mapping) else [(uid, dump_json(r)) for uid, r in v.items()]
+            return ("giveaway_rows", gid, None, rows)
+        return ("giveaway_field", gid, field, None if v is MISSING else dump_json(v))
+
+    @staticmethod
+    def _encode_giveaway(g: dict):
+        fields = [(k, dump_json(v)) for k, v in (g or {}).items() if k != "participants"]
+        rows = [(uid, dump_json(r)) for uid, r in ((g or {}).get("participants") or {}).items()]
+        return fields, rows
+
+    def write(self, records: list) -> int:
+        if not records:
+            return 0
+        size = 0
+        with self._io:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                for kind, key, rowkey, enc in records:
+                    if kind == "kv":
+                        if enc is None:
+                            self.conn.execute("DELETE FROM kv WHERE key=?", (key,))
+                        else:
+                            self.conn.execute("INSERT OR REPLACE INTO kv(key, value) VALUES(?, ?)", (key, enc))
+                            size += len(enc)
+                    elif kind == "row":
+                        size += self._write_row(key, rowkey, enc)
+                    elif kind.startswith("giveaway"):
+                        size += self._write_giveaway(kind, key, rowkey, enc)
+                    else:
+                        self._clear_table(key)
+                        for k, v in enc:
+                            size += self._write_row(key, k, v)
+        return size
+
+    def record(self, data: dict, *paths) -> int:
+        return self.write(self.collect(data, paths))
+
+    def flush(self) -> int:
+        return 0
+
+    def snapshot(self, data: dict) -> int:
+        with self.lock:
+            with self._io:
+                with self.conn:
+                    self.conn.execute("BEGIN")
+                    return self._write_all(data)
+
+    def _write_all(self, data: dict) -> int:
+        for t in ("kv", "participants", "bans", "history", "winner_log", "giveaways", "giveaway_participants"):
+            self.conn.execute(f"DELETE FROM {t}")
+        size = 0
+        for key, v in data.items():
+            if key == "giveaways":
+                for gid, g in (v or {}).items():
+                    size += self._write_giveaway("giveaway", gid, None, self._encode_giveaway(g))
+            elif key in ROW_TABLES:
+                items = v.items() if isinstance(v, dict) else enumerate(v or [])
+                for k, row in items:
+                    size += self._write_row(key, k, dump_json(row))
+            else:
+                enc = dump_json(v)
+                self.conn.execute("INSERT OR REPLACE INTO kv(key, value) VALUES(?, ?)", (key, enc))
+                size += len(enc)
+        return size
+
+    def _clear_table(self, key: str):
+        table = ROW_TABLES[key]
+        if table in ("bans", "winner_log"):
+            self.conn.execute(f"DELETE FROM {table} WHERE list=?", (key,))
+        else:
+            self.conn.execute(f"DELETE FROM {table}")
+
+    def _write_row(self, key: str, rowkey, enc) -> int:
+        c = self.conn
+        table = ROW_TABLES[key]
+
+        if enc is None:
+            if table == "participants":
+                c.execute("DELETE FROM participants WHERE uid=?", (str(rowkey),))
+            elif table == "bans":
+                c.execute("DELETE FROM bans WHERE list=? AND uid=?", (key, str(rowkey)))
+            elif table == "history":
+                c.execute("DELETE FROM history WHERE gid=?", (str(rowkey),))
+            else:
+                c.execute("DELETE FROM winner_log WHERE list=? AND pos=?", (key, int(rowkey)))
+            return 0
+
+        row = json.loads(enc) if table != "winner_log" else None
+        if table == "participants":
+            c.execute(
+                "INSERT INTO participants(uid, username, info) VALUES(?, ?, ?) "
+                "ON CONFLICT(uid) DO UPDATE SET username=excluded.username, info=excluded.info",
+                (str(rowkey), (row or {}).get("username", "") or "", enc),
+            )
+        elif table == "bans":
+            c.execute(
+                "INSERT OR REPLACE INTO bans(list, uid, username, info) VALUES(?, ?, ?, ?)",
+                (key, str(rowkey), (row or {}).get("username", "") or "", enc),
+            )
+        elif table == "history":
+            c.execute(
+                "INSERT OR REPLACE INTO history(gid, created_ts, claim_expires_ts, snapshot) VALUES(?, ?, ?, ?)",
+                (str(rowkey), (row or {}).get("created_ts"), (row or {}).get("claim_expires_ts"), enc),
+            )
+        else:
+            entry = json.loads(enc)
+            gid = (entry or {}).get("gid") or (entry or {}).get("giveaway_id") or ""
+            c.execute(
+                "INSERT OR REPLACE INTO winner_log(list, pos, gid, entry) VALUES(?, ?, ?, ?)",
+                (key, int(rowkey), gid, enc),
+            )
+        return len(enc)
+
+    def _write_giveaway(self, kind: str, gid, sub, enc) -> int:
+        c = self.conn
+        if kind == "giveaway":
+            if gid is None:
+                c.execute("DELETE FROM giveaways")
+                c.execute("DELETE FROM giveaway_participants")
+                return sum(self._write_giveaway("giveaway", g, None, e) for g, e in enc)
+            c.execute("DELETE FROM giveaways WHERE gid=?", (gid,))
+            c.execute("DELETE FROM giveaway_participants WHERE gid=?", (gid,))
+            if enc is None:
+                return 0
+            fields, rows = enc
+            size = sum(self._write_giveaway("giveaway_field", gid, k, v) for k, v in fields)
+            return size + self._write_giveaway("giveaway_rows", gid, None, rows)
+
+        if kind == "giveaway_field":
+            if enc is None:
+                c.execute("DELETE FROM giveaways WHERE gid=? AND key=?", (gid, sub))
+                return 0
+            c.execute("INSERT OR REPLACE INTO giveaways(gid, key, value) VALUES(?, ?, ?)", (gid, sub, enc))
+            return len(enc)
+
+        if kind == "giveaway_rows":
+            c.execute("DELETE FROM giveaway_participants WHERE gid=?", (gid,))
+            return sum(self._write_giveaway("giveaway_row", gid, uid, v) for uid, v in enc)
+
+        # giveaway_row
+        if enc is None:
+            c.execute("DELETE FROM giveaway_participants WHERE gid=? AND uid=?", (gid, sub))
+            return 0
+        c.execute(
+            "INSERT INTO giveaway_participants(gid, uid, username, info) VALUES(?, ?, ?, ?) "
+            "ON CONFLICT(gid, uid) DO UPDATE SET username=excluded.username, info=excluded.info",
+            (gid, sub, (json.loads(enc) or {}).get("username", "") or "", enc),
+        )
+        return len(enc)
+
+    def close(self):
+        with self._io:
+            self.conn.close()
+
+
+# =========================================================
+# WRITE-BEHIND (GROUP COMMIT)
+# =========================================================
+class WriteBehind:
+    """
+    Wraps a store so record() only marks paths dirty (no disk I/O).
+    A flusher thread writes all dirty paths in one batch `interval`
+    seconds after the first change, or as soon as `max_pending` paths are
+    dirty. flush() / snapshot() write synchronously. A batch whose write
+    raises is marked dirty again and retried, not dropped.
+
+    Lock order: state lock -> write lock. Values are encoded under the
+    state lock, the batch is written after it has been released.
+    """
+
+    def __init__(self, store, lock, interval: float = 1.0, max_pending: int = 500):
+        self.store = store
+        self.lock = lock
+        self.interval = max(0.01, float(interval))
+        self.max_pending = max(1, int(max_pending))
+
+        self._dirty = {}  # path -> None (ordered set)
+        self._cv = threading.Condition(threading.Lock())
+        self._write_lock = threading.Lock()
+        self._data = None
+        self._thread = None
+
+    def load(self) -> dict:
+        d = self.store.load()
+        self._data = d
+        return d
+
+    def record(self, data: dict, *paths) -> int:
+        self._data = data
+        with self._cv:
+            was_empty = not self._dirty
+            for p in paths:
+                path = as_path(p)
+                self._dirty.pop(path, None)
+                self._dirty[path] = None
+            if was_empty or len(self._dirty) >= self.max_pending:
+                self._cv.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write_behind", daemon=True)
+                self._thread.start()
+        return 0
+
+    def pending(self) -> int:
+        with self._cv:
+            return len(self._dirty)
+
+    def flush(self) -> int:
+        self.lock.acquire()
+        try:
+            with self._cv:
+                dirty, self._dirty = self._dirty, {}
+            if not dirty or self._data is None:
+                return 0
+            try:
+                records = self.store.collect(self._data, list(dirty))
+            except Exception:
+                self._restore(dirty)
+                raise
+            self._write_lock.acquire()
+        finally:
+            self.lock.release()
+
+        try:
+            return self.store.write(records)
+        except Exception:
+            self._restore(dirty)
+            raise
+        finally:
+            self._write_lock.release()
+
+    def _restore(self, dirty: dict):
+        # a failed batch goes back ahead of paths dirtied since, so list
+        # appends keep their order; values are re-read on the next flush
+        with self._cv:
+            for path in self._dirty:
+                dirty.pop(path, None)
+            dirty.update(self._dirty)
+            self._dirty = dirty
+
+    def snapshot(self, data: dict) -> int:
+        self._data = data
+        with self.lock:
+            with self._cv:
+                self._dirty.clear()  # the snapshot covers them
+            with self._write_lock:
+                return self.store.snapshot(data)
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._dirty:
+                    self._cv.wait()
+                self._cv.wait_for(lambda: len(self._dirty) >= self.max_pending, timeout=self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # paths stay dirty; back off one interval before retrying
+                log.exception("write-behind flush failed, %d paths pending", self.pending())
+                time.sleep(self.interval)
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+
+# =========================================================
+# OBSERVED STORE (METRICS HOOK)
+# =========================================================
+class ObservedStore:
+    """
+    Reports every disk write of the wrapped store to
+    observer(op, seconds, nbytes) with op in record / write / snapshot.
+    Sits under WriteBehind, so batched flushes are measured too.
+    """
+
+    def __init__(self, store, observer):
+        self.store = store
+        self.observer = observer
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def _timed(self, op: str, fn, *args) -> int:
+        t0 = time.perf_counter()
+        size = fn(*args)
+        try:
+            self.observer(op, time.perf_counter() - t0, size or 0)
+        except Exception:
+            pass
+        return size
+
+    def record(self, data: dict, *paths) -> int:
+        return self._timed("record", self.store.record, data, *paths)
+
+    def write(self, records: list) -> int:
+        return self._timed("write", self.store.write, records)
+
+    def snapshot(self, data: dict) -> int:
+        return self._timed("snapshot", self.store.snapshot, data)
+
+
+# =========================================================
+# FACTORY
+# =========================================================
+def open_store(backend: str, json_path: str, db_path: str, lock, compact_every: int = 5000, fsync: bool = False,
+               flush_interval: float = 0, flush_max_pending: int = 500, observer=None):
+    if (backend or "").strip().lower() == "sqlite":
+        st = SqliteStore(db_path, lock, json_path=json_path, fsync=fsync)
+    else:
+        st = JournalStore(json_path, lock, compact_every=compact_every, fsync=fsync)
+    if observer is not None:
+        st = ObservedStore(st, observer)
+    if flush_interval and flush_interval > 0:
+        return WriteBehind(st, lock, interval=flush_interval, max_pending=flush_max_pending)
+    return st
+
+
+if __name__ == "__main__":
+    # python storage.py migrate giveaway_data.json giveaway_data.db
+    if len(sys.argv) == 4 and sys.argv[1] == "migrate":
+        st = SqliteStore(sys.argv[3], threading.RLock())
+        print(f"Migrated {st.migrate_json(sys.argv[2])} bytes into {sys.argv[3]}")
+    else:
+        print("usage: python storage.py migrate <DATA_FILE> <DATA_DB>")
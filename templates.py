@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from string import Formatter
+
+from metrics import counter
+
+TEMPLATE_COMPILES = counter(
+    "giveaway_template_compiles_total", "Post templates rebuilt because their static fields changed.", ("template",),
+)
+
+
+# =========================================================
+# PRECOMPILED POST TEMPLATES
+# =========================================================
+class PostTemplate:
+    """
+    A channel post written as a str.format() text. Its {fields} are either
+    static (title, prize, rules ...: they only change when the admin edits
+    the giveaway) or dynamic slots (count, remaining, progress bar,
+    showcase lines), listed in text order in `order`.
+
+    segments(key, static) is the text with the static fields filled in,
+    cut at the slots: one more segment than there are slots. `key` is
+    whatever the static values are derived from (e.g. the raw title /
+    prize / rules); static() is called to rebuild them only when a new
+    key shows up. The last `cache_size` versions are kept (about one per
+    running giveaway).
+
+    Renderers interleave the segments with their slot values in an
+    f-string, so a tick formats a handful of short values instead of the
+    whole post.
+    """
+
+    def __init__(self, name: str, text: str, static=(), cache_size: int = 32):
+        self.name = name
+        self.text = text
+        self.static = frozenset(static)
+        self.cache_size = max(1, int(cache_size))
+        self._compiled = OrderedDict()  # key -> segments
+        self._lock = threading.Lock()
+
+        self._parsed = list(Formatter().parse(text))
+        order = []
+        for _, field, spec, conv in self._parsed:
+            if field is None:
+                continue
+            # plain {name} fields only (static ones may carry a format spec)
+            if not field.isidentifier() or conv or (spec and field not in self.static):
+                raise ValueError(f"template {name!r}: unsupported field {field!r}")
+            if field not in self.static:
+                order.append(field)
+        missing = self.static - {f for _, f, _, _ in self._parsed if f is not None}
+        if missing:
+            raise ValueError(f"template {name!r} has no field(s) {sorted(missing)}")
+        self.order = tuple(order)
+
+    def compile(self, **values) -> tuple:
+        """Segments of the text with the static fields set to `values`."""
+        segments = []
+        head = []
+        for literal, field, spec, _ in self._parsed:
+            head.append(literal)
+            if field is None:
+                continue
+            if field in self.static:
+                head.append(format(values[field], spec or ""))
+            else:
+                segments.append("".join(head))
+                head = []
+        segments.append("".join(head))
+        return tuple(segments)
+
+    def segments(self, key, static) -> tuple:
+        segs = self._compiled.get(key)
+        if segs is None:
+            segs = self.compile(**static())
+            TEMPLATE_COMPILES.inc(self.name)
+            with self._lock:
+                self._compiled[key] = segs
+                if len(self._compiled) > self.cache_size:
+                    self._compiled.popitem(last=False)
+        return segs
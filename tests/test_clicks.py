@@ -0,0 +1,81 @@
+import pytest
+
+from clicks import ClickLimiter
+
+
+class Query:
+    def __init__(self):
+        self.answers = []
+
+    def answer(self, text=None, show_alert=False, **kw):
+        self.answers.append((text, show_alert))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_repeat_gets_last_popup_until_window_passes():
+    clock = Clock()
+    clicks = ClickLimiter(window=2, clock=clock)
+    calls = []
+
+    @clicks.guard("join")
+    def join(query, context, uid, arg):
+        calls.append(arg)
+        query.answer("joined", show_alert=True)
+
+    q = Query()
+    join(q, None, "1", "P1")
+    join(q, None, "1", "P1")
+    assert calls == ["P1"]
+    assert q.answers == [("joined", True), ("joined", True)]
+
+    join(q, None, "2", "P1")  # other user
+    clock.now += 2
+    join(q, None, "1", "P1")
+    assert calls == ["P1", "P1", "P1"]
+
+
+def test_transient_popup_is_not_remembered():
+    clicks = ClickLimiter(window=2, clock=Clock())
+    calls = []
+
+    @clicks.guard("try_luck", transient=("not open yet",))
+    def try_luck(query, context, uid, arg):
+        calls.append(arg)
+        query.answer("not open yet")
+
+    try_luck(Query(), None, "1", "P1")
+    try_luck(Query(), None, "1", "P1")
+    assert len(calls) == 2
+
+
+def test_repeat_during_handler_gets_processing_popup():
+    clock = Clock()
+    clicks = ClickLimiter(window=2, clock=clock, processing="wait")
+    repeat = Query()
+    calls = []
+
+    @clicks.guard("join")
+    def join(query, context, uid, arg):
+        calls.append(query)
+        if len(calls) == 1:
+            clock.now += 5  # slower than the window
+            join(repeat, None, uid, arg)
+            raise RuntimeError("boom")
+        query.answer("joined")
+
+    with pytest.raises(RuntimeError):
+        join(Query(), None, "1", "P1")
+    assert repeat.answers == [("wait", False)]
+    assert len(calls) == 1
+
+    # the failed run no longer counts as in flight
+    q = Query()
+    join(q, None, "1", "P1")
+    assert q.answers == [("joined", False)]
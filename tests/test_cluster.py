@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# WorkerPool.start() must run before any other thread: fresh interpreter
+SCRIPT = """
+import json
+import time
+from cluster import CLUSTER_UPDATES, WorkerPool
+from metrics import counter
+
+HITS = counter("test_worker_hits_total", "", ("kind",))
+
+def setup(idx):
+    def handle(payload):
+        HITS.inc(payload["kind"])
+        if payload["kind"] == "bad":
+            raise ValueError
+    return handle
+
+pool = WorkerPool(2, setup, threads=2, stats_interval=0.1).start()
+for i in range(40):
+    assert pool.submit(i, {"kind": "bad" if i % 10 == 0 else "ok"})
+while pool.handled() < pool.submitted():
+    time.sleep(0.01)
+pool.stop()
+print(json.dumps({
+    "hits": {k[0]: v for k, v in HITS._values.items()},
+    "updates": {k[0]: v for k, v in CLUSTER_UPDATES._values.items()},
+}))
+"""
+
+
+def test_worker_counters_reach_the_parent():
+    run = subprocess.run([sys.executable, "-c", SCRIPT], cwd=HERE, capture_output=True, text=True, check=True)
+    got = json.loads(run.stdout.splitlines()[-1])
+    assert got["hits"] == {"ok": 36, "bad": 4}
+    assert got["updates"] == {"submitted": 40, "error": 4}
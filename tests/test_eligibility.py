@@ -0,0 +1,39 @@
+import random
+
+from eligibility import EligibleIndex
+
+
+def test_add_discard_contains():
+    idx = EligibleIndex(None, ["1", "2", "3"])
+    assert len(idx) == 3
+    assert not idx.add("2")
+    assert idx.discard("1")
+    assert not idx.discard("1")
+    assert not idx.discard("x")
+    assert "1" not in idx and "3" in idx and "x" not in idx
+    assert sorted(idx.sample(10)) == ["2", "3"]
+
+
+def test_matches_a_set_under_churn():
+    rnd = random.Random(7)
+    idx, ref = EligibleIndex(), set()
+    for _ in range(20000):
+        uid = rnd.randrange(3000) - 1500  # negative ids too
+        if rnd.random() < 0.6:
+            assert idx.add(uid) == (uid not in ref)
+            ref.add(uid)
+        else:
+            assert idx.discard(uid) == (uid in ref)
+            ref.discard(uid)
+    assert len(idx) == len(ref)
+    assert all(uid in idx for uid in ref)
+    assert sorted(int(u) for u in idx.sample(len(ref))) == sorted(ref)
+
+
+def test_sample_excludes():
+    idx = EligibleIndex(None, range(10))
+    for _ in range(50):
+        got = idx.sample(5, exclude=["0", "1", "2", "99"])
+        assert len(got) == 5 and len(set(got)) == 5
+        assert not {"0", "1", "2"} & set(got)
+    assert idx.sample(10, exclude=["0"]) and len(idx.sample(10, exclude=["0"])) == 9
@@ -0,0 +1,27 @@
+import csv
+import gzip
+import json
+
+from export import write_rows
+
+
+def test_csv_cells_are_not_formulas(tmp_path):
+    path = str(tmp_path / "p.csv")
+    rows = [("1", "=HYPERLINK(\"x\")", -5), ("2", "@bob", "\tname"), ("3", "plain", "+1")]
+    assert write_rows(path, ("id", "name", "n"), rows) == 3
+
+    with open(path, newline="", encoding="utf-8") as f:
+        got = list(csv.reader(f))
+    assert got == [
+        ["id", "name", "n"],
+        ["1", "'=HYPERLINK(\"x\")", "-5"],
+        ["2", "'@bob", "'\tname"],
+        ["3", "plain", "'+1"],
+    ]
+
+
+def test_jsonl_keeps_values(tmp_path):
+    path = str(tmp_path / "p.jsonl.gz")
+    write_rows(path, ("id", "name"), [("1", "=x")], fmt="jsonl", compress=True)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [{"id": "1", "name": "=x"}]
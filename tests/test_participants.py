@@ -0,0 +1,74 @@
+import random
+import threading
+
+from participants import ParticipantTable
+
+
+def table(n, seed=3):
+    rnd = random.Random(seed)
+    t, ref = ParticipantTable(), {}
+    for _ in range(n):
+        uid = str(rnd.randrange(1, 10**10))
+        info = {"username": "@u" + uid[:4], "name": ""}
+        t[uid] = info
+        ref[uid] = info
+    return t, ref
+
+
+def test_behaves_like_a_dict():
+    t, ref = table(5000)
+    assert len(t) == len(ref)
+    assert list(t) == list(ref)  # join order
+    assert all(t[uid] == info for uid, info in ref.items())
+    assert "123" not in t and "x" not in t and t.username("123", "-") == "-"
+
+    for uid in list(ref)[::3]:
+        del t[uid]
+        del ref[uid]
+    t["42"] = {"username": "@late", "name": "L"}
+    ref["42"] = {"username": "@late", "name": "L"}
+    assert dict(t.items()) == ref
+    assert t.first() == next(iter(ref))
+
+
+def test_json_round_trip():
+    t, ref = table(2000)
+    back = ParticipantTable.from_json(t.to_json())
+    assert list(back.rows()) == list(t.rows())
+    assert all(uid in back for uid in ref)
+
+
+def scan(t, q):
+    q = q.lstrip("@").lower()
+    return [i for i, (uid, uname, _) in enumerate(t.rows())
+            if uid.startswith(q) or uname.lstrip("@").lower().startswith(q)]
+
+
+def test_search_matches_a_scan():
+    t, _ = table(3000)
+    for q in ("1", "42", "@u12", "U9", "987654", "@nobody"):
+        want = scan(t, q)
+        total, rows = t.search(q, 50)
+        assert total == len(want)
+        assert len(rows) == min(50, total) and rows == sorted(rows) and set(rows) <= set(want)
+        assert t.search(q, len(t)) == (total, want)
+
+
+def test_search_sees_joins_and_renames():
+    t, _ = table(3000)
+    t.search("1", 10)
+    t["5550001"] = {"username": "@zzfresh", "name": ""}
+    assert t.search("zzfr", 10) == (1, [len(t) - 1])
+    t["5550001"] = {"username": "@other", "name": ""}
+    assert t.search("zzfr", 10) == (0, [])
+
+
+def test_prepare_search_builds_outside_the_lock():
+    t, _ = table(3000)
+    lock = threading.Lock()
+    t.prepare_search(lock)
+    idx = t._search
+    assert idx is not None and idx.built == len(t)
+    t.prepare_search(lock)
+    assert t._search is idx  # still fresh
+    assert t.search("@u1", 5000) == (len(scan(t, "u1")), scan(t, "u1"))
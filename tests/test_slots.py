@@ -0,0 +1,41 @@
+import threading
+
+from slots import SlotTable
+
+
+def test_first_claim_wins():
+    t = SlotTable()
+    assert t.claim(528, "1", "@a") == ("1", "@a", True)
+    assert t.claim(528, "2", "@b") == ("1", "@a", False)
+    assert t.claim(528, 1, "@a") == ("1", "@a", False)  # the winner again
+    assert t.get(528) == ("1", "@a") and t.get(300) is None
+
+
+def test_one_winner_under_a_burst():
+    t = SlotTable()
+    start = threading.Barrier(16)
+    wins = []
+
+    def click(uid):
+        start.wait()
+        for slot in range(200):
+            if t.claim(slot, uid, None)[2]:
+                wins.append((slot, str(uid)))
+
+    threads = [threading.Thread(target=click, args=(u,)) for u in range(16)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert sorted(s for s, _ in wins) == list(range(200))
+    assert all(t.get(s)[0] == uid for s, uid in wins)
+
+
+def test_seed_keeps_slots_decided_meanwhile():
+    t = SlotTable()
+    t.claim(300, "7", "@live")
+    t.seed({300: (9, "@saved"), 120: (8, "@old")})
+    assert t.get(300) == ("7", "@live")
+    assert t.claim(120, "5")[:2] == ("8", "@old")
+    t.reset()
+    assert len(t) == 0
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from participants import ParticipantTable
+from storage import JournalStore, SqliteStore
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_migrate_json(tmp_path):
+    jpath = str(tmp_path / "data.json")
+    js = JournalStore(jpath, threading.RLock())
+    js.load()
+    d = {
+        "auto_draw": True,
+        "permanent_block": {"7": {"username": "@bad"}},
+        "winner_log": [{"gid": "G1", "uid": "1"}],
+        "history": {"G1": {"gid": "G1", "created_ts": 1.0, "claim_expires_ts": 2.0}},
+        "giveaways": {"G2": {"active": True, "participants": ParticipantTable({"5": {"username": "@u5", "name": ""}})}},
+    }
+    js.snapshot(d)
+    js.close()
+
+    st = SqliteStore(str(tmp_path / "data.db"), threading.RLock(), json_path=jpath)
+    out = st.load()
+    assert out["auto_draw"] is True
+    assert out["permanent_block"] == {"7": {"username": "@bad"}}
+    assert out["winner_log"] == [{"gid": "G1", "uid": "1"}]
+    assert list(out["history"]) == ["G1"]
+    assert out["giveaways"]["G2"]["participants"] == {"5": {"username": "@u5", "name": ""}}
+    # no legacy single-giveaway keys on a migrated database
+    assert "participants" not in out
+
+
+def test_record_round_trip(tmp_path):
+    path = str(tmp_path / "data.db")
+    st = SqliteStore(path, threading.RLock())
+    d = st.load()
+    d["giveaways"] = {"G1": {"active": True, "participants": ParticipantTable()}}
+    st.record(d, ("giveaways", "G1"))
+    d["giveaways"]["G1"]["participants"]["9"] = {"username": "@u9", "name": "N"}
+    st.record(d, ("giveaways", "G1", "participants", "9"))
+    d["giveaways"]["G1"]["active"] = False
+    st.record(d, ("giveaways", "G1", "active"))
+    st.close()
+
+    out = SqliteStore(path, threading.RLock()).load()
+    assert out["giveaways"]["G1"]["active"] is False
+    assert out["giveaways"]["G1"]["participants"] == {"9": {"username": "@u9", "name": "N"}}
+
+
+@pytest.mark.parametrize("bot", ["main", "bot"])
+def test_sqlite_startup_does_not_resnapshot(tmp_path, bot):
+    # every start used to rewrite all tables: the loader emitted an empty
+    # legacy "participants" key that the single-giveaway migration consumed
+    script = (
+        "import storage\n"
+        "calls = []\n"
+        "orig = storage.SqliteStore.snapshot\n"
+        "storage.SqliteStore.snapshot = lambda self, d: calls.append(1) or orig(self, d)\n"
+        f"import {bot}\n"
+        "print(len(calls))\n"
+    )
+    env = dict(os.environ, BOT_TOKEN="1:x", ADMIN_ID="1", CHANNEL_ID="-100", DATA_BACKEND="sqlite",
+               DATA_FILE=str(tmp_path / "data.json"), DATA_DB=str(tmp_path / "data.db"))
+    runs = [
+        subprocess.run([sys.executable, "-c", script], cwd=HERE, env=env, capture_output=True, text=True, check=True)
+        for _ in range(2)
+    ]
+    assert [r.stdout.split()[-1] for r in runs] == ["0", "0"]
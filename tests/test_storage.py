@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from storage import JournalStore, WriteBehind
+
+
+def journal(tmp_path, **kw):
+    return JournalStore(str(tmp_path / "data.json"), threading.RLock(), **kw)
+
+
+def test_journal_replay(tmp_path):
+    s = journal(tmp_path)
+    s.load()
+    d = {"a": 1, "parts": {"1": {"username": "@x"}}, "log": []}
+    s.record(d, "a", "log", ("parts", "1"))
+    d["log"].append("first")
+    s.record(d, ("log", 0))
+    del d["parts"]["1"]
+    s.record(d, ("parts", "1"))
+    s.close()
+
+    assert journal(tmp_path).load() == {"a": 1, "parts": {}, "log": ["first"]}
+
+
+def test_journal_torn_tail(tmp_path):
+    s = journal(tmp_path)
+    s.load()
+    s.record({"a": 1, "b": 2}, "a", "b")
+    s.close()
+    with open(s.journal_path, "ab") as f:
+        f.write(b'{"s":3,"p":["c"],"v":')
+
+    s = journal(tmp_path)
+    assert s.load() == {"a": 1, "b": 2}
+    s.record({"a": 1, "b": 2, "x": 42}, "x")
+    s.close()
+
+    lines = open(s.journal_path, "rb").read().splitlines()
+    assert lines[-1].startswith(b'{"s":4,')
+    assert journal(tmp_path).load() == {"a": 1, "b": 2, "x": 42}
+
+
+def test_journal_compaction(tmp_path):
+    s = journal(tmp_path)
+    s.load()
+    d = {"n": 0}
+    for i in range(10):
+        d["n"] = i
+        s.record(d, "n")
+    s.snapshot(d)
+    d["n"] = 99
+    s.record(d, "n")
+    s.close()
+
+    r = journal(tmp_path)
+    assert r.load() == {"n": 99}
+    assert r._seq == 11
+
+
+class FlakyStore:
+    def __init__(self, inner):
+        self.inner = inner
+        self.fail = True
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def write(self, records):
+        if self.fail:
+            raise OSError("disk full")
+        return self.inner.write(records)
+
+
+def test_write_behind_keeps_failed_batch(tmp_path):
+    lock = threading.RLock()
+    flaky = FlakyStore(JournalStore(str(tmp_path / "data.json"), lock))
+    wb = WriteBehind(flaky, lock, interval=60)
+    wb.load()
+    d = {"log": []}
+    wb.record(d, "log")
+    with pytest.raises(OSError):
+        wb.flush()
+    assert wb.pending() == 1
+
+    flaky.fail = False
+    d["a"] = 1
+    wb.record(d, "a")
+    wb.flush()
+    assert wb.pending() == 0
+    wb.close()
+    assert journal(tmp_path).load() == {"log": [], "a": 1}
@@ -0,0 +1,15 @@
+import pytest
+
+from webhook import WebhookServer
+
+
+def test_public_listen_requires_secret():
+    with pytest.raises(ValueError):
+        WebhookServer(None, listen="0.0.0.0")
+    WebhookServer(None, listen="0.0.0.0", secret_token="s3cret")
+
+
+def test_loopback_without_secret():
+    WebhookServer(None)
+    WebhookServer(None, listen="::1")
+    WebhookServer(None, listen="localhost")
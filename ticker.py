@@ -0,0 +1,46 @@
+import time
+
+from metrics import counter
+
+TICKS_SKIPPED = counter("giveaway_ticks_skipped_total", "Repeating job ticks skipped because they fell behind.", ("job",))
+
+
+# =========================================================
+# DRIFT-FREE TICK DEADLINES
+# =========================================================
+class TickClock:
+    """
+    Deadlines of a self-rescheduling job whose intervals cycle through
+    `intervals` (seconds), on the monotonic clock.
+
+    next_delay() is called at the end of each tick and returns the wait
+    until the next deadline. Deadlines advance from the previous
+    deadline, not from the end of the tick, so the time a tick spends in
+    Bot API calls does not accumulate. A deadline that already passed is
+    skipped (counted in `skipped`) rather than run late back to back.
+    """
+
+    def __init__(self, intervals, idx: int = 0, name: str = "tick", clock=time.monotonic):
+        self.intervals = [float(i) for i in intervals] or [1.0]
+        self.idx = int(idx)
+        self.name = name
+        self.clock = clock
+        self.deadline = clock()
+        self.skipped = 0
+
+    def next_delay(self, limit=None) -> float:
+        """Seconds until the next deadline (at most `limit`, e.g. time left in the run)."""
+        now = self.clock()
+        while True:
+            self.deadline += self.intervals[self.idx % len(self.intervals)]
+            self.idx += 1
+            if self.deadline > now:
+                break
+            self.skipped += 1
+            TICKS_SKIPPED.inc(self.name)
+        delay = self.deadline - now
+        if limit is not None and 0 <= limit < delay:
+            # the run ends before the next deadline: tick exactly at the end
+            self.deadline = now + limit
+            delay = limit
+        return delay
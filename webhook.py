@@ -0,0 +1,192 @@
+import hmac
+import ipaddress
+import json
+import queue
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telegram import Update
+
+from metrics import WEBHOOK_UPDATES
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+MAX_BODY = 1 << 20
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog for bursts of connections
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+# =========================================================
+# WEBHOOK INGESTION
+# =========================================================
+class WebhookServer:
+    """
+    Local HTTP endpoint Telegram (or webhook_bench.py) POSTs updates to.
+
+    Each update is parsed on the HTTP thread and handed to one of `workers`
+    dispatcher threads, picked by user id so one user's updates (an admin
+    typing the setup steps, a double click) keep their order. The queues
+    are bounded: when full the request gets 503 + Retry-After and Telegram
+    redelivers it later instead of the bot buffering without limit.
+
+    Anyone who can reach the port can post an update claiming to come
+    from the admin, so listening beyond loopback requires `secret_token`
+    (checked against the header Telegram sends).
+    """
+
+    def __init__(self, dispatcher, listen: str = "127.0.0.1", port: int = 8443, path: str = "/telegram",
+                 secret_token: str = "", workers: int = 8, queue_size: int = 1000):
+        if not secret_token and not is_loopback(listen):
+            raise ValueError(f"webhook on {listen!r} needs a secret token (WEBHOOK_SECRET), or listen on 127.0.0.1")
+        self.dispatcher = dispatcher
+        self.listen = listen
+        self.port = int(port)
+        self.path = "/" + (path or "").strip("/")
+        self.secret_token = secret_token or ""
+        self.workers = max(1, int(workers))
+        per_worker = max(1, int(queue_size) // self.workers)
+        self._queues = [queue.Queue(maxsize=per_worker) for _ in range(self.workers)]
+
+        self._httpd = None
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self.stats = {"received": 0, "rejected": 0, "processed": 0, "errors": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+        WEBHOOK_UPDATES.inc(key)
+
+    def pending(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def submit(self, payload: dict) -> bool:
+        """Queue one update (Telegram JSON). False when the queue is full."""
+        update = Update.de_json(payload, self.dispatcher.bot)
+        if update is None:
+            return True
+        user = update.effective_user
+        key = user.id if user else (update.effective_chat.id if update.effective_chat else 0)
+        try:
+            self._queues[key % self.workers].put_nowait(update)
+        except queue.Full:
+            self._count("rejected")
+            return False
+        self._count("received")
+        return True
+
+    def _work(self, q: queue.Queue):
+        while True:
+            update = q.get()
+            if update is None:
+                return
+            try:
+                self.dispatcher.process_update(update)
+                self._count("processed")
+            except Exception:
+                self._count("errors")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, code: int, headers=None):
+                self.send_response(code)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                if self.path.split("?", 1)[0] != server.path:
+                    self._reply(404)
+                    return
+                if server.secret_token and not hmac.compare_digest(
+                        self.headers.get(SECRET_HEADER, ""), server.secret_token):
+                    self._reply(403)
+                    return
+
+                length = int(self.headers.get("Content-Length") or 0)
+                if length <= 0 or length > MAX_BODY:
+                    self._reply(400)
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(length))
+                    ok = server.submit(payload)
+                except Exception:
+                    self._reply(400)
+                    return
+                if ok:
+                    self._reply(200)
+                else:
+                    self._reply(503, {"Retry-After": "1"})
+
+            def log_message(self, fmt, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        for q in self._queues:
+            t = threading.Thread(target=self._work, args=(q,), name="webhook-worker", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+        self._httpd = _HTTPServer((self.listen, self.port), self._handler())
+        self.port = self._httpd.server_address[1]  # port 0 -> the one picked
+        t = threading.Thread(target=self._httpd.serve_forever, name="webhook-http", daemon=True)
+        t.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        # let the workers drain what was already accepted
+        for q in self._queues:
+            q.put(None)
+        for t in self._threads:
+            t.join(timeout=10)
+        self._threads = []
+
+
+def run_webhook(updater, server: WebhookServer, webhook_url: str = "", max_connections: int = 40):
+    """
+    Webhook counterpart of updater.start_polling() + updater.idle().
+    Without `webhook_url` nothing is registered with Telegram (a reverse
+    proxy/tunnel already points at us, or updates come from webhook_bench.py).
+    """
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    updater.job_queue.start()
+    server.start()
+    if webhook_url:
+        updater.bot.set_webhook(
+            url=webhook_url,
+            secret_token=server.secret_token or None,
+            max_connections=max_connections,
+        )
+    print(f"Webhook listening on {server.listen}:{server.port}{server.path} ({server.workers} workers)")
+
+    while not stop.wait(1):
+        pass
+
+    server.stop()
+    updater.job_queue.stop()
@@ -0,0 +1,189 @@
+"""
+Offline load test for webhook mode: POSTs synthetic Telegram Update JSON.
+
+  # against a bot started with UPDATE_MODE=webhook
+  python webhook_bench.py --url http://127.0.0.1:8443/telegram --gid P123-P456-B7890
+
+  # self-contained: in-process WebhookServer, handlers simulated with a sleep;
+  # --workers 1 is the polling dispatcher's one-update-at-a-time baseline
+  python webhook_bench.py --local --workers 1,4,8 --handler-ms 20
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from webhook import SECRET_HEADER, WebhookServer
+
+
+# =========================================================
+# SYNTHETIC UPDATES
+# =========================================================
+def user_json(uid: int) -> dict:
+    return {"id": uid, "is_bot": False, "first_name": f"U{uid}", "username": f"user{uid}"}
+
+
+def callback_update(n: int, uid: int, data: str, chat_id: int = -100, message_id: int = 1) -> dict:
+    return {
+        "update_id": n,
+        "callback_query": {
+            "id": str(n),
+            "from": user_json(uid),
+            "chat_instance": "1",
+            "data": data,
+            "message": {"message_id": message_id, "date": int(time.time()), "chat": {"id": chat_id, "type": "channel"}},
+        },
+    }
+
+
+def message_update(n: int, uid: int, text: str) -> dict:
+    return {
+        "update_id": n,
+        "message": {
+            "message_id": n,
+            "date": int(time.time()),
+            "chat": {"id": uid, "type": "private"},
+            "from": user_json(uid),
+            "text": text,
+        },
+    }
+
+
+def make_update(n: int, kind: str, users: int, button: str, gid: str) -> dict:
+    uid = 1000 + (n % max(1, users))
+    if kind == "start" or (kind == "mixed" and n % 10 == 0):
+        return message_update(n, uid, "/start")
+    return callback_update(n, uid, button.format(gid=gid))
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+# =========================================================
+# CLIENT
+# =========================================================
+def post_all(url: str, secret: str, bodies: list, concurrency: int) -> dict:
+    u = urlparse(url)
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers[SECRET_HEADER] = secret
+
+    lock = threading.Lock()
+    codes = {}
+    latencies = []
+    nxt = [0]
+
+    def worker():
+        conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=30)
+        while True:
+            with lock:
+                i = nxt[0]
+                nxt[0] += 1
+            if i >= len(bodies):
+                break
+            t0 = time.perf_counter()
+            try:
+                conn.request("POST", u.path or "/", body=bodies[i], headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                code = resp.status
+            except Exception:
+                conn.close()
+                conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=30)
+                code = "error"
+            dt = time.perf_counter() - t0
+            with lock:
+                codes[code] = codes.get(code, 0) + 1
+                latencies.append(dt)
+        conn.close()
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    return {"codes": codes, "latencies": latencies, "elapsed": elapsed}
+
+
+def report(title: str, res: dict, processed_elapsed=None):
+    n = len(res["latencies"])
+    lat = res["latencies"]
+    print(title)
+    print(f"  sent: {n}  status: {dict(sorted(res['codes'].items(), key=str))}")
+    print(f"  POST rate: {n / res['elapsed']:.0f}/s  latency p50 {percentile(lat, 50) * 1000:.2f} ms"
+          f"  p99 {percentile(lat, 99) * 1000:.2f} ms")
+    if processed_elapsed is not None:
+        ok = res["codes"].get(200, 0)
+        print(f"  handled: {ok} in {processed_elapsed:.2f}s -> {ok / processed_elapsed:.0f} updates/s")
+
+# =========================================================
+# LOCAL MODE (no bot, no Telegram)
+# =========================================================
+class SimDispatcher:
+    """Stands in for the PTB dispatcher: sleeps like a handler waiting on the API."""
+
+    def __init__(self, bot, handler_ms: float):
+        self.bot = bot
+        self.delay = handler_ms / 1000.0
+
+    def process_update(self, update):
+        time.sleep(self.delay)
+
+
+def run_local(args, bodies: list):
+    from telegram import Bot
+    bot = Bot("123456:offline-benchmark")  # never used for requests
+
+    for workers in [int(w) for w in str(args.workers).split(",") if w.strip()]:
+        server = WebhookServer(
+            SimDispatcher(bot, args.handler_ms), listen="127.0.0.1", port=0,
+            path="/telegram", secret_token=args.secret, workers=workers, queue_size=args.queue_size,
+        ).start()
+        try:
+            url = f"http://127.0.0.1:{server.port}/telegram"
+            t0 = time.perf_counter()
+            res = post_all(url, args.secret, bodies, args.concurrency)
+            while server.pending() or server.stats["processed"] < server.stats["received"]:
+                time.sleep(0.005)
+            done = time.perf_counter() - t0
+        finally:
+            server.stop()
+        report(f"workers={workers} queue={args.queue_size} handler={args.handler_ms}ms", res, done)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://127.0.0.1:8443/telegram")
+    ap.add_argument("--secret", default="")
+    ap.add_argument("--updates", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--users", type=int, default=5000)
+    ap.add_argument("--kind", choices=("join", "start", "mixed"), default="join")
+    ap.add_argument("--gid", default="", help="giveaway id for join buttons")
+    ap.add_argument("--button", default="join_giveaway|{gid}",
+                    help='join callback_data: "join_giveaway|{gid}" for main.py, "join:{gid}" for bot.py')
+    ap.add_argument("--local", action="store_true", help="benchmark an in-process server")
+    ap.add_argument("--workers", default="1,4,8")
+    ap.add_argument("--queue-size", type=int, default=100000)
+    ap.add_argument("--handler-ms", type=float, default=20.0)
+    args = ap.parse_args()
+
+    bodies = [json.dumps(make_update(n, args.kind, args.users, args.button, args.gid)).encode()
+              for n in range(1, args.updates + 1)]
+
+    if args.local:
+        run_local(args, bodies)
+    else:
+        report(args.url, post_all(args.url, args.secret, bodies, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()